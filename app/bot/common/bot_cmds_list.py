@@ -18,4 +18,6 @@ admin = [
     BotCommand(command='employees', description='👥 Управление сотрудниками'),
     BotCommand(command='add_employee', description='➕ Добавить сотрудника'),
     BotCommand(command='settings', description='⚙️ Настройки'),
+    BotCommand(command='profile', description='🔬 Профилирование'),
+    BotCommand(command='queries', description='🐢 Медленные SQL запросы'),
 ]
\ No newline at end of file
@@ -1,7 +1,11 @@
 import os
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 
+from app.core.config import REPLICA_CHECK_INTERVAL, REPLICA_MAX_LAG_SECONDS
+from app.core.database import create_db_engine
+from app.core.replica import ReplicaRouter
+
 # Bot uchun alohida Base yaratamiz
 Base = declarative_base()
 
@@ -9,10 +13,23 @@ Base = declarative_base()
 # Используем DATABASE_URL из .env основного приложения
 DATABASE_URL = os.getenv('DATABASE_URL') or os.getenv('DB_URL') or "sqlite+aiosqlite:///./workly.db"
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+# Общая фабрика движка: пул, PRAGMA для SQLite и метрика ожидания соединения (pool="bot")
+engine = create_db_engine(DATABASE_URL, name="bot")
 
 session_maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
+# Реплика только для чтения (отчеты и статистика), если задан DATABASE_REPLICA_URL
+DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
+replica_engine = create_db_engine(DATABASE_REPLICA_URL, name="bot_replica") if DATABASE_REPLICA_URL else None
+replica_session_maker = async_sessionmaker(
+    bind=replica_engine, class_=AsyncSession, expire_on_commit=False
+) if replica_engine is not None else None
+
+read_router = ReplicaRouter(
+    session_maker, replica_session_maker,
+    max_lag_seconds=REPLICA_MAX_LAG_SECONDS, check_interval=REPLICA_CHECK_INTERVAL, name="bot"
+)
+
 
 async def test_connection():
     """Тестирование подключения к БД"""
@@ -1,10 +1,11 @@
 import math
 from sqlalchemy import select, update, delete, func, and_, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
 import sys
 import os
-from datetime import datetime, date, time
+from datetime import datetime, date, time, timedelta
+from typing import NamedTuple
 
 # Bot modellarini import qilish
 from database.models import User  # Bot uchun User modeli
@@ -34,6 +35,82 @@ except ImportError:
         FACE_ID = "FACE_ID"
         MANUAL = "MANUAL"
 
+# Rollup hisoblagichlari (app servisi mavjud bo'lsa)
+try:
+    from app.services.rollups import apply_attendance_rows
+except ImportError:
+    apply_attendance_rows = None
+
+# Кэш ежедневного отчета (сбрасывается при новых отметках и изменении сотрудников)
+DAILY_REPORT_CACHE_TTL = int(os.getenv("BOT_DAILY_REPORT_CACHE_TTL", "30"))
+try:
+    from app.utils.cache import TTLCache
+    daily_report_cache = TTLCache(ttl=DAILY_REPORT_CACHE_TTL, maxsize=8)
+except ImportError:
+    daily_report_cache = None
+
+
+# Каталог сотрудников (кэш поиска по id/uuid/telegram_id)
+try:
+    from app.services.employee_directory import employee_directory
+except ImportError:
+    employee_directory = None
+
+# Шина сброса кэшей между процессами (API и бот)
+try:
+    from app.core.invalidation import ATTENDANCE, EMPLOYEE, invalidation_bus
+except ImportError:
+    invalidation_bus = None
+
+# Архив закрытых месяцев: отчеты за прошлые периоды читают attendance + attendance_archive
+try:
+    from app.models.attendance_archive import AttendanceArchive
+    from app.services.attendance_storage import attendance_source
+except ImportError:
+    AttendanceArchive = None
+    attendance_source = None
+
+
+async def _attendance_for(session: AsyncSession, start_date: date, end_date: date):
+    """Источник отметок за период (с архивом, если период его затрагивает)"""
+    if attendance_source is None:
+        return Attendance
+    return await attendance_source(session, start_date, end_date)
+
+
+def invalidate_daily_report(day: date = None):
+    """Сбросить кэш ежедневного отчета за день (None - за все дни)"""
+    if daily_report_cache is not None:
+        daily_report_cache.invalidate(day)
+
+
+def notify_attendance_changed(employee_id: int, day: date):
+    """Сообщить всем процессам о новой отметке (отчеты, кэш отметок API)"""
+    if invalidation_bus is not None:
+        invalidation_bus.publish(ATTENDANCE, ids=[employee_id], day=day)
+    else:
+        invalidate_daily_report(day)
+
+
+def notify_employee_changed(employee_id: int):
+    """Сообщить всем процессам об изменении сотрудника (каталог сотрудников, отчеты)"""
+    if invalidation_bus is not None:
+        invalidation_bus.publish(EMPLOYEE, ids=[employee_id])
+    else:
+        invalidate_daily_report()
+
+
+if invalidation_bus is not None:
+    invalidation_bus.subscribe(ATTENDANCE, lambda event: invalidate_daily_report(event.day))
+    invalidation_bus.subscribe(EMPLOYEE, lambda event: invalidate_daily_report())
+
+
+class ReportEmployee(NamedTuple):
+    """Сотрудник в ежедневном отчете (только нужные поля)"""
+    id: int
+    full_name: str
+    position: str | None
+
 async def orm_add_user(
     session: AsyncSession,
     user_id: int,
@@ -59,6 +136,8 @@ async def orm_get_all_employees(session: AsyncSession):
 
 async def orm_get_employee_by_telegram_id(session: AsyncSession, telegram_id: int):
     """Найти сотрудника по telegram_id"""
+    if employee_directory is not None:
+        return await employee_directory.get_by_telegram_id(session, telegram_id)
     query = select(Employee).where(Employee.telegram_id == telegram_id)
     result = await session.execute(query)
     return result.scalar_one_or_none()
@@ -75,6 +154,7 @@ async def orm_link_employee_telegram(session: AsyncSession, employee_id: int, te
     query = update(Employee).where(Employee.id == employee_id).values(telegram_id=telegram_id)
     await session.execute(query)
     await session.commit()
+    notify_employee_changed(employee_id)
     return True, "Успешно привязано"
 
 
@@ -85,7 +165,12 @@ async def orm_create_attendance(
     location_lat: str = None,
     location_lon: str = None
 ):
-    """Создать запись посещаемости через Telegram"""
+    """
+    Создать запись посещаемости через Telegram
+
+    Возвращает None, если сотрудник уже отметился сегодня этим типом
+    (уникальный индекс attendance: сотрудник, тип, день - запись мог сделать API).
+    """
     attendance = Attendance(
         employee_id=employee_id,
         check_type=check_type,
@@ -95,66 +180,116 @@ async def orm_create_attendance(
         location_lon=location_lon
     )
     session.add(attendance)
-    await session.commit()
+    try:
+        if apply_attendance_rows is not None:
+            # Счетчики rollup обновляются в той же транзакции
+            await apply_attendance_rows(session, [{
+                "employee_id": employee_id,
+                "check_type": check_type,
+                "check_time": attendance.check_time,
+                "is_late": False,
+            }])
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        return None
+    notify_attendance_changed(employee_id, attendance.check_time.date())
     await session.refresh(attendance)
     return attendance
 
 
 async def orm_get_daily_attendance_report(session: AsyncSession, report_date: date = None):
-    """Получить ежедневный отчет по посещаемости"""
+    """Получить ежедневный отчет по посещаемости (кэшируется на DAILY_REPORT_CACHE_TTL секунд)"""
     if report_date is None:
         report_date = get_tashkent_date()  # Используем Ташкентскую дату
     
-    # Получаем всех активных сотрудников
-    employees_query = select(Employee).where(Employee.is_active == True)
-    employees_result = await session.execute(employees_query)
-    all_employees = employees_result.scalars().all()
+    if daily_report_cache is None:
+        return await _build_daily_attendance_report(session, report_date)
+    return await daily_report_cache.get_or_set(
+        report_date, lambda: _build_daily_attendance_report(session, report_date)
+    )
+
+
+async def _build_daily_attendance_report(session: AsyncSession, report_date: date):
+    """Один запрос: активные сотрудники LEFT JOIN первая отметка IN за день"""
+    start_datetime = datetime.combine(report_date, time.min)
+    end_datetime = start_datetime + timedelta(days=1)
+    
+    # Первая отметка прихода каждого сотрудника за день
+    source = await _attendance_for(session, report_date, report_date)
+    ranked = _first_in_ranked(source, start_datetime, end_datetime)
     
-    # Получаем записи посещаемости за день
-    start_datetime = datetime.combine(report_date, time.min).replace(tzinfo=TASHKENT_TZ)
-    end_datetime = datetime.combine(report_date, time.max).replace(tzinfo=TASHKENT_TZ)
+    query = select(
+        Employee.id, Employee.full_name, Employee.position, ranked.c.check_time, ranked.c.source
+    ).outerjoin(
+        ranked, and_(ranked.c.employee_id == Employee.id, ranked.c.rn == 1)
+    ).where(Employee.is_active == True).order_by(Employee.full_name)
+    
+    result = await session.execute(query)
     
-    attendance_query = select(Attendance).where(
+    employees = []
+    first_ins = {}
+    for employee_id, full_name, position, check_time, source in result.all():
+        employees.append(ReportEmployee(employee_id, full_name, position))
+        if check_time is not None:
+            first_ins[employee_id] = (check_time, source)
+    
+    return _assemble_daily_report(report_date, employees, first_ins)
+
+
+def _first_in_ranked(Attendance, start_datetime: datetime, end_datetime: datetime, *partition_by):
+    """Отметки IN за период с номером по порядку в каждой группе (rn = 1 - первая)"""
+    return select(
+        Attendance.employee_id,
+        Attendance.check_time,
+        Attendance.source,
+        func.row_number().over(
+            partition_by=(Attendance.employee_id, *partition_by),
+            order_by=(Attendance.check_time, Attendance.id)
+        ).label("rn")
+    ).where(
         and_(
             Attendance.check_time >= start_datetime,
-            Attendance.check_time <= end_datetime,
+            Attendance.check_time < end_datetime,
             Attendance.check_type == CheckTypeEnum.IN
         )
-    ).options(joinedload(Attendance.employee))
-    
-    attendance_result = await session.execute(attendance_query)
-    attendance_records = attendance_result.scalars().all()
+    ).subquery()
+
+
+def _assemble_daily_report(report_date: date, employees: list, first_ins: dict):
+    """
+    Разбор дня по множествам: пришли (первая отметка IN), опоздали, вовремя, отсутствуют
     
+    employees - активные сотрудники, first_ins - {employee_id: (check_time, source)}
+    """
     # Определяем время начала работы (например, 9:00)
     work_start_time = time(9, 0)
     
-    # Анализируем данные
     attended_employees = []
-    late_employees = []
+    absent_employees = []
+    for employee in employees:
+        first_in = first_ins.get(employee.id)
+        if first_in is None:
+            absent_employees.append(employee)
+        else:
+            attended_employees.append({
+                'employee': employee,
+                'check_time': first_in[0],
+                'source': first_in[1]
+            })
+    attended_employees.sort(key=lambda info: info['check_time'])
     
-    for record in attendance_records:
-        employee_info = {
-            'employee': record.employee,
-            'check_time': record.check_time,
-            'source': record.source
-        }
-        
-        attended_employees.append(employee_info)
-        
-        # Проверяем опоздание
-        if record.check_time.time() > work_start_time:
+    late_employees = []
+    on_time_employees = []
+    for employee_info in attended_employees:
+        if employee_info['check_time'].time() > work_start_time:
             late_employees.append(employee_info)
-    
-    # Определяем отсутствующих
-    attended_employee_ids = {record.employee_id for record in attendance_records}
-    absent_employees = [emp for emp in all_employees if emp.id not in attended_employee_ids]
-    
-    # Сотрудники, пришедшие вовремя
-    on_time_employees = [emp for emp in attended_employees if emp not in late_employees]
+        else:
+            on_time_employees.append(employee_info)
     
     return {
         'date': report_date,
-        'total_employees': len(all_employees),
+        'total_employees': len(employees),
         'attended_count': len(attended_employees),
         'absent_count': len(absent_employees),
         'late_count': len(late_employees),
@@ -166,6 +301,54 @@ async def orm_get_daily_attendance_report(session: AsyncSession, report_date: da
     }
 
 
+async def orm_get_attendance_range_report(session: AsyncSession, start_date: date, end_date: date,
+                                          report_dates: list = None):
+    """
+    Ежедневные отчеты за период - два запроса независимо от длины периода
+    
+    Список сотрудников загружается один раз, первые отметки IN за весь период -
+    одним запросом, затем группируются по датам.
+    
+    Args:
+        report_dates: Даты для отчета (например, только рабочие дни); по умолчанию все дни периода
+    
+    Returns:
+        Список отчетов в формате orm_get_daily_attendance_report, по возрастанию даты
+    """
+    if report_dates is None:
+        report_dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    
+    employees_result = await session.execute(
+        select(Employee.id, Employee.full_name, Employee.position)
+        .where(Employee.is_active == True)
+        .order_by(Employee.full_name)
+    )
+    employees = [ReportEmployee(*row) for row in employees_result.all()]
+    active_ids = {employee.id for employee in employees}
+    
+    source = await _attendance_for(session, start_date, end_date)
+    day = func.date(source.check_time)
+    ranked = _first_in_ranked(
+        source,
+        datetime.combine(start_date, time.min),
+        datetime.combine(end_date + timedelta(days=1), time.min),
+        day
+    )
+    result = await session.execute(
+        select(ranked.c.employee_id, ranked.c.check_time, ranked.c.source).where(ranked.c.rn == 1)
+    )
+    
+    first_ins_by_day = {}
+    for employee_id, check_time, source in result.all():
+        if employee_id in active_ids:
+            first_ins_by_day.setdefault(check_time.date(), {})[employee_id] = (check_time, source)
+    
+    return [
+        _assemble_daily_report(report_date, employees, first_ins_by_day.get(report_date, {}))
+        for report_date in sorted(report_dates)
+    ]
+
+
 async def orm_get_employee_last_status(session: AsyncSession, employee_id: int):
     """Получить последний статус сотрудника (пришел или ушел)"""
     query = select(Attendance).where(
@@ -244,6 +427,8 @@ async def orm_get_all_employees(session: AsyncSession):
 
 async def orm_get_employee_by_id(session: AsyncSession, employee_id: int):
     """Xodimni ID bo'yicha olish"""
+    if employee_directory is not None:
+        return await employee_directory.get_by_id(session, employee_id)
     query = select(Employee).where(Employee.id == employee_id)
     result = await session.execute(query)
     return result.scalar_one_or_none()
@@ -272,6 +457,7 @@ async def orm_add_employee(
     
     session.add(new_employee)
     await session.commit()
+    notify_employee_changed(new_employee.id)
     await session.refresh(new_employee)
     return new_employee
 
@@ -296,6 +482,7 @@ async def orm_update_employee(session: AsyncSession, employee_id: int, update_da
     query = update(Employee).where(Employee.id == employee_id).values(**processed_data)
     await session.execute(query)
     await session.commit()
+    notify_employee_changed(employee_id)
     
     # Yangilangan xodimni qaytarish
     return await orm_get_employee_by_id(session, employee_id)
@@ -310,6 +497,7 @@ async def orm_toggle_employee_status(session: AsyncSession, employee_id: int):
     query = update(Employee).where(Employee.id == employee_id).values(is_active=new_status)
     await session.execute(query)
     await session.commit()
+    notify_employee_changed(employee_id)
     
     # Yangilangan holatni qaytarish
     return await orm_get_employee_by_id(session, employee_id)
@@ -323,12 +511,15 @@ async def orm_delete_employee(session: AsyncSession, employee_id: int):
     # Avval bog'liq attendance recordlarni o'chirish
     delete_attendances = delete(Attendance).where(Attendance.employee_id == employee_id)
     await session.execute(delete_attendances)
+    if AttendanceArchive is not None:
+        await session.execute(delete(AttendanceArchive).where(AttendanceArchive.employee_id == employee_id))
     
     # Keyin xodimni o'chirish
     delete_employee = delete(Employee).where(Employee.id == employee_id)
     await session.execute(delete_employee)
     
     await session.commit()
+    notify_employee_changed(employee_id)
     return employee
 
 
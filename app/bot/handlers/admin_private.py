@@ -2,15 +2,22 @@ from aiogram import F, Router, types
 from aiogram.filters import Command, StateFilter, or_f
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import Message, CallbackQuery, FSInputFile
+from aiogram.types import Message, CallbackQuery, BufferedInputFile, FSInputFile
 from datetime import date, datetime, timedelta
+import asyncio
+import html
+import json
+import logging
 import os
 import calendar
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.bot.filters.chat_types import ChatTypeFilter, IsAdmin
-from database.orm_query import orm_get_daily_attendance_report
+from app.core.profiler import profiler
+from app.core.query_stats import ORDER_FIELDS, query_stats
+from app.services.work_calendar import get_work_calendar
+from database.orm_query import orm_get_attendance_range_report, orm_get_daily_attendance_report
 from kbds.inline import get_admin_reports_keyboard, get_month_selection_keyboard
 
 import sys
@@ -19,23 +26,50 @@ import os
 # Добавляем путь к utils
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 try:
-    from utils.reports import format_daily_report, format_summary_stats
+    from utils.reports import format_daily_report, format_range_stats, format_summary_stats
 except ImportError:
     def format_daily_report(data):
         return "Отчет недоступен"
     def format_summary_stats(data):
         return "Статистика недоступна"
+    def format_range_stats(title, reports):
+        return "Статистика недоступна"
 
 # Добавляем путь к app для импорта сервисов отчетов
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 try:
     from app.services.reports import generate_detailed_monthly_report, generate_monthly_report
+    from app.services.report_cache import report_cache
+    from app.services.report_jobs import JOB_DONE, get_report_jobs
+    from app.services.rollups import query_rollups
 except ImportError:
+    report_cache = None
+    query_rollups = None
+    JOB_DONE = "done"
+    def get_report_jobs():
+        return None
     async def generate_detailed_monthly_report(session, year, month):
         return None
     async def generate_monthly_report(session, year, month):
         return None
 
+
+# Ссылки на фоновые задачи доставки отчетов - иначе сборщик мусора может их прервать
+_delivery_tasks: set[asyncio.Task] = set()
+
+
+async def get_cached_monthly_report(session, report_type, year, month, generate):
+    """Отдает отчет из общего кэша отчетов; генерирует только если данные изменились"""
+    if report_cache is None:
+        return await generate(session, year, month)
+    
+    start_date = date(year, month, 1)
+    end_date = date(year, month, calendar.monthrange(year, month)[1])
+    entry = await report_cache.lookup(session, report_type, start_date, end_date)
+    return await report_cache.ensure(entry, lambda: generate(session, year, month))
+
+logger = logging.getLogger(__name__)
+
 admin_router = Router()
 admin_router.message.filter(ChatTypeFilter(["private"]), IsAdmin())
 
@@ -49,10 +83,14 @@ async def admin_features(message: types.Message):
         "📊 /report - Отчет за сегодня\n"
         "📅 /report_date YYYY-MM-DD - Отчет за конкретную дату\n"
         "📈 /week_stats - Статистика за неделю\n"
+        "🗓 /range_stats YYYY-MM-DD YYYY-MM-DD - Статистика за период\n"
+        "🏢 /position_stats [недель] - Посещаемость по должностям\n"
         "📋 /reports - Excel отчеты\n"
         "👥 /employees - Управление сотрудниками\n"
         "➕ /add_employee - Добавить сотрудника\n"
-        "⚙️ /settings - Настройки бота",
+        "⚙️ /settings - Настройки бота\n"
+        "🔬 /profile - Профилирование обработчиков\n"
+        "🐢 /queries [N] [total_ms|count|p95_ms] - Самые дорогие SQL запросы",
         parse_mode="HTML"
     )
 
@@ -69,7 +107,7 @@ async def daily_report_today(message: types.Message, session: AsyncSession):
 
 
 @admin_router.message(Command("report_date"))
-async def daily_report_date(message: types.Message, session: AsyncSession):
+async def daily_report_date(message: types.Message, read_session_for):
     """Отчет за конкретную дату"""
     try:
         # Извлекаем дату из команды
@@ -85,7 +123,9 @@ async def daily_report_date(message: types.Message, session: AsyncSession):
         date_str = command_parts[1]
         report_date = datetime.strptime(date_str, "%Y-%m-%d").date()
         
-        report_data = await orm_get_daily_attendance_report(session, report_date)
+        # Сегодняшний день - с реплики только при малом отставании, иначе с основной БД
+        async with read_session_for(report_date) as read_session:
+            report_data = await orm_get_daily_attendance_report(read_session, report_date)
         report_text = format_daily_report(report_data)
         await message.answer(report_text)
         
@@ -99,21 +139,35 @@ async def daily_report_date(message: types.Message, session: AsyncSession):
         await message.answer(f"❌ Ошибка при генерации отчета: {str(e)}")
 
 
+MAX_RANGE_DAYS = 93  # До квартала
+MESSAGE_LIMIT = 4000  # Лимит Telegram - 4096 символов
+
+
+async def answer_long(message: types.Message, text: str, **kwargs):
+    """Отправляет длинный текст несколькими сообщениями (по строкам)"""
+    chunk = ""
+    for line in text.split("\n"):
+        if chunk and len(chunk) + len(line) + 1 > MESSAGE_LIMIT:
+            await message.answer(chunk, **kwargs)
+            chunk = ""
+        chunk = f"{chunk}\n{line}" if chunk else line
+    if chunk:
+        await message.answer(chunk, **kwargs)
+
+
 @admin_router.message(Command("week_stats"))
-async def week_statistics(message: types.Message, session: AsyncSession):
+async def week_statistics(message: types.Message, read_session_for):
     """Статистика за неделю"""
     try:
         today = date.today()
-        week_stats = []
+        start_date = today - timedelta(days=6)
         
-        for i in range(7):
-            report_date = today - timedelta(days=i)
-            # Пропускаем выходные (суббота=5, воскресенье=6)
-            if report_date.weekday() < 5:  # Понедельник-Пятница
-                report_data = await orm_get_daily_attendance_report(session, report_date)
-                stats_line = format_summary_stats(report_data)
-                week_stats.append(stats_line)
+        # Рабочие дни за последние 7 дней по общему календарю (выходные и праздники пропускаются)
+        work_days = get_work_calendar().working_dates(start_date, today)
+        async with read_session_for(today) as read_session:
+            reports = await orm_get_attendance_range_report(read_session, start_date, today, work_days)
         
+        week_stats = [format_summary_stats(report_data) for report_data in reversed(reports)]
         message_text = "📈 СТАТИСТИКА ЗА НЕДЕЛЮ\n\n" + "\n".join(week_stats)
         await message.answer(message_text)
         
@@ -121,6 +175,86 @@ async def week_statistics(message: types.Message, session: AsyncSession):
         await message.answer(f"❌ Ошибка при генерации статистики: {str(e)}")
 
 
+@admin_router.message(Command("range_stats"))
+async def range_statistics(message: types.Message, read_session_for):
+    """Статистика за произвольный период (рабочие дни)"""
+    command_parts = message.text.split()
+    try:
+        if len(command_parts) != 3:
+            raise ValueError
+        start_date = datetime.strptime(command_parts[1], "%Y-%m-%d").date()
+        end_date = datetime.strptime(command_parts[2], "%Y-%m-%d").date()
+        if end_date < start_date:
+            raise ValueError
+    except ValueError:
+        await message.answer(
+            "❌ Неверный формат команды!\n"
+            "Используйте: /range_stats YYYY-MM-DD YYYY-MM-DD\n"
+            "Например: /range_stats 2025-07-01 2025-09-30"
+        )
+        return
+    
+    if (end_date - start_date).days + 1 > MAX_RANGE_DAYS:
+        await message.answer(f"❌ Период не должен превышать {MAX_RANGE_DAYS} дней")
+        return
+    
+    try:
+        work_days = get_work_calendar().working_dates(start_date, end_date)
+        if not work_days:
+            await message.answer("📭 В этом периоде нет рабочих дней")
+            return
+        
+        async with read_session_for(end_date) as read_session:
+            reports = await orm_get_attendance_range_report(read_session, start_date, end_date, work_days)
+        title = f"📈 СТАТИСТИКА ЗА ПЕРИОД {start_date.strftime('%d.%m.%Y')} - {end_date.strftime('%d.%m.%Y')}"
+        await answer_long(message, format_range_stats(title, reports))
+        
+    except Exception as e:
+        await message.answer(f"❌ Ошибка при генерации статистики: {str(e)}")
+
+
+@admin_router.message(Command("position_stats"))
+async def position_statistics(message: types.Message, read_session_for):
+    """Посещаемость по должностям за последние N недель (из rollup-таблицы)"""
+    if query_rollups is None:
+        await message.answer("❌ Статистика по должностям недоступна")
+        return
+    
+    parts = message.text.split()
+    try:
+        weeks = int(parts[1]) if len(parts) > 1 else 4
+        if not 1 <= weeks <= 104:
+            raise ValueError
+    except ValueError:
+        await message.answer("❌ Укажите количество недель от 1 до 104\nПример: /position_stats 8")
+        return
+    
+    try:
+        today = date.today()
+        start_date = today - timedelta(days=today.weekday()) - timedelta(weeks=weeks - 1)
+        async with read_session_for(today) as read_session:
+            summary = await query_rollups(read_session, start_date, today, group_by="position")
+        
+        if not summary["rows"]:
+            await message.answer("📭 Нет данных о посещаемости за этот период")
+            return
+        
+        lines = [
+            "🏢 <b>ПОСЕЩАЕМОСТЬ ПО ДОЛЖНОСТЯМ</b>",
+            f"📅 {start_date.strftime('%d.%m.%Y')} - {today.strftime('%d.%m.%Y')} ({weeks} нед.)\n"
+        ]
+        for row in sorted(summary["rows"], key=lambda item: item["attendance_rate"], reverse=True):
+            lines.append(
+                f"👔 <b>{row['position'] or 'Без должности'}</b> ({row['employees']} чел.)\n"
+                f"   ✅ Посещаемость: {row['attendance_rate']}%\n"
+                f"   ⏰ Пунктуальность: {row['punctuality_rate']}% (опозданий: {row['late_days']})"
+            )
+        await message.answer("\n".join(lines), parse_mode="HTML")
+        
+    except Exception as e:
+        await message.answer(f"❌ Ошибка при генерации статистики: {str(e)}")
+
+
 # ============== EXCEL ОТЧЕТЫ ==============
 
 @admin_router.message(Command("reports"))
@@ -152,83 +286,126 @@ async def admin_reports_menu(callback: CallbackQuery):
         parse_mode="HTML"
     )
 
+MONTH_NAMES_RU = [
+    "", "Январь", "Февраль", "Март", "Апрель", "Май", "Июнь",
+    "Июль", "Август", "Сентябрь", "Октябрь", "Ноябрь", "Декабрь"
+]
+
+REPORT_ERROR_TEXT = (
+    "❌ <b>Ошибка создания отчета</b>\n\n"
+    "Возможные причины:\n"
+    "• Нет данных за указанный период\n"
+    "• Ошибка доступа к базе данных\n"
+    "• Проблема с созданием файла\n\n"
+    "Попробуйте выбрать другой период."
+)
+
+
+def describe_report(report_type, year, month):
+    """Название и описание отчета для подписи"""
+    month_name_ru = MONTH_NAMES_RU[month]
+    if report_type == "detailed":
+        return f"Подробный отчет за {month_name_ru} {year}", "с расчетом зарплат и штрафами за опоздания"
+    return f"Отчет посещаемости за {month_name_ru} {year}", "простой отчет посещаемости"
+
+
+async def send_report_document(message: Message, file_path, report_type, year, month):
+    """Отправка готового Excel отчета и обновление статусного сообщения"""
+    if not file_path or not os.path.exists(file_path):
+        await message.edit_text(REPORT_ERROR_TEXT, parse_mode="HTML")
+        return
+    
+    report_name, description = describe_report(report_type, year, month)
+    await message.answer_document(
+        FSInputFile(file_path),
+        caption=f"📊 <b>{report_name}</b>\n\n"
+               f"📅 Период: {MONTH_NAMES_RU[month]} {year}\n"
+               f"📋 Тип: {description}\n"
+               f"🕐 Создан: {datetime.now().strftime('%d.%m.%Y в %H:%M')}\n\n"
+               f"💰 {'Штраф за опоздание: 1% от зарплаты за каждый день' if report_type == 'detailed' else 'Данные только по посещаемости'}",
+        parse_mode="HTML"
+    )
+    
+    await message.edit_text(
+        f"✅ <b>Отчет успешно создан!</b>\n\n"
+        f"📊 {report_name}\n"
+        f"📋 {description.capitalize()}\n\n"
+        f"📎 Файл отправлен выше ⬆️\n\n"
+        f"🔄 Можете создать еще один отчет",
+        parse_mode="HTML"
+    )
+    # Файл остается в кэше отчетов (удаляется по LRU) - повторный запрос отдаст его сразу
+
+
+async def deliver_report_job(message: Message, jobs, job, report_type, year, month):
+    """Ожидает фоновую задачу отчета, показывает прогресс и отправляет файл"""
+    last_progress = None
+    try:
+        while not job.done.is_set():
+            if job.progress != last_progress:
+                last_progress = job.progress
+                await message.edit_text(
+                    f"⏳ <b>Генерируется отчет...</b>\n\n"
+                    f"📅 Период: {MONTH_NAMES_RU[month]} {year}\n"
+                    f"🔄 {job.stage} ({job.progress}%)",
+                    parse_mode="HTML"
+                )
+            try:
+                await jobs.wait(job, timeout=3)
+            except asyncio.TimeoutError:
+                pass
+        
+        if job.status != JOB_DONE:
+            await message.edit_text(
+                f"❌ <b>Ошибка при создании отчета:</b>\n\n"
+                f"<code>{job.error}</code>\n\n"
+                f"Обратитесь к разработчику для решения проблемы.",
+                parse_mode="HTML"
+            )
+            return
+        await send_report_document(message, job.file_path, report_type, year, month)
+    except Exception as e:
+        logger.exception("Не удалось отправить отчет %s", job.id)
+        await message.answer(f"❌ Ошибка при отправке отчета: {e}")
+
+
 @admin_router.callback_query(F.data.startswith("report_"))
-async def handle_report_generation(callback: CallbackQuery, session: AsyncSession):
-    """Генерация Excel отчетов"""
+async def handle_report_generation(callback: CallbackQuery, read_session_for):
+    """Генерация Excel отчетов (в фоновой очереди отчетов, если она запущена)"""
     # Парсим данные: report_type_year_month
     data_parts = callback.data.split("_")
     report_type = data_parts[1]  # "detailed" или "simple"
     year = int(data_parts[2])
     month = int(data_parts[3])
     
-    # Русские названия месяцев
-    month_names = [
-        "", "Январь", "Февраль", "Март", "Апрель", "Май", "Июнь",
-        "Июль", "Август", "Сентябрь", "Октябрь", "Ноябрь", "Декабрь"
-    ]
-    month_name_ru = month_names[month]
-    
     # Показываем сообщение о генерации
     await callback.message.edit_text(
         f"⏳ <b>Генерируется отчет...</b>\n\n"
-        f"📅 Период: {month_name_ru} {year}\n"
+        f"📅 Период: {MONTH_NAMES_RU[month]} {year}\n"
         f"📊 Тип: {'Подробный с зарплатами' if report_type == 'detailed' else 'Простой'}\n\n"
         f"⏰ Пожалуйста, подождите...",
         parse_mode="HTML"
     )
     
-    try:
-        # Генерируем отчет
-        if report_type == "detailed":
-            file_path = await generate_detailed_monthly_report(session, year, month)
-            report_name = f"Подробный отчет за {month_name_ru} {year}"
-            description = "с расчетом зарплат и штрафами за опоздания"
-        else:
-            file_path = await generate_monthly_report(session, year, month)
-            report_name = f"Отчет посещаемости за {month_name_ru} {year}"
-            description = "простой отчет посещаемости"
-        
-        # Проверяем файл
-        if not file_path or not os.path.exists(file_path):
-            await callback.message.edit_text(
-                "❌ <b>Ошибка создания отчета</b>\n\n"
-                "Возможные причины:\n"
-                "• Нет данных за указанный период\n"
-                "• Ошибка доступа к базе данных\n"
-                "• Проблема с созданием файла\n\n"
-                "Попробуйте выбрать другой период.",
-                parse_mode="HTML"
-            )
-            return
-        
-        # Отправляем файл
-        document = FSInputFile(file_path)
-        await callback.message.answer_document(
-            document,
-            caption=f"📊 <b>{report_name}</b>\n\n"
-                   f"📅 Период: {month_name_ru} {year}\n"
-                   f"📋 Тип: {description}\n"
-                   f"🕐 Создан: {datetime.now().strftime('%d.%m.%Y в %H:%M')}\n\n"
-                   f"💰 {'Штраф за опоздание: 1% от зарплаты за каждый день' if report_type == 'detailed' else 'Данные только по посещаемости'}",
-            parse_mode="HTML"
-        )
-        
-        # Обновляем сообщение
-        await callback.message.edit_text(
-            f"✅ <b>Отчет успешно создан!</b>\n\n"
-            f"📊 {report_name}\n"
-            f"📋 {description.capitalize()}\n\n"
-            f"📎 Файл отправлен выше ⬆️\n\n"
-            f"🔄 Можете создать еще один отчет",
-            parse_mode="HTML"
+    cache_type = "detailed" if report_type == "detailed" else "monthly"
+    jobs = get_report_jobs()
+    if jobs is not None:
+        # Задача выполняется в фоне - обработчик сразу освобождается
+        job = await jobs.submit(cache_type, {"year": year, "month": month})
+        task = asyncio.create_task(
+            deliver_report_job(callback.message, jobs, job, report_type, year, month)
         )
-        
-        # Удаляем временный файл
-        try:
-            os.remove(file_path)
-        except:
-            pass
-        
+        _delivery_tasks.add(task)
+        task.add_done_callback(_delivery_tasks.discard)
+        await callback.answer("Отчет поставлен в очередь")
+        return
+    
+    try:
+        generate = generate_detailed_monthly_report if cache_type == "detailed" else generate_monthly_report
+        period_end = date(year, month, calendar.monthrange(year, month)[1])
+        async with read_session_for(period_end) as read_session:
+            file_path = await get_cached_monthly_report(read_session, cache_type, year, month, generate)
+        await send_report_document(callback.message, file_path, report_type, year, month)
     except Exception as e:
         await callback.message.edit_text(
             f"❌ <b>Ошибка при создании отчета:</b>\n\n"
@@ -280,6 +457,8 @@ async def admin_stats_callback(callback: CallbackQuery, session: AsyncSession):
         "Пока что используйте:\n"
         "• /report - отчет за сегодня\n"
         "• /week_stats - статистика за неделю\n"
+        "• /range_stats - статистика за период\n"
+        "• /position_stats - посещаемость по должностям\n"
         "• /reports - Excel отчеты",
         parse_mode="HTML"
     )
@@ -299,6 +478,142 @@ async def admin_settings(message: types.Message):
     )
 
 
+# ========= ПРОФИЛИРОВАНИЕ =========
+
+PROFILE_HELP_TEXT = (
+    "🔬 <b>ПРОФИЛИРОВАНИЕ</b>\n\n"
+    "• /profile reports_menu 5 - следующие 5 вызовов обработчика\n"
+    "• /profile * 20 - следующие 20 обработчиков\n"
+    "• /profile 30s - весь процесс бота 30 секунд\n"
+    "• /profile reports_menu 60s - обработчик в течение 60 секунд\n"
+    "• /profile_stop - остановить\n"
+    "• /profile_get [id] - скачать результат (collapsed + speedscope)"
+)
+
+
+def format_profile_status(status):
+    """Краткое описание записи профайлера"""
+    target = status["route"] or "все обработчики"
+    limit = f"{status['requests']} вызовов" if status["requests"] else f"{status['seconds']:g} с"
+    return (
+        f"🆔 <code>{status['id']}</code> - {status['state']}\n"
+        f"🎯 {target} ({limit})\n"
+        f"📈 Вызовов: {status['profiled_requests']} | сэмплов: {status['samples']} "
+        f"| ожидание: {status['waiting_samples']}"
+    )
+
+
+@admin_router.message(Command("profile"))
+async def profile_arm(message: types.Message):
+    """Включение сэмплирующего профайлера для обработчиков бота"""
+    args = message.text.split()[1:]
+    if not args:
+        status = profiler.status()
+        captures = "\n\n".join(format_profile_status(item) for item in status["captures"][:3])
+        await message.answer(
+            f"{PROFILE_HELP_TEXT}\n\n{captures or 'Записей пока нет'}",
+            parse_mode="HTML"
+        )
+        return
+    
+    # /profile 30s - без имени обработчика: все обработчики
+    target, limit = ("*", args[0]) if len(args) == 1 else args[:2]
+    handler_name = None if target in ("*", "all") else target
+    try:
+        if limit.endswith("s") and limit[:-1].isdigit():
+            capture = profiler.arm(route=handler_name, seconds=float(limit[:-1]))
+        elif limit.isdigit():
+            capture = profiler.arm(route=handler_name, requests=int(limit))
+        else:
+            await message.answer(PROFILE_HELP_TEXT, parse_mode="HTML")
+            return
+    except (ValueError, RuntimeError) as e:
+        await message.answer(f"❌ {e}")
+        return
+    
+    await message.answer(
+        f"✅ <b>Профайлер включен</b>\n\n{format_profile_status(capture.status())}\n\n"
+        f"📥 Результат: /profile_get {capture.id}",
+        parse_mode="HTML"
+    )
+
+
+@admin_router.message(Command("profile_stop"))
+async def profile_stop(message: types.Message):
+    """Остановка активного профилирования"""
+    capture = profiler.cancel()
+    if capture is None:
+        await message.answer("🤷‍♂️ Профайлер не активен.")
+        return
+    await message.answer(
+        f"⏹ <b>Профилирование остановлено</b>\n\n{format_profile_status(capture.status())}",
+        parse_mode="HTML"
+    )
+
+
+@admin_router.message(Command("profile_get"))
+async def profile_download(message: types.Message):
+    """Отправка результата профилирования (collapsed-стеки и speedscope JSON)"""
+    args = message.text.split()[1:]
+    captures = profiler.status()["captures"]
+    capture_id = args[0] if args else (captures[0]["id"] if captures else None)
+    capture = profiler.get(capture_id) if capture_id else None
+    if capture is None:
+        await message.answer("❌ Запись профайлера не найдена.")
+        return
+    if not capture.samples:
+        await message.answer(f"⏳ Сэмплов пока нет\n\n{format_profile_status(capture.status())}", parse_mode="HTML")
+        return
+    
+    await message.answer_document(
+        BufferedInputFile(capture.collapsed().encode("utf-8"), filename=f"profile_{capture.id}.collapsed.txt"),
+        caption=f"🔬 {format_profile_status(capture.status())}\n\n"
+                f"🔥 flamegraph.pl / inferno / speedscope.app",
+        parse_mode="HTML"
+    )
+    await message.answer_document(
+        BufferedInputFile(
+            json.dumps(capture.speedscope()).encode("utf-8"),
+            filename=f"profile_{capture.id}.speedscope.json"
+        )
+    )
+
+
+# ========= SQL ЗАПРОСЫ =========
+
+@admin_router.message(Command("queries"))
+async def query_stats_report(message: types.Message):
+    """Топ SQL запросов процесса бота по суммарному времени (или count/p95_ms)"""
+    args = message.text.split()[1:]
+    if args and args[0] == "reset":
+        query_stats.reset()
+        await message.answer("🧹 Статистика SQL запросов сброшена.")
+        return
+    
+    limit = int(args[0]) if args and args[0].isdigit() else 10
+    order_by = args[1] if len(args) > 1 and args[1] in ORDER_FIELDS else "total_ms"
+    status = query_stats.status()
+    queries = query_stats.top(min(limit, 20), order_by)
+    if not queries:
+        await message.answer("📭 SQL запросов пока не было.")
+        return
+    
+    text = (
+        f"🐢 <b>ТОП SQL ЗАПРОСОВ</b> ({order_by})\n"
+        f"С {status['since'][:16].replace('T', ' ')} UTC: {status['executions']} запросов, "
+        f"{status['total_ms'] / 1000:.1f} с, медленных > {status['slow_query_ms']:g} мс\n\n"
+    )
+    for i, query in enumerate(queries, 1):
+        slow = f" | 🐢 {query['slow']}" if query["slow"] else ""
+        text += (
+            f"{i}. <b>{query['total_ms']:.0f} мс</b> | {query['count']}× | "
+            f"ср. {query['avg_ms']:.1f} | p95 {query['p95_ms']:.1f} | макс {query['max_ms']:.1f} мс{slow}\n"
+            f"<code>{html.escape(query['statement'][:200])}</code>\n\n"
+        )
+    text += "🧹 Сброс: /queries reset"
+    await message.answer(text[:4000], parse_mode="HTML")
+
+
 # ========= XODIM BOSHQARUV =========
 
 class EmployeeStates(StatesGroup):
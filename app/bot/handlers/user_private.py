@@ -187,6 +187,9 @@ async def attendance_callback(callback: CallbackQuery, session: AsyncSession):
             employee_id=employee.id,
             check_type=check_type
         )
+        if attendance is None:
+            await callback.answer("⚠️ Вы уже отметились как УШЕЛ сегодня!", show_alert=True)
+            return
         
         await callback.message.edit_text(
             f"✅ <b>{employee.full_name}</b>, \nвы успешно отметились как <b>УШЕЛ</b>\n"
@@ -318,6 +321,12 @@ async def handle_location(message: Message, session: AsyncSession):
         location_lat=str(latitude),
         location_lon=str(longitude)
     )
+    if attendance is None:
+        await message.answer(
+            "⚠️ Вы уже отметились как ПРИШЕЛ сегодня!",
+            reply_markup=get_checkout_keyboard()
+        )
+        return
     
     await message.answer(
         f"✅ <b>{employee.full_name}</b>, \nвы успешно отметились как <b>ПРИШЕЛ</b>\n"
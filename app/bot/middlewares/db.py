@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from typing import Any, Awaitable, Callable, Dict
 
 from aiogram import BaseMiddleware
@@ -7,8 +8,16 @@ from sqlalchemy.ext.asyncio import async_sessionmaker
 
 
 class DataBaseSession(BaseMiddleware):
-    def __init__(self, session_pool: async_sessionmaker):
+    """
+    Передает в обработчик session (основная БД) и read_session_for (реплика для отчетов)
+
+    read_session_for(end_date) - контекстный менеджер сессии реплики: для периодов,
+    включающих сегодня, учитывается отставание реплики, при ее недоступности -
+    откат на основную БД. Без read_router выдает ту же основную сессию.
+    """
+    def __init__(self, session_pool: async_sessionmaker, read_router=None):
         self.session_pool = session_pool
+        self.read_router = read_router
 
 
     async def __call__(
@@ -19,6 +28,11 @@ class DataBaseSession(BaseMiddleware):
     ) -> Any:
         async with self.session_pool() as session:
             data['session'] = session
+            if self.read_router is None:
+                @asynccontextmanager
+                async def read_session_for(end_date=None):
+                    yield session
+                data['read_session_for'] = read_session_for
+            else:
+                data['read_session_for'] = self.read_router.session_for
             return await handler(event, data)
-
-
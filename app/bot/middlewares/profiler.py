@@ -0,0 +1,33 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from app.core.profiler import profiler
+
+
+class ProfilerMiddleware(BaseMiddleware):
+    """
+    Подключает обработчики к сэмплирующему профайлеру (/profile)
+
+    Регистрируется как inner middleware - в data уже есть найденный handler,
+    цель профилирования - имя функции обработчика (например, reports_menu).
+    Пока профайлер не включен - только одна проверка.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if profiler.capture is None:
+            return await handler(event, data)
+
+        handler_object = data.get("handler")
+        name = getattr(getattr(handler_object, "callback", None), "__name__", None)
+        handle = profiler.enter(lambda: name)
+        try:
+            return await handler(event, data)
+        finally:
+            profiler.exit(handle)
@@ -65,4 +65,19 @@ def format_summary_stats(report_data):
     
     return (f"📊 {report_data['date'].strftime('%d.%m')} | "
             f"👥{attended}/{total} ({attendance_rate:.0f}%) | "
-            f"⏰{report_data['late_count']} опозд.")
\ No newline at end of file
+            f"⏰{report_data['late_count']} опозд.")
+
+
+def format_range_stats(title, reports):
+    """Краткая статистика по дням (новые сверху) и итог за период"""
+    lines = [title, ""]
+    lines.extend(format_summary_stats(report_data) for report_data in reversed(reports))
+    
+    expected = sum(report_data['total_employees'] for report_data in reports)
+    attended = sum(report_data['attended_count'] for report_data in reports)
+    late = sum(report_data['late_count'] for report_data in reports)
+    rate = (attended / expected * 100) if expected > 0 else 0
+    
+    lines.append("")
+    lines.append(f"📊 Итого: {len(reports)} раб. дн. | 👥{attended}/{expected} ({rate:.0f}%) | ⏰{late} опозд.")
+    return "\n".join(lines)
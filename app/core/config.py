@@ -3,9 +3,36 @@ from typing import List
 
 # Environment variables with defaults
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./workly.db")
+
+# Ma'lumotlar bazasi ulanishlari (API va bot uchun umumiy engine fabrikasi)
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")  # Har bir SQL so'rovni loglash
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # Bo'sh ulanish kutish chegarasi (sekund)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Ulanish qayta ochiladigan yosh (sekund)
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))  # Ulanish boshiga tayyor so'rovlar keshi
+
+# O'qish replikasi (statistika va hisobotlar uchun, ixtiyoriy)
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))  # Bugungi so'rovlar uchun ruxsat etilgan kechikish
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", "5"))  # Kechikishni o'lchash oralig'i (sekund)
+
+# SQLite PRAGMA sozlamalari (har bir yangi ulanishda)
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # 256MB
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
 SECRET_KEY = os.getenv("SECRET_KEY", "workly-dev-secret-key-2025")
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")  # /admin-api uchun (X-Admin-Token sarlavhasi)
+# Token o'rnatilmaganda /admin-api ni ochiq qoldirish - faqat lokal ishlab chiqish uchun aniq yoqiladi
+ADMIN_API_INSECURE = os.getenv("ADMIN_API_INSECURE", "false").lower() in ("1", "true", "yes")
 ENV = os.getenv("ENV", "development")
 
+# Ishga tushganda sxema eski bo'lsa migratsiyalarni avtomatik qo'llash (production'da `manage.py migrate`)
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "true" if ENV == "development" else "false").lower() in ("1", "true", "yes")
+
 # CORS settings
 ALLOWED_ORIGINS_STR = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000")
 ALLOWED_ORIGINS = [origin.strip() for origin in ALLOWED_ORIGINS_STR.split(",") if origin.strip()]
@@ -28,6 +55,76 @@ ALLOWED_IMAGE_FORMATS = [fmt.strip().lower() for fmt in ALLOWED_IMAGE_FORMATS_ST
 MAX_FACES_PER_EMPLOYEE = int(os.getenv("MAX_FACES_PER_EMPLOYEE", "3"))
 FACE_RECOGNITION_TOLERANCE = float(os.getenv("FACE_RECOGNITION_TOLERANCE", "0.6"))
 FACE_RECOGNITION_MODEL = os.getenv("FACE_RECOGNITION_MODEL", "hog")
+FACE_ID_WARMUP = os.getenv("FACE_ID_WARMUP", "false").lower() in ("1", "true", "yes")  # Ishga tushganda Face ID servisini fonda yuklash
+
+# Davomat yozish navbati (write-behind) sozlamalari
+ATTENDANCE_QUEUE_ENABLED = os.getenv("ATTENDANCE_QUEUE_ENABLED", "true").lower() in ("1", "true", "yes")
+ATTENDANCE_QUEUE_FLUSH_MS = int(os.getenv("ATTENDANCE_QUEUE_FLUSH_MS", "50"))
+ATTENDANCE_QUEUE_BATCH_SIZE = int(os.getenv("ATTENDANCE_QUEUE_BATCH_SIZE", "200"))
+ATTENDANCE_QUEUE_CACHE_TTL = int(os.getenv("ATTENDANCE_QUEUE_CACHE_TTL", "30"))  # sekund
+ATTENDANCE_QUEUE_RETRIES = int(os.getenv("ATTENDANCE_QUEUE_RETRIES", "3"))  # Saqlanmagan guruhni qayta urinishlar
+ATTENDANCE_QUEUE_DEAD_LETTER = os.getenv("ATTENDANCE_QUEUE_DEAD_LETTER", "./dead_letter/attendance.ndjson")  # Saqlab bo'lmagan yozuvlar
+
+# Yopilgan oylarni attendance_archive jadvaliga ko'chirish (ixtiyoriy)
+ATTENDANCE_ARCHIVE_ENABLED = os.getenv("ATTENDANCE_ARCHIVE_ENABLED", "false").lower() in ("1", "true", "yes")
+ATTENDANCE_ARCHIVE_KEEP_MONTHS = int(os.getenv("ATTENDANCE_ARCHIVE_KEEP_MONTHS", "3"))  # Joriy oydan tashqari asosiy jadvalda qoladigan oylar
+ATTENDANCE_ARCHIVE_INTERVAL_HOURS = float(os.getenv("ATTENDANCE_ARCHIVE_INTERVAL_HOURS", "24"))
+ATTENDANCE_ARCHIVE_BOUNDARY_TTL = float(os.getenv("ATTENDANCE_ARCHIVE_BOUNDARY_TTL", "300"))  # Arxiv chegarasi keshi (sekund)
+
+# Ish kalendari sozlamalari
+# Hafta maskasi Dushanbadan Yakshanbagacha: 1 - ish kuni, 0 - dam olish (standart: faqat yakshanba dam)
+WORK_WEEKMASK = os.getenv("WORK_WEEKMASK", "1111110")
+# Bayramlar: "YYYY-MM-DD" (aniq sana) yoki "MM-DD" (har yili takrorlanadi), vergul bilan
+WORK_HOLIDAYS_STR = os.getenv("WORK_HOLIDAYS", "")
+WORK_HOLIDAYS = [day.strip() for day in WORK_HOLIDAYS_STR.split(",") if day.strip()]
+WORK_CALENDAR_CACHE_SIZE = int(os.getenv("WORK_CALENDAR_CACHE_SIZE", "64"))
+
+# Tayyor hisobotlar keshi
+REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", "./reports/cache")
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))  # 200MB
+
+# Hisobotlarni fonda yaratish navbati
+REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", "2"))
+# Tur bo'yicha bir vaqtdagi vazifalar chegarasi: "tur=son", vergul bilan
+REPORT_JOB_TYPE_LIMITS_STR = os.getenv("REPORT_JOB_TYPE_LIMITS", "detailed=1,monthly=1,daily=2")
+REPORT_JOB_TYPE_LIMITS = {
+    name.strip(): int(limit)
+    for name, _, limit in (item.partition("=") for item in REPORT_JOB_TYPE_LIMITS_STR.split(","))
+    if name.strip() and limit.strip()
+}
+REPORT_JOB_TTL = int(os.getenv("REPORT_JOB_TTL", "3600"))  # tugagan vazifa holati saqlanadigan vaqt (sekund)
+# Yuklab olish so'rovi tayyor bo'lmagan hisobotni shuncha kutadi, keyin 202 + vazifa manzili (sekund)
+REPORT_DOWNLOAD_WAIT_SECONDS = float(os.getenv("REPORT_DOWNLOAD_WAIT_SECONDS", "10"))
+
+# Dashboard statistikasi javoblari keshi (sekund)
+STATISTICS_CACHE_TTL = float(os.getenv("STATISTICS_CACHE_TTL", "10"))
+
+# Xodimlar katalogi (id/uuid/telegram_id bo'yicha kesh) qayta yuklanadigan vaqt (sekund)
+EMPLOYEE_DIRECTORY_TTL = float(os.getenv("EMPLOYEE_DIRECTORY_TTL", "300"))
+
+# Keshlarni API va bot jarayonlari o'rtasida tozalash (Redis pub/sub, ixtiyoriy)
+REDIS_URL = os.getenv("REDIS_URL")
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "workly:invalidate")
+
+# So'rovlar metrikalari (/metrics, Prometheus formati)
+REQUEST_METRICS_ENABLED = os.getenv("REQUEST_METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+REQUEST_QUERY_WARN_THRESHOLD = int(os.getenv("REQUEST_QUERY_WARN_THRESHOLD", "50"))  # Bundan ko'p SQL so'rov - N+1 ogohlantirishi
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # /metrics uchun (Authorization: Bearer)
+METRICS_INSECURE = os.getenv("METRICS_INSECURE", "false").lower() in ("1", "true", "yes")  # Tokensiz ochiq /metrics (faqat lokal)
+
+# SQL so'rovlar statistikasi va sekin so'rovlar logi (/admin-api/db/queries, botda /queries)
+QUERY_STATS_ENABLED = os.getenv("QUERY_STATS_ENABLED", "true").lower() in ("1", "true", "yes")
+QUERY_STATS_MAX_FINGERPRINTS = int(os.getenv("QUERY_STATS_MAX_FINGERPRINTS", "500"))  # Saqlanadigan so'rov shakllari
+QUERY_STATS_SAMPLES = int(os.getenv("QUERY_STATS_SAMPLES", "256"))  # p95 uchun oxirgi bajarilishlar soni
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))  # Bundan sekin so'rov logga yoziladi
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() in ("1", "true", "yes")
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))  # Bir shakl uchun EXPLAIN oralig'i (sekund)
+
+# Namuna oluvchi profiler (/admin-api/profiler, botda /profile)
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "true").lower() in ("1", "true", "yes")
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))  # Namunalar oralig'i
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "300"))  # Bitta capture'ning eng uzun vaqti
+PROFILER_HISTORY = int(os.getenv("PROFILER_HISTORY", "10"))  # Xotirada saqlanadigan oxirgi capture'lar
 
 # Logging
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -1,8 +1,137 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import time
+from datetime import date
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from app.core.config import DATABASE_URL
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.config import (
+    DATABASE_REPLICA_URL,
+    DATABASE_URL,
+    DB_ECHO,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_STATEMENT_CACHE_SIZE,
+    QUERY_STATS_ENABLED,
+    REPLICA_CHECK_INTERVAL,
+    REPLICA_MAX_LAG_SECONDS,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_MMAP_SIZE,
+    SQLITE_SYNCHRONOUS,
+)
+from app.core.metrics import histogram
+from app.core.query_stats import instrument_query_stats
+from app.core.replica import ReplicaRouter
+
+POOL_CHECKOUT_SECONDS = histogram(
+    "db_pool_checkout_seconds", "Pooldan ulanish olishni kutish vaqti (sekund)"
+)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Ulanish olish vaqtini db_pool_checkout_seconds metrikasiga yozuvchi pool"""
+    metrics_name = "default"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started, pool=self.metrics_name)
+
+    def recreate(self):
+        # engine.dispose() yangi pool yaratadi - metrika nomi saqlanishi kerak
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        return pool
+
+
+def _apply_sqlite_pragmas(in_memory: bool):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            if not in_memory:
+                # WAL - o'quvchilar yozuvchini kutmaydi (API va bot bir faylda ishlaydi)
+                cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+                cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+            cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+            cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        finally:
+            cursor.close()
+    return on_connect
+
+
+def create_db_engine(url: str = DATABASE_URL, name: str = "api", echo: bool = DB_ECHO) -> AsyncEngine:
+    """
+    Sozlamalardan (DB_*, SQLITE_*) async engine yaratish - API va bot uchun umumiy
+
+    Args:
+        url: Ulanish manzili
+        name: Pool metrikasidagi nom (api, bot)
+        echo: SQL so'rovlarni loglash
+    """
+    url = make_url(url)
+    is_sqlite = url.get_backend_name() == "sqlite"
+    in_memory = is_sqlite and url.database in (None, "", ":memory:")
+
+    options = {"echo": echo, "future": True}
+    if not in_memory:
+        # Xotiradagi SQLite bitta ulanishda ishlaydi (StaticPool) - pool sozlamalari kerak emas
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+
+    if is_sqlite:
+        options["connect_args"] = {"cached_statements": DB_STATEMENT_CACHE_SIZE}
+    elif url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+
+    db_engine = create_async_engine(url, **options)
+    if not in_memory:
+        db_engine.sync_engine.pool.metrics_name = name
+    if is_sqlite:
+        event.listen(db_engine.sync_engine, "connect", _apply_sqlite_pragmas(in_memory))
+    if QUERY_STATS_ENABLED:
+        # So'rovlar statistikasi va sekin so'rovlar logi (API va bot jarayonlarida)
+        instrument_query_stats(db_engine)
+    return db_engine
 
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
+
+def dialect_insert(table, dialect_name: str):
+    """ON CONFLICT bandini qo'llab-quvvatlovchi INSERT (PostgreSQL yoki SQLite)"""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as insert_statement
+    else:
+        from sqlalchemy.dialects.sqlite import insert as insert_statement
+    return insert_statement(table)
+
+
+def pool_status(db_engine: AsyncEngine) -> dict:
+    """Pool holati: hajmi, band va bo'sh ulanishlar"""
+    pool = db_engine.sync_engine.pool
+    if not isinstance(pool, AsyncAdaptedQueuePool):
+        return {"pool": type(pool).__name__}
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "timeout": pool.timeout(),
+    }
+
+
+engine = create_db_engine(DATABASE_URL, name="api")
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -10,9 +139,36 @@ AsyncSessionLocal = sessionmaker(
     class_=AsyncSession
 )
 
+# Faqat o'qish uchun replika (DATABASE_REPLICA_URL berilgan bo'lsa)
+replica_engine = create_db_engine(DATABASE_REPLICA_URL, name="replica") if DATABASE_REPLICA_URL else None
+ReplicaSessionLocal = sessionmaker(
+    bind=replica_engine,
+    expire_on_commit=False,
+    class_=AsyncSession
+) if replica_engine is not None else None
+
+read_router = ReplicaRouter(
+    AsyncSessionLocal, ReplicaSessionLocal,
+    max_lag_seconds=REPLICA_MAX_LAG_SECONDS, check_interval=REPLICA_CHECK_INTERVAL
+)
+
 Base = declarative_base()
 
 # Dependency
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+async def get_read_db():
+    """Hisobot va statistika uchun sessiya - replika (bo'lsa) yoki asosiy baza"""
+    async with read_router.session() as session:
+        yield session
+
+def read_session_for(end_date: Optional[date] = None):
+    """Davr uchun o'qish sessiyasi - davr bugungi kunni qamrasa replika kechikishi hisobga olinadi"""
+    return read_router.session_for(end_date)
+
+async def get_fresh_read_db():
+    """Bugungi ma'lumotlar uchun - replika faqat kechikish REPLICA_MAX_LAG_SECONDS dan oshmasa"""
+    async with read_router.session(fresh=True) as session:
+        yield session
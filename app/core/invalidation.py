@@ -0,0 +1,265 @@
+"""
+Jarayonlar o'rtasida keshlarni tozalash shinasi (invalidation bus)
+
+API va bot alohida jarayonlarda bitta bazaga yozadi. Yozuvchi o'zgargan
+obyektni e'lon qiladi, har bir jarayondagi keshlar unga obuna bo'lib
+faqat tegishli yozuvlarni tozalaydi:
+
+    invalidation_bus.subscribe(EMPLOYEE, lambda event: directory.evict(event.ids))
+    invalidation_bus.publish(EMPLOYEE, ids=[employee.id])
+
+Transport:
+    - REDIS_URL berilgan bo'lsa - Redis pub/sub (INVALIDATION_CHANNEL kanali),
+      redis paketi bo'lmasa start() xato beradi;
+    - aks holda faqat shu jarayon ichida;
+    - MemoryBroker - Redis o'rnini bosuvchi, bitta jarayondagi bir nechta
+      shinani bog'laydi (testlar va lokal sinov uchun).
+
+Hodisa avval shu jarayonda darhol bajariladi, so'ng fonda boshqa jarayonlarga
+yuboriladi. Redis bilan aloqa uzilib qayta tiklansa, o'tkazib yuborilgan
+hodisalar o'rniga barcha keshlar to'liq tozalanadi (ids bo'sh hodisa).
+"""
+import asyncio
+import json
+import logging
+import os
+import uuid
+from datetime import date
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from app.core.config import INVALIDATION_CHANNEL, REDIS_URL
+from app.core.metrics import counter
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+# Obyekt turlari
+EMPLOYEE = "employee"
+ATTENDANCE = "attendance"
+FACE = "face"
+ARCHIVE = "archive"
+
+EVENTS = counter("invalidation_events_total", "Kesh tozalash hodisalari (entity, direction)")
+
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+
+
+class InvalidationEvent(NamedTuple):
+    """O'zgargan obyekt: ids bo'sh bo'lsa - shu turdagi barcha yozuvlar"""
+    entity: str
+    ids: tuple = ()
+    day: Optional[date] = None
+    origin: str = ""
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "entity": self.entity,
+            "ids": list(self.ids),
+            "day": self.day.isoformat() if self.day else None,
+            "origin": self.origin,
+        })
+
+    @classmethod
+    def from_json(cls, payload) -> "InvalidationEvent":
+        data = json.loads(payload)
+        return cls(
+            entity=data["entity"],
+            ids=tuple(data.get("ids") or ()),
+            day=date.fromisoformat(data["day"]) if data.get("day") else None,
+            origin=data.get("origin", ""),
+        )
+
+
+class MemoryBroker:
+    """Redis o'rnini bosuvchi: bir jarayondagi shinalar bir-birining hodisalarini oladi"""
+
+    def __init__(self):
+        self.buses: list["InvalidationBus"] = []
+
+    async def publish(self, payload: str):
+        for bus in list(self.buses):
+            bus._receive(payload)
+
+
+class InvalidationBus:
+    """Kesh obunachilari va hodisalarni boshqa jarayonlarga yetkazish"""
+
+    def __init__(self, redis_url: Optional[str] = None, channel: str = INVALIDATION_CHANNEL,
+                 broker: Optional[MemoryBroker] = None, origin: Optional[str] = None):
+        self.redis_url = redis_url
+        self.channel = channel
+        self.broker = broker
+        self.origin = origin or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._handlers: dict[str, list[tuple[Callable, bool]]] = {}
+        self._outbox: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+        self._redis = None
+        self.connected = False
+        self.last_error: Optional[str] = None
+
+    @property
+    def backend(self) -> str:
+        if self.broker is not None:
+            return "memory"
+        if self.redis_url and aioredis is not None:
+            return "redis"
+        return "local"
+
+    @property
+    def is_running(self) -> bool:
+        return self._outbox is not None
+
+    # ---------- Obuna va e'lon ----------
+
+    def subscribe(self, entity: str, handler: Callable[[InvalidationEvent], None], remote_only: bool = False):
+        """
+        Obyekt turi o'zgarishlariga obuna bo'lish
+
+        Args:
+            entity: EMPLOYEE, ATTENDANCE, FACE yoki ARCHIVE
+            handler: handler(event) - tez ishlaydigan sinxron funksiya
+            remote_only: Faqat boshqa jarayonlardan kelgan hodisalar (shu jarayon keshi yozuvchi tomonidan yangilangan bo'lsa)
+        """
+        self._handlers.setdefault(entity, []).append((handler, remote_only))
+
+    def publish(self, entity: str, ids: Iterable = (), day: Optional[date] = None):
+        """O'zgarishni e'lon qilish - commit'dan keyin chaqiriladi"""
+        event = InvalidationEvent(entity, tuple(ids), day, self.origin)
+        EVENTS.inc(entity=entity, direction="published")
+        self._dispatch(event, remote=False)
+        if self._outbox is not None and self.backend != "local":
+            self._outbox.put_nowait(event.to_json())
+
+    def _dispatch(self, event: InvalidationEvent, remote: bool):
+        for handler, remote_only in self._handlers.get(event.entity, ()):
+            if remote_only and not remote:
+                continue
+            try:
+                handler(event)
+            except Exception:
+                logger.exception("Kesh tozalash xatosi (%s)", event.entity)
+
+    def _receive(self, payload):
+        try:
+            event = InvalidationEvent.from_json(payload)
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Noto'g'ri kesh tozalash hodisasi: %r", payload)
+            return
+        if event.origin == self.origin:
+            return
+        EVENTS.inc(entity=event.entity, direction="received")
+        self._dispatch(event, remote=True)
+
+    def _reset_all(self):
+        """Hodisalar o'tkazib yuborilgan bo'lishi mumkin - barcha keshlarni tozalash"""
+        for entity in list(self._handlers):
+            self._dispatch(InvalidationEvent(entity, origin=self.origin), remote=True)
+
+    # ---------- Transport ----------
+
+    async def _send(self, payload: str):
+        if self.broker is not None:
+            await self.broker.publish(payload)
+        else:
+            await self._redis.publish(self.channel, payload)
+
+    async def _sender(self):
+        while True:
+            payload = await self._outbox.get()
+            try:
+                await self._send(payload)
+            except Exception as e:
+                # Boshqa jarayonlar keshi TTL bo'yicha yangilanadi
+                self.last_error = str(e)
+                logger.warning("Kesh tozalash hodisasini yuborib bo'lmadi: %s", e)
+            finally:
+                self._outbox.task_done()
+
+    async def _listener(self):
+        delay = RECONNECT_DELAY
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                if self.last_error is not None:
+                    self._reset_all()
+                self.connected = True
+                self.last_error = None
+                delay = RECONNECT_DELAY
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._receive(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.connected = False
+                self.last_error = str(e)
+                logger.warning("Redis kanali uzildi, %.0fs dan keyin qayta ulanadi: %s", delay, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def start(self):
+        """Boshqa jarayonlar bilan aloqani ishga tushirish"""
+        if self.is_running:
+            return
+        if self.broker is None and self.redis_url and aioredis is None:
+            # Jimgina "local" ga o'tish boshqa jarayonlar keshini eskirgan holda qoldiradi
+            raise RuntimeError("REDIS_URL berilgan, lekin redis paketi o'rnatilmagan: pip install -r requirements.txt")
+        self._outbox = asyncio.Queue()
+        backend = self.backend
+        if backend == "memory":
+            self.broker.buses.append(self)
+            self.connected = True
+        elif backend == "redis":
+            self._redis = aioredis.from_url(self.redis_url, decode_responses=True)
+            self._tasks.append(asyncio.create_task(self._listener()))
+        if backend != "local":
+            self._tasks.append(asyncio.create_task(self._sender()))
+
+    async def stop(self):
+        """Navbatdagi hodisalarni yuborib, aloqani to'xtatish"""
+        if not self.is_running:
+            return
+        if self._tasks:
+            try:
+                await asyncio.wait_for(self._outbox.join(), timeout=5)
+            except asyncio.TimeoutError:
+                logger.warning("Kesh tozalash hodisalari yuborilmay qoldi: %s ta", self._outbox.qsize())
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        if self.broker is not None and self in self.broker.buses:
+            self.broker.buses.remove(self)
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+        self._outbox = None
+        self.connected = False
+
+    def status(self) -> dict:
+        return {
+            "backend": self.backend,
+            "running": self.is_running,
+            "connected": self.connected,
+            "origin": self.origin,
+            "subscriptions": {entity: len(handlers) for entity, handlers in self._handlers.items()},
+            "error": self.last_error,
+        }
+
+
+invalidation_bus = InvalidationBus(REDIS_URL)
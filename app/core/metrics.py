@@ -0,0 +1,151 @@
+"""
+Jarayon ichidagi metrikalar (hisoblagich va gistogrammalar)
+
+Metrikalar nom bo'yicha bir marta ro'yxatdan o'tkaziladi va yorliqlar
+(labels) bilan yoziladi:
+
+    checkout = histogram("db_pool_checkout_seconds", "Pooldan ulanish olish vaqti")
+    checkout.observe(0.002, pool="api")
+
+snapshot() barcha qiymatlarni JSON ko'rinishida, render_prometheus() esa
+Prometheus matn formatida (/metrics) qaytaradi.
+"""
+import bisect
+import threading
+from typing import Optional
+
+# Sekundlar uchun standart chegaralar (1ms dan 10s gacha)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+class Counter:
+    """Faqat o'suvchi hisoblagich"""
+    kind = "counter"
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return [{"labels": dict(key), "value": value} for key, value in self._values.items()]
+
+
+class Histogram:
+    """Kuzatuvlar taqsimoti: soni, yig'indisi, maksimumi va chegaralar bo'yicha (kumulyativ) sonlar"""
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str = "", buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [soni, yig'indi, maksimum, har bir chegara uchun sonlar (+Inf bilan)]
+                state = self._values[key] = [0, 0.0, 0.0, [0] * (len(self.buckets) + 1)]
+            state[0] += 1
+            state[1] += value
+            state[2] = max(state[2], value)
+            state[3][index] += 1
+
+    def snapshot(self) -> list[dict]:
+        result = []
+        with self._lock:
+            for key, (count, total, maximum, bucket_counts) in self._values.items():
+                cumulative = 0
+                buckets = {}
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+                    cumulative += bucket_count
+                    buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+                result.append({
+                    "labels": dict(key),
+                    "count": count,
+                    "sum": round(total, 6),
+                    "avg": round(total / count, 6) if count else 0,
+                    "max": round(maximum, 6),
+                    "buckets": buckets,
+                })
+        return result
+
+
+_registry: dict[str, object] = {}
+_registry_lock = threading.Lock()
+
+
+def _register(metric_class, name: str, *args, **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = metric_class(name, *args, **kwargs)
+        elif not isinstance(metric, metric_class):
+            raise ValueError(f"Metrika {name} boshqa turda ro'yxatdan o'tgan")
+        return metric
+
+
+def counter(name: str, description: str = "") -> Counter:
+    """Hisoblagichni olish (bo'lmasa yaratish)"""
+    return _register(Counter, name, description)
+
+
+def histogram(name: str, description: str = "", buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+    """Gistogrammani olish (bo'lmasa yaratish)"""
+    return _register(Histogram, name, description, buckets)
+
+
+def snapshot(prefix: Optional[str] = None) -> dict:
+    """Barcha (yoki prefix bilan boshlanadigan) metrikalar qiymatlari"""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    return {
+        metric.name: {"type": metric.kind, "description": metric.description, "values": metric.snapshot()}
+        for metric in metrics
+        if prefix is None or metric.name.startswith(prefix)
+    }
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in sorted(labels.items())) + "}"
+
+
+def render_prometheus(prefix: Optional[str] = None) -> str:
+    """Metrikalar Prometheus matn formatida (text/plain; version=0.0.4)"""
+    lines = []
+    for name, metric in snapshot(prefix).items():
+        if metric["description"]:
+            help_text = metric["description"].replace("\\", "\\\\").replace("\n", "\\n")
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for value in metric["values"]:
+            labels = value["labels"]
+            if metric["type"] == "counter":
+                lines.append(f"{name}{_format_labels(labels)} {value['value']}")
+                continue
+            for bound, count in value["buckets"].items():
+                lines.append(f"{name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {value['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+    return "\n".join(lines) + "\n"
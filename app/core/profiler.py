@@ -0,0 +1,357 @@
+"""
+Namuna oluvchi (sampling) profiler - API marshrutlari va bot handlerlari uchun
+
+Profiler odatda o'chiq: so'rov/handler boshida faqat `profiler.capture is None`
+tekshiriladi. Admin uni qurollantiradi (arm):
+
+    - keyingi N ta so'rov uchun (route berilsa - faqat shu marshrut shabloni,
+      masalan /face-id/recognize);
+    - yoki vaqt oynasi uchun (route berilmasa butun jarayon, berilsa - shu
+      oynadagi barcha mos so'rovlar).
+
+Qurollantirilganda alohida oqim har PROFILER_INTERVAL_MS da sys._current_frames()
+dan steklarni oladi. Standart holatda faqat hodisalar tsikli (event loop)
+oqimi yoziladi, namuna esa o'sha paytda mos so'rovning asyncio vazifasi
+bajarilayotgan bo'lsa olinadi - parallel so'rovlar natijaga aralashmaydi.
+all_threads bilan ishchi oqimlar (asyncio.to_thread, masalan Face ID tanish)
+ham mos so'rov davom etayotganda yoziladi. Oxirgi freymi bloklovchi kutish
+(IDLE_FRAMES) bo'lgan oqimlar har doim tashlab ketiladi. Marshrut shabloni routing'dan keyin ma'lum bo'ladi, shuning uchun
+so'rov mosligi namuna olish va so'rov tugash paytida tekshiriladi.
+
+Natija collapsed-stack (flamegraph.pl, speedscope, inferno) yoki speedscope
+JSON formatida yuklab olinadi.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import PROFILER_HISTORY, PROFILER_INTERVAL_MS, PROFILER_MAX_SECONDS
+
+ARMED = "armed"
+FINISHED = "finished"
+CANCELLED = "cancelled"
+
+MAX_STACK_DEPTH = 128
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Bloklovchi kutishdagi oqimlarning oxirgi freymi (fayl, funksiya) - namunaga kirmaydi
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("socket.py", "accept"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("core.py", "_connection_worker_thread"),  # aiosqlite ulanish oqimi
+}
+
+
+def _short_path(filename: str) -> str:
+    if filename.startswith(ROOT + os.sep):
+        return os.path.relpath(filename, ROOT)
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    return os.path.basename(filename)
+
+
+class ProfileCapture:
+    """Bitta profil yozuvi: qurollantirish sharti va yig'ilgan steklar"""
+
+    def __init__(self, route: Optional[str], requests: Optional[int], seconds: float, interval_ms: float,
+                 all_threads: bool = False):
+        self.id = uuid.uuid4().hex[:12]
+        self.route = route
+        self.requests = requests
+        self.seconds = seconds
+        self.interval = interval_ms / 1000
+        self.all_threads = all_threads
+        # Qurollantirgan oqim - hodisalar tsikli (vaqt oynasi rejimi uchun)
+        self.loop_ident = threading.get_ident()
+        self.state = ARMED
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self.deadline = time.monotonic() + seconds
+
+        self.completed = 0  # Tugagan mos so'rovlar
+        self.samples = 0
+        self.waiting_samples = 0  # So'rov I/O kutgan yoki loop boshqa vazifada bo'lgan namunalar
+        self.stacks: Counter = Counter()
+        # Davom etayotgan so'rovlarning asyncio vazifalari -> (loop, oqim, marshrut nomini qaytaruvchi funksiya)
+        self.active: dict = {}
+        self._labels: dict = {}
+        self._lock = threading.Lock()
+
+    @property
+    def whole_process(self) -> bool:
+        """Vaqt oynasi marshrutsiz - barcha oqimlar yoziladi"""
+        return self.requests is None and self.route is None
+
+    def matches(self, route: Optional[str]) -> bool:
+        return self.route is None or self.route == route
+
+    def enter(self, resolve_route):
+        """So'rov boshlanishi; resolve_route() - marshrut nomi (keyinroq ma'lum bo'lishi mumkin)"""
+        if self.state != ARMED:
+            return None
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            return None
+        if task is None:
+            return None
+        with self._lock:
+            self.active[task] = (asyncio.get_running_loop(), threading.get_ident(), resolve_route)
+        return task
+
+    def exit(self, token) -> bool:
+        """So'rov tugashi; True - capture yakunlanishi kerak (N ta mos so'rov tugadi)"""
+        with self._lock:
+            entry = self.active.pop(token, None)
+            if entry is None or not self.matches(entry[2]()):
+                return False
+            self.completed += 1
+            return self.requests is not None and self.completed >= self.requests
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            label = f"{name} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+            self._labels[code] = label
+        return label
+
+    def _stack(self, frame) -> Optional[tuple]:
+        code = frame.f_code
+        if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+            return None
+        stack = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+    def sample(self, sampler_ident: int):
+        """Barcha oqimlardan bitta namuna (sampler oqimida chaqiriladi)"""
+        whole_process = self.whole_process
+        with self._lock:
+            active = {task: entry for task, entry in self.active.items() if self.matches(entry[2]())}
+        if not active and not whole_process:
+            return
+
+        loops = {ident: loop for loop, ident, _ in active.values()}
+        loop_idents = set(loops) | {self.loop_ident}
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == sampler_ident or (not self.all_threads and ident not in loop_idents):
+                continue
+            loop = loops.get(ident)
+            if loop is not None and not whole_process and asyncio.current_task(loop) not in active:
+                self.waiting_samples += 1
+                continue
+            stack = self._stack(frame)
+            if stack is None:
+                continue
+            stacks.append((names.get(ident, str(ident)),) + stack)
+        if stacks:
+            with self._lock:
+                self.stacks.update(stacks)
+                self.samples += 1
+
+    def _stacks(self) -> list:
+        with self._lock:
+            return list(self.stacks.items())
+
+    def status(self) -> dict:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "route": self.route,
+            "requests": self.requests,
+            "seconds": self.seconds,
+            "interval_ms": self.interval * 1000,
+            "all_threads": self.all_threads,
+            "profiled_requests": self.completed,
+            "in_flight": len(self.active),
+            "samples": self.samples,
+            "waiting_samples": self.waiting_samples,
+            "unique_stacks": len(self.stacks),
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def collapsed(self) -> str:
+        """Brendan Gregg collapsed-stack formati: `oqim;freym;...;freym son`"""
+        return "".join(
+            f"{';'.join(stack)} {count}\n"
+            for stack, count in sorted(self._stacks(), key=lambda item: item[1], reverse=True)
+        )
+
+    def speedscope(self) -> dict:
+        """speedscope.app fayl formati (har bir oqim - alohida sampled profil)"""
+        frames: list[dict] = []
+        index: dict[str, int] = {}
+        profiles: dict[str, dict] = {}
+        interval_ms = self.interval * 1000
+
+        for stack, count in self._stacks():
+            thread, frame_labels = stack[0], stack[1:]
+            ids = []
+            for label in frame_labels:
+                if label not in index:
+                    index[label] = len(frames)
+                    name, _, location = label.rpartition(" (")
+                    file, _, line = location.rstrip(")").rpartition(":")
+                    frames.append({"name": name, "file": file, "line": int(line) if line.isdigit() else None})
+                ids.append(index[label])
+            profile = profiles.setdefault(thread, {
+                "type": "sampled", "name": thread, "unit": "milliseconds",
+                "startValue": 0, "endValue": 0, "samples": [], "weights": [],
+            })
+            profile["samples"].append(ids)
+            profile["weights"].append(count * interval_ms)
+            profile["endValue"] += count * interval_ms
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"workly {self.route or 'process'} {self.created_at:%Y-%m-%d %H:%M:%S}",
+            "exporter": "workly",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": list(profiles.values()),
+        }
+
+
+class SamplingProfiler:
+    """Jarayondagi yagona profiler: bir vaqtda bitta faol capture"""
+
+    def __init__(self, history: int = 10, max_seconds: float = 300):
+        self.capture: Optional[ProfileCapture] = None
+        self.max_seconds = max_seconds
+        self._history: deque = deque(maxlen=history)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def arm(self, route: Optional[str] = None, requests: Optional[int] = None,
+            seconds: Optional[float] = None, interval_ms: float = PROFILER_INTERVAL_MS,
+            all_threads: bool = False) -> ProfileCapture:
+        """
+        Profilerni qurollantirish
+
+        Args:
+            route: Marshrut shabloni (API) yoki handler nomi (bot); None - hammasi
+            requests: Keyingi N ta mos so'rov; None - vaqt oynasi rejimi
+            seconds: Vaqt oynasi (requests bilan - kutish chegarasi), max_seconds gacha
+            all_threads: Ishchi oqimlarni ham yozish (standart - faqat event loop oqimi)
+
+        Raises:
+            ValueError: noto'g'ri parametrlar
+            RuntimeError: boshqa capture allaqachon faol
+        """
+        if requests is None and seconds is None:
+            raise ValueError("requests yoki seconds berilishi kerak")
+        if requests is not None and requests < 1:
+            raise ValueError("requests 1 dan kichik bo'lmasligi kerak")
+        if seconds is not None and not 0 < seconds <= self.max_seconds:
+            raise ValueError(f"seconds 0 dan {self.max_seconds:g} gacha bo'lishi kerak")
+        if not 1 <= interval_ms <= 1000:
+            raise ValueError("interval_ms 1 dan 1000 gacha bo'lishi kerak")
+
+        with self._lock:
+            if self.capture is not None:
+                raise RuntimeError(f"Profiler allaqachon faol: {self.capture.id}")
+            capture = ProfileCapture(route, requests, seconds or self.max_seconds, interval_ms, all_threads)
+            self._history.appendleft(capture)
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(capture,), name="workly-profiler", daemon=True
+            )
+            self.capture = capture
+            self._thread.start()
+        return capture
+
+    def enter(self, resolve_route):
+        """So'rov/handler boshlanishi; profil qilinmasa None (o'chiq holatda - bitta tekshiruv)"""
+        capture = self.capture
+        if capture is None:
+            return None
+        token = capture.enter(resolve_route)
+        return (capture, token) if token is not None else None
+
+    def exit(self, handle):
+        """enter() qaytargan qiymat bilan so'rov tugashi"""
+        if handle is None:
+            return
+        capture, token = handle
+        if capture.exit(token):
+            self._finish(capture, FINISHED)
+
+    def cancel(self) -> Optional[ProfileCapture]:
+        """Faol capture'ni to'xtatish (yig'ilgan namunalar saqlanadi)"""
+        capture = self.capture
+        if capture is not None:
+            self._finish(capture, CANCELLED)
+        return capture
+
+    def _finish(self, capture: ProfileCapture, state: str):
+        with self._lock:
+            if self.capture is not capture:
+                return
+            capture.state = state
+            capture.finished_at = datetime.utcnow()
+            self.capture = None
+            self._stop.set()
+
+    def _run(self, capture: ProfileCapture):
+        ident = threading.get_ident()
+        while not self._stop.wait(capture.interval):
+            if time.monotonic() >= capture.deadline:
+                # Vaqt oynasi tugadi (requests rejimida - kutish chegarasi)
+                self._finish(capture, FINISHED if capture.requests is None else CANCELLED)
+                break
+            capture.sample(ident)
+
+    def get(self, capture_id: str) -> Optional[ProfileCapture]:
+        for capture in self._history:
+            if capture.id == capture_id:
+                return capture
+        return None
+
+    def status(self) -> dict:
+        capture = self.capture
+        return {
+            "active": capture.status() if capture is not None else None,
+            "captures": [item.status() for item in self._history],
+            "max_seconds": self.max_seconds,
+        }
+
+
+profiler = SamplingProfiler(history=PROFILER_HISTORY, max_seconds=PROFILER_MAX_SECONDS)
+
+
+class ProfilerMiddleware:
+    """API so'rovlarini qurollantirilgan profilerga ulash (ASGI)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if profiler.capture is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Starlette marshrutni routing paytida scope["route"] ga yozadi
+        handle = profiler.enter(lambda: getattr(scope.get("route"), "path", None))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.exit(handle)
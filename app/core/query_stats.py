@@ -0,0 +1,241 @@
+"""
+SQL so'rovlar statistikasi va sekin so'rovlar logi
+
+Har bir engine'dagi so'rovlar (create_db_engine avtomatik ulaydi) SQLAlchemy
+before/after_cursor_execute hodisalari orqali o'lchanadi. So'rov matni
+normallashtiriladi - literallar, parametrlar va IN (...) ro'yxatlari `?` ga
+almashtiriladi - va shu shakl bo'yicha (fingerprint) yig'iladi: soni, umumiy
+vaqt, o'rtacha, p95 (oxirgi QUERY_STATS_SAMPLES ta bajarilish) va maksimum.
+
+SLOW_QUERY_MS dan sekin so'rov EXPLAIN rejasi bilan birga logga yoziladi
+(bir shakl uchun SLOW_QUERY_EXPLAIN_INTERVAL da bir marta). Eng qimmat
+so'rovlar /admin-api/db/queries va botdagi /queries buyrug'i bilan ko'riladi.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import (
+    QUERY_STATS_MAX_FINGERPRINTS,
+    QUERY_STATS_SAMPLES,
+    SLOW_QUERY_EXPLAIN,
+    SLOW_QUERY_EXPLAIN_INTERVAL,
+    SLOW_QUERY_MS,
+)
+from app.core.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERIES = counter("db_slow_queries_total", "SLOW_QUERY_MS dan sekin SQL so'rovlar")
+
+ORDER_FIELDS = ("total_ms", "count", "avg_ms", "p95_ms", "max_ms")
+# EXPLAIN faqat ma'lumot o'qiydigan/o'zgartiradigan so'rovlar uchun (DDL, PRAGMA, BEGIN - yo'q)
+EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+|\?")
+_NUMBER = re.compile(r"(?<![\w.$])-?\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROWS = re.compile(r"\(\?, \.\.\.\)(?:\s*,\s*\(\?, \.\.\.\))+")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize(statement: str) -> tuple[str, str]:
+    """
+    So'rov matnini shakliga keltirish
+
+    Returns:
+        (normallashtirilgan matn, fingerprint)
+    """
+    text = _STRING.sub("?", statement)
+    text = _PARAM.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _SPACE.sub(" ", text).strip()
+    text = _LIST.sub("(?, ...)", text)
+    text = _ROWS.sub("(?, ...), ...", text)
+    return text, hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+def _percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class QueryStat:
+    """Bitta so'rov shakli bo'yicha yig'indilar"""
+    __slots__ = ("fingerprint", "statement", "count", "total", "max", "slow", "recent",
+                 "engines", "last_seen", "plan", "explained_at")
+
+    def __init__(self, fingerprint: str, statement: str, samples: int):
+        self.fingerprint = fingerprint
+        self.statement = statement
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow = 0
+        self.recent = deque(maxlen=samples)
+        self.engines: set[str] = set()
+        self.last_seen: Optional[datetime] = None
+        self.plan: Optional[str] = None
+        self.explained_at = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "fingerprint": self.fingerprint,
+            "statement": self.statement,
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0,
+            "p95_ms": round(_percentile(self.recent, 0.95) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "slow": self.slow,
+            "engines": sorted(self.engines),
+            "last_seen": self.last_seen.isoformat() if self.last_seen else None,
+            "plan": self.plan,
+        }
+
+
+class QueryStats:
+    """Jarayondagi barcha engine'lar uchun so'rovlar statistikasi"""
+
+    def __init__(self, slow_ms: float = 200, explain: bool = True, explain_interval: float = 300,
+                 max_fingerprints: int = 500, samples: int = 256):
+        self.slow_seconds = slow_ms / 1000
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.max_fingerprints = max_fingerprints
+        self.samples = samples
+        self._stats: dict[str, QueryStat] = {}
+        self.dropped = 0  # max_fingerprints to'lgandan keyin hisobga olinmagan so'rovlar
+        self.started_at = datetime.utcnow()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, seconds: float, engine_name: str) -> Optional[QueryStat]:
+        """Bajarilgan so'rovni hisobga olish"""
+        normalized, fingerprint = normalize(statement)
+        with self._lock:
+            stat = self._stats.get(fingerprint)
+            if stat is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    self.dropped += 1
+                    return None
+                stat = self._stats[fingerprint] = QueryStat(fingerprint, normalized, self.samples)
+            stat.count += 1
+            stat.total += seconds
+            stat.max = max(stat.max, seconds)
+            stat.recent.append(seconds)
+            stat.engines.add(engine_name)
+            stat.last_seen = datetime.utcnow()
+            if seconds >= self.slow_seconds:
+                stat.slow += 1
+        return stat
+
+    def top(self, limit: int = 20, order_by: str = "total_ms") -> list[dict]:
+        """Eng qimmat so'rov shakllari"""
+        if order_by not in ORDER_FIELDS:
+            raise ValueError(f"order_by: {', '.join(ORDER_FIELDS)}")
+        with self._lock:
+            rows = [stat.as_dict() for stat in self._stats.values()]
+        rows.sort(key=lambda row: row[order_by], reverse=True)
+        return rows[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.dropped = 0
+            self.started_at = datetime.utcnow()
+
+    def status(self) -> dict:
+        with self._lock:
+            fingerprints = len(self._stats)
+            executions = sum(stat.count for stat in self._stats.values())
+            total = sum(stat.total for stat in self._stats.values())
+        return {
+            "since": self.started_at.isoformat(),
+            "fingerprints": fingerprints,
+            "executions": executions,
+            "total_ms": round(total * 1000, 3),
+            "dropped": self.dropped,
+            "slow_query_ms": self.slow_seconds * 1000,
+        }
+
+    def should_explain(self, stat: QueryStat) -> bool:
+        if not self.explain or not stat.statement.lstrip("( ").upper().startswith(EXPLAINABLE):
+            return False
+        now = time.monotonic()
+        if stat.explained_at and now - stat.explained_at < self.explain_interval:
+            return False
+        stat.explained_at = now
+        return True
+
+
+query_stats = QueryStats(
+    slow_ms=SLOW_QUERY_MS,
+    explain=SLOW_QUERY_EXPLAIN,
+    explain_interval=SLOW_QUERY_EXPLAIN_INTERVAL,
+    max_fingerprints=QUERY_STATS_MAX_FINGERPRINTS,
+    samples=QUERY_STATS_SAMPLES,
+)
+
+
+def _explain(conn, statement: str, parameters) -> Optional[str]:
+    # Xuddi shu ulanish va parametrlar bilan; DBAPI kursor orqali - hodisalar qayta chaqirilmaydi
+    dialect = conn.dialect.name
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    # SQLite: (id, parent, notused, detail); PostgreSQL/MySQL: birinchi ustun
+    return "\n".join(str(row[3] if dialect == "sqlite" else row[0]) for row in rows)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_stats_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_stats_started", None)
+    if started is None:
+        return
+    seconds = time.perf_counter() - started
+    engine_name = getattr(conn.engine.pool, "metrics_name", "default")
+    stat = query_stats.record(statement, seconds, engine_name)
+    if stat is None or seconds < query_stats.slow_seconds:
+        return
+
+    SLOW_QUERIES.inc(engine=engine_name)
+    if not executemany and query_stats.should_explain(stat):
+        try:
+            stat.plan = _explain(conn, statement, parameters)
+        except Exception as e:
+            stat.plan = f"EXPLAIN xatosi: {e}"
+    logger.warning(
+        "Sekin SQL so'rov: %.1f ms (%s, %s) %s\nReja:\n%s",
+        seconds * 1000, engine_name, stat.fingerprint, " ".join(statement.split())[:1000], stat.plan or "-"
+    )
+
+
+def instrument_query_stats(db_engine: Optional[AsyncEngine]):
+    """Engine so'rovlarini query_stats ga yozish (takroriy chaqiruv xavfsiz)"""
+    if db_engine is None:
+        return
+    sync_engine = db_engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,174 @@
+"""
+O'qish so'rovlarini replikaga yo'naltirish
+
+Hisobot va statistika so'rovlari (faqat o'qish) replikaga yuboriladi, shunda
+oy oxiridagi og'ir eksportlar ertalabki check-in yozuvlarini sekinlashtirmaydi.
+
+    - replika sozlanmagan yoki ishlamayotgan bo'lsa - asosiy baza ishlatiladi;
+    - fon tekshiruvi har REPLICA_CHECK_INTERVAL sekundda replika kechikishini o'lchaydi;
+    - "bugungi" so'rovlar (fresh=True) replikaga faqat kechikish
+      REPLICA_MAX_LAG_SECONDS dan oshmaganda yuboriladi.
+
+Kechikish PostgreSQL replikasida WAL qayta ijrosi bo'yicha, boshqa bazalarda
+(masalan, nusxalanadigan SQLite fayli) davomat jadvalidagi eng so'nggi yozuv
+vaqtini asosiy baza bilan solishtirib o'lchanadi.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+_POSTGRES_LAG_SQL = text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaRouter:
+    """Asosiy baza va (ixtiyoriy) replika o'rtasida o'qish sessiyalarini tanlash"""
+
+    def __init__(self, primary, replica=None, max_lag_seconds: float = 5,
+                 check_interval: float = 5, name: str = "replica"):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.name = name
+        self.healthy = replica is not None
+        self.lag_seconds: Optional[float] = None
+        self.checked_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.replica is not None
+
+    def use_replica(self, fresh: bool = False) -> bool:
+        """Replikadan o'qish mumkinmi (fresh - bugungi ma'lumotlar uchun kechikish hisobga olinadi)"""
+        if not self.enabled or not self.healthy:
+            return False
+        if fresh:
+            return self.lag_seconds is not None and self.lag_seconds <= self.max_lag_seconds
+        return True
+
+    def sessionmaker(self, fresh: bool = False):
+        """O'qish uchun sessiya fabrikasi (ulanish tekshirilmaydi)"""
+        return self.replica if self.use_replica(fresh) else self.primary
+
+    @asynccontextmanager
+    async def session(self, fresh: bool = False) -> AsyncIterator[AsyncSession]:
+        """
+        O'qish sessiyasi - replikaga ulanib bo'lmasa asosiy bazaga o'tiladi
+
+        Ulanish oldindan olinadi, shuning uchun replika xatosi so'rov ichida emas,
+        shu yerda aniqlanadi.
+        """
+        if self.use_replica(fresh):
+            session = self.replica()
+            try:
+                await session.connection()
+            except Exception as e:
+                await session.close()
+                self._mark_unhealthy(e)
+            else:
+                try:
+                    yield session
+                finally:
+                    await session.close()
+                return
+
+        async with self.primary() as session:
+            yield session
+
+    def session_for(self, end_date: Optional[date] = None):
+        """Davr uchun o'qish sessiyasi - davr bugungi kunni qamrasa kechikish hisobga olinadi"""
+        return self.session(fresh=end_date is None or end_date >= date.today())
+
+    def _mark_unhealthy(self, error: Exception):
+        if self.healthy:
+            logger.warning("Replika (%s) ishlamayapti, asosiy bazaga o'tildi: %s", self.name, error)
+        self.healthy = False
+        self.last_error = str(error)
+
+    # ---------- Kechikishni o'lchash ----------
+
+    async def _watermark(self, factory) -> Optional[datetime]:
+        from app.models.attendance import Attendance
+        async with factory() as session:
+            result = await session.execute(select(func.max(Attendance.check_time)))
+            return result.scalar()
+
+    async def measure_lag(self) -> float:
+        """Replika asosiy bazadan necha sekund orqada"""
+        async with self.replica() as session:
+            if session.get_bind().dialect.name == "postgresql":
+                result = await session.execute(_POSTGRES_LAG_SQL)
+                return max(float(result.scalar() or 0), 0.0)
+
+        primary_mark = await self._watermark(self.primary)
+        replica_mark = await self._watermark(self.replica)
+        if primary_mark is None or (replica_mark is not None and replica_mark >= primary_mark):
+            return 0.0
+        if replica_mark is None:
+            return float("inf")
+        return (primary_mark - replica_mark).total_seconds()
+
+    async def check(self) -> dict:
+        """Replika holatini yangilash"""
+        if not self.enabled:
+            return self.status()
+        started = time.perf_counter()
+        try:
+            self.lag_seconds = await self.measure_lag()
+        except Exception as e:
+            self.lag_seconds = None
+            self._mark_unhealthy(e)
+        else:
+            if not self.healthy:
+                logger.info("Replika (%s) qayta ishlamoqda", self.name)
+            self.healthy = True
+            self.last_error = None
+        self.checked_at = datetime.now()
+        logger.debug("Replika tekshiruvi %.1fms", (time.perf_counter() - started) * 1000)
+        return self.status()
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "healthy": self.healthy,
+            # inf - replikada hali davomat yozuvlari yo'q
+            "lag_seconds": None if self.lag_seconds in (None, float("inf")) else round(self.lag_seconds, 3),
+            "max_lag_seconds": self.max_lag_seconds,
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+            "error": self.last_error,
+        }
+
+    # ---------- Fon tekshiruvi ----------
+
+    async def _run(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+    async def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
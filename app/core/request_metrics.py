@@ -0,0 +1,149 @@
+"""
+API so'rovlari metrikalari (ASGI middleware)
+
+Har bir HTTP so'rov uchun marshrut shabloni (/employees/{employee_id}),
+metod va status bo'yicha yoziladi:
+
+    - http_request_duration_seconds - javob to'liq yuborilguncha vaqt;
+    - http_request_db_queries / http_request_db_seconds - so'rov davomida
+      bajarilgan SQL so'rovlar soni va ularning umumiy vaqti;
+    - http_request_size_bytes / http_response_size_bytes - yuklama hajmi.
+
+SQL so'rovlar SQLAlchemy before/after_cursor_execute hodisalari orqali
+sanaladi (instrument_engine). Joriy so'rov contextvar'da saqlanadi, shuning
+uchun so'rovdan tashqaridagi (fon vazifalari, navbat) SQL hisobga kirmaydi.
+REQUEST_QUERY_WARN_THRESHOLD dan ko'p SQL bajargan so'rov N+1 ehtimoli
+sifatida eng ko'p takrorlangan so'rov bilan birga logga yoziladi.
+"""
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import REQUEST_QUERY_WARN_THRESHOLD
+from app.core.metrics import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+REQUEST_SECONDS = histogram("http_request_duration_seconds", "API so'rovi davomiyligi (method, route, status)")
+REQUEST_QUERIES = histogram("http_request_db_queries", "So'rov davomida bajarilgan SQL so'rovlar soni",
+                            buckets=QUERY_COUNT_BUCKETS)
+REQUEST_DB_SECONDS = histogram("http_request_db_seconds", "So'rov davomida SQL so'rovlarga ketgan vaqt")
+REQUEST_BYTES = histogram("http_request_size_bytes", "So'rov tanasi hajmi", buckets=SIZE_BUCKETS)
+RESPONSE_BYTES = histogram("http_response_size_bytes", "Javob tanasi hajmi", buckets=SIZE_BUCKETS)
+QUERY_FLOODS = counter("http_request_query_flood_total",
+                       "REQUEST_QUERY_WARN_THRESHOLD dan ko'p SQL bajargan so'rovlar (N+1 ehtimoli)")
+
+
+class RequestStats:
+    """Bitta so'rov davomidagi SQL statistikasi"""
+    __slots__ = ("queries", "db_seconds", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements: dict[str, int] = {}
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._request_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_request_started", None)
+    if stats is None or started is None:
+        return
+    stats.queries += 1
+    stats.db_seconds += time.perf_counter() - started
+    stats.statements[statement] = stats.statements.get(statement, 0) + 1
+
+
+def instrument_engine(db_engine: Optional[AsyncEngine]):
+    """Engine SQL so'rovlarini joriy API so'roviga hisoblash"""
+    if db_engine is None:
+        return
+    sync_engine = db_engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _route_template(scope) -> str:
+    # Starlette marshrutni scope["route"] ga yozadi; topilmagan yo'llar bitta yorliqda
+    # (aks holda har bir noto'g'ri URL alohida metrika bo'lib qoladi)
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class RequestMetricsMiddleware:
+    """Marshrutlar bo'yicha kechikish, SQL so'rovlar va yuklama hajmi metrikalari"""
+
+    def __init__(self, app, query_warn_threshold: int = REQUEST_QUERY_WARN_THRESHOLD):
+        self.app = app
+        self.query_warn_threshold = query_warn_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        request_bytes = 0
+        response_bytes = 0
+        status = 500
+
+        async def receive_wrapper():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal response_bytes, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            _current.reset(token)
+            self._record(scope, stats, time.perf_counter() - started, status, request_bytes, response_bytes)
+
+    def _record(self, scope, stats: RequestStats, seconds: float, status: int,
+                request_bytes: int, response_bytes: int):
+        method = scope["method"]
+        route = _route_template(scope)
+        REQUEST_SECONDS.observe(seconds, method=method, route=route, status=str(status))
+        REQUEST_QUERIES.observe(stats.queries, method=method, route=route)
+        REQUEST_DB_SECONDS.observe(stats.db_seconds, method=method, route=route)
+        REQUEST_BYTES.observe(request_bytes, method=method, route=route)
+        RESPONSE_BYTES.observe(response_bytes, method=method, route=route)
+
+        if stats.queries > self.query_warn_threshold:
+            QUERY_FLOODS.inc(method=method, route=route)
+            statement, repeats = max(stats.statements.items(), key=lambda item: item[1])
+            logger.warning(
+                "N+1 ehtimoli: %s %s - %s ta SQL so'rov (%.3fs DB, %.3fs jami); eng ko'p takrorlangan (%s marta): %s",
+                method, route, stats.queries, stats.db_seconds, seconds, repeats, " ".join(statement.split())[:300]
+            )
@@ -0,0 +1,22 @@
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from app.core.config import ADMIN_API_INSECURE, ADMIN_API_TOKEN
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Admin API uchun tekshiruv (dependency)
+
+    ADMIN_API_TOKEN o'rnatilmagan bo'lsa yopiq; faqat ADMIN_API_INSECURE=1 bilan
+    (lokal ishlab chiqish) tokensiz ruxsat beriladi.
+    """
+    if not ADMIN_API_TOKEN:
+        if ADMIN_API_INSECURE:
+            return
+        raise HTTPException(status_code=403, detail="Admin API o'chirilgan (ADMIN_API_TOKEN o'rnatilmagan)")
+
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_API_TOKEN):
+        raise HTTPException(status_code=401, detail="Admin token noto'g'ri")
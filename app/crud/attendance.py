@@ -1,7 +1,8 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
-from sqlalchemy import and_, func, desc, text
+from sqlalchemy import and_, or_, func, desc, text
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, date, time, timedelta
 from typing import Optional, List
 from app.models import attendance as attendance_model
@@ -9,6 +10,12 @@ from app.models import employee as employee_model
 from app.schemas import attendance as attendance_schema
 from app.crud.employee import get_employee_by_uuid
 from app.utils.timezone import get_tashkent_time, convert_to_tashkent, get_tashkent_time_naive
+from app.services.attendance_queue import DuplicateAttendanceError, PendingAttendance, get_attendance_queue
+from app.services.payroll import HOURS_PER_DAY, compute_payroll, payroll_salary_info
+from app.services.work_calendar import get_work_calendar
+from app.core.invalidation import ATTENDANCE, invalidation_bus
+from app.services.rollups import apply_attendance_rows, bucket_end, bucket_start, query_rollups
+from app.services.attendance_storage import attendance_source
 
 # Ish vaqti sozlamalari
 WORK_START_TIME = time(9, 30)  # 9:30
@@ -51,7 +58,8 @@ def calculate_time_difference_minutes(actual_time: time, expected_time: time) ->
     expected_minutes = expected_time.hour * 60 + expected_time.minute
     return actual_minutes - expected_minutes
 
-async def create_attendance_by_qr(db: AsyncSession, qr_request: attendance_schema.QRScanRequest):
+async def create_attendance_by_qr(db: AsyncSession, qr_request: attendance_schema.QRScanRequest,
+                                  wait_for_id: bool = True):
     """QR kod orqali davomat yaratish"""
     # Employee ni UUID bo'yicha topish
     employee = await get_employee_by_uuid(db, qr_request.qr_code)
@@ -66,29 +74,27 @@ async def create_attendance_by_qr(db: AsyncSession, qr_request: attendance_schem
         return {"error": time_error}
 
     # Bugun allaqachon shu turdagi belgi qo'yilgan yoki yo'qligini tekshirish
-    already_checked = await check_if_already_checked_today(
-        db, employee.id, qr_request.check_type.value
-    )
+    already_checked = not await _reserve_check(db, employee.id, qr_request.check_type.value, check_time)
     
     if already_checked:
-        action = "kelgan" if qr_request.check_type.value == "IN" else "ketgan"
-        return {"error": f"Siz bugun allaqachon {action} deb belgilangansiz"}
+        return _already_checked_error(qr_request.check_type.value)
 
     # Kechikishni hisoblash
     is_late = calculate_attendance_status(check_time, qr_request.check_type.value)
     
-    db_attendance = attendance_model.Attendance(
-        employee_id=employee.id,
-        check_type=qr_request.check_type,
-        source=qr_request.source if hasattr(qr_request, 'source') else attendance_model.SourceEnum.APP,
-        check_time=check_time,  # Явно устанавливаем Ташкентское время
-        location_lat=qr_request.location_lat if hasattr(qr_request, 'location_lat') else None,
-        location_lon=qr_request.location_lon if hasattr(qr_request, 'location_lon') else None,
-        is_late=is_late
-    )
-    db.add(db_attendance)
-    await db.commit()
-    await db.refresh(db_attendance)
+    try:
+        db_attendance = await _store_attendance(db, {
+            "employee_id": employee.id,
+            "check_type": qr_request.check_type,
+            "source": qr_request.source if hasattr(qr_request, 'source') else attendance_model.SourceEnum.APP,
+            "check_time": check_time,  # Явно устанавливаем Ташкентское время
+            "location_lat": qr_request.location_lat if hasattr(qr_request, 'location_lat') else None,
+            "location_lon": qr_request.location_lon if hasattr(qr_request, 'location_lon') else None,
+            "is_late": is_late
+        }, wait_for_id=wait_for_id)
+    except DuplicateAttendanceError:
+        # Boshqa jarayon (worker yoki bot) shu paytda yozib ulgurgan
+        return _already_checked_error(qr_request.check_type.value)
     
     # Muvaffaqiyatli natija
     action = "keldi" if qr_request.check_type.value == "IN" else "ketdi"
@@ -116,79 +122,432 @@ async def create_attendance(db: AsyncSession, attendance: attendance_schema.Atte
     if not is_valid_time:
         return {"error": time_error}
 
+    # Bir xil belgini ikki marta yozmaslik (navbat bilan ham, navbatsiz ham)
+    if not await _reserve_check(db, employee.id, attendance.check_type.value, check_time):
+        return _already_checked_error(attendance.check_type.value)
+
     # Kechikishni hisoblash
     is_late = calculate_attendance_status(check_time, attendance.check_type.value)
     
-    db_attendance = attendance_model.Attendance(
-        employee_id=employee.id,
-        check_type=attendance.check_type,
-        check_time=check_time,  # Явно устанавливаем Ташкентское время
-        is_late=is_late
-    )
-    db.add(db_attendance)
+    try:
+        return await _store_attendance(db, {
+            "employee_id": employee.id,
+            "check_type": attendance.check_type,
+            "source": attendance.source or attendance_model.SourceEnum.APP,
+            "check_time": check_time,  # Явно устанавливаем Ташкентское время
+            "location_lat": attendance.location_lat,
+            "location_lon": attendance.location_lon,
+            "is_late": is_late
+        })
+    except DuplicateAttendanceError:
+        return _already_checked_error(attendance.check_type.value)
+
+def _already_checked_error(check_type: str) -> dict:
+    action = "kelgan" if check_type == "IN" else "ketgan"
+    return {"error": f"Siz bugun allaqachon {action} deb belgilangansiz"}
+
+async def _reserve_check(db: AsyncSession, employee_id: int, check_type: str, check_time: datetime) -> bool:
+    """Belgini tekshirish va band qilish - navbat keshi yoki bazadagi COUNT orqali"""
+    queue = get_attendance_queue()
+    if queue is not None:
+        return await queue.reserve(db, employee_id, check_type, check_time.date())
+    return not await check_if_already_checked_today(db, employee_id, check_type)
+
+async def _store_attendance(db: AsyncSession, row: dict, wait_for_id: bool = True):
+    """
+    Davomat yozuvini saqlash - navbat ishlayotgan bo'lsa u orqali guruhlab yoziladi
+
+    Belgi oldindan _reserve_check bilan band qilingan bo'lishi kerak.
+    Navbat rejimida wait_for_id=False bo'lsa saqlangan yozuv emas,
+    PendingAttendance (id=None) qaytariladi.
+
+    Raises:
+        DuplicateAttendanceError: Belgi bazada allaqachon bor (unikal indeks)
+    """
+    queue = get_attendance_queue()
+    if queue is not None:
+        # So'rov sessiyasining ulanishini pulga qaytarish - yozuvchi kutayotganda band qilmasin
+        await db.commit()
+        try:
+            attendance_id = await queue.submit(row, wait=wait_for_id)
+        except Exception:
+            queue.release(row["employee_id"], row["check_type"].value, row["check_time"].date())
+            raise
+        # ATTENDANCE hodisasini navbat yozuvchisi commit'dan keyin e'lon qiladi
+        if attendance_id is None:
+            return PendingAttendance(**row)
+        return attendance_model.Attendance(id=attendance_id, **row)
+
+    db_attendance = attendance_model.Attendance(**row)
+    try:
+        # SAVEPOINT - xato bo'lsa so'rovda yuklangan obyektlar (xodim) eskirmaydi
+        async with db.begin_nested():
+            db.add(db_attendance)
+            await apply_attendance_rows(db, [row])
+    except IntegrityError:
+        # Unikal indeks (xodim, tur, kun) - boshqa jarayon shu belgini allaqachon yozgan
+        day = row["check_time"].date()
+        Attendance = attendance_model.Attendance
+        result = await db.execute(
+            select(func.count(Attendance.id)).where(and_(
+                *_employee_history_filters(Attendance, row["employee_id"], day, day),
+                Attendance.check_type == row["check_type"]
+            ))
+        )
+        if result.scalar():
+            raise DuplicateAttendanceError(row["employee_id"], row["check_type"].value, day)
+        raise
     await db.commit()
     await db.refresh(db_attendance)
+    invalidation_bus.publish(ATTENDANCE, ids=[row["employee_id"]], day=row["check_time"].date())
     return db_attendance
 
+def _employee_history_filters(Attendance, employee_id: int, start_date: Optional[date] = None,
+                              end_date: Optional[date] = None) -> list:
+    """Xodim tarixi uchun filtrlar (indeksdan foydalanish uchun sana oralig'i ko'rinishida)"""
+    filters = [Attendance.employee_id == employee_id]
+    if start_date:
+        filters.append(Attendance.check_time >= datetime.combine(start_date, time.min))
+    if end_date:
+        filters.append(
+            Attendance.check_time < datetime.combine(end_date + timedelta(days=1), time.min)
+        )
+    return filters
+
 async def get_attendance_by_employee(db: AsyncSession, employee_id: int, 
                                    start_date: Optional[date] = None, 
-                                   end_date: Optional[date] = None):
-    query = select(attendance_model.Attendance).where(
-        attendance_model.Attendance.employee_id == employee_id
+                                   end_date: Optional[date] = None,
+                                   limit: Optional[int] = None,
+                                   after: Optional[tuple[datetime, int]] = None):
+    """
+    Xodimning davomat tarixi (eng yangisi birinchi)
+    
+    Args:
+        limit: Sahifadagi yozuvlar soni (None - barchasi)
+        after: Oldingi sahifaning oxirgi yozuvi (check_time, id) - keyset paginatsiya
+    """
+    Attendance = await attendance_source(db, start_date, end_date)
+    query = select(Attendance).where(
+        and_(*_employee_history_filters(Attendance, employee_id, start_date, end_date))
     )
     
-    if start_date:
-        query = query.where(func.date(attendance_model.Attendance.check_time) >= start_date)
-    if end_date:
-        query = query.where(func.date(attendance_model.Attendance.check_time) <= end_date)
+    if after:
+        after_time, after_id = after
+        query = query.where(
+            or_(
+                Attendance.check_time < after_time,
+                and_(
+                    Attendance.check_time == after_time,
+                    Attendance.id < after_id
+                )
+            )
+        )
+    
+    query = query.order_by(
+        desc(Attendance.check_time),
+        desc(Attendance.id)
+    )
+    if limit:
+        query = query.limit(limit)
     
-    query = query.order_by(desc(attendance_model.Attendance.check_time))
     result = await db.execute(query)
     return result.scalars().all()
 
+async def stream_attendance_by_employee(db: AsyncSession, employee_id: int,
+                                        start_date: Optional[date] = None,
+                                        end_date: Optional[date] = None,
+                                        batch_size: int = 1000):
+    """
+    Xodimning davomat tarixini server tomonidagi kursor orqali qismlab qaytarish
+    
+    ORM obyektlari yaratilmaydi - har bir qism ustunlar tuple'laridan iborat,
+    shuning uchun xotira tarix uzunligiga bog'liq emas.
+    """
+    Attendance = await attendance_source(db, start_date, end_date)
+    query = select(
+        Attendance.id,
+        Attendance.employee_id,
+        Attendance.check_type,
+        Attendance.check_time,
+        Attendance.source,
+        Attendance.location_lat,
+        Attendance.location_lon,
+        Attendance.is_late
+    ).where(
+        and_(*_employee_history_filters(Attendance, employee_id, start_date, end_date))
+    ).order_by(
+        desc(Attendance.check_time),
+        desc(Attendance.id)
+    ).execution_options(yield_per=batch_size)
+    
+    result = await db.stream(query)
+    async for partition in result.partitions(batch_size):
+        yield partition
+
 async def get_daily_attendance(db: AsyncSession, target_date: date):
     """Kunlik davomat ma'lumotlari"""
-    query = select(attendance_model.Attendance).options(
-        selectinload(attendance_model.Attendance.employee)
+    Attendance = await attendance_source(db, target_date, target_date)
+    query = select(Attendance).options(
+        selectinload(Attendance.employee)
     ).where(
-        func.date(attendance_model.Attendance.check_time) == target_date
-    ).order_by(attendance_model.Attendance.check_time)
+        func.date(Attendance.check_time) == target_date
+    ).order_by(Attendance.check_time)
     
     result = await db.execute(query)
     return result.scalars().all()
 
-async def get_monthly_attendance_report(db: AsyncSession, month: int, year: int):
-    """Oylik hisobot uchun ma'lumotlar - yangilangan versiya"""
-    start_date = date(year, month, 1)
+async def get_daily_attendance_rows(db: AsyncSession, target_date: date) -> list:
+    """
+    Kunlik hisobot uchun yengil ma'lumotlar - bitta JOIN so'rovi, ORM obyektlarisiz
+    
+    Returns:
+        (full_name, position, check_type, check_time, is_late) tuple'lari ro'yxati
+    """
+    Attendance = await attendance_source(db, target_date, target_date)
+    day_start = datetime.combine(target_date, time.min)
+    result = await db.execute(
+        select(
+            employee_model.Employee.full_name,
+            employee_model.Employee.position,
+            Attendance.check_type,
+            Attendance.check_time,
+            Attendance.is_late
+        )
+        .select_from(Attendance)
+        .outerjoin(employee_model.Employee, employee_model.Employee.id == Attendance.employee_id)
+        .where(
+            and_(
+                Attendance.check_time >= day_start,
+                Attendance.check_time < day_start + timedelta(days=1)
+            )
+        )
+        .order_by(Attendance.check_time)
+    )
+    return result.all()
+
+async def get_daily_overview_counts(db: AsyncSession, target_date: date) -> dict:
+    """
+    Kunlik umumiy ko'rsatkichlar - agregat so'rovlar bilan (qatorlar yuklanmaydi)
+    
+    Returns:
+        checked_in (kelgan xodimlar), late_arrivals (kechikkan kelishlar),
+        currently_in_office (oxirgi belgisi IN bo'lgan xodimlar)
+    """
+    Attendance = await attendance_source(db, target_date, target_date)
+    day_start = datetime.combine(target_date, time.min)
+    day_filter = and_(
+        Attendance.check_time >= day_start,
+        Attendance.check_time < day_start + timedelta(days=1)
+    )
+    is_in = Attendance.check_type == attendance_model.CheckTypeEnum.IN
     
-    # Oyning oxirgi kunini aniqlash
-    if month == 12:
-        end_date = date(year + 1, 1, 1) - timedelta(days=1)
-    else:
-        end_date = date(year, month + 1, 1) - timedelta(days=1)
+    result = await db.execute(
+        select(
+            func.count(func.distinct(Attendance.employee_id)).filter(is_in),
+            func.count(Attendance.id).filter(and_(is_in, Attendance.is_late == True))
+        ).where(day_filter)
+    )
+    checked_in, late_arrivals = result.one()
+    
+    # Har bir xodimning kun ichidagi oxirgi belgisi
+    last_check = (
+        select(Attendance.employee_id, func.max(Attendance.check_time).label("last_time"))
+        .where(day_filter)
+        .group_by(Attendance.employee_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(func.count(func.distinct(Attendance.employee_id)))
+        .join(last_check, and_(
+            Attendance.employee_id == last_check.c.employee_id,
+            Attendance.check_time == last_check.c.last_time
+        ))
+        .where(is_in)
+    )
+    
+    return {
+        "checked_in": checked_in,
+        "late_arrivals": late_arrivals,
+        "currently_in_office": result.scalar_one()
+    }
+
+async def get_monthly_rate_summary(db: AsyncSession, month: int, year: int) -> dict:
+    """
+    Faol xodimlar bo'yicha o'rtacha davomat va punktuallik foizlari
+    
+    get_monthly_statistics_bulk bilan bir xil qoidalar: ish kunidagi oxirgi
+    kelish (IN) belgisi hisobga olinadi. Natija xodim-kun juftliklari
+    darajasida agregatlanadi - davomat qatorlari yuklanmaydi.
+    
+    Returns:
+        employees, working_days, avg_attendance_rate, avg_punctuality_rate
+    """
+    Employee = employee_model.Employee
+    
+    working_dates = get_work_calendar().month_working_dates(year, month)
+    working_days = len(working_dates)
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    Attendance = await attendance_source(db, start.date(), end.date() - timedelta(days=1))
+    
+    day = func.date(Attendance.check_time)
+    last_in = (
+        select(
+            Attendance.employee_id,
+            day.label("day"),
+            func.max(Attendance.check_time).label("last_in")
+        )
+        .join(Employee, Employee.id == Attendance.employee_id)
+        .where(and_(
+            Employee.is_active == True,
+            Attendance.check_type == attendance_model.CheckTypeEnum.IN,
+            Attendance.check_time >= start,
+            Attendance.check_time < end
+        ))
+        .group_by(Attendance.employee_id, day)
+        .subquery()
+    )
+    result = await db.execute(
+        select(last_in.c.employee_id, last_in.c.day, Attendance.is_late)
+        .join(Attendance, and_(
+            Attendance.employee_id == last_in.c.employee_id,
+            Attendance.check_time == last_in.c.last_in
+        ))
+    )
     
-    # Ish kunlarini hisoblash (6 kun/hafta - faqat yakshanba dam)
-    working_days = 0
-    current_date = start_date
-    while current_date <= end_date:
-        if current_date.weekday() != 6:  # Faqat yakshanba (Sunday=6) dam, qolgan kunlar ish
-            working_days += 1
-        current_date += timedelta(days=1)
+    working_set = set(working_dates)
+    present = {}
+    late = {}
+    for employee_id, check_day, is_late in result.all():
+        # SQLite func.date() qator qaytaradi
+        if isinstance(check_day, str):
+            check_day = date.fromisoformat(check_day)
+        if check_day not in working_set:
+            continue
+        present[employee_id] = present.get(employee_id, 0) + 1
+        if is_late:
+            late[employee_id] = late.get(employee_id, 0) + 1
+    
+    result = await db.execute(select(func.count(Employee.id)).where(Employee.is_active == True))
+    employees = result.scalar_one()
+    
+    attendance_rates = [
+        round(days / working_days * 100, 2) if working_days > 0 else 0 for days in present.values()
+    ]
+    punctuality_rates = [
+        round((days - late.get(employee_id, 0)) / days * 100, 2) for employee_id, days in present.items()
+    ]
+    # Kelmagan xodimlarning foizlari 0 - o'rtachaga barcha faol xodimlar kiradi
+    return {
+        "employees": employees,
+        "working_days": working_days,
+        "avg_attendance_rate": round(sum(attendance_rates) / employees, 2) if employees else 0,
+        "avg_punctuality_rate": round(sum(punctuality_rates) / employees, 2) if employees else 0
+    }
+
+TREND_BUCKETS = ("day", "week", "month")
+
+async def get_attendance_trends(db: AsyncSession, start_date: date, end_date: date,
+                                bucket: str = "week") -> List[dict]:
+    """
+    Davr bo'yicha davomat trendi - rollup jadvalidan
+    
+    Args:
+        bucket: day, week yoki month
+    
+    Returns:
+        Har bir davr uchun (bo'sh davrlar ham) lug'at, eng eski davrdan boshlab
+    """
+    if bucket not in TREND_BUCKETS:
+        raise ValueError(f"Noma'lum davr: {bucket} ({', '.join(TREND_BUCKETS)})")
+    
+    summary = await query_rollups(db, start_date, end_date, bucket, group_by=None)
+    rows = {
+        bucket_start(date.fromisoformat(row["bucket_start"]), bucket): row
+        for row in summary["rows"]
+    }
     
-    # Har bir xodim uchun batafsil statistika
-    query = select(employee_model.Employee).where(employee_model.Employee.is_active == True)
+    trends = []
+    current = bucket_start(start_date, bucket)
+    while current <= end_date:
+        row = rows.get(current, {})
+        check_ins = row.get("check_ins", 0)
+        late_count = row.get("late_check_ins", 0)
+        trends.append({
+            "bucket_start": current.isoformat(),
+            "bucket_end": bucket_end(current, bucket).isoformat(),
+            "total_check_ins": check_ins,
+            "late_arrivals": late_count,
+            "unique_employees": row.get("present_employees", 0),
+            "late_percentage": round((late_count / check_ins * 100), 1) if check_ins else 0
+        })
+        current = bucket_end(current, bucket) + timedelta(days=1)
+    return trends
+
+def _employee_period_stats_query(Attendance, start_date: date, end_date: date):
+    """Xodimlar bo'yicha davr statistikasi (GROUP BY xodim) - faol xodimlar, davomatsizlari ham"""
+    Employee = employee_model.Employee
+    is_in = Attendance.check_type == attendance_model.CheckTypeEnum.IN
+    is_out = Attendance.check_type == attendance_model.CheckTypeEnum.OUT
+    
+    return (
+        select(
+            Employee.id.label("employee_id"),
+            Employee.full_name.label("full_name"),
+            Employee.position.label("position"),
+            func.count(Attendance.id).filter(is_in).label("check_ins"),
+            func.count(Attendance.id).filter(is_out).label("check_outs"),
+            func.count(func.distinct(func.date(Attendance.check_time))).filter(is_in).label("working_days"),
+            func.count(Attendance.id).filter(and_(is_in, Attendance.is_late == True)).label("late_days")
+        )
+        .select_from(Employee)
+        .outerjoin(Attendance, and_(
+            Attendance.employee_id == Employee.id,
+            Attendance.check_time >= datetime.combine(start_date, time.min),
+            Attendance.check_time < datetime.combine(end_date + timedelta(days=1), time.min)
+        ))
+        .where(Employee.is_active == True)
+        .group_by(Employee.id, Employee.full_name, Employee.position)
+    )
+
+async def get_department_employee_stats(db: AsyncSession, position: str,
+                                        start_date: date, end_date: date) -> list:
+    """Lavozim (bo'lim) xodimlarining davr statistikasi - bitta so'rov"""
+    source = await attendance_source(db, start_date, end_date)
+    query = _employee_period_stats_query(source, start_date, end_date).where(
+        func.lower(employee_model.Employee.position) == position.lower()
+    ).order_by(employee_model.Employee.id)
     result = await db.execute(query)
-    employees = result.scalars().all()
+    return result.all()
+
+async def get_department_summaries(db: AsyncSession, start_date: date, end_date: date) -> list:
+    """Barcha lavozimlar bo'yicha umumiy statistika (GROUP BY position) - bitta so'rov"""
+    source = await attendance_source(db, start_date, end_date)
+    per_employee = _employee_period_stats_query(source, start_date, end_date).subquery()
+    result = await db.execute(
+        select(
+            per_employee.c.position,
+            func.count(per_employee.c.employee_id),
+            func.sum(per_employee.c.working_days),
+            func.sum(per_employee.c.late_days)
+        )
+        .group_by(per_employee.c.position)
+        .order_by(per_employee.c.position)
+    )
+    return result.all()
+
+async def get_monthly_attendance_report(db: AsyncSession, month: int, year: int):
+    """Oylik hisobot uchun ma'lumotlar - yangilangan versiya"""
+    # Barcha faol xodimlar statistikasi bitta so'rov bilan
+    all_stats = await get_monthly_statistics_bulk(db, month, year)
     
     reports = []
-    for employee in employees:
-        stats = await get_employee_monthly_statistics(db, employee.id, month, year)
-        
+    for stats in all_stats:
         reports.append({
-            "employee_id": employee.id,
-            "employee_name": employee.full_name,
-            "position": employee.position,
-            "working_days": working_days,
+            "employee_id": stats["employee_id"],
+            "employee_name": stats["employee_name"],
+            "position": stats["position"],
+            "working_days": stats["working_days"],
             "present_days": stats["present_days"],
             "absent_days": stats["absent_days"],
             "late_days": stats["late_days"],
@@ -209,6 +568,17 @@ async def get_employee_last_status(db: AsyncSession, employee_id: int):
         .order_by(desc(attendance_model.Attendance.check_time))
         .limit(1)
     )
+    last = result.scalar_one_or_none()
+    if last is not None:
+        return last
+    # Yaqin oylarda belgisi yo'q xodim - arxivdan
+    Attendance = await attendance_source(db)
+    result = await db.execute(
+        select(Attendance)
+        .where(Attendance.employee_id == employee_id)
+        .order_by(desc(Attendance.check_time))
+        .limit(1)
+    )
     return result.scalar_one_or_none()
 
 async def check_if_already_checked_today(db: AsyncSession, employee_id: int, check_type: str):
@@ -218,6 +588,11 @@ async def check_if_already_checked_today(db: AsyncSession, employee_id: int, che
     # API dan "in"/"out" keladi, lekin DB da "IN"/"OUT" saqlanadi
     db_check_type = check_type.upper()
     
+    # Navbat ishlayotgan bo'lsa, keshdan javob berish (bazaga so'rovsiz)
+    queue = get_attendance_queue()
+    if queue is not None:
+        return await queue.is_checked(db, employee_id, db_check_type, today)
+    
     # Faqat COUNT qilish, obyekt qaytarmaslik
     result = await db.execute(
         select(func.count(attendance_model.Attendance.id))
@@ -232,24 +607,9 @@ async def check_if_already_checked_today(db: AsyncSession, employee_id: int, che
     count = result.scalar()
     return count > 0
 
-async def calculate_daily_work_hours(db: AsyncSession, employee_id: int, target_date: date) -> dict:
-    """Kunlik ish soatlarini hisoblash - yangilangan versiya"""
-    
-    # Kunda kelish va ketish vaqtlarini olish
-    result = await db.execute(
-        select(attendance_model.Attendance)
-        .where(
-            and_(
-                attendance_model.Attendance.employee_id == employee_id,
-                func.date(attendance_model.Attendance.check_time) == target_date
-            )
-        )
-        .order_by(attendance_model.Attendance.check_time)
-    )
-    
-    attendances = result.scalars().all()
-    
-    if not attendances:
+def _summarize_work_day(target_date: date, checks: list) -> dict:
+    """Bir kunlik belgilar (check_type, check_time, is_late) bo'yicha ish soatlarini hisoblash"""
+    if not checks:
         return {
             "date": target_date,
             "worked_hours": 0,
@@ -265,16 +625,16 @@ async def calculate_daily_work_hours(db: AsyncSession, employee_id: int, target_
     is_late = False
     late_minutes = 0
     
-    for attendance in attendances:
-        if attendance.check_type.value == "IN":
-            check_in = attendance.check_time
-            is_late = attendance.is_late
+    for check_type, check_time, check_is_late in checks:
+        if check_type == "IN":
+            check_in = check_time
+            is_late = check_is_late
             if is_late:
                 late_minutes = calculate_time_difference_minutes(
-                    attendance.check_time.time(), WORK_START_TIME
+                    check_time.time(), WORK_START_TIME
                 )
-        elif attendance.check_type.value == "OUT":
-            check_out = attendance.check_time
+        elif check_type == "OUT":
+            check_out = check_time
     
     # Ish soatlarini hisoblash
     worked_hours = 0
@@ -308,15 +668,126 @@ async def calculate_daily_work_hours(db: AsyncSession, employee_id: int, target_
         "late_minutes": late_minutes
     }
 
-async def get_employee_monthly_statistics(db: AsyncSession, employee_id: int, month: int, year: int) -> dict:
-    """Xodimning oylik statistikasi - yangilangan versiya"""
+async def _fetch_attendance_checks(db: AsyncSession, start_date: date, end_date: date,
+                                   employee_ids: Optional[List[int]] = None) -> dict:
+    """
+    Davr ichidagi barcha belgilarni bitta so'rov bilan olish
+    
+    Returns:
+        {employee_id: {sana: [(check_type, check_time, is_late), ...]}}
+    """
+    Attendance = await attendance_source(db, start_date, end_date)
+    query = select(
+        Attendance.employee_id,
+        Attendance.check_type,
+        Attendance.check_time,
+        Attendance.is_late
+    ).where(
+        and_(
+            Attendance.check_time >= datetime.combine(start_date, time.min),
+            Attendance.check_time < datetime.combine(end_date + timedelta(days=1), time.min)
+        )
+    )
+    if employee_ids is not None:
+        query = query.where(Attendance.employee_id.in_(employee_ids))
     
+    result = await db.execute(query.order_by(Attendance.check_time))
+    
+    checks = {}
+    for employee_id, check_type, check_time, is_late in result.all():
+        checks.setdefault(employee_id, {}).setdefault(check_time.date(), []).append(
+            (check_type.value, check_time, is_late)
+        )
+    return checks
+
+async def calculate_daily_work_hours(db: AsyncSession, employee_id: int, target_date: date) -> dict:
+    """Kunlik ish soatlarini hisoblash - yangilangan versiya"""
+    checks = await _fetch_attendance_checks(db, target_date, target_date, [employee_id])
+    return _summarize_work_day(target_date, checks.get(employee_id, {}).get(target_date, []))
+
+async def get_monthly_statistics_bulk(db: AsyncSession, month: int, year: int,
+                                      employees: Optional[list] = None) -> List[dict]:
+    """
+    Bir nechta xodimning oylik statistikasi - bitta davomat so'rovi bilan
+    
+    Args:
+        employees: Xodimlar ro'yxati (berilmasa - barcha faol xodimlar)
+    
+    Returns:
+        Har bir xodim uchun get_employee_monthly_statistics bilan bir xil lug'at
+    """
     start_date = date(year, month, 1)
     if month == 12:
         end_date = date(year + 1, 1, 1) - timedelta(days=1)
     else:
         end_date = date(year, month + 1, 1) - timedelta(days=1)
     
+    employee_ids = None
+    if employees is None:
+        result = await db.execute(
+            select(employee_model.Employee).where(employee_model.Employee.is_active == True)
+        )
+        employees = result.scalars().all()
+    else:
+        employee_ids = [employee.id for employee in employees]
+    
+    if not employees:
+        return []
+    
+    # Ish kunlari - kalendar bo'yicha (dam olish va bayram kunlarisiz, keshlangan)
+    working_dates = get_work_calendar().month_working_dates(year, month)
+    working_days = len(working_dates)
+    expected_hours = working_days * HOURS_PER_DAY
+    
+    checks = await _fetch_attendance_checks(db, start_date, end_date, employee_ids)
+    
+    stats_list = []
+    for employee in employees:
+        employee_checks = checks.get(employee.id, {})
+        daily_stats = [
+            _summarize_work_day(day, employee_checks.get(day, [])) for day in working_dates
+        ]
+        
+        # Faqat check_in mavjud bo'lgan kunlarni hisoblash
+        present = [day for day in daily_stats if day["check_in"] is not None]
+        late = [day for day in present if day["is_late"]]
+        present_days = len(present)
+        late_days = len(late)
+        
+        stats_list.append({
+            "employee_id": employee.id,
+            "employee_name": employee.full_name,
+            "position": employee.position if employee.position else "Unknown",
+            "month": month,
+            "year": year,
+            "working_days": working_days,
+            "present_days": present_days,
+            "absent_days": working_days - present_days,
+            "late_days": late_days,
+            "total_worked_hours": round(sum(day["worked_hours"] for day in present), 2),
+            "expected_hours": expected_hours,
+            "total_late_minutes": sum(day["late_minutes"] for day in late),
+            "attendance_rate": round(present_days / working_days * 100, 2) if working_days > 0 else 0,
+            "punctuality_rate": round((present_days - late_days) / present_days * 100, 2) if present_days > 0 else 0,
+            "daily_stats": daily_stats
+        })
+    
+    # Maosh hisoblash - barcha xodimlar uchun vektorlashtirilgan (erta ketish yo'q)
+    payroll = compute_payroll(
+        base_salary=[float(employee.base_salary) if employee.base_salary else 0 for employee in employees],
+        absent_days=[stats["absent_days"] for stats in stats_list],
+        late_days=[stats["late_days"] for stats in stats_list],
+        worked_hours=[stats["total_worked_hours"] for stats in stats_list],
+        expected_hours=[expected_hours] * len(stats_list)
+    )
+    for stats, salary_info in zip(stats_list, payroll_salary_info(payroll)):
+        stats["salary_info"] = salary_info
+    
+    return stats_list
+
+async def get_employee_monthly_statistics(db: AsyncSession, employee_id: int, month: int, year: int) -> dict:
+    """Xodimning oylik statistikasi - yangilangan versiya"""
+    
     # Xodim ma'lumotlarini olish
     result = await db.execute(
         select(employee_model.Employee).where(employee_model.Employee.id == employee_id)
@@ -326,116 +797,17 @@ async def get_employee_monthly_statistics(db: AsyncSession, employee_id: int, mo
     if not employee:
         return {"error": "Xodim topilmadi"}
     
-    # Har bir kun uchun statistika
-    daily_stats = []
-    total_worked_hours = 0
-    present_days = 0
-    late_days = 0
-    working_days = 0
-    total_late_minutes = 0
-    
-    current_date = start_date
-    while current_date <= end_date:
-        # Faqat ish kunlarini hisobga olish (6 kun/hafta - faqat yakshanba dam)
-        if current_date.weekday() != 6:  # Faqat yakshanba (Sunday=6) dam
-            working_days += 1
-            day_stats = await calculate_daily_work_hours(db, employee_id, current_date)
-            daily_stats.append(day_stats)
-            
-            # Faqat check_in mavjud bo'lgan kunlarni hisoblash
-            if day_stats["check_in"] is not None:
-                present_days += 1
-                total_worked_hours += day_stats["worked_hours"]
-                
-                if day_stats["is_late"]:
-                    late_days += 1
-                    total_late_minutes += day_stats["late_minutes"]
-        
-        current_date += timedelta(days=1)
-    
-    # Foizlarni hisoblash
-    attendance_rate = (present_days / working_days * 100) if working_days > 0 else 0
-    punctuality_rate = ((present_days - late_days) / present_days * 100) if present_days > 0 else 0
-    
-    # Maosh hisoblash
-    base_salary = float(employee.base_salary) if employee.base_salary else 0
-    expected_hours = working_days * 8.5  # 8.5 soat kuniga
-    
-    # Udjelishlar hisoblash (erta ketish yo'q)
-    salary_calculations = calculate_salary_deductions(
-        base_salary=base_salary,
-        worked_hours=total_worked_hours,
-        expected_hours=expected_hours,
-        late_days=late_days,
-        absent_days=working_days - present_days
-    )
-    
-    return {
-        "employee_id": employee_id,
-        "employee_name": employee.full_name,
-        "position": employee.position if employee.position else "Unknown",
-        "month": month,
-        "year": year,
-        "working_days": working_days,
-        "present_days": present_days,
-        "absent_days": working_days - present_days,
-        "late_days": late_days,
-        "total_worked_hours": round(total_worked_hours, 2),
-        "expected_hours": expected_hours,
-        "total_late_minutes": total_late_minutes,
-        "attendance_rate": round(attendance_rate, 2),
-        "punctuality_rate": round(punctuality_rate, 2),
-        "salary_info": salary_calculations,
-        "daily_stats": daily_stats
-    }
+    stats_list = await get_monthly_statistics_bulk(db, month, year, [employee])
+    return stats_list[0]
 
 def calculate_salary_deductions(base_salary: float, worked_hours: float, expected_hours: float, 
                               late_days: int, absent_days: int) -> dict:
-    """Maosh va uderzhaniyalarni hisoblash"""
-    
-    if base_salary <= 0:
-        return {
-            "base_salary": 0,
-            "final_salary": 0,
-            "total_deductions": 0,
-            "deduction_breakdown": {}
-        }
-    
-    # Kunlik maosh (6 kun/hafta - 26 kun/oy)
-    daily_salary = base_salary / 26  # Oyda 26 ish kuni (6 kun/hafta)
-    hourly_salary = daily_salary / 8.5  # Kuniga 8.5 soat
-    
-    # Uderjhanilar
-    deductions = {}
-    
-    # Yo'qolgan kunlar uchun to'liq uderjhanie
-    if absent_days > 0:
-        absent_deduction = absent_days * daily_salary
-        deductions["absent_days"] = {
-            "days": absent_days,
-            "amount": round(absent_deduction, 2)
-        }
-    
-    # Kechikkanlar uchun uderjhanie (har kechikish uchun 1% maoshdan)
-    if late_days > 0:
-        late_penalty = late_days * (base_salary * 0.01)  # Har kechikish uchun oylik maoshning 1%
-        deductions["late_arrivals"] = {
-            "days": late_days,
-            "amount": round(late_penalty, 2),
-            "description": f"Har kechikish uchun 1% (jami {late_days}%)"
-        }
-    
-    # Umumiy uderzhaniya
-    total_deductions = sum(item["amount"] for item in deductions.values())
-    final_salary = base_salary - total_deductions
-    
-    return {
-        "base_salary": round(base_salary, 2),
-        "daily_salary": round(daily_salary, 2),
-        "hourly_salary": round(hourly_salary, 2),
-        "total_deductions": round(total_deductions, 2),
-        "final_salary": round(final_salary, 2),
-        "deduction_breakdown": deductions,
-        "worked_hours": round(worked_hours, 2),
-        "expected_hours": round(expected_hours, 2)
-    }
+    """Maosh va uderzhaniyalarni hisoblash (bitta xodim uchun)"""
+    payroll = compute_payroll(
+        base_salary=[base_salary],
+        absent_days=[absent_days],
+        late_days=[late_days],
+        worked_hours=[worked_hours],
+        expected_hours=[expected_hours]
+    )
+    return payroll_salary_info(payroll)[0]
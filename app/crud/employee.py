@@ -2,11 +2,13 @@ import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
-from sqlalchemy import and_
+from sqlalchemy import and_, func
 from typing import Optional, List
 from app.schemas import employee as employee_schema
 from app.models import employee as employee_model
 from app.utils.timezone import get_tashkent_time_naive
+from app.core.invalidation import EMPLOYEE, invalidation_bus
+from app.services.employee_directory import employee_directory
 
 async def create_employee(db: AsyncSession, employee: employee_schema.EmployeeCreate):
     employee_uuid = str(uuid.uuid4())
@@ -22,19 +24,14 @@ async def create_employee(db: AsyncSession, employee: employee_schema.EmployeeCr
     db.add(db_employee)
     await db.commit()
     await db.refresh(db_employee)
+    invalidation_bus.publish(EMPLOYEE, ids=[db_employee.id])
     return db_employee
 
 async def get_employee_by_id(db: AsyncSession, employee_id: int):
-    result = await db.execute(
-        select(employee_model.Employee).where(employee_model.Employee.id == employee_id)
-    )
-    return result.scalar_one_or_none()
+    return await employee_directory.get_by_id(db, employee_id)
 
 async def get_employee_by_uuid(db: AsyncSession, employee_uuid: str):
-    result = await db.execute(
-        select(employee_model.Employee).where(employee_model.Employee.uuid == employee_uuid)
-    )
-    return result.scalar_one_or_none()
+    return await employee_directory.get_by_uuid(db, employee_uuid)
 
 async def get_employee_by_qr_code(db: AsyncSession, qr_code: str):
     """QR code UUID bilan bir xil"""
@@ -50,6 +47,17 @@ async def get_employees(db: AsyncSession, skip: int = 0, limit: int = 100, inclu
     result = await db.execute(query)
     return result.scalars().all()
 
+async def count_employees(db: AsyncSession) -> tuple[int, int]:
+    """Jami va faol xodimlar soni (bitta agregat so'rov)"""
+    result = await db.execute(
+        select(
+            func.count(employee_model.Employee.id),
+            func.count(employee_model.Employee.id).filter(employee_model.Employee.is_active == True)
+        )
+    )
+    total, active = result.one()
+    return total, active
+
 async def update_employee(db: AsyncSession, employee_id: int, employee_update: employee_schema.EmployeeUpdate):
     db_employee = await get_employee_by_id(db, employee_id)
     if not db_employee:
@@ -61,6 +69,7 @@ async def update_employee(db: AsyncSession, employee_id: int, employee_update: e
     
     await db.commit()
     await db.refresh(db_employee)
+    invalidation_bus.publish(EMPLOYEE, ids=[db_employee.id])
     return db_employee
 
 async def delete_employee(db: AsyncSession, employee_id: int):
@@ -71,6 +80,7 @@ async def delete_employee(db: AsyncSession, employee_id: int):
     # Soft delete
     db_employee.is_active = False
     await db.commit()
+    invalidation_bus.publish(EMPLOYEE, ids=[db_employee.id])
     return db_employee
 
 async def get_employees_with_attendance_count(db: AsyncSession):
@@ -80,10 +90,7 @@ async def get_employees_with_attendance_count(db: AsyncSession):
 
 async def get_employee_by_telegram_id(db: AsyncSession, telegram_id: int):
     """Найти сотрудника по Telegram ID"""
-    result = await db.execute(
-        select(employee_model.Employee).where(employee_model.Employee.telegram_id == telegram_id)
-    )
-    return result.scalar_one_or_none()
+    return await employee_directory.get_by_telegram_id(db, telegram_id)
 
 
 async def link_telegram_to_employee(db: AsyncSession, employee_id: int, telegram_id: int):
@@ -100,5 +107,6 @@ async def link_telegram_to_employee(db: AsyncSession, employee_id: int, telegram
     
     db_employee.telegram_id = telegram_id
     await db.commit()
+    invalidation_bus.publish(EMPLOYEE, ids=[employee_id])
     await db.refresh(db_employee)
     return db_employee, "Успешно привязано"
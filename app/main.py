@@ -1,12 +1,24 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+import asyncio
 import os
 from sqladmin import Admin, ModelView
-from app.core.database import Base, engine
+from app.core.config import FACE_ID_WARMUP, PROFILER_ENABLED, REQUEST_METRICS_ENABLED
+from app.core.database import engine, AsyncSessionLocal, read_router, read_session_for, replica_engine
+from app.core.profiler import ProfilerMiddleware
+from app.core.request_metrics import RequestMetricsMiddleware, instrument_engine
+from app.core.invalidation import EMPLOYEE, invalidation_bus
+from app.migrations import ensure_schema
 from app.models.employee import Employee
 from app.models.attendance import Attendance
-from app.routers import employees, attendance as attendance_router, mobile, statistics, face_id
+from app.models.attendance_rollup import AttendanceRollup
+from app.models.attendance_archive import AttendanceArchive
+from app.routers import employees, attendance as attendance_router, mobile, statistics, face_id, admin as admin_router, reports as reports_router, metrics as metrics_router
+from app.services.attendance_archive import start_attendance_archiver, stop_attendance_archiver
+from app.services.attendance_queue import start_attendance_queue, stop_attendance_queue
+from app.services.report_jobs import start_report_jobs, stop_report_jobs
+from app.services.rollups import ensure_rollups
 
 app = FastAPI(
     title="📊 Workly - Ishchilar Boshqaruv Tizimi",
@@ -37,6 +49,13 @@ class EmployeeAdmin(ModelView, model=Employee):
     name_plural = "Xodimlar"
     icon = "fa-solid fa-user"
 
+    # Admin paneldagi o'zgarishlar ham crud/employee kabi keshlarni tozalaydi
+    async def after_model_change(self, data, model, is_created, request):
+        invalidation_bus.publish(EMPLOYEE, ids=[model.id])
+
+    async def after_model_delete(self, model, request):
+        invalidation_bus.publish(EMPLOYEE, ids=[model.id])
+
 class AttendanceAdmin(ModelView, model=Attendance):
     column_list = [Attendance.id, Attendance.employee_id, Attendance.check_type, Attendance.check_time, Attendance.is_late]
     column_sortable_list = [Attendance.id, Attendance.employee_id, Attendance.check_time]
@@ -70,13 +89,56 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Davomat tarixi paginatsiyasi uchun
 )
 
-# Startup event -> DB yaratish
+# So'rovlar metrikalari: marshrut bo'yicha kechikish, SQL so'rovlar soni/vaqti, yuklama hajmi (/metrics)
+if REQUEST_METRICS_ENABLED:
+    instrument_engine(engine)
+    instrument_engine(replica_engine)
+    app.add_middleware(RequestMetricsMiddleware)
+
+# Namuna oluvchi profiler (/admin-api/profiler); qurollantirilmaganda - bitta tekshiruv
+if PROFILER_ENABLED:
+    app.add_middleware(ProfilerMiddleware)
+
+# Startup event -> sxema versiyasini tekshirish
 @app.on_event("startup")
 async def startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Faqat sxema versiyasi tekshiriladi (migratsiyalar: python manage.py migrate)
+    await ensure_schema(engine)
+    
+    # Rollup jadvali yangi yaratilgan bo'lsa - mavjud tarixdan to'ldirish
+    async with AsyncSessionLocal() as session:
+        await ensure_rollups(session)
+    
+    # Davomat yozish navbatini ishga tushirish
+    await start_attendance_queue(AsyncSessionLocal)
+    
+    # Hisobotlarni fonda yaratish navbati
+    await start_report_jobs(AsyncSessionLocal, read_session=read_session_for)
+    
+    # Yopilgan oylarni arxivlash (ATTENDANCE_ARCHIVE_ENABLED)
+    await start_attendance_archiver(AsyncSessionLocal)
+    
+    # O'qish replikasi kechikishini kuzatish (DATABASE_REPLICA_URL berilgan bo'lsa)
+    await read_router.start()
+    
+    # Bot bilan keshlarni tozalash hodisalari (REDIS_URL berilgan bo'lsa)
+    await invalidation_bus.start()
+    
+    # Face ID servisi birinchi so'rovda yuklanadi; FACE_ID_WARMUP - fonda oldindan
+    if FACE_ID_WARMUP:
+        app.state.face_id_warmup = asyncio.create_task(face_id.warm_up_face_service())
+
+# Shutdown event -> navbatdagi yozuvlarni saqlab qolish
+@app.on_event("shutdown")
+async def shutdown():
+    await read_router.stop()
+    await stop_attendance_archiver()
+    await stop_report_jobs()
+    await stop_attendance_queue()
+    await invalidation_bus.stop()
 
 # Routers
 app.include_router(employees.router)
@@ -84,6 +146,9 @@ app.include_router(attendance_router.router)
 app.include_router(mobile.router)
 app.include_router(statistics.router)
 app.include_router(face_id.router)
+app.include_router(admin_router.router)
+app.include_router(reports_router.router)
+app.include_router(metrics_router.router)
 
 @app.get("/")
 async def root():
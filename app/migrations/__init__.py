@@ -0,0 +1,164 @@
+"""
+Ma'lumotlar bazasi sxemasi migratsiyalari
+
+Har bir migratsiya app/migrations/versions/ papkasidagi vNNNN_nomi.py fayli:
+
+    \"\"\"Qisqa tavsif\"\"\"
+    def upgrade(conn):          # sinxron sqlalchemy Connection
+        conn.execute(text("CREATE INDEX ..."))
+
+    TRANSACTIONAL = False       # ixtiyoriy: tranzaksiyasiz (masalan, CREATE INDEX CONCURRENTLY)
+
+Qo'llangan versiyalar schema_version jadvalida saqlanadi. Migratsiyalar
+`python manage.py migrate` bilan bir marta qo'llanadi, ilova ishga tushganda
+esa faqat versiya tekshiriladi (DB_AUTO_MIGRATE yoqilgan bo'lsa - qo'llanadi).
+"""
+import importlib
+import logging
+import pkgutil
+import time
+from typing import NamedTuple, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import DB_AUTO_MIGRATE
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_PACKAGE = "app.migrations.versions"
+
+schema_version_table = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False, server_default=func.now()),
+)
+
+
+class SchemaOutdatedError(RuntimeError):
+    """Bazadagi sxema versiyasi koddagidan eski (yoki yangi)"""
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    module: object
+
+    @property
+    def description(self) -> str:
+        return (self.module.__doc__ or self.name).strip().splitlines()[0]
+
+    @property
+    def transactional(self) -> bool:
+        return getattr(self.module, "TRANSACTIONAL", True)
+
+
+def discover() -> list[Migration]:
+    """versions papkasidagi migratsiyalar (versiya bo'yicha tartiblangan)"""
+    package = importlib.import_module(VERSIONS_PACKAGE)
+    migrations = []
+    for info in pkgutil.iter_modules(package.__path__):
+        prefix, _, name = info.name.partition("_")
+        if not (prefix.startswith("v") and prefix[1:].isdigit()):
+            continue
+        module = importlib.import_module(f"{VERSIONS_PACKAGE}.{info.name}")
+        migrations.append(Migration(int(prefix[1:]), name, module))
+    migrations.sort(key=lambda migration: migration.version)
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Takrorlangan migratsiya versiyasi: {versions}")
+    return migrations
+
+
+def latest_version() -> int:
+    migrations = discover()
+    return migrations[-1].version if migrations else 0
+
+
+def _applied_versions(conn: Connection) -> set[int]:
+    schema_version_table.create(conn, checkfirst=True)
+    return set(conn.execute(select(schema_version_table.c.version)).scalars())
+
+
+async def get_schema_version(db_engine: AsyncEngine) -> int:
+    """
+    Bazadagi eng so'nggi qo'llangan versiya (schema_version jadvali bo'lmasa 0)
+
+    Ulanish va boshqa xatolar yutilmaydi - ular "yangi baza" deb qabul qilinmasligi kerak.
+    """
+    async with db_engine.connect() as conn:
+        has_table = await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table(schema_version_table.name))
+        if not has_table:
+            return 0
+        result = await conn.execute(select(func.max(schema_version_table.c.version)))
+        return result.scalar() or 0
+
+
+async def pending_migrations(db_engine: AsyncEngine) -> list[Migration]:
+    async with db_engine.begin() as conn:
+        applied = await conn.run_sync(_applied_versions)
+    return [migration for migration in discover() if migration.version not in applied]
+
+
+async def migrate(db_engine: AsyncEngine, target: Optional[int] = None) -> list[Migration]:
+    """
+    Qo'llanmagan migratsiyalarni tartib bilan qo'llash
+
+    Har bir migratsiya (va uning schema_version yozuvi) alohida tranzaksiyada
+    bajariladi - xato bo'lsa oldingilari saqlanib qoladi.
+
+    Args:
+        db_engine: Async engine
+        target: Shu versiyagacha (None - oxirigacha)
+
+    Returns:
+        Qo'llangan migratsiyalar
+    """
+    applied = []
+    for migration in await pending_migrations(db_engine):
+        if target is not None and migration.version > target:
+            break
+        started = time.perf_counter()
+        if migration.transactional:
+            async with db_engine.begin() as conn:
+                await conn.run_sync(migration.module.upgrade)
+                await conn.execute(schema_version_table.insert().values(
+                    version=migration.version, name=migration.name
+                ))
+        else:
+            async with db_engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await conn.run_sync(migration.module.upgrade)
+                await conn.execute(schema_version_table.insert().values(
+                    version=migration.version, name=migration.name
+                ))
+        logger.info("Migratsiya %04d_%s qo'llandi (%.2fs)", migration.version, migration.name,
+                    time.perf_counter() - started)
+        applied.append(migration)
+    return applied
+
+
+async def ensure_schema(db_engine: AsyncEngine, auto_migrate: bool = DB_AUTO_MIGRATE) -> int:
+    """
+    Ilova ishga tushganda sxema versiyasini tekshirish (bitta so'rov)
+
+    Versiya eski bo'lsa: auto_migrate - migratsiyalar qo'llanadi,
+    aks holda SchemaOutdatedError.
+    """
+    current = await get_schema_version(db_engine)
+    latest = latest_version()
+    if current == latest:
+        return current
+    if current > latest:
+        raise SchemaOutdatedError(
+            f"Baza sxemasi ({current}) koddagi oxirgi migratsiyadan ({latest}) yangi - kod eskirgan"
+        )
+    if not auto_migrate:
+        raise SchemaOutdatedError(
+            f"Baza sxemasi eskirgan ({current} < {latest}): `python manage.py migrate` ni ishga tushiring"
+        )
+    await migrate(db_engine)
+    return latest_version()
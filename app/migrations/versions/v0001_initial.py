@@ -0,0 +1,67 @@
+"""Boshlang'ich sxema: employees, attendance, attendance_rollups
+
+Jadvallar shu versiyadagi modellar nusxasi (keyinchalik modellar o'zgarsa ham
+bu migratsiya o'zgarmaydi). Avval create_all bilan yaratilgan bazalarda faqat
+yetishmayotgan jadval va indekslar (masalan, keyinroq modelga qo'shilgan
+ix_attendance_check_time) yaratiladi.
+"""
+from sqlalchemy import (
+    BigInteger, Boolean, Column, Date, DateTime, Enum, ForeignKey, Index, Integer,
+    MetaData, Numeric, String, Table, UniqueConstraint, inspect,
+)
+
+metadata = MetaData()
+
+employees = Table(
+    "employees", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("uuid", String, unique=True, nullable=False),
+    Column("full_name", String, nullable=False),
+    Column("position", String, nullable=True),
+    Column("phone", String, nullable=True),
+    Column("photo", String, nullable=True),
+    Column("base_salary", Numeric(12, 2), nullable=True),
+    Column("telegram_id", BigInteger, nullable=True, unique=True),
+    Column("is_active", Boolean),
+    Column("created_at", DateTime, nullable=False),
+)
+
+attendance = Table(
+    "attendance", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("employee_id", Integer, ForeignKey("employees.id", ondelete="CASCADE")),
+    Column("check_type", Enum("IN", "OUT", name="checktypeenum"), nullable=False),
+    Column("source", Enum("APP", "TELEGRAM", name="sourceenum"), nullable=False),
+    Column("check_time", DateTime, nullable=False),
+    Column("location_lat", String, nullable=True),
+    Column("location_lon", String, nullable=True),
+    Column("is_late", Boolean),
+    Index("ix_attendance_employee_check_time", "employee_id", "check_time", "id"),
+    Index("ix_attendance_check_time", "check_time"),
+)
+
+attendance_rollups = Table(
+    "attendance_rollups", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("granularity", String(8), nullable=False),
+    Column("bucket_start", Date, nullable=False),
+    Column("employee_id", Integer, nullable=False),
+    Column("position", String, nullable=True),
+    Column("check_ins", Integer, nullable=False),
+    Column("check_outs", Integer, nullable=False),
+    Column("late_check_ins", Integer, nullable=False),
+    Column("present_days", Integer, nullable=False),
+    Column("late_days", Integer, nullable=False),
+    UniqueConstraint("granularity", "bucket_start", "employee_id", name="uq_attendance_rollup_bucket"),
+    Index("ix_attendance_rollup_position", "granularity", "position", "bucket_start"),
+)
+
+
+def upgrade(conn):
+    existing = set(inspect(conn).get_table_names())
+    metadata.create_all(conn, checkfirst=True)
+    # create_all mavjud jadvallarga yangi indekslarni qo'shmaydi
+    for table in metadata.sorted_tables:
+        if table.name in existing:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
@@ -0,0 +1,29 @@
+"""Yopilgan oylar uchun attendance_archive jadvali (PostgreSQL'da oylik bo'limlar bilan)"""
+from sqlalchemy import (
+    Boolean, Column, DateTime, Enum, ForeignKey, Index, Integer, MetaData, String, Table,
+)
+
+metadata = MetaData()
+
+# Tashqi kalit uchun (yaratilmaydi)
+Table("employees", metadata, Column("id", Integer, primary_key=True))
+
+attendance_archive = Table(
+    "attendance_archive", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("employee_id", Integer, ForeignKey("employees.id", ondelete="CASCADE")),
+    Column("check_type", Enum("IN", "OUT", name="checktypeenum"), nullable=False),
+    Column("source", Enum("APP", "TELEGRAM", name="sourceenum"), nullable=False),
+    Column("check_time", DateTime, primary_key=True),
+    Column("location_lat", String, nullable=True),
+    Column("location_lon", String, nullable=True),
+    Column("is_late", Boolean),
+    Index("ix_attendance_archive_employee_check_time", "employee_id", "check_time", "id"),
+    Index("ix_attendance_archive_check_time", "check_time"),
+    # Oylik bo'limlarni arxivlash vazifasi kerak bo'lganda yaratadi
+    postgresql_partition_by="RANGE (check_time)",
+)
+
+
+def upgrade(conn):
+    attendance_archive.create(conn, checkfirst=True)
@@ -0,0 +1,81 @@
+"""Xodim kuniga bitta IN/OUT: attendance uchun (employee_id, check_type, date(check_time)) unikal indeksi
+
+Indeksdan oldin takroriy yozuvlar (shu kundagi eng birinchisidan tashqari)
+attendance_duplicates jadvaliga ko'chiriladi va attendance dan o'chiriladi.
+Bunday yozuvlar bo'lsa, o'sha davr rollup'larini qayta hisoblash kerak
+(`python manage.py rebuild-rollups --start ... --end ...`).
+"""
+import logging
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, Enum, Integer, MetaData, String, Table,
+    and_, delete, exists, func, or_, select, text,
+)
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+
+metadata = MetaData()
+
+
+def _attendance_columns():
+    return [
+        Column("id", Integer, primary_key=True, autoincrement=False),
+        Column("employee_id", Integer),
+        Column("check_type", Enum("IN", "OUT", name="checktypeenum"), nullable=False),
+        Column("source", Enum("APP", "TELEGRAM", name="sourceenum"), nullable=False),
+        Column("check_time", DateTime, nullable=False),
+        Column("location_lat", String, nullable=True),
+        Column("location_lon", String, nullable=True),
+        Column("is_late", Boolean),
+    ]
+
+
+attendance = Table("attendance", metadata, *_attendance_columns())
+
+# O'chirilgan takroriy yozuvlar (tekshirish uchun saqlanadi)
+attendance_duplicates = Table("attendance_duplicates", metadata, *_attendance_columns())
+
+# Ifoda (date(...)) indeksini SQLite reflection ko'rmaydi - checkfirst o'rniga IF NOT EXISTS
+CREATE_UNIQUE_DAY_INDEX = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_attendance_employee_type_day "
+    "ON attendance (employee_id, check_type, date(check_time))"
+)
+
+
+def duplicate_ids_query():
+    """Shu xodim, tur va kunda undan oldingi yozuvi bor yozuvlar"""
+    earlier = attendance.alias("earlier")
+    return select(attendance.c.id).where(exists().where(and_(
+        earlier.c.employee_id == attendance.c.employee_id,
+        earlier.c.check_type == attendance.c.check_type,
+        func.date(earlier.c.check_time) == func.date(attendance.c.check_time),
+        or_(
+            earlier.c.check_time < attendance.c.check_time,
+            and_(earlier.c.check_time == attendance.c.check_time, earlier.c.id < attendance.c.id)
+        )
+    ))).order_by(attendance.c.id)
+
+
+def upgrade(conn):
+    duplicate_ids = conn.execute(duplicate_ids_query()).scalars().all()
+    if duplicate_ids:
+        first_day, last_day = conn.execute(
+            select(func.min(attendance.c.check_time), func.max(attendance.c.check_time))
+            .where(attendance.c.id.in_(duplicate_ids))
+        ).one()
+        attendance_duplicates.create(conn, checkfirst=True)
+        columns = [column.name for column in attendance.columns]
+        for i in range(0, len(duplicate_ids), CHUNK_SIZE):
+            chunk = duplicate_ids[i:i + CHUNK_SIZE]
+            conn.execute(attendance_duplicates.insert().from_select(
+                columns, select(attendance).where(attendance.c.id.in_(chunk))
+            ))
+            conn.execute(delete(attendance).where(attendance.c.id.in_(chunk)))
+        logger.warning(
+            "%s ta takroriy davomat yozuvi attendance_duplicates ga ko'chirildi. Rollup'larni qayta hisoblang: "
+            "python manage.py rebuild-rollups --start %s --end %s",
+            len(duplicate_ids), first_day.date(), last_day.date()
+        )
+    conn.execute(text(CREATE_UNIQUE_DAY_INDEX))
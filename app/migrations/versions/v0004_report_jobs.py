@@ -0,0 +1,26 @@
+"""Hisobot vazifalari holati uchun report_jobs jadvali (worker'lar o'rtasida umumiy)"""
+from sqlalchemy import Column, Float, Index, Integer, MetaData, String, Table, Text
+
+metadata = MetaData()
+
+report_jobs = Table(
+    "report_jobs", metadata,
+    Column("id", String(32), primary_key=True),
+    Column("report_type", String(16), nullable=False),
+    Column("params", Text, nullable=False),
+    Column("status", String(16), nullable=False),
+    Column("progress", Integer, nullable=False),
+    Column("stage", String, nullable=False),
+    Column("file_path", String, nullable=True),
+    Column("etag", String, nullable=True),
+    Column("error", Text, nullable=True),
+    Column("created_at", Float, nullable=False),
+    Column("started_at", Float, nullable=True),
+    Column("finished_at", Float, nullable=True),
+    Column("updated_at", Float, nullable=False),
+    Index("ix_report_jobs_finished_at", "finished_at"),
+)
+
+
+def upgrade(conn):
+    report_jobs.create(conn, checkfirst=True)
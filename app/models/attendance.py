@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum, Boolean, String
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum, Boolean, String, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -14,6 +14,12 @@ class SourceEnum(enum.Enum):
 
 class Attendance(Base):
     __tablename__ = "attendance"
+    __table_args__ = (
+        # Xodim tarixini (check_time, id) bo'yicha keyset paginatsiya uchun
+        Index("ix_attendance_employee_check_time", "employee_id", "check_time", "id"),
+        # Davr bo'yicha hisobotlar va kesh versiyasi uchun
+        Index("ix_attendance_check_time", "check_time"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"))
@@ -26,3 +32,11 @@ class Attendance(Base):
     
     # Relationship
     employee = relationship("Employee", back_populates="attendance_records")
+
+
+# Xodim kuniga bitta IN va bitta OUT - bir nechta API/bot jarayonlari uchun ham bazada kafolatlanadi
+Index(
+    "uq_attendance_employee_type_day",
+    Attendance.employee_id, Attendance.check_type, func.date(Attendance.check_time),
+    unique=True
+)
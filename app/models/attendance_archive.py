@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum, Boolean, String, Index
+from app.core.database import Base
+from app.models.attendance import CheckTypeEnum, SourceEnum
+
+class AttendanceArchive(Base):
+    """
+    Yopilgan oylarning xom davomat yozuvlari (attendance jadvalidan ko'chiriladi)
+
+    PostgreSQL'da check_time bo'yicha oylik bo'limlarga (partition) ajratilgan,
+    shuning uchun birlamchi kalit (id, check_time). id asl yozuv id si saqlanadi.
+    """
+    __tablename__ = "attendance_archive"
+    __table_args__ = (
+        Index("ix_attendance_archive_employee_check_time", "employee_id", "check_time", "id"),
+        Index("ix_attendance_archive_check_time", "check_time"),
+        {"postgresql_partition_by": "RANGE (check_time)"},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"))
+    check_type = Column(Enum(CheckTypeEnum), nullable=False)
+    source = Column(Enum(SourceEnum), nullable=False, default=SourceEnum.APP)
+    check_time = Column(DateTime, primary_key=True)
+    location_lat = Column(String, nullable=True)
+    location_lon = Column(String, nullable=True)
+    is_late = Column(Boolean, default=False)
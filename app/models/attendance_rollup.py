@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Date, Index, UniqueConstraint
+from app.core.database import Base
+
+class AttendanceRollup(Base):
+    """
+    Davomatning oldindan agregatlangan hisoblagichlari (kun/hafta/oy, xodim bo'yicha)
+
+    Lavozim bo'yicha ko'rsatkichlar shu qatorlarni position ustuni bo'yicha
+    guruhlash orqali olinadi (lavozim yozuv paytidagi holatda saqlanadi).
+    """
+    __tablename__ = "attendance_rollups"
+    __table_args__ = (
+        UniqueConstraint("granularity", "bucket_start", "employee_id", name="uq_attendance_rollup_bucket"),
+        Index("ix_attendance_rollup_position", "granularity", "position", "bucket_start"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    granularity = Column(String(8), nullable=False)  # day, week, month
+    bucket_start = Column(Date, nullable=False)  # Kun, haftaning dushanbasi yoki oyning 1-kuni
+    employee_id = Column(Integer, nullable=False)
+    position = Column(String, nullable=True)
+    check_ins = Column(Integer, nullable=False, default=0)
+    check_outs = Column(Integer, nullable=False, default=0)
+    late_check_ins = Column(Integer, nullable=False, default=0)
+    present_days = Column(Integer, nullable=False, default=0)  # Kelish (IN) belgisi bor kunlar
+    late_days = Column(Integer, nullable=False, default=0)  # Birinchi kelishi kechikkan kunlar
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Float, Index, Integer, String, Text
+from app.core.database import Base
+
+class ReportJobRecord(Base):
+    """
+    Hisobot vazifasi holati - barcha API worker'lari uchun umumiy
+
+    Vazifani yaratgan jarayon holat va progressni yozib boradi, boshqa
+    worker'lar holat so'rovlariga shu jadvaldan javob beradi.
+    """
+    __tablename__ = "report_jobs"
+    __table_args__ = (
+        Index("ix_report_jobs_finished_at", "finished_at"),
+    )
+
+    id = Column(String(32), primary_key=True)
+    report_type = Column(String(16), nullable=False)
+    params = Column(Text, nullable=False)  # JSON
+    status = Column(String(16), nullable=False)
+    progress = Column(Integer, nullable=False, default=0)
+    stage = Column(String, nullable=False)
+    file_path = Column(String, nullable=True)
+    etag = Column(String, nullable=True)
+    error = Column(Text, nullable=True)
+    # Vaqtlar time.time() ko'rinishida (API javobidagi kabi)
+    created_at = Column(Float, nullable=False)
+    started_at = Column(Float, nullable=True)
+    finished_at = Column(Float, nullable=True)
+    updated_at = Column(Float, nullable=False)  # Bajaruvchi jarayonning oxirgi yozuvi (heartbeat)
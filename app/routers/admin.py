@@ -0,0 +1,215 @@
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
+from starlette.background import BackgroundTask
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import Optional
+import asyncio
+import os
+import shutil
+import tempfile
+from app.core.config import PROFILER_INTERVAL_MS
+from app.core.database import engine, get_db, pool_status, read_router, replica_engine
+from app.core.invalidation import invalidation_bus
+from app.core.metrics import snapshot as metrics_snapshot
+from app.core.profiler import profiler
+from app.core.query_stats import ORDER_FIELDS, query_stats
+from app.core.security import require_admin
+from app.services import attendance_bulk
+from app.services.attendance_archive import archive_closed_months, storage_status
+from app.services.employee_directory import employee_directory
+from app.services.rollups import rebuild_rollups
+
+router = APIRouter(prefix="/admin-api", tags=["Admin API"], dependencies=[Depends(require_admin)])
+
+@router.get("/attendance/export")
+async def export_attendance(
+    format: str = Query("csv", pattern="^(csv|npz)$"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    chunk_size: int = Query(attendance_bulk.DEFAULT_CHUNK_SIZE, ge=100, le=100000),
+    db: AsyncSession = Depends(get_db)
+):
+    """Davomat jadvalini CSV yoki ustunli (npz) fayl sifatida eksport qilish"""
+    os.makedirs("reports", exist_ok=True)
+    period = f"{start_date or 'boshidan'}_{end_date or 'hozirgacha'}"
+    # Har bir eksport o'z faylida - bir xil davrning parallel eksportlari bir-birini buzmaydi
+    fd, file_path = tempfile.mkstemp(dir="reports", prefix=f"davomat_eksport_{period}_", suffix=f".{format}")
+    os.close(fd)
+    
+    try:
+        stats = await attendance_bulk.export_attendance(
+            db, file_path, format, start_date=start_date, end_date=end_date, chunk_size=chunk_size
+        )
+    except BaseException:
+        os.remove(file_path)
+        raise
+    
+    media_type = "text/csv" if format == "csv" else "application/zip"
+    return FileResponse(
+        file_path,
+        media_type=media_type,
+        filename=f"davomat_eksport_{period}.{format}",
+        headers={
+            "X-Export-Rows": str(stats["rows"]),
+            "X-Export-Seconds": str(stats["seconds"])
+        },
+        # Fayl javob to'liq yuborilgandan keyin o'chiriladi
+        background=BackgroundTask(os.remove, file_path)
+    )
+
+@router.post("/attendance/import")
+async def import_attendance(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|npz)$"),
+    chunk_size: int = Query(attendance_bulk.DEFAULT_CHUNK_SIZE, ge=100, le=100000),
+    db: AsyncSession = Depends(get_db)
+):
+    """CSV yoki ustunli (npz) fayldan davomat yozuvlarini ommaviy import qilish"""
+    try:
+        fmt = attendance_bulk.detect_format(file.filename or "", format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Yuklangan faylni vaqtinchalik faylga saqlash (xotiraga to'liq o'qimasdan)
+    with tempfile.NamedTemporaryFile(suffix=f".{fmt}", delete=False) as tmp:
+        await asyncio.to_thread(shutil.copyfileobj, file.file, tmp)
+        tmp_path = tmp.name
+    
+    try:
+        stats = await attendance_bulk.import_attendance(db, tmp_path, fmt, chunk_size=chunk_size)
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Faylni o'qishda xatolik: {e}")
+    finally:
+        os.remove(tmp_path)
+    
+    stats["path"] = file.filename
+    return stats
+
+@router.post("/rollups/rebuild")
+async def rebuild_attendance_rollups(
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """Davomat rollup'larini xom yozuvlardan qayta hisoblash (sanalarsiz - butun tarix)"""
+    if start_date and end_date and end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date start_date dan oldin bo'lishi mumkin emas")
+    return await rebuild_rollups(db, start_date, end_date)
+
+@router.get("/storage/attendance")
+async def get_attendance_storage(db: AsyncSession = Depends(get_db)):
+    """Asosiy davomat jadvali va arxivdagi yozuvlar, arxiv chegarasi va arxivlash vazifasi holati"""
+    return await storage_status(db)
+
+@router.post("/storage/attendance/archive")
+async def archive_attendance(
+    keep_months: Optional[int] = Query(None, ge=0, le=120),
+    db: AsyncSession = Depends(get_db)
+):
+    """Yopilgan oylarni arxivlash (keep_months berilmasa - ATTENDANCE_ARCHIVE_KEEP_MONTHS)"""
+    if keep_months is None:
+        return await archive_closed_months(db)
+    return await archive_closed_months(db, keep_months)
+
+@router.get("/db/pool")
+async def get_db_pool_stats():
+    """Ulanishlar pooli holati, replika kechikishi va ulanish olishni kutish vaqti (db_pool_* metrikalari)"""
+    return {
+        "status": pool_status(engine),
+        "replica": {
+            **read_router.status(),
+            **({"pool": pool_status(replica_engine)} if replica_engine is not None else {})
+        },
+        "metrics": metrics_snapshot("db_pool_")
+    }
+
+@router.get("/db/queries")
+async def get_query_stats(
+    limit: int = Query(20, ge=1, le=500),
+    order_by: str = Query("total_ms", pattern="^(" + "|".join(ORDER_FIELDS) + ")$")
+):
+    """Eng qimmat SQL so'rov shakllari: soni, umumiy/o'rtacha/p95/maksimal vaqt va sekin so'rovlar rejasi"""
+    return {
+        **query_stats.status(),
+        "queries": query_stats.top(limit, order_by),
+        "metrics": metrics_snapshot("db_slow_queries")
+    }
+
+@router.delete("/db/queries")
+async def reset_query_stats():
+    """So'rovlar statistikasini nolga tushirish (masalan, optimallashtirishdan keyin)"""
+    query_stats.reset()
+    return query_stats.status()
+
+@router.get("/cache/employees")
+async def get_employee_directory_stats():
+    """Xodimlar katalogi holati va indekslar bo'yicha hit ratio"""
+    return {
+        **employee_directory.status(),
+        "metrics": metrics_snapshot("employee_directory_")
+    }
+
+@router.get("/cache/bus")
+async def get_invalidation_bus_status():
+    """Keshlarni jarayonlar o'rtasida tozalash shinasi holati va hodisalar soni"""
+    return {
+        **invalidation_bus.status(),
+        "metrics": metrics_snapshot("invalidation_")
+    }
+
+@router.get("/profiler")
+async def get_profiler_status():
+    """Faol profil va oxirgi yozuvlar (capture) holati"""
+    return profiler.status()
+
+@router.post("/profiler")
+async def arm_profiler(
+    request: Request,
+    route: Optional[str] = Query(None, description="Marshrut shabloni, masalan /face-id/recognize; bo'sh - hammasi"),
+    requests: Optional[int] = Query(None, ge=1, le=1000, description="Keyingi N ta so'rov"),
+    seconds: Optional[float] = Query(None, gt=0, description="Vaqt oynasi (requests bilan - kutish chegarasi)"),
+    interval_ms: float = Query(PROFILER_INTERVAL_MS, ge=1, le=1000),
+    all_threads: bool = Query(False, description="Ishchi oqimlar ham (asyncio.to_thread, masalan Face ID)")
+):
+    """Namuna oluvchi profilerni keyingi N ta so'rov yoki vaqt oynasi uchun yoqish"""
+    if route is not None and route not in request.app.openapi()["paths"]:
+        raise HTTPException(status_code=404, detail=f"Marshrut topilmadi: {route}")
+    try:
+        capture = profiler.arm(
+            route=route, requests=requests, seconds=seconds, interval_ms=interval_ms, all_threads=all_threads
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return capture.status()
+
+@router.delete("/profiler")
+async def cancel_profiler():
+    """Faol profilni to'xtatish (yig'ilgan namunalar yuklab olish uchun qoladi)"""
+    capture = profiler.cancel()
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Faol profil yo'q")
+    return capture.status()
+
+@router.get("/profiler/{capture_id}")
+async def download_profile(
+    capture_id: str,
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$")
+):
+    """Profil natijasi: collapsed-stack (flamegraph.pl/inferno) yoki speedscope JSON"""
+    capture = profiler.get(capture_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Profil topilmadi")
+    
+    filename = f"profile_{capture.id}"
+    if format == "speedscope":
+        return JSONResponse(
+            capture.speedscope(),
+            headers={"Content-Disposition": f'attachment; filename="{filename}.speedscope.json"'}
+        )
+    return PlainTextResponse(
+        capture.collapsed(),
+        headers={"Content-Disposition": f'attachment; filename="{filename}.collapsed.txt"'}
+    )
@@ -1,12 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from datetime import date, datetime
 from typing import List, Optional
+import asyncio
+import csv
+import io
+import json
+from app.core.config import REPORT_DOWNLOAD_WAIT_SECONDS
 from app.crud import attendance as crud_attendance
 from app.schemas import attendance as schema_attendance
-from app.core.database import get_db
-from app.services.reports import generate_monthly_report
+from app.core.database import get_db, get_read_db, read_session_for, AsyncSessionLocal
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.services.report_cache import report_cache
+from app.services.report_jobs import JOB_DONE, generate_report, get_report_jobs, report_bounds
 from app.crud.employee import get_employee_by_uuid
 
 router = APIRouter(prefix="/attendance", tags=["Attendance"])
@@ -35,12 +43,82 @@ async def scan_qr_code(qr_request: schema_attendance.QRScanRequest, db: AsyncSes
 @router.get("/employee/{employee_id}", response_model=List[schema_attendance.Attendance])
 async def get_employee_attendance(
     employee_id: int, 
+    response: Response,
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Oldingi javobning X-Next-Cursor sarlavhasi"),
     db: AsyncSession = Depends(get_db)
 ):
-    """Xodimning davomat tarixini olish"""
-    return await crud_attendance.get_attendance_by_employee(db, employee_id, start_date, end_date)
+    """
+    Xodimning davomat tarixini olish (keyset paginatsiya bilan)
+    
+    Keyingi sahifa mavjud bo'lsa, uning kursori X-Next-Cursor sarlavhasida qaytariladi.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Kursor noto'g'ri")
+    
+    # Keyingi sahifa borligini bilish uchun bitta ortiqcha yozuv olinadi
+    rows = await crud_attendance.get_attendance_by_employee(
+        db, employee_id, start_date, end_date, limit=limit + 1, after=after
+    )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].check_time, rows[-1].id)
+    
+    return rows
+
+EXPORT_COLUMNS = ["id", "employee_id", "check_type", "check_time", "source", "location_lat", "location_lon", "is_late"]
+
+def _export_row(row) -> dict:
+    """Eksport uchun qatorni JSON/CSV ga mos qiymatlarga aylantirish"""
+    data = dict(zip(EXPORT_COLUMNS, row))
+    data["check_type"] = data["check_type"].value
+    data["source"] = data["source"].value if data["source"] else None
+    data["check_time"] = data["check_time"].isoformat()
+    return data
+
+@router.get("/employee/{employee_id}/export")
+async def export_employee_attendance(
+    employee_id: int,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None)
+):
+    """Xodimning butun davomat tarixini NDJSON yoki CSV oqimi sifatida yuklab olish"""
+    
+    async def generate():
+        # Oqim javob yuborilguncha davom etadi, shuning uchun sessiya shu yerda ochiladi
+        async with AsyncSessionLocal() as session:
+            if format == "csv":
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+                writer.writeheader()
+                yield buffer.getvalue()
+            
+            async for partition in crud_attendance.stream_attendance_by_employee(
+                session, employee_id, start_date, end_date
+            ):
+                if format == "csv":
+                    buffer.seek(0)
+                    buffer.truncate()
+                    writer.writerows(_export_row(row) for row in partition)
+                    yield buffer.getvalue()
+                else:
+                    yield "".join(
+                        json.dumps(_export_row(row), ensure_ascii=False) + "\n" for row in partition
+                    )
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        generate(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="davomat_{employee_id}.{format}"'}
+    )
 
 @router.get("/daily/{target_date}")
 async def get_daily_attendance(target_date: date, db: AsyncSession = Depends(get_db)):
@@ -88,7 +166,7 @@ async def get_employee_current_status(employee_id: int, db: AsyncSession = Depen
         }
 
 @router.get("/report/monthly/{year}/{month}")
-async def get_monthly_report(year: int, month: int, db: AsyncSession = Depends(get_db)):
+async def get_monthly_report(year: int, month: int, db: AsyncSession = Depends(get_read_db)):
     """Oylik hisobot ma'lumotlarini olish - yangilangan versiya"""
     if month < 1 or month > 12:
         raise HTTPException(status_code=400, detail="Oy 1-12 orasida bo'lishi kerak")
@@ -102,44 +180,69 @@ async def get_monthly_report(year: int, month: int, db: AsyncSession = Depends(g
         "reports": report_data
     }
 
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+async def _cached_report_response(request: Request, report_type: str, params: dict, filename: str):
+    """
+    Hisobotni keshdan berish (ETag / If-None-Match bilan), kerak bo'lsa yaratish
+
+    Keshda bo'lmasa hisobot navbatiga yuboriladi - bir vaqtdagi yaratishlar soni
+    cheklanadi va bir xil so'rovlar bitta vazifani kutadi. Vazifa
+    REPORT_DOWNLOAD_WAIT_SECONDS ichida tugamasa 202 va vazifa manzili (Location)
+    qaytariladi. Ma'lumotlar o'qish replikasidan olinadi (davr bugunni qamrasa -
+    faqat kechikish kichik bo'lsa); navbatni kutishda ulanish band qilinmaydi.
+    """
+    start_date, end_date = report_bounds(report_type, params)
+    manager = get_report_jobs()
+    async with read_session_for(end_date) as db:
+        entry = await report_cache.lookup(db, report_type, start_date, end_date)
+        headers = {"ETag": f'"{entry.etag}"', "Cache-Control": "private, no-cache"}
+        
+        # Mijozda shu versiya bor - faylni qayta yubormaymiz
+        if entry.matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        
+        if entry.exists or manager is None:
+            file_path = await report_cache.ensure(entry, lambda: generate_report(db, report_type, params))
+            return FileResponse(file_path, media_type=XLSX_MEDIA_TYPE, filename=filename, headers=headers)
+    
+    # Sessiya yopilgan - vazifa o'z sessiyasi bilan ishlaydi
+    job = await manager.submit(report_type, params)
+    try:
+        job = await manager.wait(job, timeout=REPORT_DOWNLOAD_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        location = str(request.url_for("get_report_job", job_id=job.id))
+        return JSONResponse(
+            jsonable_encoder({**job.to_dict(), "status_url": location}),
+            status_code=202,
+            headers={"Location": location, "Retry-After": "5"}
+        )
+    if job.status != JOB_DONE:
+        raise HTTPException(status_code=500, detail=job.error or "Hisobot yaratilmadi")
+    headers["ETag"] = f'"{job.etag}"'
+    return FileResponse(job.file_path, media_type=XLSX_MEDIA_TYPE, filename=filename, headers=headers)
+
 @router.get("/report/download/daily/{target_date}")
-async def download_daily_report(target_date: date, db: AsyncSession = Depends(get_db)):
+async def download_daily_report(target_date: date, request: Request):
     """Kunlik hisobotni Excel fayl sifatida yuklab olish"""
-    from app.services.reports import generate_daily_report, delete_file_after_delay
-    
-    file_path = await generate_daily_report(db, target_date)
-    
-    # Faylni yuklab olingandan keyin 5 daqiqada o'chirish
-    import asyncio
-    asyncio.create_task(delete_file_after_delay(file_path, 300))
-    
-    return FileResponse(
-        file_path, 
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", 
-        filename=f"kunlik_davomat_{target_date}.xlsx"
+    return await _cached_report_response(
+        request, "daily", {"date": target_date},
+        f"kunlik_davomat_{target_date}.xlsx"
     )
 
 @router.get("/report/download/{year}/{month}")
-async def download_monthly_report(year: int, month: int, db: AsyncSession = Depends(get_db)):
+async def download_monthly_report(year: int, month: int, request: Request):
     """Oylik hisobotni Excel fayl sifatida yuklab olish"""
     if month < 1 or month > 12:
         raise HTTPException(status_code=400, detail="Oy 1-12 orasida bo'lishi kerak")
     
-    file_path = await generate_monthly_report(db, year, month)
-    
-    # Faylni yuklab olingandan keyin 5 daqiqada o'chirish uchun background task
-    import asyncio
-    from app.services.reports import delete_file_after_delay
-    asyncio.create_task(delete_file_after_delay(file_path, 300))  # 5 daqiqa
-    
-    return FileResponse(
-        file_path, 
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", 
-        filename=f"davomat_hisoboti_{year}_{month:02d}.xlsx"
+    return await _cached_report_response(
+        request, "monthly", {"year": year, "month": month},
+        f"davomat_hisoboti_{year}_{month:02d}.xlsx"
     )
 
 @router.get("/report/daily/{target_date}")
-async def download_daily_report(target_date: str, db: AsyncSession = Depends(get_db)):
+async def download_daily_report(target_date: str, request: Request):
     """Kunlik batafsil hisobotni Excel fayl sifatida yuklab olish"""
     try:
         from datetime import datetime
@@ -147,38 +250,20 @@ async def download_daily_report(target_date: str, db: AsyncSession = Depends(get
     except ValueError:
         raise HTTPException(status_code=400, detail="Sana formati noto'g'ri. YYYY-MM-DD formatida kiriting")
     
-    from app.services.reports import generate_daily_report
-    file_path = await generate_daily_report(db, date_obj)
-    
-    # Faylni yuklab olingandan keyin 5 daqiqada o'chirish uchun background task
-    import asyncio
-    from app.services.reports import delete_file_after_delay
-    asyncio.create_task(delete_file_after_delay(file_path, 300))  # 5 daqiqa
-    
-    return FileResponse(
-        file_path, 
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", 
-        filename=f"kunlik_batafsil_{target_date}.xlsx"
+    return await _cached_report_response(
+        request, "daily", {"date": date_obj},
+        f"kunlik_batafsil_{target_date}.xlsx"
     )
 
 @router.get("/report/detailed/{year}/{month}")
-async def download_detailed_monthly_report(year: int, month: int, db: AsyncSession = Depends(get_db)):
+async def download_detailed_monthly_report(year: int, month: int, request: Request):
     """Batafsil oylik hisobotni Excel fayl sifatida yuklab olish"""
     if month < 1 or month > 12:
         raise HTTPException(status_code=400, detail="Oy 1-12 orasida bo'lishi kerak")
     
-    from app.services.reports import generate_detailed_monthly_report
-    file_path = await generate_detailed_monthly_report(db, year, month)
-    
-    # Faylni yuklab olingandan keyin 5 daqiqada o'chirish uchun background task
-    import asyncio
-    from app.services.reports import delete_file_after_delay
-    asyncio.create_task(delete_file_after_delay(file_path, 300))  # 5 daqiqa
-    
-    return FileResponse(
-        file_path, 
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", 
-        filename=f"batafsil_hisoboti_{year}_{month:02d}.xlsx"
+    return await _cached_report_response(
+        request, "detailed", {"year": year, "month": month},
+        f"batafsil_hisoboti_{year}_{month:02d}.xlsx"
     )
 
 @router.get("/statistics/employee/{employee_id}")
@@ -202,26 +287,22 @@ async def get_daily_work_hours(
     stats = await crud_attendance.calculate_daily_work_hours(db, employee_id, target_date)
     return stats
 
-@router.get("/report/detailed/{year}/{month}")
+@router.get("/report/detailed/{year}/{month}/json")
 async def get_detailed_monthly_report(
     year: int, 
     month: int, 
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Batafsil oylik hisobot - maosh hisob-kitoblari bilan"""
+    """
+    Batafsil oylik hisobot - maosh hisob-kitoblari bilan (JSON)
+
+    Excel fayl /report/detailed/{year}/{month} manzilida.
+    """
     if month < 1 or month > 12:
         raise HTTPException(status_code=400, detail="Oy 1-12 orasida bo'lishi kerak")
     
-    # Barcha faol xodimlar uchun batafsil statistika
-    from app.crud.employee import get_employees
-    employees = await get_employees(db, include_inactive=False)
-    
-    detailed_reports = []
-    for employee in employees:
-        stats = await crud_attendance.get_employee_monthly_statistics(db, employee.id, month, year)
-        if not isinstance(stats, dict) or "error" in stats:
-            continue
-        detailed_reports.append(stats)
+    # Barcha faol xodimlar uchun batafsil statistika (bitta davomat so'rovi bilan)
+    detailed_reports = await crud_attendance.get_monthly_statistics_bulk(db, month, year)
     
     # Umumiy statistika
     total_base_salary = sum(report["salary_info"]["base_salary"] for report in detailed_reports)
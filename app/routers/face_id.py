@@ -4,17 +4,49 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.crud.employee import get_employee_by_id
 from app.crud.attendance import create_attendance, check_if_already_checked_today
-from app.services.simple_face_id import simple_face_service as face_service
-# from app.services.face_id import face_service
+from app.core.invalidation import FACE, invalidation_bus
 from app.schemas.attendance import AttendanceCreate, CheckTypeEnum as CheckType
 from datetime import datetime
 from typing import Optional
 from pydantic import Field
+import asyncio
 import base64
+import threading
 from app.utils.timezone import get_tashkent_time, format_tashkent_time
 
 router = APIRouter(prefix="/face-id", tags=["Face ID"])
 
+# Face ID servisi (OpenCV, cascade va yuzlar galereyasi) birinchi murojaatda yaratiladi -
+# Face ID ishlatmaydigan worker, bot va CLI buyruqlari uni yuklamaydi
+_face_service = None
+_face_service_lock = threading.Lock()
+
+def get_face_service():
+    """Face ID servisi (Depends orqali - birinchi yaratish threadpool'da, event loop bloklanmaydi)"""
+    global _face_service
+    if _face_service is None:
+        with _face_service_lock:
+            if _face_service is None:
+                from app.services.simple_face_id import SimpleFaceIDService
+                # from app.services.face_id import FaceIDService as SimpleFaceIDService
+                _face_service = SimpleFaceIDService()
+    return _face_service
+
+async def warm_up_face_service():
+    """Servisni oldindan yuklash (FACE_ID_WARMUP) - birinchi so'rov kutib qolmasligi uchun"""
+    try:
+        await asyncio.to_thread(get_face_service)
+    except Exception as e:
+        print(f"❌ Face ID servisini yuklab bo'lmadi: {e}")
+
+def _reload_known_faces(event):
+    # Hali yaratilmagan servis birinchi murojaatda galereyani fayldan o'qiydi
+    if _face_service is not None:
+        _face_service.load_known_faces()
+
+# Boshqa jarayonda (masalan, boshqa API worker'ida) yuz qo'shilsa yoki o'chirilsa - galereya fayldan qayta yuklanadi
+invalidation_bus.subscribe(FACE, _reload_known_faces, remote_only=True)
+
 def get_error_suggestions(error_type: str) -> list:
     """Xatolik turiga qarab takliflar berish"""
     suggestions = {
@@ -75,7 +107,8 @@ async def create_face_id_attendance(db: AsyncSession, employee_id: int, check_ty
 async def register_employee_face(
     employee_id: int = Form(...),
     image: UploadFile = File(...),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    face_service=Depends(get_face_service)
 ):
     """Xodimning yuzini ro'yxatga olish"""
     
@@ -103,6 +136,7 @@ async def register_employee_face(
         )
         
         if result["success"]:
+            invalidation_bus.publish(FACE, ids=[employee_id])
             return JSONResponse(
                 status_code=200,
                 content={
@@ -161,7 +195,8 @@ async def register_employee_face(
 async def recognize_face_attendance(
     image: UploadFile = File(...),
     check_type: CheckType = Form(...),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    face_service=Depends(get_face_service)
 ):
     """Yuz tanish orqali davomat belgilash"""
     
@@ -250,7 +285,8 @@ async def recognize_face_attendance(
 @router.get("/employee/{employee_id}/faces")
 async def get_employee_face_info(
     employee_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    face_service=Depends(get_face_service)
 ):
     """Xodimning yuz ma'lumotlari haqida ma'lumot"""
     
@@ -281,7 +317,8 @@ async def get_employee_face_info(
 @router.delete("/employee/{employee_id}/faces")
 async def delete_employee_faces(
     employee_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    face_service=Depends(get_face_service)
 ):
     """Xodimning barcha yuz ma'lumotlarini o'chirish"""
     
@@ -293,6 +330,7 @@ async def delete_employee_faces(
     result = face_service.delete_employee_faces(employee_id)
     
     if result["success"]:
+        invalidation_bus.publish(FACE, ids=[employee_id])
         return JSONResponse(
             status_code=200,
             content={
@@ -315,7 +353,7 @@ async def delete_employee_faces(
         )
 
 @router.get("/statistics")
-async def get_face_id_statistics():
+async def get_face_id_statistics(face_service=Depends(get_face_service)):
     """Face ID tizimi statistikalari"""
     
     stats = face_service.get_statistics()
@@ -331,6 +369,7 @@ async def get_face_id_statistics():
 @router.post("/test-recognition")
 async def test_face_recognition(
     image: UploadFile = File(...),
+    face_service=Depends(get_face_service)
 ):
     """Yuzni tanish testini amalga oshirish (davomat belgilamasdan)"""
     
@@ -360,7 +399,8 @@ async def test_face_recognition(
 async def check_face_duplicate(
     image: UploadFile = File(...),
     employee_id: Optional[int] = Form(None),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    face_service=Depends(get_face_service)
 ):
     """Yuz duplikatligi tekshiruvi (registratsiya qilishdan oldin)"""
     
@@ -493,7 +533,7 @@ async def face_id_health_check():
     """Face ID tizimi ishlash holatini tekshirish"""
     
     try:
-        stats = face_service.get_statistics()
+        stats = (await asyncio.to_thread(get_face_service)).get_statistics()
         
         return {
             "status": "healthy",
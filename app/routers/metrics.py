@@ -0,0 +1,34 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import METRICS_INSECURE, METRICS_TOKEN
+from app.core.metrics import render_prometheus
+
+router = APIRouter(tags=["Metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+async def require_metrics_token(authorization: Optional[str] = Header(None)):
+    """
+    /metrics uchun tekshiruv (Prometheus: `authorization: {credentials: ...}`)
+
+    METRICS_TOKEN o'rnatilmagan bo'lsa yopiq; faqat METRICS_INSECURE=1 bilan tokensiz ochiq.
+    """
+    if not METRICS_TOKEN:
+        if METRICS_INSECURE:
+            return
+        raise HTTPException(status_code=403, detail="Metrikalar o'chirilgan (METRICS_TOKEN o'rnatilmagan)")
+
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token, METRICS_TOKEN):
+        raise HTTPException(status_code=401, detail="Metrikalar tokeni noto'g'ri")
+
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_token)])
+async def prometheus_metrics():
+    """Jarayon metrikalari Prometheus matn formatida"""
+    return PlainTextResponse(render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -48,7 +48,8 @@ async def mobile_qr_scan(qr_request: QRScanRequest, db: AsyncSession = Depends(g
         }
     
     # Davomat yaratish
-    attendance = await crud_attendance.create_attendance_by_qr(db, qr_request)
+    # Javobda yozuv ID si kerak emas - navbatga qo'yib, saqlanishini kutmaymiz
+    attendance = await crud_attendance.create_attendance_by_qr(db, qr_request, wait_for_id=False)
     if not attendance:
         return {
             "success": False,
@@ -85,6 +86,10 @@ async def mobile_qr_scan(qr_request: QRScanRequest, db: AsyncSession = Depends(g
         "is_late": actual_attendance.is_late
     }
     
+    # Yozuv navbatda - hali bazaga saqlanmagan (ID yo'q)
+    if getattr(actual_attendance, "pending", False):
+        response["pending"] = True
+
     # Kechikish haqida ogohlantirish
     if actual_attendance.is_late and qr_request.check_type.value == "IN":
         response["warning"] = "⚠️ Siz kechikdingiz! (9:00 dan keyin)"
@@ -0,0 +1,123 @@
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from datetime import date
+import calendar
+from typing import Optional
+import os
+from app.core.database import read_session_for
+from app.schemas import report as schema_report
+from app.services import exports
+from app.services.report_jobs import (
+    JOB_DONE, JOB_FAILED, get_report_jobs, normalize_report_params, report_filename
+)
+
+router = APIRouter(prefix="/reports", tags=["Reports"])
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+def _get_manager():
+    manager = get_report_jobs()
+    if manager is None:
+        raise HTTPException(status_code=503, detail="Hisobot navbati ishlamayapti")
+    return manager
+
+def _job_response(request: Request, job) -> dict:
+    data = job.to_dict()
+    if job.status == JOB_DONE:
+        data["download_url"] = str(request.url_for("download_report_job", job_id=job.id))
+    return data
+
+@router.post("/jobs", response_model=schema_report.ReportJob, status_code=202)
+async def create_report_job(job_request: schema_report.ReportJobCreate, request: Request, response: Response):
+    """
+    Hisobot yaratish vazifasini navbatga qo'yish
+
+    Xuddi shu hisobot allaqachon yaratilayotgan bo'lsa, mavjud vazifa qaytariladi.
+    Holatni Location sarlavhasidagi manzil orqali kuzatish mumkin.
+    """
+    try:
+        params = normalize_report_params(
+            job_request.report_type, job_request.target_date, job_request.year, job_request.month
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    job = await _get_manager().submit(job_request.report_type, params)
+    response.headers["Location"] = str(request.url_for("get_report_job", job_id=job.id))
+    return _job_response(request, job)
+
+@router.get("/jobs/{job_id}", response_model=schema_report.ReportJob)
+async def get_report_job(job_id: str, request: Request):
+    """Vazifa holati va progressi"""
+    job = await _get_manager().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Vazifa topilmadi")
+    return _job_response(request, job)
+
+@router.get("/jobs/{job_id}/download")
+async def download_report_job(job_id: str):
+    """Tayyor hisobotni yuklab olish"""
+    job = await _get_manager().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Vazifa topilmadi")
+    if job.status == JOB_FAILED:
+        raise HTTPException(status_code=500, detail=job.error or "Hisobot yaratilmadi")
+    if job.status != JOB_DONE:
+        raise HTTPException(status_code=409, detail="Hisobot hali tayyor emas")
+    if not job.file_path or not os.path.exists(job.file_path):
+        # Fayl keshdan o'chirilgan - vazifani qayta yuborish kerak
+        raise HTTPException(status_code=410, detail="Hisobot fayli endi mavjud emas, qayta so'rov yuboring")
+
+    return FileResponse(
+        job.file_path,
+        media_type=XLSX_MEDIA_TYPE,
+        filename=report_filename(job.report_type, job.params),
+        headers={"ETag": f'"{job.etag}"'}
+    )
+
+def _export_response(dataset: str, format: str, filename_suffix: str, period_end: Optional[date], **params):
+    """
+    Eksportni oqim sifatida qaytarish (sessiya oqim ichida ochiladi)
+
+    Ma'lumotlar o'qish replikasidan olinadi; period_end bugun yoki None bo'lsa
+    replika kechikishi hisobga olinadi.
+    """
+    try:
+        exports.validate_export(dataset, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def generate():
+        # Oqim javob yuborilguncha davom etadi, shuning uchun sessiya shu yerda ochiladi
+        async with read_session_for(period_end) as session:
+            async for data in exports.stream_export(session, dataset, format, **params):
+                yield data
+
+    filename = exports.export_filename(dataset, format, filename_suffix)
+    return StreamingResponse(
+        generate(),
+        media_type=exports.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/export/attendance")
+async def export_attendance(
+    format: str = Query("csv.gz", description="csv.gz, ndjson yoki npz"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None)
+):
+    """Xom davomat yozuvlarini analitika uchun eksport qilish"""
+    suffix = f"{start_date or 'boshidan'}_{end_date or 'hozirgacha'}"
+    return _export_response("attendance", format, suffix, end_date, start_date=start_date, end_date=end_date)
+
+@router.get("/export/monthly/{year}/{month}")
+async def export_monthly_statistics(
+    year: int,
+    month: int,
+    format: str = Query("csv.gz", description="csv.gz, ndjson yoki npz")
+):
+    """Oylik xodim statistikasini (davomat va maosh) analitika uchun eksport qilish"""
+    if month < 1 or month > 12:
+        raise HTTPException(status_code=400, detail="Oy 1-12 orasida bo'lishi kerak")
+    period_end = date(year, month, calendar.monthrange(year, month)[1])
+    return _export_response("monthly", format, f"{year}_{month:02d}", period_end, year=year, month=month)
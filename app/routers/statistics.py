@@ -1,55 +1,52 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date, datetime, timedelta
 from typing import Optional
-from app.core.database import get_db
+from app.core.config import STATISTICS_CACHE_TTL
+from app.core.invalidation import ATTENDANCE, EMPLOYEE, invalidation_bus
+from app.core.database import get_fresh_read_db, read_session_for
 from app.crud import attendance as crud_attendance, employee as crud_employee
+from app.crud.attendance import WORK_START_TIME, WORK_END_TIME
+from app.services.payroll import HOURS_PER_DAY
+from app.services.rollups import query_rollups
+from app.utils.cache import TTLCache
 
 router = APIRouter(prefix="/statistics", tags=["Statistics"])
 
+# Kalit - sana: kun almashganda yangi javob hisoblanadi
+overview_cache = TTLCache(ttl=STATISTICS_CACHE_TTL, maxsize=4)
+
+# Xodimlar o'zgarishi va ommaviy import keshni darhol tozalaydi. Oddiy check-in'lar
+# tozalamaydi - ertalabki oqimda kesh har belgida bekor bo'lmasin (TTL yetarli)
+def _on_data_changed(event):
+    if event.entity == EMPLOYEE or not event.ids:
+        overview_cache.invalidate()
+
+invalidation_bus.subscribe(EMPLOYEE, _on_data_changed)
+invalidation_bus.subscribe(ATTENDANCE, _on_data_changed)
+
 @router.get("/overview")
-async def get_statistics_overview(db: AsyncSession = Depends(get_db)):
-    """Umumiy statistika - yangilangan versiya"""
+async def get_statistics_overview(db: AsyncSession = Depends(get_fresh_read_db)):
+    """
+    Umumiy statistika - agregat so'rovlar bilan
     
-    # Umumiy xodimlar soni
-    total_employees = len(await crud_employee.get_employees(db))
-    active_employees = len(await crud_employee.get_employees(db, include_inactive=False))
-    
-    # Bugungi statistika
+    Javob STATISTICS_CACHE_TTL soniya keshlanadi - tez-tez yangilanadigan
+    dashboard bazaga har safar murojaat qilmaydi.
+    """
     today = date.today()
-    today_attendances = await crud_attendance.get_daily_attendance(db, today)
-    
-    checked_in_today = len(set(
-        att.employee_id for att in today_attendances 
-        if att.check_type.value == "IN"
-    ))
-    
-    late_today = len([
-        att for att in today_attendances 
-        if att.check_type.value == "IN" and att.is_late
-    ])
-    
-    # Hozir ishda bo'lganlar
-    currently_in_office = 0
-    employee_last_status = {}
-    
-    for att in today_attendances:
-        emp_id = att.employee_id
-        if emp_id not in employee_last_status or att.check_time > employee_last_status[emp_id]["time"]:
-            employee_last_status[emp_id] = {
-                "type": att.check_type.value,
-                "time": att.check_time
-            }
+    return await overview_cache.get_or_set(today, lambda: _build_overview(db, today))
+
+async def _build_overview(db: AsyncSession, today: date) -> dict:
+    total_employees, active_employees = await crud_employee.count_employees(db)
     
-    currently_in_office = sum(1 for status in employee_last_status.values() if status["type"] == "IN")
+    # Bugungi statistika
+    today_counts = await crud_attendance.get_daily_overview_counts(db, today)
+    checked_in_today = today_counts["checked_in"]
     
     # Oylik statistika (joriy oy)
-    current_month = datetime.now().month
-    current_year = datetime.now().year
-    monthly_data = await crud_attendance.get_monthly_attendance_report(db, current_month, current_year)
-    
-    # Ish vaqti ma'lumotlari
-    from app.crud.attendance import WORK_START_TIME, WORK_END_TIME
+    current_month = today.month
+    current_year = today.year
+    monthly_summary = await crud_attendance.get_monthly_rate_summary(db, current_month, current_year)
     
     return {
         "employees": {
@@ -60,46 +57,21 @@ async def get_statistics_overview(db: AsyncSession = Depends(get_db)):
         "today": {
             "date": today,
             "checked_in": checked_in_today,
-            "late_arrivals": late_today,
-            "currently_in_office": currently_in_office,
+            "late_arrivals": today_counts["late_arrivals"],
+            "currently_in_office": today_counts["currently_in_office"],
             "attendance_rate": round((checked_in_today / active_employees * 100) if active_employees > 0 else 0, 2)
         },
         "work_schedule": {
             "start_time": WORK_START_TIME.strftime("%H:%M"),
             "end_time": WORK_END_TIME.strftime("%H:%M"),
-            "working_hours_per_day": 8.5
+            "working_hours_per_day": HOURS_PER_DAY
         },
         "current_month": {
             "month": current_month,
             "year": current_year,
-            "total_reports": len(monthly_data),
-            "avg_attendance_rate": round(
-                sum(report["attendance_rate"] for report in monthly_data) / len(monthly_data) 
-                if monthly_data else 0, 2
-            ),
-            "avg_punctuality_rate": round(
-                sum(report["punctuality_rate"] for report in monthly_data) / len(monthly_data) 
-                if monthly_data else 0, 2
-            )
-        }
-    }
-    
-    return {
-        "total_employees": total_employees,
-        "active_employees": active_employees,
-        "today": {
-            "date": today.isoformat(),
-            "checked_in": checked_in_today,
-            "late_arrivals": late_today,
-            "currently_in_office": currently_in_office,
-            "attendance_rate": round((checked_in_today / active_employees * 100), 1) if active_employees > 0 else 0
-        },
-        "monthly": {
-            "month": current_month,
-            "year": current_year,
-            "total_working_days": len(monthly_data),
-            "average_attendance": round(sum(row.present_days for row in monthly_data) / len(monthly_data), 1) if monthly_data else 0,
-            "total_late_days": sum(row.late_days for row in monthly_data)
+            "total_reports": monthly_summary["employees"],
+            "avg_attendance_rate": monthly_summary["avg_attendance_rate"],
+            "avg_punctuality_rate": monthly_summary["avg_punctuality_rate"]
         }
     }
 
@@ -107,8 +79,7 @@ async def get_statistics_overview(db: AsyncSession = Depends(get_db)):
 async def get_employee_monthly_stats(
     employee_id: int, 
     month: Optional[int] = Query(None),
-    year: Optional[int] = Query(None),
-    db: AsyncSession = Depends(get_db)
+    year: Optional[int] = Query(None)
 ):
     """Xodimning oylik statistikasi"""
     
@@ -117,11 +88,6 @@ async def get_employee_monthly_stats(
     if not year:
         year = datetime.now().year
     
-    # Xodimni tekshirish
-    employee = await crud_employee.get_employee_by_id(db, employee_id)
-    if not employee:
-        return {"error": "Xodim topilmadi"}
-    
     # Oylik ma'lumotlar
     start_date = date(year, month, 1)
     if month == 12:
@@ -129,11 +95,18 @@ async def get_employee_monthly_stats(
     else:
         end_date = date(year, month + 1, 1) - timedelta(days=1)
     
-    attendances = await crud_attendance.get_attendance_by_employee(db, employee_id, start_date, end_date)
+    # Joriy oy - replika faqat kechikish kichik bo'lsa
+    async with read_session_for(end_date) as db:
+        # Xodimni tekshirish
+        employee = await crud_employee.get_employee_by_id(db, employee_id)
+        if not employee:
+            return {"error": "Xodim topilmadi"}
+        
+        attendances = await crud_attendance.get_attendance_by_employee(db, employee_id, start_date, end_date)
     
     # Statistika hisoblash
     check_ins = [att for att in attendances if att.check_type.value == "IN"]
-    check_outs = [att for att in attendances if att.check_type.value == "IN"]
+    check_outs = [att for att in attendances if att.check_type.value == "OUT"]
     late_days = [att for att in check_ins if att.is_late]
     
     unique_days = set(att.check_time.date() for att in check_ins)
@@ -159,94 +132,170 @@ async def get_employee_monthly_stats(
         }
     }
 
+def _month_range(month: int, year: int) -> tuple[date, date]:
+    start_date = date(year, month, 1)
+    if month == 12:
+        end_date = date(year + 1, 1, 1) - timedelta(days=1)
+    else:
+        end_date = date(year, month + 1, 1) - timedelta(days=1)
+    return start_date, end_date
+
+def _employee_stats_entry(row, month: int, year: int, start_date: date, end_date: date) -> dict:
+    """get_employee_monthly_stats bilan bir xil tuzilma"""
+    return {
+        "employee": {
+            "id": row.employee_id,
+            "name": row.full_name,
+            "position": row.position if row.position else None
+        },
+        "period": {
+            "month": month,
+            "year": year,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat()
+        },
+        "statistics": {
+            "total_check_ins": row.check_ins,
+            "total_check_outs": row.check_outs,
+            "unique_working_days": row.working_days,
+            "late_days": row.late_days,
+            "late_percentage": round((row.late_days / row.check_ins * 100), 1) if row.check_ins else 0
+        }
+    }
+
 @router.get("/department/{position}")
 async def get_department_stats(
     position: str,
     month: Optional[int] = Query(None),
-    year: Optional[int] = Query(None),
-    db: AsyncSession = Depends(get_db)
+    year: Optional[int] = Query(None)
 ):
-    """Bo'lim bo'yicha statistika"""
+    """Bo'lim bo'yicha statistika (bitta GROUP BY so'rovi)"""
     
     if not month:
         month = datetime.now().month
     if not year:
         year = datetime.now().year
     
-    # Bo'lim xodimlari
-    try:
-        # No need to import PositionEnum as position is now a string
-        position_filter = position.lower() if position else None
-    except ValueError:
-        return {"error": "Noto'g'ri lavozim"}
+    start_date, end_date = _month_range(month, year)
+    async with read_session_for(end_date) as db:
+        rows = await crud_attendance.get_department_employee_stats(db, position, start_date, end_date)
     
-    employees = await crud_employee.get_employees(db)
-    department_employees = [emp for emp in employees if emp.position and emp.position.lower() == position_filter]
-    
-    if not department_employees:
+    if not rows:
         return {"error": "Ushbu bo'limda xodimlar topilmadi"}
     
-    # Har bir xodim uchun statistika
-    stats = []
-    total_late = 0
-    total_present = 0
-    
-    for emp in department_employees:
-        emp_stats = await get_employee_monthly_stats(emp.id, month, year, db)
-        if "error" not in emp_stats:
-            stats.append(emp_stats)
-            total_late += emp_stats["statistics"]["late_days"]
-            total_present += emp_stats["statistics"]["unique_working_days"]
+    stats = [_employee_stats_entry(row, month, year, start_date, end_date) for row in rows]
+    total_late = sum(row.late_days for row in rows)
+    total_present = sum(row.working_days for row in rows)
     
     return {
         "department": position.upper(),
         "period": {"month": month, "year": year},
         "summary": {
-            "total_employees": len(department_employees),
-            "average_working_days": round(total_present / len(stats), 1) if stats else 0,
+            "total_employees": len(rows),
+            "average_working_days": round(total_present / len(rows), 1),
             "total_late_days": total_late,
-            "average_late_days": round(total_late / len(stats), 1) if stats else 0
+            "average_late_days": round(total_late / len(rows), 1)
         },
         "employees": stats
     }
 
+@router.get("/departments")
+async def get_departments_summary(
+    month: Optional[int] = Query(None, ge=1, le=12),
+    year: Optional[int] = Query(None)
+):
+    """Barcha bo'limlar bo'yicha qisqacha statistika (GROUP BY position)"""
+    
+    if not month:
+        month = datetime.now().month
+    if not year:
+        year = datetime.now().year
+    
+    start_date, end_date = _month_range(month, year)
+    async with read_session_for(end_date) as db:
+        rows = await crud_attendance.get_department_summaries(db, start_date, end_date)
+    
+    departments = []
+    for position, employees, working_days, late_days in rows:
+        working_days = working_days or 0
+        late_days = late_days or 0
+        departments.append({
+            "department": position.upper() if position else None,
+            "total_employees": employees,
+            "average_working_days": round(working_days / employees, 1) if employees else 0,
+            "total_late_days": late_days,
+            "average_late_days": round(late_days / employees, 1) if employees else 0
+        })
+    
+    return {
+        "period": {"month": month, "year": year},
+        "departments": departments
+    }
+
+@router.get("/trends")
+async def get_trends(
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    bucket: str = Query("week", pattern="^(day|week|month)$")
+):
+    """Ixtiyoriy davr va bo'lak (kun, hafta, oy) bo'yicha davomat trendi"""
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date start_date dan oldin bo'lishi mumkin emas")
+    
+    async with read_session_for(end_date) as db:
+        trends = await crud_attendance.get_attendance_trends(db, start_date, end_date, bucket)
+    return {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "bucket": bucket,
+        "trends": trends
+    }
+
+@router.get("/rollups")
+async def get_rollup_stats(
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    bucket: Optional[str] = Query(None, pattern="^(day|week|month)$"),
+    group_by: str = Query("position", pattern="^(position|employee)$"),
+    position: Optional[str] = Query(None)
+):
+    """
+    Uzoq davrlar uchun lavozim yoki xodim bo'yicha davomat ko'rsatkichlari
+    
+    Oldindan agregatlangan rollup'lardan o'qiladi (xom yozuvlar skanerlanmaydi).
+    bucket berilmasa - butun davr bitta qator.
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date start_date dan oldin bo'lishi mumkin emas")
+    
+    async with read_session_for(end_date) as db:
+        return await query_rollups(db, start_date, end_date, bucket, group_by, position)
+
 @router.get("/trends/weekly")
 async def get_weekly_trends(
-    weeks_back: int = Query(4, ge=1, le=12),
-    db: AsyncSession = Depends(get_db)
+    weeks_back: int = Query(4, ge=1, le=12)
 ):
     """Haftalik trend ma'lumotlari"""
     
-    trends = []
+    today = date.today()
+    start_of_week = today - timedelta(days=today.weekday())
+    start_date = start_of_week - timedelta(weeks=weeks_back - 1)
+    end_date = start_of_week + timedelta(days=6)
     
-    for week in range(weeks_back):
-        # Hafta boshini hisoblash
-        today = date.today()
-        start_of_week = today - timedelta(days=today.weekday() + (week * 7))
-        end_of_week = start_of_week + timedelta(days=6)
-        
-        # Haftalik ma'lumotlar
-        week_attendances = []
-        current_date = start_of_week
-        
-        while current_date <= end_of_week:
-            daily_att = await crud_attendance.get_daily_attendance(db, current_date)
-            week_attendances.extend(daily_att)
-            current_date += timedelta(days=1)
-        
-        # Statistika
-        check_ins = [att for att in week_attendances if att.check_type.value == "IN"]
-        late_count = len([att for att in check_ins if att.is_late])
-        
-        trends.append({
-            "week_start": start_of_week.isoformat(),
-            "week_end": end_of_week.isoformat(),
-            "total_check_ins": len(check_ins),
-            "late_arrivals": late_count,
-            "late_percentage": round((late_count / len(check_ins) * 100), 1) if check_ins else 0
-        })
+    # Joriy hafta bugunni qamraydi - replika faqat kechikish kichik bo'lsa
+    async with read_session_for(end_date) as db:
+        trends = await crud_attendance.get_attendance_trends(db, start_date, end_date, "week")
     
     return {
         "weeks_analyzed": weeks_back,
-        "trends": list(reversed(trends))  # Eng eski haftadan boshlab
+        "trends": [  # Eng eski haftadan boshlab
+            {
+                "week_start": week["bucket_start"],
+                "week_end": week["bucket_end"],
+                "total_check_ins": week["total_check_ins"],
+                "late_arrivals": week["late_arrivals"],
+                "late_percentage": week["late_percentage"]
+            }
+            for week in trends
+        ]
     }
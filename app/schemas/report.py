@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from datetime import date
+from typing import Optional
+
+class ReportJobCreate(BaseModel):
+    report_type: str = Field(..., description="daily, monthly yoki detailed")
+    target_date: Optional[date] = Field(None, description="Kunlik hisobot sanasi")
+    year: Optional[int] = Field(None, ge=2020)
+    month: Optional[int] = Field(None, ge=1, le=12)
+
+class ReportJob(BaseModel):
+    id: str
+    report_type: str
+    params: dict
+    status: str  # queued, running, done, failed
+    progress: int
+    stage: str
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    download_url: Optional[str] = None
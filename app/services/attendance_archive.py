@@ -0,0 +1,282 @@
+"""
+Yopilgan oylarni arxivlash
+
+Davomat jadvali faqat yaqin oylarni saqlaydi - kunlik belgilash, navbat
+tekshiruvi va bugungi hisobotlar kichik jadval va indeks bilan ishlaydi.
+ATTENDANCE_ARCHIVE_KEEP_MONTHS dan eski har bir oy uchun:
+
+    1. oy rollup'lari xom yozuvlardan qayta hisoblanadi (hisobotlar tarixni
+       shu ixcham ko'rinishdan o'qiydi);
+    2. xom yozuvlar attendance_archive jadvaliga ko'chiriladi - PostgreSQL'da
+       oyning o'z bo'limiga (partition, kerak bo'lsa yaratiladi) bitta
+       DELETE ... RETURNING so'rovi bilan, boshqa bazalarda INSERT ... SELECT
+       va DELETE bitta tranzaksiyada.
+
+Eski davrlarga so'rovlar attendance_storage.attendance_source() orqali ikkala
+jadvaldan o'qiladi. Vazifa ATTENDANCE_ARCHIVE_ENABLED bilan fonda har
+ATTENDANCE_ARCHIVE_INTERVAL_HOURS soatda yoki `python manage.py archive` bilan
+ishga tushiriladi.
+
+Fon vazifasi har bir API ishchisida ishlaydi, shuning uchun ko'chirish
+jarayonlararo qulf ostida bajariladi (archive_lock): PostgreSQL'da advisory
+lock, SQLite'da baza fayli yonidagi lock-fayl. Qulf band bo'lsa fon vazifasi
+shu safar o'tkazib yuboriladi.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import (
+    ATTENDANCE_ARCHIVE_ENABLED,
+    ATTENDANCE_ARCHIVE_INTERVAL_HOURS,
+    ATTENDANCE_ARCHIVE_KEEP_MONTHS,
+)
+from app.core.invalidation import ARCHIVE, invalidation_bus
+from app.models.attendance import Attendance
+from app.models.attendance_archive import AttendanceArchive
+from app.services.attendance_storage import COLUMNS, archive_boundary
+from app.services.rollups import bucket_end, rebuild_rollups
+from app.utils.file_lock import file_lock
+from app.utils.timezone import get_tashkent_time_naive
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_LOCK_KEY = 0x57_4F_52_4B  # pg advisory lock kaliti (barcha jarayonlar uchun bir xil)
+
+
+def _add_months(month_start: date, months: int) -> date:
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def archive_cutoff(today: date, keep_months: int = ATTENDANCE_ARCHIVE_KEEP_MONTHS) -> date:
+    """Shu sanadan oldingi oylar arxivlanadi (joriy oy + keep_months oy qoladi)"""
+    return _add_months(today.replace(day=1), -max(keep_months, 0))
+
+
+async def _create_partition(db: AsyncSession, month_start: date, month_end: date):
+    name = f"attendance_archive_y{month_start.year}m{month_start.month:02d}"
+    await db.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF attendance_archive "
+        f"FOR VALUES FROM ('{month_start.isoformat()}') TO ('{month_end.isoformat()}')"
+    ))
+
+
+@asynccontextmanager
+async def archive_lock(db: AsyncSession, wait: bool = False):
+    """
+    Arxivlashni bitta jarayonga cheklovchi qulf (API ishchilari, bot, manage.py)
+
+    PostgreSQL'da - alohida ulanishdagi advisory lock (sessiya commit'lari uni
+    bo'shatmaydi, serverlar orasida ham ishlaydi), SQLite'da - baza fayli
+    yonidagi lock-fayl.
+
+    Yields:
+        True - qulf olindi, False - boshqa jarayon arxivlamoqda (faqat wait=False)
+    """
+    bind = db.bind
+    if bind.dialect.name == "postgresql":
+        async with bind.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            if wait:
+                await conn.execute(select(func.pg_advisory_lock(ARCHIVE_LOCK_KEY)))
+                acquired = True
+            else:
+                acquired = (await conn.execute(select(func.pg_try_advisory_lock(ARCHIVE_LOCK_KEY)))).scalar()
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    await conn.execute(select(func.pg_advisory_unlock(ARCHIVE_LOCK_KEY)))
+        return
+
+    database = bind.url.database
+    if not database or database == ":memory:":
+        # Xotiradagi baza faqat shu jarayonga tegishli
+        yield True
+        return
+    async with file_lock(f"{database}.archive.lock", wait=wait) as acquired:
+        yield acquired
+
+
+async def archive_month(db: AsyncSession, month_start: date) -> int:
+    """
+    Bitta oyni arxivlash (commit bilan)
+
+    Returns:
+        Ko'chirilgan yozuvlar soni
+    """
+    month_start = month_start.replace(day=1)
+    next_month = bucket_end(month_start, "month") + timedelta(days=1)
+
+    # Arxivlangan oy hisobotlari rollup'lardan o'qiladi - avval aniq holatga keltiriladi
+    await rebuild_rollups(db, month_start, next_month - timedelta(days=1))
+
+    hot = Attendance.__table__
+    columns = [hot.c[name] for name in COLUMNS]
+    period = and_(
+        hot.c.check_time >= datetime.combine(month_start, datetime.min.time()),
+        hot.c.check_time < datetime.combine(next_month, datetime.min.time())
+    )
+    archive = insert(AttendanceArchive.__table__)
+
+    if db.get_bind().dialect.name == "postgresql":
+        await _create_partition(db, month_start, next_month)
+        moved = delete(hot).where(period).returning(*columns).cte("moved")
+        result = await db.execute(archive.from_select(COLUMNS, select(*moved.c)))
+    else:
+        await db.execute(archive.from_select(COLUMNS, select(*columns).where(period)))
+        result = await db.execute(delete(hot).where(period))
+    await db.commit()
+    return result.rowcount or 0
+
+
+async def archive_closed_months(db: AsyncSession, keep_months: int = ATTENDANCE_ARCHIVE_KEEP_MONTHS,
+                                today: Optional[date] = None, wait: bool = False) -> dict:
+    """
+    Chegaradan eski barcha oylarni arxivlash (kechikib import qilingan yozuvlar ham)
+
+    Args:
+        wait: Boshqa jarayon arxivlayotgan bo'lsa uni kutish (aks holda skipped=True qaytadi)
+
+    Returns:
+        Statistika: cutoff, months, rows, skipped, seconds
+    """
+    started = time.perf_counter()
+    cutoff = archive_cutoff(today or get_tashkent_time_naive().date(), keep_months)
+
+    months = []
+    rows = 0
+    async with archive_lock(db, wait=wait) as acquired:
+        if not acquired:
+            logger.info("Arxivlash boshqa jarayonda bajarilmoqda - o'tkazib yuborildi")
+        while acquired:
+            result = await db.execute(
+                select(func.min(Attendance.check_time))
+                .where(Attendance.check_time < datetime.combine(cutoff, datetime.min.time()))
+            )
+            first = result.scalar()
+            if first is None:
+                break
+            month_start = first.date().replace(day=1)
+            moved = await archive_month(db, month_start)
+            if not moved:
+                break
+            months.append(month_start.isoformat())
+            rows += moved
+            logger.info("Davomat arxivlandi: %s (%s ta yozuv)", month_start.strftime("%Y-%m"), moved)
+
+    if months:
+        archive_boundary.expire()
+        invalidation_bus.publish(ARCHIVE)
+
+    return {
+        "cutoff": cutoff.isoformat(),
+        "months": months,
+        "rows": rows,
+        "skipped": not acquired,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+async def storage_status(db: AsyncSession) -> dict:
+    """Asosiy jadval va arxivdagi yozuvlar soni hamda arxiv chegarasi"""
+    hot = await db.execute(select(func.count(Attendance.id), func.min(Attendance.check_time)))
+    hot_rows, hot_first = hot.one()
+    archived = await db.execute(select(func.count(AttendanceArchive.id)))
+    archive_boundary.expire()
+    boundary = await archive_boundary.get(db)
+    return {
+        "hot_rows": hot_rows,
+        "hot_first": hot_first.isoformat() if hot_first else None,
+        "archived_rows": archived.scalar_one(),
+        "archive_boundary": boundary.isoformat() if boundary else None,
+        "archiver": attendance_archiver.status() if attendance_archiver is not None else None,
+    }
+
+
+class AttendanceArchiver:
+    """Yopilgan oylarni davriy arxivlovchi fon vazifasi"""
+
+    def __init__(self, session_factory, interval_hours: float = 24, keep_months: int = 3):
+        self._session_factory = session_factory
+        self.interval = interval_hours * 3600
+        self.keep_months = keep_months
+        self._task: Optional[asyncio.Task] = None
+        self.last_run: Optional[dict] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def run_once(self) -> dict:
+        async with self._session_factory() as db:
+            stats = await archive_closed_months(db, self.keep_months)
+        self.last_run = {**stats, "finished_at": datetime.utcnow().isoformat()}
+        return stats
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                logger.exception("Davomatni arxivlashda xato")
+            await asyncio.sleep(self.interval)
+
+    async def start(self):
+        if self.is_running:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def status(self) -> dict:
+        return {
+            "running": self.is_running,
+            "interval_hours": self.interval / 3600,
+            "keep_months": self.keep_months,
+            "last_run": self.last_run,
+            "error": self.last_error,
+        }
+
+
+attendance_archiver: Optional[AttendanceArchiver] = None
+
+
+async def start_attendance_archiver(session_factory):
+    """Ilova ishga tushganda arxivlash vazifasini yoqish (ATTENDANCE_ARCHIVE_ENABLED)"""
+    global attendance_archiver
+    if not ATTENDANCE_ARCHIVE_ENABLED:
+        return None
+    attendance_archiver = AttendanceArchiver(
+        session_factory,
+        interval_hours=ATTENDANCE_ARCHIVE_INTERVAL_HOURS,
+        keep_months=ATTENDANCE_ARCHIVE_KEEP_MONTHS,
+    )
+    await attendance_archiver.start()
+    return attendance_archiver
+
+
+async def stop_attendance_archiver():
+    """Ilova to'xtaganda arxivlash vazifasini to'xtatish"""
+    if attendance_archiver is not None:
+        await attendance_archiver.stop()
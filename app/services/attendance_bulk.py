@@ -0,0 +1,319 @@
+"""
+Davomat jadvalini ommaviy eksport/import qilish (migratsiya va backfill uchun)
+
+Formatlar:
+    csv - sarlavhali oddiy CSV
+    npz - ustunli (columnar) arxiv: har bir qism uchun har bir ustun
+          alohida .npy massiv sifatida zip ichida saqlanadi
+
+Import Core INSERT ... ON CONFLICT DO NOTHING executemany orqali qismlab
+bajariladi (bazada bor yozuvlar va kunlik takroriy belgilar o'tkazib
+yuboriladi), eksport esa
+server tomonidagi kursordan qismlab o'qiydi - xotira fayl hajmiga bog'liq emas.
+"""
+import asyncio
+import csv
+import logging
+import os
+import time
+import zipfile
+from datetime import date, datetime, timedelta
+from datetime import time as dt_time
+from typing import Iterator, Optional
+
+import numpy as np
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import dialect_insert
+from app.models.attendance import Attendance, CheckTypeEnum, SourceEnum
+from app.models.employee import Employee
+from app.core.invalidation import ATTENDANCE, invalidation_bus
+from app.services.attendance_storage import attendance_source
+from app.services.rollups import rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = ("csv", "npz")
+DEFAULT_CHUNK_SIZE = 5000
+
+# Eksport qilinadigan ustunlar (id faqat ma'lumot uchun - importda yangi id beriladi)
+EXPORT_COLUMNS = ["id", "employee_id", "check_type", "check_time", "source",
+                  "location_lat", "location_lon", "is_late"]
+IMPORT_COLUMNS = EXPORT_COLUMNS[1:]
+
+# Ustunli formatdagi NumPy turlari
+NPZ_DTYPES = {
+    "id": np.int64,
+    "employee_id": np.int64,
+    "check_type": "U3",
+    "check_time": "datetime64[us]",
+    "source": "U8",
+    "location_lat": "U32",
+    "location_lon": "U32",
+    "is_late": np.bool_,
+}
+
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    """Fayl formatini aniqlash (aniq ko'rsatilmagan bo'lsa - kengaytma bo'yicha)"""
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Qo'llab-quvvatlanmaydigan format: {fmt} ({', '.join(SUPPORTED_FORMATS)})")
+    return fmt
+
+
+# Enum.value xususiyatiga har qatorda murojaat qilmaslik uchun
+_CHECK_TYPE_VALUES = {member: member.value for member in CheckTypeEnum}
+_SOURCE_VALUES = {member: member.value for member in SourceEnum}
+
+
+def export_columns(rows: list) -> dict[str, list]:
+    """EXPORT_COLUMNS tartibidagi qatorlarni ustunlarga ajratish (enumlar qiymatga aylantiriladi)"""
+    columns = list(zip(*rows))
+    return {
+        "id": columns[0],
+        "employee_id": columns[1],
+        "check_type": [_CHECK_TYPE_VALUES[check_type] for check_type in columns[2]],
+        "check_time": columns[3],
+        "source": [_SOURCE_VALUES.get(source, "") for source in columns[4]],
+        "location_lat": [lat or "" for lat in columns[5]],
+        "location_lon": [lon or "" for lon in columns[6]],
+        "is_late": [bool(is_late) for is_late in columns[7]],
+    }
+
+
+def _throughput(rows: int, started: float) -> dict:
+    """O'tkazuvchanlik statistikasi"""
+    seconds = time.perf_counter() - started
+    return {
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else None,
+    }
+
+
+# ---------- Yozuvchilar ----------
+
+class _CsvWriter:
+    def __init__(self, path: str):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(EXPORT_COLUMNS)
+
+    def write_chunk(self, rows: list):
+        self._writer.writerows(
+            (
+                row_id, employee_id, check_type.value, check_time.isoformat(),
+                source.value if source else "", lat or "", lon or "", int(bool(is_late))
+            )
+            for row_id, employee_id, check_type, check_time, source, lat, lon, is_late in rows
+        )
+
+    def close(self):
+        self._file.close()
+
+
+class _NpzWriter:
+    def __init__(self, path: str):
+        self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True)
+        self._chunk = 0
+
+    def write_chunk(self, rows: list):
+        values = export_columns(rows)
+        for name in EXPORT_COLUMNS:
+            array = np.asarray(values[name], dtype=NPZ_DTYPES[name])
+            with self._zip.open(f"chunk_{self._chunk:05d}/{name}.npy", "w", force_zip64=True) as member:
+                np.lib.format.write_array(member, array, allow_pickle=False)
+        self._chunk += 1
+
+    def close(self):
+        self._zip.close()
+
+
+# ---------- O'quvchilar ----------
+
+def _parse_bool(value) -> bool:
+    return str(value).strip().lower() in ("1", "true", "yes")
+
+
+def _normalize_row(raw: dict) -> dict:
+    """Fayldagi qatorni attendance jadvaliga mos lug'atga aylantirish"""
+    check_time = raw["check_time"]
+    if isinstance(check_time, str):
+        check_time = datetime.fromisoformat(check_time)
+    source = raw.get("source") or SourceEnum.APP.value
+    return {
+        "employee_id": int(raw["employee_id"]),
+        "check_type": CheckTypeEnum(str(raw["check_type"]).upper()),
+        "check_time": check_time,
+        "source": SourceEnum(str(source).upper()),
+        "location_lat": raw.get("location_lat") or None,
+        "location_lon": raw.get("location_lon") or None,
+        "is_late": _parse_bool(raw.get("is_late", False)),
+    }
+
+
+def _read_csv_chunks(path: str, chunk_size: int) -> Iterator[list[dict]]:
+    with open(path, newline="", encoding="utf-8") as file:
+        reader = csv.DictReader(file)
+        missing = set(IMPORT_COLUMNS[:3]) - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"CSV da ustunlar yetishmayapti: {', '.join(sorted(missing))}")
+        chunk = []
+        for raw in reader:
+            chunk.append(_normalize_row(raw))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def _read_npz_chunks(path: str, chunk_size: int) -> Iterator[list[dict]]:
+    with zipfile.ZipFile(path) as archive:
+        chunks: dict[str, set[str]] = {}
+        for name in archive.namelist():
+            prefix, _, member = name.partition("/")
+            if member.endswith(".npy"):
+                chunks.setdefault(prefix, set()).add(member[:-4])
+
+        for prefix in sorted(chunks):
+            names = [name for name in IMPORT_COLUMNS if name in chunks[prefix]]
+            arrays = {}
+            for name in names:
+                with archive.open(f"{prefix}/{name}.npy") as member:
+                    arrays[name] = np.lib.format.read_array(member, allow_pickle=False)
+
+            arrays["check_time"] = arrays["check_time"].astype("datetime64[us]").astype(object)
+            columns = {name: array.tolist() for name, array in arrays.items()}
+            length = len(columns["employee_id"])
+            for start in range(0, length, chunk_size):
+                yield [
+                    _normalize_row({name: columns[name][i] for name in names})
+                    for i in range(start, min(start + chunk_size, length))
+                ]
+
+
+_READERS = {"csv": _read_csv_chunks, "npz": _read_npz_chunks}
+_WRITERS = {"csv": _CsvWriter, "npz": _NpzWriter}
+
+
+# ---------- Ommaviy operatsiyalar ----------
+
+async def bulk_insert_attendance(db: AsyncSession, rows: list[dict]) -> int:
+    """
+    Qatorlarni bitta executemany INSERT bilan qo'shish (commit chaqiruvchida)
+
+    Unikal kalitlarga (id, xodim/tur/kun) to'qnashgan qatorlar o'tkazib yuboriladi.
+
+    Returns:
+        Haqiqatan qo'shilgan qatorlar soni
+    """
+    if not rows:
+        return 0
+    statement = dialect_insert(Attendance.__table__, db.get_bind().dialect.name)
+    result = await db.execute(statement.on_conflict_do_nothing().returning(Attendance.id), rows)
+    return len(result.all())
+
+
+async def export_query(db: AsyncSession, start_date: Optional[date] = None, end_date: Optional[date] = None):
+    """EXPORT_COLUMNS ustunlarini vaqt tartibida tanlovchi so'rov (arxivlangan oylar ham)"""
+    Attendance = await attendance_source(db, start_date, end_date)
+    query = select(
+        Attendance.id, Attendance.employee_id, Attendance.check_type, Attendance.check_time,
+        Attendance.source, Attendance.location_lat, Attendance.location_lon, Attendance.is_late
+    )
+    filters = []
+    if start_date:
+        filters.append(Attendance.check_time >= datetime.combine(start_date, dt_time.min))
+    if end_date:
+        filters.append(Attendance.check_time < datetime.combine(end_date + timedelta(days=1), dt_time.min))
+    if filters:
+        query = query.where(and_(*filters))
+    return query.order_by(Attendance.check_time, Attendance.id)
+
+
+async def export_attendance(db: AsyncSession, path: str, fmt: Optional[str] = None,
+                            start_date: Optional[date] = None, end_date: Optional[date] = None,
+                            chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """
+    Davomat yozuvlarini faylga eksport qilish
+
+    Returns:
+        Statistika: rows, chunks, seconds, rows_per_sec, path, format
+    """
+    fmt = detect_format(path, fmt)
+    started = time.perf_counter()
+
+    query = (await export_query(db, start_date, end_date)).execution_options(yield_per=chunk_size)
+
+    rows = 0
+    chunks = 0
+    writer = _WRITERS[fmt](path)
+    try:
+        result = await db.stream(query)
+        async for partition in result.partitions(chunk_size):
+            await asyncio.to_thread(writer.write_chunk, partition)
+            rows += len(partition)
+            chunks += 1
+    finally:
+        writer.close()
+
+    stats = {"path": path, "format": fmt, "rows": rows, "chunks": chunks, **_throughput(rows, started)}
+    logger.info("Davomat eksporti: %s", stats)
+    return stats
+
+
+async def import_attendance(db: AsyncSession, path: str, fmt: Optional[str] = None,
+                            chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """
+    Davomat yozuvlarini fayldan import qilish
+
+    Har bir qism alohida tranzaksiyada saqlanadi. Bazada mavjud bo'lmagan
+    xodimlarga tegishli qatorlar (skipped) va bazada allaqachon bor
+    yozuvlar (duplicates) o'tkazib yuboriladi.
+
+    Returns:
+        Statistika: rows, skipped, duplicates, chunks, seconds, rows_per_sec, path, format
+    """
+    fmt = detect_format(path, fmt)
+    started = time.perf_counter()
+
+    result = await db.execute(select(Employee.id))
+    employee_ids = set(result.scalars().all())
+
+    rows = 0
+    skipped = 0
+    duplicates = 0
+    chunks = 0
+    first_day = last_day = None
+    reader = _READERS[fmt](path, chunk_size)
+    while True:
+        # Faylni o'qish va tahlil qilish event loop ni bloklamasligi uchun
+        chunk = await asyncio.to_thread(next, reader, None)
+        if chunk is None:
+            break
+
+        valid = [row for row in chunk if row["employee_id"] in employee_ids]
+        skipped += len(chunk) - len(valid)
+        if valid:
+            chunk_first = min(row["check_time"] for row in valid).date()
+            chunk_last = max(row["check_time"] for row in valid).date()
+            first_day = chunk_first if first_day is None else min(first_day, chunk_first)
+            last_day = chunk_last if last_day is None else max(last_day, chunk_last)
+        inserted = await bulk_insert_attendance(db, valid)
+        rows += inserted
+        duplicates += len(valid) - inserted
+        await db.commit()
+        chunks += 1
+
+    # Import istalgan davrga tegishli bo'lishi mumkin - barcha hisobotlar eskiradi
+    if rows:
+        invalidation_bus.publish(ATTENDANCE)
+        # Import qilingan davr rollup'lari xom yozuvlardan qayta hisoblanadi
+        await rebuild_rollups(db, first_day, last_day)
+
+    stats = {"path": path, "format": fmt, "rows": rows, "skipped": skipped, "duplicates": duplicates, "chunks": chunks,
+             **_throughput(rows, started)}
+    logger.info("Davomat importi: %s", stats)
+    return stats
@@ -0,0 +1,408 @@
+"""
+Davomat yozuvlari uchun write-behind navbati
+
+Check-in so'rovlari keshlangan "bugun kim belgilagan" holati bo'yicha
+sinxron tekshiriladi, so'ng yozuvlar navbatga qo'yiladi. Fon yozuvchisi
+ularni har N ms yoki M ta yozuvda bitta ko'p qatorli INSERT bilan saqlaydi.
+
+Saqlash xato bersa guruh ATTENDANCE_QUEUE_RETRIES marta qayta yoziladi, so'ng
+yozuvlar alohida-alohida saqlanadi (bitta buzuq yozuv butun guruhni yo'qotmasin).
+Kutayotgan so'rovlar xatoni oladi; javobi allaqachon qaytgan yozuvlar esa
+ATTENDANCE_QUEUE_DEAD_LETTER fayliga (NDJSON) yoziladi.
+
+"Bugun kim belgilagan" keshi faqat shu jarayonga tegishli - takrorlanishdan
+uq_attendance_employee_type_day indeksi himoya qiladi: INSERT ... ON CONFLICT
+DO NOTHING bilan yozilmagan yozuv kutayotgan so'rovga DuplicateAttendanceError
+bo'lib qaytadi.
+"""
+import asyncio
+import enum
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.invalidation import ATTENDANCE, invalidation_bus
+from app.core.config import (
+    ATTENDANCE_QUEUE_BATCH_SIZE,
+    ATTENDANCE_QUEUE_CACHE_TTL,
+    ATTENDANCE_QUEUE_DEAD_LETTER,
+    ATTENDANCE_QUEUE_ENABLED,
+    ATTENDANCE_QUEUE_FLUSH_MS,
+    ATTENDANCE_QUEUE_RETRIES,
+)
+from app.core.database import dialect_insert
+from app.core.metrics import counter
+from app.models.attendance import Attendance
+from app.services.rollups import apply_attendance_rows
+
+logger = logging.getLogger(__name__)
+
+FLUSH_FAILURES = counter(
+    "attendance_queue_flush_failures_total",
+    "Davomat navbati saqlay olmagan yozuvlar (result: retried, failed, dead_lettered)"
+)
+
+DUPLICATES = counter(
+    "attendance_queue_duplicates_total",
+    "Bazada allaqachon mavjud bo'lgani uchun yozilmagan belgilar (boshqa jarayon yozgan)"
+)
+
+_STOP = object()
+RETRY_DELAY_SECONDS = 0.5  # Har urinishda ikki baravar oshadi
+
+
+class DuplicateAttendanceError(Exception):
+    """Xodim shu kuni shu turdagi belgini allaqachon qo'ygan (bazadagi unikal indeks)"""
+
+
+@dataclass
+class PendingAttendance:
+    """
+    Navbatga qabul qilingan, lekin hali saqlanmagan davomat yozuvi
+
+    ID yozuvchi uni bazaga yozgandan keyin paydo bo'ladi - shuning uchun bu
+    ORM obyekti emas va saqlangan yozuv sifatida ishlatilmasligi kerak.
+    """
+    employee_id: int
+    check_type: Any
+    check_time: datetime
+    is_late: bool = False
+    source: Any = None
+    location_lat: Optional[str] = None
+    location_lon: Optional[str] = None
+    id: None = None
+    pending: bool = True
+
+
+class AttendanceIngestQueue:
+    """Davomat yozuvlarini guruhlab (batch) yozuvchi navbat"""
+
+    def __init__(self, session_factory, flush_interval_ms: int = 50, max_batch_size: int = 200,
+                 cache_ttl: int = 30, retries: int = 3, retry_delay: float = RETRY_DELAY_SECONDS,
+                 dead_letter_path: Optional[str] = None):
+        self._session_factory = session_factory
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.cache_ttl = cache_ttl
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.dead_letter_path = dead_letter_path
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._warm_lock = asyncio.Lock()
+        # {sana: {(employee_id, "IN"/"OUT")}} - bazada yoki navbatda bor belgilar
+        self._checked: dict[date, set[tuple[int, str]]] = {}
+        self._warmed_at: dict[date, float] = {}
+
+        self.stats = {
+            "enqueued": 0, "flushed": 0, "batches": 0, "duplicates": 0,
+            "retries": 0, "failed": 0, "dead_lettered": 0,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return self._writer_task is not None and not self._writer_task.done()
+
+    async def start(self):
+        """Fon yozuvchisini ishga tushirish"""
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Navbatdagi barcha yozuvlarni saqlab, yozuvchini to'xtatish"""
+        if not self.is_running:
+            return
+        await self._queue.put((_STOP, None))
+        await self._writer_task
+        self._writer_task = None
+
+    # ---------- Keshlangan holat ----------
+
+    async def _ensure_day(self, db: AsyncSession, day: date):
+        """Kun bo'yicha belgilar keshini bazadan yuklash (TTL bilan, so'rovchining sessiyasi orqali)"""
+        loop = asyncio.get_running_loop()
+        warmed_at = self._warmed_at.get(day)
+        if warmed_at is not None and loop.time() - warmed_at < self.cache_ttl:
+            return
+
+        async with self._warm_lock:
+            warmed_at = self._warmed_at.get(day)
+            if warmed_at is not None and loop.time() - warmed_at < self.cache_ttl:
+                return
+
+            start = datetime.combine(day, time.min)
+            result = await db.execute(
+                select(Attendance.employee_id, Attendance.check_type)
+                .where(and_(
+                    Attendance.check_time >= start,
+                    Attendance.check_time < start + timedelta(days=1)
+                ))
+                .distinct()
+            )
+            db_keys = {(employee_id, check_type.value) for employee_id, check_type in result.all()}
+
+            # Navbatda turgan (hali yozilmagan) belgilarni yo'qotmaslik uchun birlashtiramiz
+            self._checked[day] = self._checked.get(day, set()) | db_keys
+            self._warmed_at[day] = loop.time()
+
+            # Eski kunlarni keshdan olib tashlash
+            for old_day in [d for d in self._checked if d < day - timedelta(days=1)]:
+                self._checked.pop(old_day, None)
+                self._warmed_at.pop(old_day, None)
+
+    def expire_day(self, day: Optional[date] = None):
+        """Kun (None - barcha kunlar) keshini eskirgan deb belgilash - keyingi tekshiruvda bazadan yuklanadi"""
+        if day is None:
+            self._warmed_at.clear()
+        else:
+            self._warmed_at.pop(day, None)
+
+    async def is_checked(self, db: AsyncSession, employee_id: int, check_type: str, day: date) -> bool:
+        """Xodim shu kuni shu turdagi belgi qo'yganmi (keshdan)"""
+        await self._ensure_day(db, day)
+        return (employee_id, check_type.upper()) in self._checked[day]
+
+    async def reserve(self, db: AsyncSession, employee_id: int, check_type: str, day: date) -> bool:
+        """Belgini band qilish. Allaqachon mavjud bo'lsa False qaytaradi"""
+        await self._ensure_day(db, day)
+        key = (employee_id, check_type.upper())
+        day_keys = self._checked[day]
+        if key in day_keys:
+            return False
+        day_keys.add(key)
+        return True
+
+    def release(self, employee_id: int, check_type: str, day: date):
+        """Band qilingan belgini bekor qilish (yozish muvaffaqiyatsiz bo'lsa)"""
+        self._checked.get(day, set()).discard((employee_id, check_type.upper()))
+
+    # ---------- Navbat ----------
+
+    async def submit(self, row: dict, wait: bool = True) -> Optional[int]:
+        """
+        Yozuvni navbatga qo'yish
+
+        Args:
+            row: Attendance ustunlari (employee_id, check_type, check_time, ...)
+            wait: True bo'lsa yozuv saqlanishini kutib, uning ID sini qaytaradi
+
+        Returns:
+            Yozuv ID si (wait=True) yoki None
+        """
+        if not self.is_running:
+            raise RuntimeError("Davomat navbati ishga tushirilmagan")
+
+        future = asyncio.get_running_loop().create_future() if wait else None
+        self.stats["enqueued"] += 1
+        await self._queue.put((row, future))
+
+        if future is not None:
+            return await future
+        return None
+
+    async def _run(self):
+        """Fon yozuvchisi: yozuvlarni guruhlab saqlash"""
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            item = await self._queue.get()
+            if item[0] is _STOP:
+                break
+
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item[0] is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+
+        # To'xtashdan oldin qolgan yozuvlarni saqlash
+        remaining = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item[0] is not _STOP:
+                remaining.append(item)
+        for i in range(0, len(remaining), self.max_batch_size):
+            await self._flush(remaining[i:i + self.max_batch_size])
+
+    async def _write(self, rows: list) -> dict:
+        """
+        Bitta ko'p qatorli INSERT ... ON CONFLICT DO NOTHING va rollup'lar - bitta tranzaksiyada
+
+        Returns:
+            {attendance_key: id} - faqat haqiqatan yozilgan qatorlar
+        """
+        async with self._session_factory() as session:
+            statement = dialect_insert(Attendance.__table__, session.get_bind().dialect.name)
+            result = await session.execute(
+                statement.on_conflict_do_nothing().returning(
+                    Attendance.id, Attendance.employee_id, Attendance.check_type, Attendance.check_time
+                ),
+                rows
+            )
+            ids = {(employee_id, check_type, check_time): attendance_id
+                   for attendance_id, employee_id, check_type, check_time in result.all()}
+            # Rollup'lar faqat yozilgan qatorlar bo'yicha oshiriladi
+            inserted = [row for row in rows if (row["employee_id"], row["check_type"], row["check_time"]) in ids]
+            await apply_attendance_rows(session, inserted)
+            await session.commit()
+        return ids
+
+    async def _flush(self, batch: list, retries: Optional[int] = None):
+        """Guruhni saqlash: xato bo'lsa qayta urinish, so'ng yozuvlarni alohida saqlash"""
+        rows = [row for row, _ in batch]
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            try:
+                ids = await self._write(rows)
+                break
+            except Exception as e:
+                error = e
+                if attempt < retries:
+                    delay = self.retry_delay * 2 ** attempt
+                    logger.warning("Davomat guruhini saqlashda xato (%s ta yozuv), %.1fs dan keyin qayta urinish: %s",
+                                   len(rows), delay, e)
+                    self.stats["retries"] += 1
+                    FLUSH_FAILURES.inc(len(rows), result="retried")
+                    await asyncio.sleep(delay)
+        else:
+            if len(batch) > 1:
+                for item in batch:
+                    await self._flush([item], retries=0)
+                return
+            await self._fail(batch, error)
+            return
+
+        inserted = []
+        for row, future in batch:
+            attendance_id = ids.get((row["employee_id"], row["check_type"], row["check_time"]))
+            if attendance_id is not None:
+                inserted.append(row)
+                if future is not None and not future.done():
+                    future.set_result(attendance_id)
+                continue
+            # Boshqa jarayon (API worker yoki bot) shu belgini allaqachon yozgan - belgi band qoladi
+            self.stats["duplicates"] += 1
+            DUPLICATES.inc()
+            if future is None:
+                logger.warning("Takroriy belgi yozilmadi (javob allaqachon qaytgan): %s", row)
+            elif not future.done():
+                future.set_exception(DuplicateAttendanceError(
+                    row["employee_id"], row["check_type"].value, row["check_time"].date()
+                ))
+
+        self.stats["flushed"] += len(inserted)
+        self.stats["batches"] += 1
+        # Obunachilar (hisobot keshi, bot hisoboti, overview) yozuv bazada bo'lgandan keyin xabar oladi
+        for day in sorted({row["check_time"].date() for row in inserted}):
+            invalidation_bus.publish(
+                ATTENDANCE, ids=sorted({row["employee_id"] for row in inserted if row["check_time"].date() == day}),
+                day=day
+            )
+
+    async def _fail(self, batch: list, error: Exception):
+        """
+        Saqlab bo'lmagan yozuvlar: kutayotgan so'rovga xato qaytariladi (belgi bo'shatiladi),
+        javobi allaqachon qaytganlari dead-letter fayliga yoziladi (belgi band qoladi)
+        """
+        logger.error("Davomat yozuvlarini saqlab bo'lmadi (%s ta): %s", len(batch), error)
+        lost = []
+        for row, future in batch:
+            if future is not None:
+                self.stats["failed"] += 1
+                FLUSH_FAILURES.inc(result="failed")
+                self.release(row["employee_id"], row["check_type"].value, row["check_time"].date())
+                if not future.done():
+                    future.set_exception(error)
+            else:
+                lost.append(row)
+        if not lost:
+            return
+
+        self.stats["dead_lettered"] += len(lost)
+        FLUSH_FAILURES.inc(len(lost), result="dead_lettered")
+        if not self.dead_letter_path:
+            logger.error("Dead-letter fayli sozlanmagan - yozuvlar yo'qoldi: %s", lost)
+            return
+        try:
+            await asyncio.to_thread(_append_dead_letter, self.dead_letter_path, lost, str(error))
+        except OSError:
+            logger.exception("Dead-letter fayliga yozib bo'lmadi - yozuvlar: %s", lost)
+
+
+def _json_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"JSON ga o'tkazib bo'lmaydi: {value!r}")
+
+
+def _append_dead_letter(path: str, rows: list, error: str):
+    """Yozuvlarni NDJSON fayliga qo'shish (har qator - bitta yozuv va xato matni)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as file:
+        for row in rows:
+            file.write(json.dumps({"row": row, "error": error}, default=_json_value) + "\n")
+
+
+attendance_queue: Optional[AttendanceIngestQueue] = None
+
+
+def _on_attendance_changed(event):
+    # Boshqa jarayon (masalan, bot) yozgan belgilar shu kun keshiga qayta yuklanadi
+    if attendance_queue is not None:
+        attendance_queue.expire_day(event.day)
+
+
+invalidation_bus.subscribe(ATTENDANCE, _on_attendance_changed, remote_only=True)
+
+
+def get_attendance_queue() -> Optional[AttendanceIngestQueue]:
+    """Ishlayotgan navbatni qaytarish (aks holda None - to'g'ridan-to'g'ri yoziladi)"""
+    if attendance_queue is not None and attendance_queue.is_running:
+        return attendance_queue
+    return None
+
+
+async def start_attendance_queue(session_factory):
+    """Ilova ishga tushganda navbatni yaratish va ishga tushirish"""
+    global attendance_queue
+    if not ATTENDANCE_QUEUE_ENABLED:
+        return None
+    attendance_queue = AttendanceIngestQueue(
+        session_factory,
+        flush_interval_ms=ATTENDANCE_QUEUE_FLUSH_MS,
+        max_batch_size=ATTENDANCE_QUEUE_BATCH_SIZE,
+        cache_ttl=ATTENDANCE_QUEUE_CACHE_TTL,
+        retries=ATTENDANCE_QUEUE_RETRIES,
+        dead_letter_path=ATTENDANCE_QUEUE_DEAD_LETTER,
+    )
+    await attendance_queue.start()
+    return attendance_queue
+
+
+async def stop_attendance_queue():
+    """Ilova to'xtaganda navbatni bo'shatib to'xtatish"""
+    if attendance_queue is not None:
+        await attendance_queue.stop()
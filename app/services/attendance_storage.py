@@ -0,0 +1,100 @@
+"""
+Davomat yozuvlarini sana oralig'i bo'yicha jadvalga yo'naltirish
+
+Yopilgan oylar attendance_archive jadvaliga ko'chiriladi (attendance_archive.py).
+Arxiv chegarasi - arxivdagi eng so'nggi oydan keyingi birinchi kun:
+
+    - oraliq chegaradan keyin boshlansa (bugungi va yaqin kunlar) - faqat
+      attendance jadvali o'qiladi, tarix uchun hech narsa to'lanmaydi;
+    - oraliq chegaradan oldingi kunlarni qamrasa - attendance va arxiv
+      UNION ALL qilinadi (kechikib import qilingan eski yozuvlar ham topiladi).
+
+attendance_source() Attendance bilan bir xil atributlarga ega ORM obyektini
+qaytaradi, shuning uchun so'rovlar `Attendance.check_time` o'rniga
+`source.check_time` yozish bilan yo'naltiriladi.
+"""
+import time
+from datetime import date, datetime, timedelta
+from datetime import time as dt_time
+from typing import Optional
+
+from sqlalchemy import func, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.config import ATTENDANCE_ARCHIVE_BOUNDARY_TTL
+from app.core.invalidation import ARCHIVE, invalidation_bus
+from app.models.attendance import Attendance
+from app.models.attendance_archive import AttendanceArchive
+
+COLUMNS = ("id", "employee_id", "check_type", "source", "check_time", "location_lat", "location_lon", "is_late")
+
+
+class ArchiveBoundary:
+    """Arxiv chegarasi (TTL bilan keshlanadi, ARCHIVE hodisasida yangilanadi)"""
+
+    def __init__(self, ttl: float = ATTENDANCE_ARCHIVE_BOUNDARY_TTL):
+        self.ttl = ttl
+        self.value: Optional[date] = None
+        self._expires_at = 0.0
+
+    def expire(self, event=None):
+        self._expires_at = 0.0
+
+    async def get(self, db: AsyncSession) -> Optional[date]:
+        if time.monotonic() < self._expires_at:
+            return self.value
+        result = await db.execute(select(func.max(AttendanceArchive.check_time)))
+        last = result.scalar()
+        if isinstance(last, str):  # SQLite agregat natijasi
+            last = datetime.fromisoformat(last)
+        if last is None:
+            self.value = None
+        else:
+            month_end = (last.replace(day=28) + timedelta(days=4)).replace(day=1)
+            self.value = month_end.date()
+        self._expires_at = time.monotonic() + self.ttl
+        return self.value
+
+
+archive_boundary = ArchiveBoundary()
+invalidation_bus.subscribe(ARCHIVE, archive_boundary.expire)
+
+
+def _range_filter(model, start_date: Optional[date], end_date: Optional[date]) -> list:
+    filters = []
+    if start_date is not None:
+        filters.append(model.check_time >= datetime.combine(start_date, dt_time.min))
+    if end_date is not None:
+        filters.append(model.check_time < datetime.combine(end_date + timedelta(days=1), dt_time.min))
+    return filters
+
+
+def attendance_entity(boundary: Optional[date], start_date: Optional[date] = None,
+                      end_date: Optional[date] = None, name: str = "attendance_all"):
+    """
+    Oraliq uchun davomat manbai (chegara ma'lum bo'lganda)
+
+    Har chaqiruv yangi alias qaytaradi - bitta so'rovda ikki marta ishlatish mumkin.
+    """
+    if boundary is None or (start_date is not None and start_date >= boundary):
+        return aliased(Attendance, name=name)
+
+    parts = [
+        select(*[getattr(model, column) for column in COLUMNS]).where(*_range_filter(model, start_date, end_date))
+        for model in (Attendance, AttendanceArchive)
+    ]
+    return aliased(Attendance, union_all(*parts).subquery(name), adapt_on_names=True)
+
+
+async def attendance_source(db: AsyncSession, start_date: Optional[date] = None,
+                            end_date: Optional[date] = None, name: str = "attendance_all"):
+    """
+    Sana oralig'i uchun davomat manbai: attendance yoki attendance + arxiv
+
+    Args:
+        db: Sessiya (chegara birinchi marta va TTL o'tgach shu sessiya orqali o'qiladi)
+        start_date: Oraliq boshi (None - butun tarix)
+        end_date: Oraliq oxiri
+    """
+    return attendance_entity(await archive_boundary.get(db), start_date, end_date, name)
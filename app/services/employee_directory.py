@@ -0,0 +1,153 @@
+"""
+Xodimlar katalogi - id, uuid va telegram_id bo'yicha xotiradagi kesh
+
+Deyarli har bir so'rov xodimni bitta SELECT bilan qidirishdan boshlanadi,
+xodimlar jadvali esa oyiga bir necha marta o'zgaradi. Katalog:
+
+    - birinchi qidiruvda (va TTL o'tgach) butun jadvalni bitta so'rov bilan yuklaydi;
+    - xodim o'zgarganda (invalidation_bus EMPLOYEE hodisasi, shu jumladan boshqa
+      jarayondan) faqat shu xodim yozuvi olib tashlanadi;
+    - keshda yo'q kalit bazadan qidiriladi (boshqa jarayonda qo'shilgan xodimlar uchun);
+    - har bir indeks bo'yicha hit/miss sonini yuritadi.
+
+Qaytariladigan Employee obyekti chaqiruvchining sessiyasiga SELECT'siz
+biriktiriladi, shuning uchun uni odatdagidek o'zgartirib commit qilish mumkin.
+"""
+import asyncio
+import time
+from typing import Optional
+
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import EMPLOYEE_DIRECTORY_TTL
+from app.core.invalidation import EMPLOYEE, InvalidationEvent, invalidation_bus
+from app.core.metrics import counter
+from app.models.employee import Employee
+
+INDEXES = ("id", "uuid", "telegram_id")
+
+LOOKUPS = counter("employee_directory_lookups_total", "Xodimlar katalogidan qidiruvlar (index, result)")
+
+_COLUMNS = [prop.columns[0] for prop in inspect(Employee).column_attrs]
+_KEYS = [prop.key for prop in inspect(Employee).column_attrs]
+
+
+class EmployeeDirectory:
+    """Xodimlar ustunlari nusxasi va ularning id/uuid/telegram_id indekslari"""
+
+    def __init__(self, ttl: float = EMPLOYEE_DIRECTORY_TTL):
+        self.ttl = ttl
+        self._rows: dict[int, dict] = {}
+        self._index: dict[str, dict] = {name: {} for name in INDEXES}
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self.stats = {name: {"hits": 0, "misses": 0} for name in INDEXES}
+        self.loads = 0
+
+    @property
+    def loaded(self) -> bool:
+        return time.monotonic() < self._expires_at
+
+    def invalidate(self):
+        """Butun katalogni tozalash - keyingi qidiruvda qayta yuklanadi"""
+        self._generation += 1
+        self._rows = {}
+        self._index = {name: {} for name in INDEXES}
+        self._expires_at = 0.0
+
+    def evict(self, employee_ids):
+        """Berilgan xodimlarni katalogdan olib tashlash - keyingi qidiruvda bazadan olinadi"""
+        self._generation += 1
+        for employee_id in employee_ids:
+            values = self._rows.pop(employee_id, None)
+            if values is None:
+                continue
+            for name in INDEXES:
+                if values[name] is not None and self._index[name].get(values[name]) == employee_id:
+                    del self._index[name][values[name]]
+
+    def on_event(self, event: InvalidationEvent):
+        if event.ids:
+            self.evict(event.ids)
+        else:
+            self.invalidate()
+
+    def _store(self, values: dict):
+        self._rows[values["id"]] = values
+        for name in INDEXES:
+            if values[name] is not None:
+                self._index[name][values[name]] = values["id"]
+
+    async def _load(self, db: AsyncSession):
+        async with self._lock:
+            if self.loaded:
+                return
+            generation = self._generation
+            result = await db.execute(select(*_COLUMNS))
+            rows = [dict(zip(_KEYS, row)) for row in result.all()]
+            # Yuklash paytida invalidate() chaqirilgan bo'lsa - eski ma'lumot saqlanmaydi
+            if generation != self._generation:
+                return
+            self._rows = {}
+            self._index = {name: {} for name in INDEXES}
+            for values in rows:
+                self._store(values)
+            self._expires_at = time.monotonic() + self.ttl
+            self.loads += 1
+
+    async def _attach(self, db: AsyncSession, values: dict) -> Employee:
+        employee = Employee(**values)
+        make_transient_to_detached(employee)
+        return await db.merge(employee, load=False)
+
+    async def _lookup(self, db: AsyncSession, index: str, key) -> Optional[Employee]:
+        if key is None:
+            return None
+        if not self.loaded:
+            await self._load(db)
+
+        employee_id = self._index[index].get(key)
+        if employee_id is not None:
+            self.stats[index]["hits"] += 1
+            LOOKUPS.inc(index=index, result="hit")
+            return await self._attach(db, self._rows[employee_id])
+
+        self.stats[index]["misses"] += 1
+        LOOKUPS.inc(index=index, result="miss")
+        generation = self._generation
+        column = getattr(Employee, index)
+        result = await db.execute(select(Employee).where(column == key))
+        employee = result.scalar_one_or_none()
+        if employee is not None and self.loaded and generation == self._generation:
+            self._store({key_: getattr(employee, key_) for key_ in _KEYS})
+        return employee
+
+    async def get_by_id(self, db: AsyncSession, employee_id: int) -> Optional[Employee]:
+        return await self._lookup(db, "id", employee_id)
+
+    async def get_by_uuid(self, db: AsyncSession, employee_uuid: str) -> Optional[Employee]:
+        return await self._lookup(db, "uuid", employee_uuid)
+
+    async def get_by_telegram_id(self, db: AsyncSession, telegram_id: int) -> Optional[Employee]:
+        return await self._lookup(db, "telegram_id", telegram_id)
+
+    def status(self) -> dict:
+        """Katalog hajmi va indekslar bo'yicha hit ratio"""
+        indexes = {}
+        for name, counts in self.stats.items():
+            total = counts["hits"] + counts["misses"]
+            indexes[name] = {**counts, "hit_ratio": round(counts["hits"] / total, 4) if total else None}
+        return {
+            "employees": len(self._rows),
+            "loaded": self.loaded,
+            "ttl": self.ttl,
+            "loads": self.loads,
+            "indexes": indexes,
+        }
+
+
+employee_directory = EmployeeDirectory()
+invalidation_bus.subscribe(EMPLOYEE, employee_directory.on_event)
@@ -0,0 +1,283 @@
+"""
+Analitika (BI) uchun mashina o'qiydigan eksportlar
+
+Excel hisobotlari yonida turadi va ularning ustun ta'riflarini ishlatadi:
+    attendance - xom davomat yozuvlari (attendance_bulk.EXPORT_COLUMNS)
+    monthly    - oylik xodim statistikasi (MONTHLY/DETAILED_REPORT_COLUMNS kalitlari)
+
+Formatlar:
+    csv.gz - gzip bilan siqilgan CSV
+    ndjson - har qatorda bitta JSON obyekt
+    npz    - ustunli zip arxiv (har qism uchun har ustun alohida .npy),
+             attendance_bulk bilan bir xil tuzilma - import-attendance o'qiy oladi
+
+Eksport baytlar oqimi sifatida qismlab yaratiladi (server kursoridan),
+shuning uchun xotira natija hajmiga bog'liq emas.
+"""
+import asyncio
+import csv
+import io
+import json
+import zipfile
+import zlib
+from datetime import date, datetime
+from typing import AsyncIterator, Optional
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.attendance import get_monthly_attendance_report
+from app.services import attendance_bulk
+from app.services.reports import DETAILED_REPORT_COLUMNS, MONTHLY_REPORT_COLUMNS
+
+EXPORT_FORMATS = ("csv.gz", "ndjson", "npz")
+DATASETS = ("attendance", "monthly")
+DEFAULT_CHUNK_SIZE = attendance_bulk.DEFAULT_CHUNK_SIZE
+
+MEDIA_TYPES = {
+    "csv.gz": "application/gzip",
+    "ndjson": "application/x-ndjson",
+    "npz": "application/zip",
+}
+
+_SALARY_KEYS = ("base_salary", "final_salary", "total_deductions")
+
+# Oylik statistika ustunlari: Excel hisobotlaridagi kalitlar + xodim ID si va soatlar
+MONTHLY_STATS_COLUMNS = (
+    ["employee_id"]
+    + [key for key, _ in MONTHLY_REPORT_COLUMNS if key != "index"]
+    + [key for key, _ in DETAILED_REPORT_COLUMNS if key in _SALARY_KEYS]
+    + ["total_worked_hours", "expected_hours"]
+)
+
+MONTHLY_STATS_DTYPES = {
+    "employee_id": np.int64,
+    "employee_name": str,
+    "position": str,
+    "working_days": np.int64,
+    "present_days": np.int64,
+    "late_days": np.int64,
+    "absent_days": np.int64,
+    "attendance_percent": np.float64,
+    "base_salary": np.float64,
+    "final_salary": np.float64,
+    "total_deductions": np.float64,
+    "total_worked_hours": np.float64,
+    "expected_hours": np.float64,
+}
+
+
+def monthly_stats_record(row_data: dict) -> dict:
+    """get_monthly_attendance_report qatorini formatlanmagan qiymatlar lug'atiga aylantirish"""
+    salary_info = row_data.get("salary_info", {})
+    working_days = row_data["working_days"]
+    present_days = row_data["present_days"]
+    return {
+        "employee_id": row_data["employee_id"],
+        "employee_name": row_data["employee_name"],
+        "position": row_data["position"] or "",
+        "working_days": working_days,
+        "present_days": present_days,
+        "late_days": row_data["late_days"],
+        "absent_days": working_days - present_days,
+        "attendance_percent": round(present_days / working_days * 100, 2) if working_days > 0 else 0.0,
+        "base_salary": float(salary_info.get("base_salary", 0)),
+        "final_salary": float(salary_info.get("final_salary", 0)),
+        "total_deductions": float(salary_info.get("total_deductions", 0)),
+        "total_worked_hours": float(row_data["total_worked_hours"]),
+        "expected_hours": float(row_data["expected_hours"]),
+    }
+
+
+# ---------- Ma'lumotlar manbalari (ustunli qismlar) ----------
+
+async def _attendance_chunks(db: AsyncSession, chunk_size: int, start_date: Optional[date] = None,
+                             end_date: Optional[date] = None, **_) -> AsyncIterator[dict]:
+    query = (await attendance_bulk.export_query(db, start_date, end_date)).execution_options(yield_per=chunk_size)
+    # Core ulanishi orqali - ORM qatlamisiz kursordan to'g'ridan-to'g'ri o'qiladi
+    connection = await db.connection()
+    result = await connection.stream(query)
+    async for partition in result.partitions(chunk_size):
+        yield attendance_bulk.export_columns(partition)
+
+
+async def _monthly_chunks(db: AsyncSession, chunk_size: int, year: Optional[int] = None,
+                          month: Optional[int] = None, **_) -> AsyncIterator[dict]:
+    if year is None or month is None:
+        raise ValueError("Oylik statistika uchun yil va oy kerak")
+    # Xodim boshiga bitta qator - hajm xodimlar soni bilan cheklangan
+    report_data = await get_monthly_attendance_report(db, month, year)
+    for start in range(0, len(report_data), chunk_size):
+        records = [monthly_stats_record(row) for row in report_data[start:start + chunk_size]]
+        yield {name: [record[name] for record in records] for name in MONTHLY_STATS_COLUMNS}
+
+
+_DATASETS = {
+    "attendance": (attendance_bulk.EXPORT_COLUMNS, attendance_bulk.NPZ_DTYPES, _attendance_chunks),
+    "monthly": (MONTHLY_STATS_COLUMNS, MONTHLY_STATS_DTYPES, _monthly_chunks),
+}
+
+
+# ---------- Kodlovchilar ----------
+
+def _text_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _rows(columns: list[str], chunk: dict):
+    """Ustunli qismni matnli formatlar uchun qatorlarga aylantirish"""
+    converted = []
+    for name in columns:
+        values = chunk[name]
+        if values and isinstance(values[0], (datetime, date)):
+            values = [_text_value(value) for value in values]
+        converted.append(values)
+    return zip(*converted)
+
+
+class _CsvGzipEncoder:
+    def __init__(self, columns: list[str], dtypes: dict):
+        self.columns = columns
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31 - gzip sarlavhasi bilan
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._header_written = False
+
+    def encode(self, chunk: dict) -> bytes:
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        if not self._header_written:
+            self._writer.writerow(self.columns)
+            self._header_written = True
+        self._writer.writerows(
+            [int(value) if isinstance(value, bool) else value for value in row]
+            for row in _rows(self.columns, chunk)
+        )
+        return self._compressor.compress(self._buffer.getvalue().encode("utf-8"))
+
+    def close(self) -> bytes:
+        tail = b"" if self._header_written else self.encode({name: [] for name in self.columns})
+        return tail + self._compressor.flush()
+
+
+class _NdjsonEncoder:
+    def __init__(self, columns: list[str], dtypes: dict):
+        self.columns = columns
+        self._dumps = json.JSONEncoder(ensure_ascii=False).encode
+
+    def encode(self, chunk: dict) -> bytes:
+        columns = self.columns
+        lines = [self._dumps(dict(zip(columns, row))) for row in _rows(columns, chunk)]
+        lines.append("")
+        return "\n".join(lines).encode("utf-8")
+
+    def close(self) -> bytes:
+        return b""
+
+
+class _StreamSink(io.RawIOBase):
+    """zipfile uchun faqat yoziladigan bufer - yozilgan baytlar drain() bilan olinadi"""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class _NpzEncoder:
+    def __init__(self, columns: list[str], dtypes: dict):
+        self.columns = columns
+        self.dtypes = dtypes
+        self._sink = _StreamSink()
+        # Sink seek() ni qo'llamaydi - zipfile oqim rejimida (data descriptor bilan) yozadi
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True)
+        self._chunk = 0
+
+    def encode(self, chunk: dict) -> bytes:
+        for name in self.columns:
+            array = np.asarray(chunk[name], dtype=self.dtypes[name])
+            with self._zip.open(f"chunk_{self._chunk:05d}/{name}.npy", "w", force_zip64=True) as member:
+                np.lib.format.write_array(member, array, allow_pickle=False)
+        self._chunk += 1
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._zip.close()
+        return self._sink.drain()
+
+
+_ENCODERS = {"csv.gz": _CsvGzipEncoder, "ndjson": _NdjsonEncoder, "npz": _NpzEncoder}
+
+
+# ---------- Umumiy interfeys ----------
+
+def validate_export(dataset: str, fmt: str):
+    """Ma'lumotlar to'plami va formatni tekshirish (ValueError)"""
+    if dataset not in DATASETS:
+        raise ValueError(f"Noma'lum ma'lumotlar to'plami: {dataset} ({', '.join(DATASETS)})")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Qo'llab-quvvatlanmaydigan format: {fmt} ({', '.join(EXPORT_FORMATS)})")
+
+
+def export_filename(dataset: str, fmt: str, suffix: str = "") -> str:
+    """Yuklab olinadigan fayl nomi"""
+    return f"{dataset}{'_' + suffix if suffix else ''}.{fmt}"
+
+
+async def stream_export(db: AsyncSession, dataset: str, fmt: str,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE, **params) -> AsyncIterator[bytes]:
+    """
+    Eksportni baytlar oqimi sifatida yaratish
+
+    Args:
+        dataset: attendance (params: start_date, end_date) yoki monthly (params: year, month)
+        fmt: csv.gz, ndjson yoki npz
+    """
+    validate_export(dataset, fmt)
+    columns, dtypes, source = _DATASETS[dataset]
+    encoder = _ENCODERS[fmt](columns, dtypes)
+
+    # Qism oqimda kodlanayotganda keyingi qism bazadan o'qiladi (konveyer)
+    pending = None
+    async for chunk in source(db, chunk_size, **params):
+        if pending is not None:
+            data = await pending
+            if data:
+                yield data
+        pending = asyncio.ensure_future(asyncio.to_thread(encoder.encode, chunk))
+
+    if pending is not None:
+        data = await pending
+        if data:
+            yield data
+    tail = await asyncio.to_thread(encoder.close)
+    if tail:
+        yield tail
+
+
+async def export_to_file(db: AsyncSession, path: str, dataset: str, fmt: str,
+                         chunk_size: int = DEFAULT_CHUNK_SIZE, **params) -> int:
+    """Eksportni faylga yozish. Yozilgan baytlar sonini qaytaradi"""
+    written = 0
+    with open(path, "wb") as file:
+        async for data in stream_export(db, dataset, fmt, chunk_size, **params):
+            file.write(data)
+            written += len(data)
+    return written
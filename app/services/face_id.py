@@ -368,5 +368,4 @@ class FaceIDService:
             }
         }
 
-# Global Face ID servis instance
-face_service = FaceIDService()
+# Global instance import paytida yaratilmaydi - app.routers.face_id.get_face_service()
@@ -0,0 +1,135 @@
+"""
+Oylik maosh va chegirmalarni butun xodimlar ro'yxati uchun hisoblash
+
+Hisob-kitob (chegirmalar, jami chegirma va yakuniy maosh) NumPy massivlarida
+tiyinlarda vektorlashtirilgan holda bajariladi; Decimal faqat natija
+lug'atlarini yaratishda ishlatiladi.
+"""
+from decimal import Decimal
+from typing import Sequence
+
+import numpy as np
+
+# Maosh qoidalari
+WORKING_DAYS_PER_MONTH = 26  # Oyda 26 ish kuni (6 kun/hafta)
+HOURS_PER_DAY = 8.5  # Kuniga 8.5 soat (9:30-18:00)
+LATE_PENALTY_RATE = 0.01  # Har kechikish uchun oylik maoshning 1%
+
+def _cents(values: np.ndarray) -> np.ndarray:
+    """
+    Summalarni tiyinlarga (butun son) yaxlitlash - ROUND_HALF_UP
+
+    Avval float shovqini olib tashlanadi (1.005 * 100 = 100.49999...), shuning
+    uchun natija Decimal(repr(x)).quantize(0.01, ROUND_HALF_UP) bilan bir xil.
+    """
+    scaled = np.round(np.asarray(values, dtype=np.float64) * 100, 6)
+    return (np.sign(scaled) * np.floor(np.abs(scaled) + 0.5)).astype(np.int64)
+
+
+def _from_cents(cents: int) -> float:
+    """Tiyinlarni so'mga aniq o'tkazish (Decimal orqali)"""
+    return float(Decimal(int(cents)).scaleb(-2))
+
+
+def compute_payroll(
+    base_salary: Sequence[float],
+    absent_days: Sequence[int],
+    late_days: Sequence[int],
+    worked_hours: Sequence[float],
+    expected_hours: Sequence[float],
+) -> dict[str, np.ndarray]:
+    """
+    Barcha xodimlar uchun maosh hisob-kitobini vektorlashtirilgan holda bajarish
+
+    Pul ustunlari tiyinlarda (int64): jami chegirma yaxlitlangan qismlar
+    yig'indisi, yakuniy maosh - asosiy maosh minus jami chegirma.
+
+    Args:
+        base_salary: Asosiy oylik maoshlar (maosh belgilanmagan bo'lsa 0)
+        absent_days: Ishga kelmagan kunlar soni
+        late_days: Kechikkan kunlar soni
+        worked_hours: Jami ishlangan soatlar
+        expected_hours: Kutilgan ish soatlari
+
+    Returns:
+        Ustunlar lug'ati - har bir qiymat xodimlar soniga teng uzunlikdagi massiv
+    """
+    base = np.nan_to_num(np.asarray(base_salary, dtype=np.float64))
+    absent = np.asarray(absent_days, dtype=np.int64)
+    late = np.asarray(late_days, dtype=np.int64)
+
+    has_salary = base > 0
+    base = np.where(has_salary, base, 0.0)
+
+    daily_salary = base / WORKING_DAYS_PER_MONTH
+    hourly_salary = daily_salary / HOURS_PER_DAY
+
+    base_cents = _cents(base)
+    absent_cents = _cents(absent * daily_salary)
+    late_cents = _cents(late * base * LATE_PENALTY_RATE)
+    total_deductions_cents = absent_cents + late_cents
+
+    return {
+        "has_salary": has_salary,
+        "base_salary_cents": base_cents,
+        "daily_salary_cents": _cents(daily_salary),
+        "hourly_salary_cents": _cents(hourly_salary),
+        "absent_days": absent,
+        "absent_deduction_cents": absent_cents,
+        "late_days": late,
+        "late_deduction_cents": late_cents,
+        "total_deductions_cents": total_deductions_cents,
+        "final_salary_cents": base_cents - total_deductions_cents,
+        "worked_hours": np.round(np.asarray(worked_hours, dtype=np.float64), 2),
+        "expected_hours": np.round(np.asarray(expected_hours, dtype=np.float64), 2),
+    }
+
+
+def payroll_salary_info(payroll: dict[str, np.ndarray]) -> list[dict]:
+    """
+    compute_payroll natijasini har bir xodim uchun salary_info lug'atlariga aylantirish
+
+    Hisob-kitob massivlarda tugagan - bu yerda faqat tiyinlar so'mga o'tkaziladi.
+    """
+    columns = {name: values.tolist() for name, values in payroll.items()}
+    results = []
+
+    for i, has_salary in enumerate(columns["has_salary"]):
+        if not has_salary:
+            results.append({
+                "base_salary": 0,
+                "final_salary": 0,
+                "total_deductions": 0,
+                "deduction_breakdown": {}
+            })
+            continue
+
+        deductions = {}
+
+        absent_days = columns["absent_days"][i]
+        if absent_days > 0:
+            deductions["absent_days"] = {
+                "days": absent_days,
+                "amount": _from_cents(columns["absent_deduction_cents"][i])
+            }
+
+        late_days = columns["late_days"][i]
+        if late_days > 0:
+            deductions["late_arrivals"] = {
+                "days": late_days,
+                "amount": _from_cents(columns["late_deduction_cents"][i]),
+                "description": f"Har kechikish uchun 1% (jami {late_days}%)"
+            }
+
+        results.append({
+            "base_salary": _from_cents(columns["base_salary_cents"][i]),
+            "daily_salary": _from_cents(columns["daily_salary_cents"][i]),
+            "hourly_salary": _from_cents(columns["hourly_salary_cents"][i]),
+            "total_deductions": _from_cents(columns["total_deductions_cents"][i]),
+            "final_salary": _from_cents(columns["final_salary_cents"][i]),
+            "deduction_breakdown": deductions,
+            "worked_hours": columns["worked_hours"][i],
+            "expected_hours": columns["expected_hours"][i]
+        })
+
+    return results
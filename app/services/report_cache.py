@@ -0,0 +1,203 @@
+"""
+Tayyor Excel hisobotlari uchun disk keshi
+
+Kalit - (hisobot turi, davr, ma'lumotlar versiyasi). Versiya - bazadagi davr
+barmoq izi (davomat soni, oxirgi id va kechikishlar soni, hisobotda
+ishlatiladigan xodim ustunlari xeshi). U faqat bazaga bog'liq, shuning uchun
+barcha jarayonlar (API ishchilari, bot, qayta ishga tushgan jarayon) bir xil
+ma'lumot uchun bir xil ETag va fayl nomini hisoblaydi.
+
+Yopilgan oylar uchun versiya o'zgarmaydi, shuning uchun ularning hisoboti
+bir marta yaratiladi. Bir xil hisobotni jarayon ichida asyncio.Lock, jarayonlar
+(API ishchilari, bot) orasida kesh papkasidagi fcntl lock-fayli bilan faqat
+bitta yozuvchi yaratadi; fcntl bo'lmagan tizimlarda oxirgi yozuvchi yutadi.
+Fayllar LRU tartibida (oxirgi foydalanish vaqti bo'yicha)
+REPORT_CACHE_MAX_BYTES chegarasidan oshmaydigan qilib o'chiriladi.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import weakref
+import zlib
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import REPORT_CACHE_DIR, REPORT_CACHE_MAX_BYTES
+from app.models.employee import Employee
+from app.services.attendance_storage import attendance_source
+from app.utils.file_lock import file_lock
+
+logger = logging.getLogger(__name__)
+
+# Hisobot formati o'zgarganda oshiriladi - eski keshlangan fayllar yaroqsiz bo'ladi
+REPORT_FORMAT_VERSION = 1
+
+# Jarayonlararo lock-fayllar soni - kalitlar shularga taqsimlanadi (fayllar soni o'smaydi)
+LOCK_SLOTS = 16
+
+
+@dataclass
+class CachedReport:
+    """Keshdagi hisobot yozuvi"""
+    report_type: str
+    period: str
+    etag: str
+    path: str
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """If-None-Match sarlavhasi shu versiyaga mos keladimi"""
+        if not if_none_match:
+            return False
+        tags = [tag.strip().removeprefix("W/").strip('"') for tag in if_none_match.split(",")]
+        return "*" in tags or self.etag in tags
+
+
+class ReportCache:
+    """Hisobot fayllari keshi"""
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        # Kutuvchisi qolmagan lock'lar avtomatik o'chadi
+        self._locks: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+    # ---------- Versiyalar ----------
+
+    async def _fingerprint(self, db: AsyncSession, start_date: date, end_date: date) -> str:
+        """Davr uchun bazadagi ma'lumotlar barmoq izi"""
+        Attendance = await attendance_source(db, start_date, end_date)
+        attendance = await db.execute(
+            select(
+                func.count(Attendance.id),
+                func.max(Attendance.id),
+                func.count(Attendance.id).filter(Attendance.is_late == True)
+            ).where(
+                and_(
+                    Attendance.check_time >= datetime.combine(start_date, time.min),
+                    Attendance.check_time < datetime.combine(end_date + timedelta(days=1), time.min)
+                )
+            )
+        )
+        employees = await db.execute(
+            select(
+                Employee.id, Employee.full_name, Employee.position,
+                Employee.base_salary, Employee.is_active
+            ).order_by(Employee.id)
+        )
+        employees_hash = hashlib.sha256(repr(employees.all()).encode()).hexdigest()
+        return f"{tuple(attendance.one())}|{employees_hash}"
+
+    async def lookup(self, db: AsyncSession, report_type: str,
+                     start_date: date, end_date: Optional[date] = None) -> CachedReport:
+        """
+        Hisobotning joriy versiyasi uchun kesh yozuvini aniqlash (fayl hali bo'lmasligi mumkin)
+
+        Kunlik hisobot uchun end_date berilmaydi, oylik uchun - oyning birinchi va oxirgi kuni.
+        """
+        if end_date is None or end_date == start_date:
+            period = start_date.isoformat()
+            end_date = start_date
+        else:
+            period = f"{start_date.year}-{start_date.month:02d}"
+
+        fingerprint = await self._fingerprint(db, start_date, end_date)
+        version = f"{REPORT_FORMAT_VERSION}|{report_type}|{period}|{fingerprint}"
+        etag = hashlib.sha256(version.encode()).hexdigest()[:32]
+        path = os.path.join(self.cache_dir, f"{report_type}_{period}_{etag[:16]}.xlsx")
+        return CachedReport(report_type, period, etag, path)
+
+    # ---------- Fayllar ----------
+
+    async def ensure(self, entry: CachedReport, generate: Callable[[], Awaitable[str]]) -> str:
+        """
+        Keshdagi faylni qaytarish, bo'lmasa generate() orqali yaratib keshga joylash
+
+        Bir xil hisobot bir vaqtda faqat bir marta yaratiladi (boshqa jarayonlarda ham).
+        """
+        if entry.exists:
+            self.stats["hits"] += 1
+            self._touch(entry.path)
+            return entry.path
+
+        key = (entry.report_type, entry.period)
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        async with lock, self._process_lock(key):
+            if entry.exists:
+                self.stats["hits"] += 1
+                self._touch(entry.path)
+                return entry.path
+
+            self.stats["misses"] += 1
+            generated_path = await generate()
+            try:
+                os.replace(generated_path, entry.path)
+            except FileNotFoundError:
+                # fcntl'siz tizimda boshqa jarayon xuddi shu faylni allaqachon ko'chirgan
+                if not entry.exists:
+                    raise
+
+            await asyncio.to_thread(self._evict, entry.path)
+        return entry.path
+
+    @asynccontextmanager
+    async def _process_lock(self, key: tuple[str, str]):
+        """Jarayonlararo qulf - kesh papkasidagi LOCK_SLOTS ta lock-fayldan biri"""
+        slot = zlib.crc32("|".join(key).encode()) % LOCK_SLOTS
+        async with file_lock(os.path.join(self.cache_dir, f".lock{slot}")):
+            yield
+
+    def _touch(self, path: str):
+        """Oxirgi foydalanish vaqtini yangilash (LRU uchun)"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _evict(self, keep_path: str):
+        """
+        Kesh hajmi chegaradan oshsa, eng uzoq ishlatilmagan fayllarni o'chirish (LRU)
+
+        Eski versiyalar ham shu yo'l bilan tozalanadi - ularga boshqa murojaat bo'lmaydi.
+        """
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".xlsx"):
+                continue  # Lock-fayllar o'chirilmaydi
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == keep_path:
+                continue
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+            self.stats["evicted"] += 1
+        except OSError as e:
+            logger.warning("Kesh faylini o'chirib bo'lmadi %s: %s", path, e)
+
+
+report_cache = ReportCache(REPORT_CACHE_DIR, REPORT_CACHE_MAX_BYTES)
@@ -0,0 +1,386 @@
+"""
+Excel hisobotlarini fonda yaratish navbati
+
+Hisobot so'rovi vazifa (job) sifatida qabul qilinadi va darhol ID qaytariladi;
+mijoz holat/progressni so'rab turadi va tayyor faylni yuklab oladi.
+
+    - umumiy ishchilar soni (REPORT_JOB_WORKERS) va har bir hisobot turi uchun
+      alohida chegara (REPORT_JOB_TYPE_LIMITS) semaforlar orqali cheklanadi;
+    - bajarilayotgan bir xil vazifa (tur + parametrlar) qayta yaratilmaydi -
+      mavjud vazifa qaytariladi;
+    - natija report_cache orqali saqlanadi, shuning uchun o'zgarmagan davr
+      uchun vazifa keshdan darhol tugaydi;
+    - vazifa holati report_jobs jadvalida saqlanadi: bajaruvchi jarayon progressni
+      har SAVE_INTERVAL sekundda yozadi, holat so'rovi istalgan API worker'ga
+      tushishi mumkin. Jarayon STALE_AFTER sekund yozmasa, vazifa to'xtagan
+      (failed) hisoblanadi. Boshqa worker'lardagi bir xil hisobotlarni
+      report_cache fayl qulfi bitta yaratishga birlashtiradi.
+
+Tayyor fayl REPORT_CACHE_DIR da - bir nechta serverda ishlaganda bu papka
+umumiy bo'lishi kerak.
+"""
+import asyncio
+import calendar
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import and_, delete, or_
+
+from app.core.config import REPORT_JOB_TTL, REPORT_JOB_TYPE_LIMITS, REPORT_JOB_WORKERS
+from app.models.report_job import ReportJobRecord
+from app.services import reports
+from app.services.report_cache import report_cache
+
+logger = logging.getLogger(__name__)
+
+REPORT_TYPES = ("daily", "monthly", "detailed")
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+SAVE_INTERVAL = 1.0  # Progress bazaga yoziladigan oraliq (sekund)
+HEARTBEAT_INTERVAL = 30.0  # O'zgarish bo'lmasa ham holat shuncha vaqtda yangilanadi
+STALE_AFTER = 120.0  # Bajaruvchi jarayon shuncha vaqt yozmasa - vazifa to'xtagan
+
+
+def normalize_report_params(report_type: str, target_date: Optional[date] = None,
+                            year: Optional[int] = None, month: Optional[int] = None) -> dict:
+    """
+    Hisobot parametrlarini tekshirish
+
+    Returns:
+        daily uchun {"date": ...}, oylik hisobotlar uchun {"year": ..., "month": ...}
+
+    Raises:
+        ValueError: Noma'lum tur yoki parametrlar noto'g'ri
+    """
+    if report_type not in REPORT_TYPES:
+        raise ValueError(f"Noma'lum hisobot turi: {report_type} ({', '.join(REPORT_TYPES)})")
+    if report_type == "daily":
+        if target_date is None:
+            raise ValueError("Kunlik hisobot uchun sana kerak")
+        return {"date": target_date}
+    if year is None or month is None:
+        raise ValueError("Oylik hisobot uchun yil va oy kerak")
+    if not 1 <= month <= 12:
+        raise ValueError("Oy 1-12 orasida bo'lishi kerak")
+    return {"year": year, "month": month}
+
+
+def report_bounds(report_type: str, params: dict) -> tuple[date, date]:
+    """Hisobot davrining birinchi va oxirgi kuni"""
+    if report_type == "daily":
+        return params["date"], params["date"]
+    year, month = params["year"], params["month"]
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def report_filename(report_type: str, params: dict) -> str:
+    """Yuklab olinadigan fayl nomi"""
+    if report_type == "daily":
+        return f"kunlik_batafsil_{params['date']}.xlsx"
+    prefix = "batafsil_hisoboti" if report_type == "detailed" else "davomat_hisoboti"
+    return f"{prefix}_{params['year']}_{params['month']:02d}.xlsx"
+
+
+def generate_report(db, report_type: str, params: dict, progress=None):
+    """Hisobot generatorini chaqirish (coroutine qaytaradi); progress(foiz, bosqich) - ixtiyoriy"""
+    if report_type == "daily":
+        return reports.generate_daily_report(db, params["date"], progress=progress)
+    if report_type == "monthly":
+        return reports.generate_monthly_report(db, params["year"], params["month"], progress=progress)
+    return reports.generate_detailed_monthly_report(db, params["year"], params["month"], progress=progress)
+
+
+@dataclass
+class ReportJob:
+    """Hisobot vazifasi holati"""
+    id: str
+    report_type: str
+    params: dict
+    status: str = JOB_QUEUED
+    progress: int = 0
+    stage: str = "Navbatda"
+    file_path: Optional[str] = None
+    etag: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def key(self) -> tuple:
+        return (self.report_type, tuple(sorted(self.params.items())))
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    def set_stage(self, progress: int, stage: str):
+        """Progressni yangilash (Excel yozuvchi oqimdan ham chaqiriladi)"""
+        self.progress = progress
+        self.stage = stage
+
+    def _params_dict(self) -> dict:
+        return {key: str(value) if isinstance(value, date) else value for key, value in self.params.items()}
+
+    def to_record(self) -> dict:
+        """report_jobs jadvali qatori"""
+        return {
+            "id": self.id,
+            "report_type": self.report_type,
+            "params": json.dumps(self._params_dict(), sort_keys=True),
+            "status": self.status,
+            "progress": self.progress,
+            "stage": self.stage,
+            "file_path": self.file_path,
+            "etag": self.etag,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "updated_at": time.time(),
+        }
+
+    @classmethod
+    def from_record(cls, record: ReportJobRecord) -> "ReportJob":
+        """Boshqa jarayon bajarayotgan (yoki bajargan) vazifa holati"""
+        params = json.loads(record.params)
+        if "date" in params:
+            params["date"] = date.fromisoformat(params["date"])
+        job = cls(
+            id=record.id, report_type=record.report_type, params=params, status=record.status,
+            progress=record.progress, stage=record.stage, file_path=record.file_path, etag=record.etag,
+            error=record.error, created_at=record.created_at, started_at=record.started_at,
+            finished_at=record.finished_at,
+        )
+        if not job.is_finished and time.time() - record.updated_at > STALE_AFTER:
+            job.status = JOB_FAILED
+            job.error = "Vazifani bajarayotgan jarayon to'xtadi, qayta so'rov yuboring"
+        if job.is_finished:
+            job.done.set()
+        return job
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "report_type": self.report_type,
+            "params": self._params_dict(),
+            "status": self.status,
+            "progress": self.progress,
+            "stage": self.stage,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ReportJobManager:
+    """Hisobot vazifalarini cheklangan ishchilar bilan bajaruvchi menejer"""
+
+    def __init__(self, session_factory, max_workers: int = 2,
+                 type_limits: Optional[dict[str, int]] = None, result_ttl: int = 3600,
+                 read_session=None):
+        self._session_factory = session_factory
+        # read_session(end_date) - o'qish sessiyasi (replika); berilmasa session_factory()
+        self._read_session = read_session
+        self.max_workers = max_workers
+        self.type_limits = type_limits or {}
+        self.result_ttl = result_ttl
+
+        self._workers = asyncio.Semaphore(max_workers)
+        self._type_semaphores: dict[str, asyncio.Semaphore] = {}
+        self._jobs: dict[str, ReportJob] = {}
+        self._in_flight: dict[tuple, ReportJob] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._running = True
+
+        self.stats = {"submitted": 0, "deduplicated": 0, "completed": 0, "failed": 0}
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def _type_semaphore(self, report_type: str) -> asyncio.Semaphore:
+        if report_type not in self._type_semaphores:
+            limit = self.type_limits.get(report_type, self.max_workers)
+            self._type_semaphores[report_type] = asyncio.Semaphore(max(1, limit))
+        return self._type_semaphores[report_type]
+
+    # ---------- Vazifalar ----------
+
+    async def submit(self, report_type: str, params: dict) -> ReportJob:
+        """
+        Vazifani navbatga qo'yish
+
+        Xuddi shu hisobot shu jarayonda hali bajarilayotgan bo'lsa, yangi vazifa
+        yaratilmaydi. Vazifa qaytishidan oldin report_jobs jadvaliga yoziladi -
+        holat so'rovi boshqa worker'ga tushsa ham topiladi.
+
+        Args:
+            report_type: daily, monthly yoki detailed
+            params: normalize_report_params() natijasi
+        """
+        if not self._running:
+            raise RuntimeError("Hisobot navbati to'xtatilgan")
+
+        await self._prune()
+        job = ReportJob(id=uuid.uuid4().hex, report_type=report_type, params=params)
+        existing = self._in_flight.get(job.key)
+        if existing is not None:
+            self.stats["deduplicated"] += 1
+            return existing
+
+        self._jobs[job.id] = job
+        self._in_flight[job.key] = job
+        self.stats["submitted"] += 1
+        await self._save(job)
+
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def get(self, job_id: str) -> Optional[ReportJob]:
+        """Vazifa holati: shu jarayondagi vazifa yoki report_jobs jadvalidan"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        async with self._session_factory() as session:
+            record = await session.get(ReportJobRecord, job_id)
+        return ReportJob.from_record(record) if record is not None else None
+
+    async def wait(self, job: ReportJob, timeout: Optional[float] = None) -> ReportJob:
+        """Vazifa tugashini kutish (submit() qaytargan vazifa uchun)"""
+        await asyncio.wait_for(job.done.wait(), timeout)
+        return job
+
+    async def _save(self, job: ReportJob):
+        """Holatni report_jobs jadvaliga yozish - xato vazifani to'xtatmaydi"""
+        try:
+            async with self._session_factory() as session:
+                await session.merge(ReportJobRecord(**job.to_record()))
+                await session.commit()
+        except Exception:
+            logger.exception("Hisobot vazifasi holatini saqlab bo'lmadi: %s", job.id)
+
+    async def _heartbeat(self, job: ReportJob):
+        """Progress o'zgarsa (yoki HEARTBEAT_INTERVAL o'tsa) holatni yozib borish"""
+        loop = asyncio.get_running_loop()
+        saved = (job.status, job.progress, job.stage)
+        saved_at = loop.time()
+        while True:
+            await asyncio.sleep(SAVE_INTERVAL)
+            state = (job.status, job.progress, job.stage)
+            if state != saved or loop.time() - saved_at >= HEARTBEAT_INTERVAL:
+                await self._save(job)
+                saved, saved_at = state, loop.time()
+
+    async def _run(self, job: ReportJob):
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            # Avval tur chegarasi - band tur umumiy ishchi o'rnini egallab turmasligi uchun
+            async with self._type_semaphore(job.report_type):
+                async with self._workers:
+                    job.status = JOB_RUNNING
+                    job.started_at = time.time()
+                    await self._execute(job)
+            job.status = JOB_DONE
+            job.set_stage(100, "Tayyor")
+            self.stats["completed"] += 1
+        except asyncio.CancelledError:
+            job.status = JOB_FAILED
+            job.error = "Vazifa bekor qilindi"
+            raise
+        except Exception as e:
+            logger.exception("Hisobot vazifasi bajarilmadi: %s %s", job.report_type, job.params)
+            job.status = JOB_FAILED
+            job.error = str(e)
+            self.stats["failed"] += 1
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+            job.finished_at = time.time()
+            self._in_flight.pop(job.key, None)
+            await self._save(job)
+            job.done.set()
+
+    async def _execute(self, job: ReportJob):
+        start_date, end_date = report_bounds(job.report_type, job.params)
+        opener = self._read_session(end_date) if self._read_session else self._session_factory()
+        async with opener as session:
+            job.set_stage(5, "Ma'lumotlar versiyasi tekshirilmoqda")
+            entry = await report_cache.lookup(session, job.report_type, start_date, end_date)
+            job.etag = entry.etag
+
+            async def generate():
+                # Bosqichlar va har PROGRESS_BATCH_ROWS qator bo'yicha progress
+                return await generate_report(session, job.report_type, job.params, progress=job.set_stage)
+
+            job.file_path = await report_cache.ensure(entry, generate)
+
+    async def _prune(self):
+        """Muddati o'tgan tugagan (va to'xtab qolgan) vazifalarni unutish"""
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.is_finished and now - job.finished_at > self.result_ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+        try:
+            async with self._session_factory() as session:
+                await session.execute(delete(ReportJobRecord).where(or_(
+                    ReportJobRecord.finished_at < now - self.result_ttl,
+                    and_(ReportJobRecord.finished_at.is_(None), ReportJobRecord.updated_at < now - self.result_ttl)
+                )))
+                await session.commit()
+        except Exception:
+            logger.exception("Eski hisobot vazifalarini o'chirib bo'lmadi")
+
+    async def stop(self):
+        """Yangi vazifalarni qabul qilmaslik va bajarilayotganlarini bekor qilish"""
+        self._running = False
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+report_jobs: Optional[ReportJobManager] = None
+
+
+def get_report_jobs() -> Optional[ReportJobManager]:
+    """Ishlayotgan menejerni qaytarish (aks holda None - hisobot so'rov ichida yaratiladi)"""
+    if report_jobs is not None and report_jobs.is_running:
+        return report_jobs
+    return None
+
+
+async def start_report_jobs(session_factory, read_session=None) -> ReportJobManager:
+    """
+    Jarayon ishga tushganda menejerni yaratish (API va bot o'z sessiya fabrikasi bilan)
+
+    read_session(end_date) berilsa hisobotlar u orqali (masalan, replikadan) o'qiladi.
+    """
+    global report_jobs
+    report_jobs = ReportJobManager(
+        session_factory,
+        max_workers=REPORT_JOB_WORKERS,
+        type_limits=REPORT_JOB_TYPE_LIMITS,
+        result_ttl=REPORT_JOB_TTL,
+        read_session=read_session,
+    )
+    return report_jobs
+
+
+async def stop_report_jobs():
+    """Jarayon to'xtaganda bajarilayotgan vazifalarni bekor qilish"""
+    if report_jobs is not None:
+        await report_jobs.stop()
@@ -1,11 +1,99 @@
 import os
 import asyncio
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
+import tempfile
+from functools import lru_cache
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import date, datetime, timedelta
-from app.crud.attendance import get_monthly_attendance_report
+from datetime import date, datetime, time, timedelta
+from app.crud.attendance import get_monthly_attendance_report, get_daily_attendance_rows, WORK_START_TIME
+from app.services.work_calendar import get_work_calendar
+
+# Katak bo'yoqlari (ReportSheet.add_row fills qiymatlari)
+WARNING_FILL = "warning"
+DEDUCTION_FILL = "deduction"
+
+# Hisobot bosqichlari progressi (foiz): ma'lumotlarni o'qish, qatorlarni tayyorlash, Excel yozish
+PROGRESS_QUERY = 10
+PROGRESS_ROWS = 25
+PROGRESS_WRITE = 60
+PROGRESS_SAVED = 95
+PROGRESS_BATCH_ROWS = 500  # Progress har shuncha qatorda yangilanadi
+
+def batch_progress(progress, start: int, end: int, stage: str, total: int):
+    """
+    Qatorlar bo'yicha progress: step(done) har PROGRESS_BATCH_ROWS qatorda
+    progress(foiz, bosqich) ni chaqiradi (foiz start..end oralig'ida)
+    """
+    def step(done: int):
+        if progress is not None and (done % PROGRESS_BATCH_ROWS == 0 or done == total):
+            progress(start + (end - start) * done // max(total, 1), f"{stage}: {done}/{total}")
+    return step
+
+@lru_cache(maxsize=None)
+def _styles() -> dict:
+    """
+    Umumiy uslublar (har bir katak uchun qayta yaratilmaydi)
+    
+    openpyxl birinchi hisobot yozilganda import qilinadi - hisobot
+    yaratmaydigan jarayonlar ishga tushishda uni yuklamaydi.
+    """
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    thin = Side(style="thin")
+    return {
+        "header_font": Font(bold=True, color="FFFFFF"),
+        "header_fill": PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+        "center": Alignment(horizontal="center", vertical="center"),
+        "border": Border(left=thin, right=thin, top=thin, bottom=thin),
+        "bold": Font(bold=True),
+        WARNING_FILL: PatternFill(start_color="FFD7D7", end_color="FFD7D7", fill_type="solid"),
+        DEDUCTION_FILL: PatternFill(start_color="FFE6E6", end_color="FFE6E6", fill_type="solid"),
+    }
+
+# Hisobot ustunlari: (kalit, sarlavha). Excel hisobotlari sarlavhalarni,
+# mashina o'qiydigan eksportlar (app/services/exports.py) kalitlarni ishlatadi
+DAILY_REPORT_COLUMNS = [
+    ("index", "№"), ("employee_name", "Xodim ismi"), ("position", "Lavozimi"),
+    ("check_type", "Harakat"), ("check_time", "Vaqti"), ("is_late", "Kechikdi"),
+    ("time_diff", "Vaqt farqi"), ("note", "Izoh"),
+]
+MONTHLY_REPORT_COLUMNS = [
+    ("index", "№"), ("employee_name", "Xodim ismi"), ("position", "Lavozimi"),
+    ("working_days", "Umumiy ish kunlari"), ("present_days", "Jami kelgan kunlar"),
+    ("late_days", "Kechikkan kunlar"), ("absent_days", "Ishga kelmagan kunlar"),
+    ("attendance_percent", "Davomat %"),
+]
+DETAILED_REPORT_COLUMNS = [
+    ("index", "№"), ("employee_name", "Xodim ismi"), ("position", "Lavozimi"),
+    ("present_days", "Jami kelgan kunlar"), ("late_days", "Kechikkanlar"),
+    ("base_salary", "Asosiy maosh"), ("final_salary", "Yakuniy maosh"),
+    ("total_deductions", "Chegirmalar"), ("note", "Izoh"),
+]
+
+def column_headers(columns: list[tuple[str, str]]) -> list[str]:
+    """Ustun ta'riflaridan Excel sarlavhalari"""
+    return [header for _, header in columns]
+
+def _adjust_column_width(header_value: str, max_length: int, min_width=8, max_width=50, padding=2):
+    """Ustun sarlavhasi va eng uzun qiymat bo'yicha kenglikni hisoblash"""
+    # Optimal kenglikni hisoblash
+    adjusted_width = min(max(max_length + padding, min_width), max_width)
+    
+    # Maxsus ustunlar uchun qoidalar
+    if any(word in header_value for word in ["ism", "name"]):
+        adjusted_width = max(adjusted_width, 25)
+    elif any(word in header_value for word in ["lavozim", "position"]):
+        adjusted_width = max(adjusted_width, 20)
+    elif any(word in header_value for word in ["izoh", "comment"]):
+        adjusted_width = max(adjusted_width, 35)
+    elif any(word in header_value for word in ["maosh", "salary"]):
+        adjusted_width = max(adjusted_width, 18)
+    elif any(word in header_value for word in ["vaqt", "time"]):
+        adjusted_width = max(adjusted_width, 15)
+    elif header_value == "№":
+        adjusted_width = 6
+    elif "%" in header_value:
+        adjusted_width = max(adjusted_width, 12)
+    
+    return adjusted_width
 
 def smart_column_width(worksheet, min_width=8, max_width=50, padding=2):
     """
@@ -17,80 +105,144 @@ def smart_column_width(worksheet, min_width=8, max_width=50, padding=2):
         max_width: Maksimal ustun kengligi  
         padding: Qo'shimcha joy (kenglik)
     """
+    from openpyxl.utils import get_column_letter
+    
     for column in worksheet.columns:
         max_length = 0
         column_letter = get_column_letter(column[0].column)
         
         for cell in column:
-            try:
-                if cell.value:
-                    cell_length = len(str(cell.value))
-                    if cell_length > max_length:
-                        max_length = cell_length
-            except:
-                pass
-        
-        # Optimal kenglikni hisoblash
-        adjusted_width = min(max(max_length + padding, min_width), max_width)
+            if cell.value:
+                max_length = max(max_length, len(str(cell.value)))
         
-        # Maxsus ustunlar uchun qoidalar
         header_value = str(column[0].value).lower() if column[0].value else ""
-        
-        if any(word in header_value for word in ["ism", "name"]):
-            adjusted_width = max(adjusted_width, 25)
-        elif any(word in header_value for word in ["lavozim", "position"]):
-            adjusted_width = max(adjusted_width, 20)
-        elif any(word in header_value for word in ["izoh", "comment"]):
-            adjusted_width = max(adjusted_width, 35)
-        elif any(word in header_value for word in ["maosh", "salary"]):
-            adjusted_width = max(adjusted_width, 18)
-        elif any(word in header_value for word in ["vaqt", "time"]):
-            adjusted_width = max(adjusted_width, 15)
-        elif header_value == "№":
-            adjusted_width = 6
-        elif "%" in header_value:
-            adjusted_width = max(adjusted_width, 12)
-            
-        worksheet.column_dimensions[column_letter].width = adjusted_width
+        worksheet.column_dimensions[column_letter].width = _adjust_column_width(
+            header_value, max_length, min_width, max_width, padding
+        )
+
+class ReportSheet:
+    """
+    Write-only rejimda yoziladigan hisobot varag'i
+    
+    Qatorlar qo'shilayotganda ustunlarning eng uzun qiymati yangilanib boriladi,
+    shuning uchun kenglikni hisoblash uchun varaqni qayta aylanib chiqish shart emas.
+    """
+    
+    def __init__(self, title: str, headers: list):
+        self.title = title
+        self.headers = headers
+        self.rows = []
+        self.footer = None
+        self._max_lengths = [len(str(header)) for header in headers]
+    
+    def add_row(self, values: list, fills: dict = None):
+        """Qator qo'shish (fills: {ustun_raqami: WARNING_FILL/DEDUCTION_FILL}, 1 dan boshlanadi)"""
+        self.rows.append((values, fills or {}))
+        for index, value in enumerate(values):
+            if value:
+                length = len(str(value))
+                if length > self._max_lengths[index]:
+                    self._max_lengths[index] = length
+    
+    def set_footer(self, values: list):
+        """Jami qatori (bitta bo'sh qatordan keyin, qalin shriftda; kenglikka ta'sir qilmaydi)"""
+        self.footer = values
+    
+    def column_widths(self) -> list:
+        return [
+            _adjust_column_width(str(header).lower(), max_length)
+            for header, max_length in zip(self.headers, self._max_lengths)
+        ]
+
+def _write_report_sheet(sheet: ReportSheet, file_path: str, progress=None):
+    """
+    Varaqni write-only rejimda xlsx faylga yozish (ishchi oqimda chaqiriladi)
 
-async def generate_detailed_monthly_report(db: AsyncSession, year: int, month: int):
-    """Batafsil oylik Excel hisobotini yaratish - vaqt va maosh ma'lumotlari bilan"""
+    progress(foiz, bosqich) shu oqimdan chaqiriladi - tez va oqim uchun xavfsiz bo'lishi kerak.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+    
+    styles = _styles()
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet.title)
+    
+    # Write-only rejimda ustun kengliklari qatorlardan oldin berilishi kerak
+    for index, width in enumerate(sheet.column_widths(), 1):
+        ws.column_dimensions[get_column_letter(index)].width = width
+    
+    def styled_cell(value, font=None, fill=None):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.alignment = styles["center"]
+        cell.border = styles["border"]
+        if font is not None:
+            cell.font = font
+        if fill is not None:
+            cell.fill = styles[fill] if isinstance(fill, str) else fill
+        return cell
+    
+    ws.append([styled_cell(header, styles["header_font"], styles["header_fill"]) for header in sheet.headers])
+    
+    step = batch_progress(progress, PROGRESS_WRITE, PROGRESS_SAVED, "Excel yozilmoqda", len(sheet.rows))
+    for done, (values, fills) in enumerate(sheet.rows, 1):
+        ws.append([styled_cell(value, fill=fills.get(col)) for col, value in enumerate(values, 1)])
+        step(done)
+    
+    if sheet.footer is not None:
+        ws.append([])
+        footer_cells = []
+        for value in sheet.footer:
+            if value is None:
+                footer_cells.append(None)
+            else:
+                cell = WriteOnlyCell(ws, value=value)
+                cell.font = styles["bold"]
+                footer_cells.append(cell)
+        ws.append(footer_cells)
+    
+    # Yarim yozilgan fayl yuklab olinmasligi uchun avval vaqtinchalik faylga saqlanadi.
+    # Nom har yozuvchi uchun noyob - bir jarayondagi parallel oqimlar ham to'qnashmaydi
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or ".", suffix=".tmp")
+    os.close(fd)
+    if progress is not None:
+        progress(PROGRESS_SAVED, "Fayl saqlanmoqda")
+    try:
+        wb.save(tmp_path)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+async def save_report_sheet(sheet: ReportSheet, file_path: str, progress=None) -> str:
+    """Faylni event loop ni bloklamasdan ishchi oqimda yaratish"""
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    await asyncio.to_thread(_write_report_sheet, sheet, file_path, progress)
+    return file_path
+
+def _report_started(progress):
+    if progress is not None:
+        progress(PROGRESS_QUERY, "Ma'lumotlar o'qilmoqda")
+
+async def generate_detailed_monthly_report(db: AsyncSession, year: int, month: int, progress=None):
+    """
+    Batafsil oylik Excel hisobotini yaratish - vaqt va maosh ma'lumotlari bilan
+
+    progress(foiz, bosqich) berilsa bosqichlar va qatorlar bo'yicha chaqiriladi.
+    """
     
     # Ma'lumotlarni olish
+    _report_started(progress)
     report_data = await get_monthly_attendance_report(db, month, year)
     
-    # Excel faylini yaratish
-    wb = Workbook()
-    ws = wb.active
-    ws.title = f"{year}-{month:02d} Batafsil Hisoboti"
-    
-    # Styling
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    center_alignment = Alignment(horizontal="center", vertical="center")
-    border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thin")
-    )
-    
     # Header - batafsil ma'lumotlar
-    headers = [
-        "№", "Xodim ismi", "Lavozimi", "Jami kelgan kunlar", "Kechikkanlar", 
-        "Asosiy maosh", "Yakuniy maosh", "Chegirmalar", "Izoh"
-    ]
-    
-    # Header qo'shish
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = center_alignment
-        cell.border = border
+    sheet = ReportSheet(f"{year}-{month:02d} Batafsil Hisoboti", column_headers(DETAILED_REPORT_COLUMNS))
+    step = batch_progress(progress, PROGRESS_ROWS, PROGRESS_WRITE, "Qatorlar tayyorlanmoqda", len(report_data))
     
     # Ma'lumotlarni qo'shish
-    for row_idx, row_data in enumerate(report_data, 2):
+    for index, row_data in enumerate(report_data, 1):
         # Salary ma'lumotlari
         salary_info = row_data.get("salary_info", {})
         base_salary = salary_info.get("base_salary", 0)
@@ -106,7 +258,7 @@ async def generate_detailed_monthly_report(db: AsyncSession, year: int, month: i
         izoh = "; ".join(izoh_parts) if izoh_parts else "Yaxshi ish"
         
         row_values = [
-            row_idx - 1,  # №
+            index,  # №
             row_data["employee_name"],
             row_data["position"] if row_data["position"] else "Belgilanmagan",
             row_data["present_days"],
@@ -117,164 +269,67 @@ async def generate_detailed_monthly_report(db: AsyncSession, year: int, month: i
             izoh
         ]
         
-        for col, value in enumerate(row_values, 1):
-            cell = ws.cell(row=row_idx, column=col, value=value)
-            cell.alignment = center_alignment
-            cell.border = border
-            
-            # Rangli format
-            if col == 5 and isinstance(value, int) and value > 0:  # Kechikkanlar
-                cell.fill = PatternFill(start_color="FFD7D7", end_color="FFD7D7", fill_type="solid")
-            if col == 8 and isinstance(value, str) and "0" not in value:  # Chegirmalar
-                cell.fill = PatternFill(start_color="FFE6E6", end_color="FFE6E6", fill_type="solid")
-    
-    # Ma'lumotlarni qo'shish
-    for row_idx, row_data in enumerate(report_data, 2):
-        # Salary ma'lumotlari
-        salary_info = row_data.get("salary_info", {})
-        base_salary = salary_info.get("base_salary", 0)
-        final_salary = salary_info.get("final_salary", 0)
-        total_deductions = salary_info.get("total_deductions", 0)
+        # Rangli format
+        fills = {}
+        if row_data["late_days"] > 0:  # Kechikkanlar
+            fills[5] = WARNING_FILL
+        if "0" not in row_values[7]:  # Chegirmalar
+            fills[8] = DEDUCTION_FILL
         
-        # Izoh yaratish
-        izoh_parts = []
-        if row_data["late_days"] > 0:
-            izoh_parts.append(f"Kechikish: {row_data['late_days']} kun")
-        if total_deductions > 0:
-            izoh_parts.append(f"Jarima: {total_deductions:,.0f} so'm")
-        izoh = "; ".join(izoh_parts) if izoh_parts else "Yaxshi ish"
-        
-        row_values = [
-            row_idx - 1,  # №
-            row_data["employee_name"],
-            row_data["position"] if row_data["position"] else "Belgilanmagan",
-            row_data["present_days"],
-            row_data["late_days"],
-            f"{base_salary:,.0f}" if base_salary > 0 else "Belgilanmagan",
-            f"{final_salary:,.0f}" if final_salary > 0 else "0",
-            f"{total_deductions:,.0f}" if total_deductions > 0 else "0",
-            izoh
-        ]
-        
-        for col, value in enumerate(row_values, 1):
-            cell = ws.cell(row=row_idx, column=col, value=value)
-            cell.alignment = center_alignment
-            cell.border = border
-            
-            # Rangli format
-            if col == 5 and isinstance(value, int) and value > 0:  # Kechikkanlar
-                cell.fill = PatternFill(start_color="FFD7D7", end_color="FFD7D7", fill_type="solid")
-                cell.fill = PatternFill(start_color="FFD7D7", end_color="FFD7D7", fill_type="solid")
-            if col == 9 and isinstance(value, str) and "0" not in value:  # Chegirmalar
-                cell.fill = PatternFill(start_color="FFE6E6", end_color="FFE6E6", fill_type="solid")
-    
-    # Aqlli ustun kengligini sozlash
-    smart_column_width(ws)
-    
-    # Fayl nomini yaratish
-    os.makedirs("reports", exist_ok=True)
-    file_path = f"reports/batafsil_hisoboti_{year}_{month:02d}.xlsx"
-    wb.save(file_path)
+        sheet.add_row(row_values, fills)
+        step(index)
     
-    return file_path
+    return await save_report_sheet(sheet, f"reports/batafsil_hisoboti_{year}_{month:02d}.xlsx", progress)
 
-async def generate_monthly_report(db: AsyncSession, year: int, month: int):
+async def generate_monthly_report(db: AsyncSession, year: int, month: int, progress=None):
     """Oylik Excel hisobotini yaratish - yangilangan versiya maoshlar bilan"""
     
     # Ma'lumotlarni olish
+    _report_started(progress)
     report_data = await get_monthly_attendance_report(db, month, year)
     
-    # Oyning umumiy ish kunlari (dam olish kunlarisiz)
-    start_date = date(year, month, 1)
-    if month == 12:
-        end_date = date(year + 1, 1, 1) - timedelta(days=1)
-    else:
-        end_date = date(year, month + 1, 1) - timedelta(days=1)
-    
-    working_days = 0
-    current_date = start_date
-    while current_date <= end_date:
-        # Faqat yakshanba dam olish kuni (Sunday=6), qolgan kunlar ish kunlari
-        if current_date.weekday() != 6:  # Sunday=6, qolgan kunlar ish kuni
-            working_days += 1
-        current_date += timedelta(days=1)
-    
-    # Excel faylini yaratish
-    wb = Workbook()
-    ws = wb.active
-    ws.title = f"{year}-{month:02d} Davomat Hisoboti"
-    
-    # Styling
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    center_alignment = Alignment(horizontal="center", vertical="center")
-    border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thin")
-    )
+    # Oyning umumiy ish kunlari (dam olish va bayram kunlarisiz)
+    working_days = get_work_calendar().month_working_days(year, month)
     
     # Header - davomat ma'lumotlari
-    headers = [
-        "№", "Xodim ismi", "Lavozimi", "Umumiy ish kunlari", "Jami kelgan kunlar", 
-        "Kechikkan kunlar", "Ishga kelmagan kunlar", "Davomat %"
-    ]
-    
-    # Header qo'shish
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = center_alignment
-        cell.border = border
+    sheet = ReportSheet(f"{year}-{month:02d} Davomat Hisoboti", column_headers(MONTHLY_REPORT_COLUMNS))
+    step = batch_progress(progress, PROGRESS_ROWS, PROGRESS_WRITE, "Qatorlar tayyorlanmoqda", len(report_data))
     
     # Ma'lumotlarni qo'shish
-    for row_idx, row_data in enumerate(report_data, 2):
+    for index, row_data in enumerate(report_data, 1):
         attendance_percentage = (row_data["present_days"] / working_days * 100) if working_days > 0 else 0
+        absent_days = working_days - row_data["present_days"]  # Yo'qliklar
         
         row_values = [
-            row_idx - 1,  # №
+            index,  # №
             row_data["employee_name"],
             row_data["position"] if row_data["position"] else "Belgilanmagan",
             working_days,
             row_data["present_days"],
             row_data["late_days"],
-            working_days - row_data["present_days"],  # Yo'qliklar
+            absent_days,
             f"{attendance_percentage:.1f}%"
         ]
         
-        for col, value in enumerate(row_values, 1):
-            cell = ws.cell(row=row_idx, column=col, value=value)
-            cell.alignment = center_alignment
-            cell.border = border
-            
-            # Muammolar uchun qizil rang
-            try:
-                numeric_value = float(str(value).replace(",", "").replace("%", "")) if isinstance(value, str) else value
-                if col == 6 and numeric_value > 0:  # Kechikkanlar ustuni
-                    cell.fill = PatternFill(start_color="FFD7D7", end_color="FFD7D7", fill_type="solid")
-                if col == 7 and numeric_value > 0:  # Yo'qliklar ustuni
-                    cell.fill = PatternFill(start_color="FFD7D7", end_color="FFD7D7", fill_type="solid")
-            except (ValueError, TypeError):
-                pass  # Agar raqamga aylantira olmasak, rangni o'zgartirmaymiz
-    
-    # Aqlli ustun kengligini sozlash
-    smart_column_width(ws)
+        # Muammolar uchun qizil rang
+        fills = {}
+        if row_data["late_days"] > 0:  # Kechikkanlar ustuni
+            fills[6] = WARNING_FILL
+        if absent_days > 0:  # Yo'qliklar ustuni
+            fills[7] = WARNING_FILL
+        
+        sheet.add_row(row_values, fills)
+        step(index)
     
     # Jami statistika qo'shish
-    total_row = len(report_data) + 3
-    ws.cell(row=total_row, column=1, value="JAMI:").font = Font(bold=True)
-    ws.cell(row=total_row, column=5, value=sum(row["present_days"] for row in report_data)).font = Font(bold=True)
-    ws.cell(row=total_row, column=6, value=sum(row["late_days"] for row in report_data)).font = Font(bold=True)
-    ws.cell(row=total_row, column=7, value=sum(working_days - row["present_days"] for row in report_data)).font = Font(bold=True)
-    
-    # Fayl nomini yaratish
-    os.makedirs("reports", exist_ok=True)
-    file_path = f"reports/davomat_hisoboti_{year}_{month:02d}.xlsx"
-    wb.save(file_path)
-    
-    return file_path
+    sheet.set_footer([
+        "JAMI:", None, None, None,
+        sum(row["present_days"] for row in report_data),
+        sum(row["late_days"] for row in report_data),
+        sum(working_days - row["present_days"] for row in report_data)
+    ])
+    
+    return await save_report_sheet(sheet, f"reports/davomat_hisoboti_{year}_{month:02d}.xlsx", progress)
 
 async def delete_file_after_delay(file_path: str, delay_seconds: int = 300):
     """Faylni ma'lum vaqtdan keyin o'chirish (default: 5 daqiqa)"""
@@ -286,99 +341,69 @@ async def delete_file_after_delay(file_path: str, delay_seconds: int = 300):
     except Exception as e:
         print(f"❌ Faylni o'chirishda xato: {e}")
 
-async def generate_daily_report(db: AsyncSession, target_date: date):
-    """Kunlik batafsil hisobotni yaratish - vaqt ma'lumotlari bilan"""
-    from app.crud.attendance import get_daily_attendance
-    
-    attendances = await get_daily_attendance(db, target_date)
-    
-    wb = Workbook()
-    ws = wb.active
-    ws.title = f"{target_date} Kunlik Davomat"
-    
-    # Styling
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    center_alignment = Alignment(horizontal="center", vertical="center")
-    border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thin")
-    )
-    
-    # Headers
-    headers = [
-        "№", "Xodim ismi", "Lavozimi", "Harakat", "Vaqti", 
-        "Kechikdi", "Vaqt farqi", "Izoh"
-    ]
+def format_daily_report_row(index: int, row, work_start: time) -> tuple[list, dict]:
+    """
+    Kunlik hisobot qatorini tayyorlash (bazaga murojaatsiz, sof funksiya)
     
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = center_alignment
-        cell.border = border
+    Args:
+        row: get_daily_attendance_rows natijasidagi tuple
+        work_start: Ish boshlanish vaqti (kechikish daqiqalari uchun)
     
-    # Ma'lumotlar
-    for row_idx, attendance in enumerate(attendances, 2):
-        # Employee ma'lumotlarini olish
-        from app.crud.employee import get_employee_by_id
-        employee = await get_employee_by_id(db, attendance.employee_id)
-        
-        # Vaqt farqi va izoh hisoblash
-        vaqt_farqi = ""
-        izoh = ""
-        
-        if attendance.check_type.value == "IN":
-            if attendance.is_late:
-                # Kechikish vaqtini hisoblash (9:30 dan necha daqiqa kech)
-                from datetime import time, datetime, timedelta
-                work_start = time(9, 30)
-                work_start_datetime = datetime.combine(attendance.check_time.date(), work_start)
-                if attendance.check_time > work_start_datetime:
-                    late_minutes = (attendance.check_time - work_start_datetime).seconds // 60
-                    vaqt_farqi = f"{late_minutes} daqiqa kech"
-                    izoh = f"Kechikish: {late_minutes} daqiqa"
-                else:
-                    vaqt_farqi = "Vaqtida"
-                    izoh = "Vaqtida keldi"
+    Returns:
+        (qator qiymatlari, rang berish lug'ati)
+    """
+    full_name, position, check_type, check_time, is_late = row
+    
+    # Vaqt farqi va izoh hisoblash
+    vaqt_farqi = ""
+    izoh = ""
+    
+    if check_type.value == "IN":
+        if is_late:
+            # Kechikish vaqtini hisoblash (9:30 dan necha daqiqa kech)
+            work_start_datetime = datetime.combine(check_time.date(), work_start)
+            if check_time > work_start_datetime:
+                late_minutes = (check_time - work_start_datetime).seconds // 60
+                vaqt_farqi = f"{late_minutes} daqiqa kech"
+                izoh = f"Kechikish: {late_minutes} daqiqa"
             else:
                 vaqt_farqi = "Vaqtida"
                 izoh = "Vaqtida keldi"
-        
-        elif attendance.check_type.value == "OUT":
+        else:
             vaqt_farqi = "Vaqtida"
-            izoh = "Normal vaqtda ketdi"
-        
-        row_values = [
-            row_idx - 1,
-            employee.full_name if employee else "Noma'lum",
-            employee.position if employee and employee.position else "N/A",
-            "Keldi" if attendance.check_type.value == "IN" else "Ketdi",
-            attendance.check_time.strftime("%H:%M:%S"),
-            "Ha" if attendance.is_late else "Yo'q",
-            vaqt_farqi,
-            izoh
-        ]
-        
-        for col, value in enumerate(row_values, 1):
-            cell = ws.cell(row=row_idx, column=col, value=value)
-            cell.alignment = center_alignment
-            cell.border = border
-            
-            # Rangli format
-            if col == 6 and value == "Ha":  # Kechikdi
-                cell.fill = PatternFill(start_color="FFD7D7", end_color="FFD7D7", fill_type="solid")
-            if col == 7 and value == "Ha":  # Erta ketdi
-                cell.fill = PatternFill(start_color="FFD7D7", end_color="FFD7D7", fill_type="solid")
-    
-    # Aqlli ustun kengligini sozlash
-    smart_column_width(ws)
-    
-    # Fayl saqlash
-    os.makedirs("reports", exist_ok=True)
-    file_path = f"reports/kunlik_batafsil_{target_date}.xlsx"
-    wb.save(file_path)
+            izoh = "Vaqtida keldi"
+    
+    elif check_type.value == "OUT":
+        vaqt_farqi = "Vaqtida"
+        izoh = "Normal vaqtda ketdi"
+    
+    row_values = [
+        index,
+        full_name if full_name else "Noma'lum",
+        position if position else "N/A",
+        "Keldi" if check_type.value == "IN" else "Ketdi",
+        check_time.strftime("%H:%M:%S"),
+        "Ha" if is_late else "Yo'q",
+        vaqt_farqi,
+        izoh
+    ]
     
-    return file_path
+    # Rangli format
+    fills = {6: WARNING_FILL} if is_late else {}  # Kechikdi
+    return row_values, fills
+
+async def generate_daily_report(db: AsyncSession, target_date: date, progress=None):
+    """Kunlik batafsil hisobotni yaratish - vaqt ma'lumotlari bilan"""
+    # Bitta JOIN so'rovi - faqat kerakli ustunlar
+    _report_started(progress)
+    rows = await get_daily_attendance_rows(db, target_date)
+    
+    sheet = ReportSheet(f"{target_date} Kunlik Davomat", column_headers(DAILY_REPORT_COLUMNS))
+    step = batch_progress(progress, PROGRESS_ROWS, PROGRESS_WRITE, "Qatorlar tayyorlanmoqda", len(rows))
+    
+    # Ma'lumotlar
+    for index, row in enumerate(rows, 1):
+        sheet.add_row(*format_daily_report_row(index, row, WORK_START_TIME))
+        step(index)
+    
+    return await save_report_sheet(sheet, f"reports/kunlik_batafsil_{target_date}.xlsx", progress)
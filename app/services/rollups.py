@@ -0,0 +1,493 @@
+"""
+Davomat rollup'lari - kun, hafta va oy bo'yicha oldindan agregatlangan hisoblagichlar
+
+    - yozish yo'li (API, navbat, bot) har bir yangi yozuvni apply_attendance_rows()
+      orqali shu tranzaksiyada hisoblagichlarga qo'shadi;
+    - rebuild_rollups() xom yozuvlardan qayta hisoblaydi (import yoki
+      nomuvofiqlikdan keyin, manage.py rebuild-rollups);
+    - query_rollups() so'ralgan oraliqni eng yirik mos bo'laklar bilan
+      qoplaydi: to'liq oylar - oylik, to'liq haftalar - haftalik, qolgan
+      chekka kunlar - kunlik qatorlardan o'qiladi.
+
+Kelgan kun - xodimning shu kunda kelish (IN) belgisi bor; kechikkan kun -
+kunning birinchi kelish belgisi kechikkan.
+"""
+import logging
+import time
+from datetime import date, datetime, timedelta
+from datetime import time as dt_time
+from typing import Optional
+
+from sqlalchemy import and_, case, delete, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import dialect_insert
+from app.models.attendance import Attendance, CheckTypeEnum
+from app.models.attendance_rollup import AttendanceRollup
+from app.models.employee import Employee
+from app.services.attendance_storage import attendance_source
+from app.services.work_calendar import get_work_calendar
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ("day", "week", "month")
+GROUP_BY_OPTIONS = (None, "position", "employee")
+COUNTERS = ("check_ins", "check_outs", "late_check_ins", "present_days", "late_days")
+
+# Natija bo'lagi uchun qaysi rollup'lar ichma-ich joylashadi (yirikdan maydaga)
+_NESTED_GRANULARITIES = {
+    None: ("month", "week", "day"),
+    "month": ("month", "day"),
+    "week": ("week", "day"),
+    "day": ("day",),
+}
+
+_INSERT_CHUNK_SIZE = 5000
+
+
+def bucket_start(target_date: date, bucket: str) -> date:
+    """Sana tegishli bo'lgan davr boshi (hafta - dushanbadan)"""
+    if bucket == "week":
+        return target_date - timedelta(days=target_date.weekday())
+    if bucket == "month":
+        return target_date.replace(day=1)
+    return target_date
+
+
+def bucket_end(start: date, bucket: str) -> date:
+    """Davrning oxirgi kuni"""
+    if bucket == "week":
+        return start + timedelta(days=6)
+    if bucket == "month":
+        next_month = date(start.year + 1, 1, 1) if start.month == 12 else date(start.year, start.month + 1, 1)
+        return next_month - timedelta(days=1)
+    return start
+
+
+def _empty_counters() -> dict:
+    return dict.fromkeys(COUNTERS, 0)
+
+
+def _dialect_insert(dialect_name: str):
+    return dialect_insert(AttendanceRollup.__table__, dialect_name)
+
+
+def _upsert_statement(dialect_name: str):
+    """Hisoblagichlarni oshiruvchi INSERT ... ON CONFLICT DO UPDATE"""
+    table = AttendanceRollup.__table__
+    statement = _dialect_insert(dialect_name)
+    return statement.on_conflict_do_update(
+        index_elements=["granularity", "bucket_start", "employee_id"],
+        set_={name: table.c[name] + statement.excluded[name] for name in COUNTERS}
+    )
+
+
+def _presence_claim_statement(dialect_name: str):
+    """
+    Kunlik qatorda xodimni "kelgan" deb belgilash - faqat hali belgilanmagan bo'lsa
+
+    Qator qaytsa - shu tranzaksiya kunni birinchi bo'lib belgiladi (haftalik va
+    oylik present_days shundagina oshiriladi). Tekshirish va yozish bitta
+    so'rovda, shuning uchun bir vaqtdagi ikki kelish kunni ikki marta sanamaydi.
+    """
+    table = AttendanceRollup.__table__
+    statement = _dialect_insert(dialect_name)
+    return statement.on_conflict_do_update(
+        index_elements=["granularity", "bucket_start", "employee_id"],
+        set_={"present_days": 1, "late_days": statement.excluded.late_days},
+        where=table.c.present_days == 0
+    ).returning(table.c.employee_id, table.c.bucket_start)
+
+
+async def _employee_positions(db: AsyncSession, employee_ids=None) -> dict:
+    query = select(Employee.id, Employee.position)
+    if employee_ids is not None:
+        query = query.where(Employee.id.in_(employee_ids))
+    result = await db.execute(query)
+    return dict(result.all())
+
+
+def _add_day(deltas: dict, employee_id: int, day: date, counters: dict):
+    """Kunlik hisoblagichlarni uchala darajaga qo'shish"""
+    for granularity in GRANULARITIES:
+        key = (granularity, bucket_start(day, granularity), employee_id)
+        total = deltas.setdefault(key, _empty_counters())
+        for name in COUNTERS:
+            total[name] += counters[name]
+
+
+def _rollup_params(deltas: dict, positions: dict) -> list[dict]:
+    return [
+        {
+            "granularity": granularity,
+            "bucket_start": start,
+            "employee_id": employee_id,
+            "position": positions.get(employee_id),
+            **counters,
+        }
+        for (granularity, start, employee_id), counters in deltas.items()
+    ]
+
+
+# ---------- Yozish yo'li ----------
+
+async def apply_attendance_rows(db: AsyncSession, rows: list[dict]):
+    """
+    Yangi davomat yozuvlarini rollup hisoblagichlariga qo'shish
+
+    Chaqiruvchining tranzaksiyasida bajariladi (commit chaqiruvchida).
+
+    Args:
+        rows: employee_id, check_type, check_time, is_late kalitli lug'atlar
+    """
+    if not rows:
+        return
+
+    days: dict[tuple[int, date], dict] = {}
+    for row in rows:
+        check_type = row["check_type"]
+        check_type = check_type.value if isinstance(check_type, CheckTypeEnum) else str(check_type).upper()
+        check_time = row["check_time"]
+        is_late = bool(row.get("is_late"))
+
+        day = days.setdefault((row["employee_id"], check_time.date()), {**_empty_counters(), "first_in": None})
+        if check_type == "IN":
+            day["check_ins"] += 1
+            day["late_check_ins"] += int(is_late)
+            if day["first_in"] is None or check_time < day["first_in"][0]:
+                day["first_in"] = (check_time, is_late)
+        else:
+            day["check_outs"] += 1
+
+    employee_ids = {employee_id for employee_id, _ in days}
+    positions = await _employee_positions(db, employee_ids)
+    dialect_name = db.get_bind().dialect.name
+
+    # Kelgan kunlar: kunlik qatorda atomar belgilanadi, yangi belgilanganlari qaytadi
+    first_ins = {key: counters.pop("first_in") for key, counters in days.items()}
+    claim = _presence_claim_statement(dialect_name)
+    claimed = {}
+    for (employee_id, day), first_in in first_ins.items():
+        if first_in is None:
+            continue
+        result = await db.execute(claim, {
+            "granularity": "day", "bucket_start": day, "employee_id": employee_id,
+            "position": positions.get(employee_id), **_empty_counters(),
+            "present_days": 1, "late_days": int(first_in[1])
+        })
+        if result.first() is not None:
+            claimed[(employee_id, day)] = int(first_in[1])
+
+    deltas: dict = {}
+    for (employee_id, day), counters in days.items():
+        _add_day(deltas, employee_id, day, counters)
+        if (employee_id, day) in claimed:
+            for granularity in ("week", "month"):
+                total = deltas[(granularity, bucket_start(day, granularity), employee_id)]
+                total["present_days"] += 1
+                total["late_days"] += claimed[(employee_id, day)]
+
+    await db.execute(_upsert_statement(dialect_name), _rollup_params(deltas, positions))
+
+
+# ---------- Qayta hisoblash ----------
+
+def _daily_aggregates_statement(Attendance, first_in, start_date: date, end_date: date):
+    """
+    (xodim, kun) hisoblagichlari so'rovi
+
+    Kunning birinchi IN belgisi kechikkanmi - max(CASE ...) bilan (PostgreSQL'da
+    boolean uchun max() yo'q), natija 0/1.
+    """
+    is_in = Attendance.check_type == CheckTypeEnum.IN
+    day = func.date(Attendance.check_time)
+    period = and_(
+        Attendance.check_time >= datetime.combine(start_date, dt_time.min),
+        Attendance.check_time < datetime.combine(end_date + timedelta(days=1), dt_time.min)
+    )
+
+    counts = (
+        select(
+            Attendance.employee_id.label("employee_id"),
+            day.label("day"),
+            func.count(Attendance.id).filter(is_in).label("check_ins"),
+            func.count(Attendance.id).filter(~is_in).label("check_outs"),
+            func.count(Attendance.id).filter(and_(is_in, Attendance.is_late == True)).label("late_check_ins"),
+            func.min(Attendance.check_time).filter(is_in).label("first_in")
+        )
+        .where(period)
+        .group_by(Attendance.employee_id, day)
+        .subquery()
+    )
+    return (
+        select(
+            counts.c.employee_id, counts.c.day, counts.c.check_ins,
+            counts.c.check_outs, counts.c.late_check_ins,
+            func.max(case((first_in.is_late == True, 1), else_=0))
+        )
+        .select_from(counts)
+        .outerjoin(first_in, and_(
+            first_in.employee_id == counts.c.employee_id,
+            first_in.check_time == counts.c.first_in,
+            first_in.check_type == CheckTypeEnum.IN
+        ))
+        .group_by(counts.c.employee_id, counts.c.day, counts.c.check_ins,
+                  counts.c.check_outs, counts.c.late_check_ins)
+    )
+
+
+async def _daily_aggregates(db: AsyncSession, start_date: date, end_date: date) -> dict:
+    """Xom yozuvlardan (xodim, kun) bo'yicha hisoblagichlar - GROUP BY so'rovi"""
+    Attendance = await attendance_source(db, start_date, end_date)
+    first_in = await attendance_source(db, start_date, end_date, name="first_in")
+    result = await db.execute(_daily_aggregates_statement(Attendance, first_in, start_date, end_date))
+
+    aggregates = {}
+    for employee_id, check_day, check_ins, check_outs, late_check_ins, first_late in result.all():
+        if isinstance(check_day, str):  # SQLite func.date() qator qaytaradi
+            check_day = date.fromisoformat(check_day)
+        aggregates[(employee_id, check_day)] = {
+            "check_ins": check_ins,
+            "check_outs": check_outs,
+            "late_check_ins": late_check_ins,
+            "present_days": 1 if check_ins else 0,
+            "late_days": 1 if check_ins and bool(first_late) else 0,
+        }
+    return aggregates
+
+
+async def rebuild_rollups(db: AsyncSession, start_date: Optional[date] = None,
+                          end_date: Optional[date] = None) -> dict:
+    """
+    Rollup'larni xom davomat yozuvlaridan qayta hisoblash va saqlash (commit bilan)
+
+    Oraliq har bir daraja uchun to'liq davrlargacha kengaytiriladi. Sanalar
+    berilmasa - butun tarix.
+
+    Returns:
+        Statistika: start_date, end_date, rows, seconds
+    """
+    started = time.perf_counter()
+    if start_date is None or end_date is None:
+        source = await attendance_source(db)
+        result = await db.execute(select(func.min(source.check_time), func.max(source.check_time)))
+        first, last = result.one()
+        if first is None:
+            return {"start_date": None, "end_date": None, "rows": 0, "seconds": 0}
+        start_date = start_date or first.date()
+        end_date = end_date or last.date()
+
+    ranges = {
+        granularity: (bucket_start(start_date, granularity),
+                      bucket_end(bucket_start(end_date, granularity), granularity))
+        for granularity in GRANULARITIES
+    }
+    low = min(start for start, _ in ranges.values())
+    high = max(end for _, end in ranges.values())
+
+    aggregates = await _daily_aggregates(db, low, high)
+    deltas: dict = {}
+    for (employee_id, day), counters in aggregates.items():
+        _add_day(deltas, employee_id, day, counters)
+    # Har bir daraja faqat o'z to'liq oralig'idagi davrlar uchun yangilanadi
+    deltas = {
+        key: counters for key, counters in deltas.items()
+        if ranges[key[0]][0] <= key[1] <= ranges[key[0]][1]
+    }
+
+    for granularity, (start, end) in ranges.items():
+        await db.execute(
+            delete(AttendanceRollup).where(and_(
+                AttendanceRollup.granularity == granularity,
+                AttendanceRollup.bucket_start >= start,
+                AttendanceRollup.bucket_start <= end
+            ))
+        )
+
+    params = _rollup_params(deltas, await _employee_positions(db))
+    for i in range(0, len(params), _INSERT_CHUNK_SIZE):
+        await db.execute(insert(AttendanceRollup.__table__), params[i:i + _INSERT_CHUNK_SIZE])
+    await db.commit()
+
+    stats = {
+        "start_date": low.isoformat(),
+        "end_date": high.isoformat(),
+        "rows": len(params),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info("Rollup'lar qayta hisoblandi: %s", stats)
+    return stats
+
+
+async def ensure_rollups(db: AsyncSession):
+    """Rollup jadvali bo'sh, davomat esa bor bo'lsa - butun tarixni hisoblash (birinchi ishga tushirish)"""
+    has_rollups = await db.execute(select(AttendanceRollup.id).limit(1))
+    if has_rollups.first() is not None:
+        return None
+    has_attendance = await db.execute(select(Attendance.id).limit(1))
+    if has_attendance.first() is None:
+        return None
+    return await rebuild_rollups(db)
+
+
+# ---------- O'qish ----------
+
+def _cover(start_date: date, end_date: date, granularities: tuple) -> list[list]:
+    """O'rtadagi to'liq davrlar - eng yirik daraja, chekkalari - maydaroq darajalar"""
+    if start_date > end_date:
+        return []
+    granularity, finer = granularities[0], granularities[1:]
+    if not finer:
+        return [[granularity, start_date, end_date]]
+
+    first = bucket_start(start_date, granularity)
+    if first < start_date:
+        first = bucket_end(first, granularity) + timedelta(days=1)
+    last_end = bucket_end(bucket_start(end_date, granularity), granularity)
+    if last_end > end_date:
+        last_end = bucket_start(end_date, granularity) - timedelta(days=1)
+    if first > last_end:
+        return _cover(start_date, end_date, finer)
+
+    return (
+        _cover(start_date, first - timedelta(days=1), finer)
+        + [[granularity, first, last_end]]
+        + _cover(last_end + timedelta(days=1), end_date, finer)
+    )
+
+
+def plan_segments(start_date: date, end_date: date, bucket: Optional[str] = None) -> list[tuple[str, date, date]]:
+    """
+    Oraliqni eng yirik mos rollup'lar bilan qoplash
+
+    Returns:
+        (daraja, boshi, oxiri) bo'laklari, sana bo'yicha tartiblangan
+    """
+    return [tuple(segment) for segment in _cover(start_date, end_date, _NESTED_GRANULARITIES[bucket])]
+
+
+async def _active_roster(db: AsyncSession, group_by: Optional[str], position: Optional[str]) -> tuple[dict, dict]:
+    """
+    Faol xodimlar guruh bo'yicha (davomat foizining maxraji, jonli statistika kabi)
+
+    Returns:
+        ({guruh: xodimlar soni}, {guruh: lavozim})
+    """
+    query = select(Employee.id, Employee.position).where(Employee.is_active == True)
+    if position is not None:
+        query = query.where(func.lower(Employee.position) == position.lower())
+    result = await db.execute(query)
+
+    roster: dict = {}
+    positions: dict = {}
+    for employee_id, employee_position in result.all():
+        group = {"position": employee_position, "employee": employee_id}.get(group_by)
+        roster[group] = roster.get(group, 0) + 1
+        positions.setdefault(group, employee_position)
+    return roster, positions
+
+
+def _output_starts(start_date: date, end_date: date, bucket: Optional[str]) -> list[date]:
+    if bucket is None:
+        return [start_date]
+    starts = []
+    current = bucket_start(start_date, bucket)
+    while current <= end_date:
+        starts.append(current)
+        current = bucket_end(current, bucket) + timedelta(days=1)
+    return starts
+
+
+async def query_rollups(db: AsyncSession, start_date: date, end_date: date,
+                        bucket: Optional[str] = None, group_by: str = "position",
+                        position: Optional[str] = None) -> dict:
+    """
+    Rollup'lardan davomat ko'rsatkichlari
+
+    Args:
+        bucket: Natija bo'lagi (day, week, month) yoki None - butun oraliq bitta qator
+        group_by: position, employee yoki None - barcha xodimlar bitta guruh
+        position: Faqat shu lavozim (katta-kichik harf farqsiz)
+
+    Returns:
+        segments (qaysi rollup'lar o'qilgani) va rows - har bir (bo'lak, guruh) uchun
+        hisoblagichlar, davomat va punktuallik foizlari. employees - guruhdagi
+        faol xodimlar soni (davomat foizining maxraji; bitta ham kelmagan guruh
+        ham qatorda), present_employees - bo'lakda kamida bir kun kelganlar.
+    """
+    if bucket is not None and bucket not in GRANULARITIES:
+        raise ValueError(f"Noma'lum davr: {bucket} ({', '.join(GRANULARITIES)})")
+    if group_by not in GROUP_BY_OPTIONS:
+        raise ValueError(f"Noma'lum guruhlash: {group_by} (position, employee)")
+
+    segments = plan_segments(start_date, end_date, bucket)
+    query = select(
+        AttendanceRollup.bucket_start, AttendanceRollup.employee_id, AttendanceRollup.position,
+        *[getattr(AttendanceRollup, name) for name in COUNTERS]
+    ).where(or_(*[
+        and_(
+            AttendanceRollup.granularity == granularity,
+            AttendanceRollup.bucket_start >= segment_start,
+            AttendanceRollup.bucket_start <= segment_end
+        )
+        for granularity, segment_start, segment_end in segments
+    ]))
+    if position is not None:
+        query = query.where(func.lower(AttendanceRollup.position) == position.lower())
+    result = await db.execute(query)
+    roster, roster_positions = await _active_roster(db, group_by, position)
+
+    groups: dict[tuple, dict] = {}
+    for output_start in _output_starts(start_date, end_date, bucket):
+        for group in roster:
+            groups[(output_start, group)] = {
+                **_empty_counters(), "employees": set(), "position": roster_positions[group]
+            }
+    for row in result.all():
+        output_start = bucket_start(row.bucket_start, bucket) if bucket else start_date
+        group = {"position": row.position, "employee": row.employee_id}.get(group_by)
+        entry = groups.setdefault((output_start, group), {
+            **_empty_counters(), "employees": set(), "position": row.position
+        })
+        for name in COUNTERS:
+            entry[name] += getattr(row, name)
+        if row.present_days:
+            entry["employees"].add(row.employee_id)
+
+    calendar = get_work_calendar()
+    rows = []
+    for (output_start, group), entry in sorted(groups.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+        # Bo'lak chegaralari so'ralgan oraliq bilan kesishtiriladi
+        period_start = max(output_start, start_date)
+        period_end = min(bucket_end(output_start, bucket) if bucket else end_date, end_date)
+        working_days = calendar.count_working_days(period_start, period_end)
+        present_employees = len(entry["employees"])
+        # Hozir faol bo'lmagan (yoki lavozimi o'zgargan) kelganlar ham maxrajda
+        employees = max(roster.get(group, 0), present_employees)
+        present_days = entry["present_days"]
+        rows.append({
+            "bucket_start": period_start.isoformat(),
+            "bucket_end": period_end.isoformat(),
+            **({group_by: group} if group_by else {}),
+            **({"position": entry["position"]} if group_by == "employee" else {}),
+            "employees": employees,
+            "present_employees": present_employees,
+            **{name: entry[name] for name in COUNTERS},
+            "working_days": working_days,
+            "attendance_rate": round(present_days / (employees * working_days) * 100, 2)
+            if employees and working_days else 0,
+            "punctuality_rate": round((present_days - entry["late_days"]) / present_days * 100, 2)
+            if present_days else 0,
+        })
+
+    return {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "bucket": bucket,
+        "group_by": group_by,
+        "segments": [
+            {"granularity": granularity, "start_date": start.isoformat(), "end_date": end.isoformat()}
+            for granularity, start, end in segments
+        ],
+        "rows": rows,
+    }
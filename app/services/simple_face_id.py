@@ -459,5 +459,4 @@ class SimpleFaceIDService:
                 "error": str(e)
             }
 
-# Global Simple Face ID servis instance
-simple_face_service = SimpleFaceIDService()
+# Global instance import paytida yaratilmaydi - app.routers.face_id.get_face_service()
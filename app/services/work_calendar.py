@@ -0,0 +1,118 @@
+"""
+Ish kunlari kalendari - dam olish va bayram kunlari bilan
+
+Har oy uchun ish kunlari massivi bir marta hisoblanadi va LRU keshda
+saqlanadi. Oraliqlar bo'yicha hisoblash NumPy busday_count orqali bajariladi.
+"""
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Iterable
+
+import numpy as np
+
+from app.core.config import WORK_CALENDAR_CACHE_SIZE, WORK_HOLIDAYS, WORK_WEEKMASK
+
+
+class WorkCalendar:
+    """Hafta maskasi va bayramlar jadvali bo'yicha ish kunlari kalendari"""
+
+    def __init__(self, weekmask: str = "1111110", holidays: Iterable[str] = (),
+                 cache_size: int = 64):
+        self.weekmask = weekmask
+        self.fixed_holidays: set[date] = set()
+        self.yearly_holidays: set[tuple[int, int]] = set()
+
+        for value in holidays:
+            parts = value.split("-")
+            if len(parts) == 3:
+                self.fixed_holidays.add(date.fromisoformat(value))
+            elif len(parts) == 2:
+                self.yearly_holidays.add((int(parts[0]), int(parts[1])))
+            else:
+                raise ValueError(f"Noto'g'ri bayram sanasi: {value}")
+
+        # Har bir nusxa o'z keshiga ega
+        self._holidays_for_year = lru_cache(maxsize=cache_size)(self._build_year_holidays)
+        self._month_working_dates = lru_cache(maxsize=cache_size)(self._build_month_working_dates)
+
+    # ---------- Ichki hisob-kitob ----------
+
+    def _build_year_holidays(self, year: int) -> np.ndarray:
+        """Yil uchun barcha bayram sanalari (datetime64[D] massivi)"""
+        days = {day for day in self.fixed_holidays if day.year == year}
+        for month, day in self.yearly_holidays:
+            try:
+                days.add(date(year, month, day))
+            except ValueError:
+                continue  # masalan, kabisa bo'lmagan yilda 02-29
+        return np.array(sorted(days), dtype="datetime64[D]")
+
+    def _holidays_between(self, start_date: date, end_date: date) -> np.ndarray:
+        """Oraliqqa tegishli yillarning bayramlari"""
+        years = [self._holidays_for_year(year) for year in range(start_date.year, end_date.year + 1)]
+        return np.concatenate(years) if years else np.array([], dtype="datetime64[D]")
+
+    def _build_month_working_dates(self, year: int, month: int) -> tuple[date, ...]:
+        """Oyning ish kunlari (o'zgarmas tuple - keshda xavfsiz saqlanadi)"""
+        start = np.datetime64(date(year, month, 1), "D")
+        end = np.datetime64(date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1), "D")
+        days = np.arange(start, end, dtype="datetime64[D]")
+        mask = np.is_busday(days, weekmask=self.weekmask, holidays=self._holidays_for_year(year))
+        return tuple(days[mask].astype(object))
+
+    # ---------- Ommaviy interfeys ----------
+
+    def month_working_dates(self, year: int, month: int) -> tuple[date, ...]:
+        """Oyning barcha ish kunlari"""
+        return self._month_working_dates(year, month)
+
+    def month_working_days(self, year: int, month: int) -> int:
+        """Oydagi ish kunlari soni"""
+        return len(self._month_working_dates(year, month))
+
+    def count_working_days(self, start_date: date, end_date: date) -> int:
+        """Oraliqdagi ish kunlari soni (ikkala chegara ham kiradi)"""
+        if end_date < start_date:
+            return 0
+        return int(np.busday_count(
+            np.datetime64(start_date, "D"),
+            np.datetime64(end_date + timedelta(days=1), "D"),
+            weekmask=self.weekmask,
+            holidays=self._holidays_between(start_date, end_date)
+        ))
+
+    def working_dates(self, start_date: date, end_date: date) -> list[date]:
+        """Oraliqdagi ish kunlari ro'yxati (ikkala chegara ham kiradi)"""
+        if end_date < start_date:
+            return []
+        days = np.arange(
+            np.datetime64(start_date, "D"),
+            np.datetime64(end_date + timedelta(days=1), "D"),
+            dtype="datetime64[D]"
+        )
+        mask = np.is_busday(days, weekmask=self.weekmask,
+                            holidays=self._holidays_between(start_date, end_date))
+        return list(days[mask].astype(object))
+
+    def is_working_day(self, day: date) -> bool:
+        """Sana ish kunimi"""
+        return bool(np.is_busday(
+            np.datetime64(day, "D"),
+            weekmask=self.weekmask,
+            holidays=self._holidays_for_year(day.year)
+        ))
+
+    def cache_info(self) -> dict:
+        """Kesh statistikasi"""
+        return {
+            "months": self._month_working_dates.cache_info()._asdict(),
+            "holiday_years": self._holidays_for_year.cache_info()._asdict(),
+        }
+
+
+work_calendar = WorkCalendar(WORK_WEEKMASK, WORK_HOLIDAYS, cache_size=WORK_CALENDAR_CACHE_SIZE)
+
+
+def get_work_calendar() -> WorkCalendar:
+    """Ilova bo'ylab umumiy ish kalendari"""
+    return work_calendar
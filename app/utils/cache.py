@@ -0,0 +1,72 @@
+"""
+Qisqa muddatli (TTL) xotira keshi
+
+Tez-tez so'raladigan, lekin bir necha soniya eskirishi mumkin bo'lgan
+javoblar (masalan, dashboard statistikasi) uchun. Bir vaqtda kelgan
+so'rovlar uchun qiymat faqat bir marta hisoblanadi.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class TTLCache:
+    """Yozuvlari ttl soniyadan keyin eskiradigan LRU kesh"""
+
+    def __init__(self, ttl: float, maxsize: int = 128):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._locks: dict[Hashable, asyncio.Lock] = {}
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: Hashable, default=None):
+        """Yaroqli qiymatni qaytarish (eskirgan bo'lsa default)"""
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if time.monotonic() >= expires_at:
+            self._data.pop(key, None)
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable = None):
+        """Bitta kalitni yoki (key=None) butun keshni tozalash"""
+        if key is None:
+            self._data.clear()
+        else:
+            self._data.pop(key, None)
+
+    async def get_or_set(self, key: Hashable, factory: Callable[[], Awaitable[Any]]):
+        """
+        Keshdagi qiymatni qaytarish, bo'lmasa factory() orqali hisoblash
+
+        Bir kalit uchun parallel so'rovlar bitta hisoblashni kutadi.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.stats["hits"] += 1
+            return value
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                self.stats["hits"] += 1
+                return value
+            self.stats["misses"] += 1
+            value = await factory()
+            self.set(key, value)
+        return value
+
+
+_MISSING = object()
@@ -0,0 +1,52 @@
+"""
+Jarayonlararo fayl qulfi (fcntl.flock)
+
+Bitta serverdagi API ishchilari, bot va manage.py buyruqlari bir xil
+lock-fayl orqali kelishadi. Qulf fayl yopilganda bo'shaydi - jarayon
+to'satdan to'xtasa ham qulf osilib qolmaydi. fcntl bo'lmagan tizimlarda
+(Windows) qulf olinmaydi va har doim muvaffaqiyatli deb qaytadi.
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+POLL_SECONDS = 0.05
+
+
+@asynccontextmanager
+async def file_lock(path: str, wait: bool = True, poll_seconds: float = POLL_SECONDS):
+    """
+    Lock-faylni eksklyuziv qulflash (event loop bloklanmasligi uchun so'rov bilan kutiladi)
+
+    Args:
+        path: Lock-fayl (kerak bo'lsa yaratiladi)
+        wait: False bo'lsa qulf band bo'lganda kutmasdan qaytadi
+
+    Yields:
+        True - qulf olindi, False - boshqa jarayon ushlab turibdi (faqat wait=False)
+    """
+    if fcntl is None:
+        yield True
+        return
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                acquired = True
+                break
+            except BlockingIOError:
+                if not wait:
+                    acquired = False
+                    break
+                await asyncio.sleep(poll_seconds)
+        yield acquired
+    finally:
+        os.close(fd)  # Qulf fayl yopilganda bo'shaydi
@@ -0,0 +1,30 @@
+"""
+Keyset (cursor) paginatsiya uchun yordamchi funksiyalar
+
+Kursor oxirgi qaytarilgan yozuvning (check_time, id) juftligini
+URL uchun xavfsiz base64 qatorga o'raydi.
+"""
+import base64
+from datetime import datetime
+
+
+def encode_cursor(check_time: datetime, row_id: int) -> str:
+    """(check_time, id) juftligidan kursor yaratish"""
+    raw = f"{check_time.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Kursorni (check_time, id) juftligiga qaytarish
+
+    Raises:
+        ValueError: Kursor noto'g'ri formatda bo'lsa
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        check_time, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(check_time), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Noto'g'ri kursor") from e
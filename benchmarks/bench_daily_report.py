@@ -0,0 +1,156 @@
+"""
+Kunlik hisobot yaratish tezligini o'lchash
+
+Avvalgi usul (har bir qator uchun get_employee_by_id + to'liq Workbook +
+smart_column_width) joriy usul (bitta JOIN so'rovi + write-only yozish)
+bilan vaqtinchalik SQLite bazasida solishtiriladi.
+
+Foydalanish:
+    python benchmarks/bench_daily_report.py --rows 5000 --employees 300
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCH_DIR = tempfile.mkdtemp(prefix="workly_bench_")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{BENCH_DIR}/bench.db"
+
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.crud.attendance import get_daily_attendance
+from app.crud.employee import get_employee_by_id
+from app.models.attendance import Attendance, CheckTypeEnum
+from app.models.employee import Employee
+from app.services import reports
+
+TARGET_DATE = date(2025, 6, 2)
+
+
+async def seed(session_factory, rows: int, employees: int):
+    """Bitta kun uchun sinov ma'lumotlarini yaratish"""
+    random.seed(42)
+    async with session_factory() as session:
+        session.add_all([
+            Employee(full_name=f"Xodim {i}", position=random.choice(["Dev", "HR", "Sales"]),
+                     created_at=datetime(2025, 1, 1))
+            for i in range(employees)
+        ])
+        await session.flush()
+        day_start = datetime.combine(TARGET_DATE, datetime.min.time())
+        session.add_all([
+            Attendance(
+                employee_id=random.randint(1, employees),
+                check_type=random.choice([CheckTypeEnum.IN, CheckTypeEnum.OUT]),
+                check_time=day_start + timedelta(hours=7, seconds=random.randint(0, 12 * 3600)),
+                is_late=random.random() < 0.3,
+            )
+            for _ in range(rows)
+        ])
+        await session.commit()
+
+
+async def legacy_generate_daily_report(db: AsyncSession, target_date: date, file_path: str):
+    """Avvalgi kunlik hisobot usuli (taqqoslash uchun)"""
+    attendances = await get_daily_attendance(db, target_date)
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = f"{target_date} Kunlik Davomat"
+    center_alignment = Alignment(horizontal="center", vertical="center")
+    border = Border(left=Side(style="thin"), right=Side(style="thin"),
+                    top=Side(style="thin"), bottom=Side(style="thin"))
+
+    headers = ["№", "Xodim ismi", "Lavozimi", "Harakat", "Vaqti", "Kechikdi", "Vaqt farqi", "Izoh"]
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=col, value=header)
+        cell.font = Font(bold=True, color="FFFFFF")
+        cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+        cell.alignment = center_alignment
+        cell.border = border
+
+    for row_idx, attendance in enumerate(attendances, 2):
+        from app.crud.employee import get_employee_by_id as lookup  # avvalgidek har qatorda import
+        employee = await lookup(db, attendance.employee_id)
+        row = (
+            employee.full_name if employee else None,
+            employee.position if employee else None,
+            attendance.check_type, attendance.check_time, attendance.is_late,
+        )
+        values, _ = reports.format_daily_report_row(row_idx - 1, row, reports.WORK_START_TIME)
+        for col, value in enumerate(values, 1):
+            cell = ws.cell(row=row_idx, column=col, value=value)
+            cell.alignment = center_alignment
+            cell.border = border
+            if col == 6 and value == "Ha":
+                cell.fill = PatternFill(start_color="FFD7D7", end_color="FFD7D7", fill_type="solid")
+
+    reports.smart_column_width(ws)
+    wb.save(file_path)
+    return file_path
+
+
+async def measure(name: str, func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    print(f"{name:<40} {best * 1000:>10.1f} ms")
+    return best
+
+
+async def main(rows: int, employees: int, repeat: int):
+    engine = create_async_engine(os.environ["DATABASE_URL"])
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await seed(session_factory, rows, employees)
+
+    print(f"Qatorlar: {rows}, xodimlar: {employees}, takror: {repeat} (eng yaxshi natija)\n")
+
+    async with session_factory() as session:
+        async def legacy_query():
+            attendances = await get_daily_attendance(session, TARGET_DATE)
+            for attendance in attendances:
+                await get_employee_by_id(session, attendance.employee_id)
+
+        async def projection_query():
+            rows_ = await reports.get_daily_attendance_rows(session, TARGET_DATE)
+            for index, row in enumerate(rows_, 1):
+                reports.format_daily_report_row(index, row, reports.WORK_START_TIME)
+
+        async def legacy_full():
+            await legacy_generate_daily_report(session, TARGET_DATE, f"{BENCH_DIR}/legacy.xlsx")
+
+        async def current_full():
+            path = await reports.generate_daily_report(session, TARGET_DATE)
+            os.remove(path)
+
+        legacy_q = await measure("So'rov + formatlash (avvalgi, N+1)", legacy_query, repeat)
+        current_q = await measure("So'rov + formatlash (JOIN proyeksiya)", projection_query, repeat)
+        legacy_f = await measure("To'liq hisobot (avvalgi)", legacy_full, repeat)
+        current_f = await measure("To'liq hisobot (joriy)", current_full, repeat)
+
+    print(f"\nSo'rov qismi: {legacy_q / current_q:.1f}x tezroq")
+    print(f"To'liq hisobot: {legacy_f / current_f:.1f}x tezroq")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--employees", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.employees, args.repeat))
@@ -0,0 +1,107 @@
+"""
+Ilova ishga tushish vaqtini `python -X importtime` bilan o'lchash
+
+Har bir modul alohida (toza) jarayonda bir necha marta import qilinadi,
+kumulyativ vaqtning medianasi byudjet bilan solishtiriladi. Og'ir kutubxonalar
+(OpenCV, face_recognition/dlib, openpyxl) faqat birinchi murojaatda yuklanishi
+kerak - ular import paytida yuklansa tekshiruv muvaffaqiyatsiz tugaydi.
+
+Foydalanish:
+    python benchmarks/startup_importtime.py
+    python benchmarks/startup_importtime.py app.main --budget-ms 1500 --runs 5 --top 15
+
+Chiqish kodi: 0 - byudjet ichida, 1 - byudjetdan oshdi yoki taqiqlangan modul yuklandi.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ["app.main", "manage"]
+DEFAULT_BUDGET_MS = 1500.0
+# Import paytida yuklanmasligi kerak bo'lgan paketlar
+FORBIDDEN = ["cv2", "face_recognition", "dlib", "openpyxl"]
+
+
+def measure(module: str, env: dict) -> dict[str, tuple[int, int]]:
+    """
+    Modulni yangi jarayonda import qilish
+
+    Returns:
+        {modul: (self_us, cumulative_us)} - barcha yuklangan modullar
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{module} import qilinmadi:\n{result.stderr[-2000:]}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():  # sarlavha qatori
+            continue
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def report(module: str, runs: int, top: int, env: dict) -> tuple[float, list[str]]:
+    """Median vaqt (ms) va yuklangan taqiqlangan paketlar"""
+    totals = []
+    timings = {}
+    for _ in range(runs):
+        timings = measure(module, env)
+        totals.append(timings[module][1] / 1000)
+    median_ms = statistics.median(totals)
+
+    print(f"\n📦 {module}: median {median_ms:.0f} ms (min {min(totals):.0f}, max {max(totals):.0f}, {runs} marta)")
+    print("   {:>14}  {:>8}  modul".format("kumulyativ ms", "o'zi ms"))
+    # Yuqori darajadagi paketlar va app modullari (bola modullar ota-onasi ichida hisoblangan)
+    heaviest = sorted(
+        ((name, values) for name, values in timings.items()
+         if name != module and ("." not in name or name.startswith("app."))),
+        key=lambda item: item[1][1], reverse=True
+    )
+    for name, (self_us, cumulative_us) in heaviest[:top]:
+        print(f"   {cumulative_us / 1000:>14.1f}  {self_us / 1000:>8.1f}  {name}")
+
+    loaded = sorted({name.split(".")[0] for name in timings} & set(FORBIDDEN))
+    return median_ms, loaded
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Ishga tushish (import) vaqti byudjeti")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Har bir modul uchun ruxsat etilgan median import vaqti")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Eng og'ir importlar soni")
+    args = parser.parse_args(argv)
+
+    # Import paytida baza fayli yaratilmasligi uchun vaqtinchalik manzil
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='workly_bench_')}/bench.db")
+
+    failed = False
+    for module in args.modules:
+        median_ms, loaded = report(module, args.runs, args.top, env)
+        if median_ms > args.budget_ms:
+            print(f"❌ {module}: {median_ms:.0f} ms > byudjet {args.budget_ms:.0f} ms")
+            failed = True
+        if loaded:
+            print(f"❌ {module}: import paytida yuklandi: {', '.join(loaded)}")
+            failed = True
+        if median_ms <= args.budget_ms and not loaded:
+            print(f"✅ {module}: byudjet ichida ({args.budget_ms:.0f} ms)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -35,15 +35,17 @@ load_dotenv(find_dotenv())
 # Bot modullari
 from app.bot.middlewares.db import DataBaseSession
 from app.bot.middlewares.logging import LoggingMiddleware, DetailedLoggingMiddleware
+from app.bot.middlewares.profiler import ProfilerMiddleware
 from app.bot.common.bot_cmds_list import private, admin
 
 # Database engine import qilish
 try:
-    from app.bot.database.engine import session_maker
+    from app.bot.database.engine import read_router, session_maker
     print("✅ Database engine import qilindi")
 except ImportError as e:
     print(f"❌ Database engine import xatosi: {e}")
     session_maker = None
+    read_router = None
 
 # Test connection funksiyasini alohida import qilish
 async def test_db_connection():
@@ -73,6 +75,19 @@ except ImportError:
     DailyReportScheduler = None
     print("⚠️ Планировщик отчетов недоступен")
 
+# Фоновая очередь Excel отчетов
+try:
+    from app.services.report_jobs import start_report_jobs, stop_report_jobs
+except ImportError:
+    start_report_jobs = stop_report_jobs = None
+    print("⚠️ Очередь отчетов недоступна")
+
+# Шина сброса кэшей между ботом и API (Redis, если задан REDIS_URL)
+try:
+    from app.core.invalidation import invalidation_bus
+except ImportError:
+    invalidation_bus = None
+
 ALLOWED_UPDATES = ['message', 'edited_message', 'callback_query']
 
 # Bot tokenini tekshirish
@@ -96,7 +111,10 @@ dp = Dispatcher()
 # Middlewares ni qo'shish (tartib muhim!)
 dp.message.middleware(LoggingMiddleware())
 dp.callback_query.middleware(LoggingMiddleware())
-dp.update.middleware(DataBaseSession(session_pool=session_maker))
+dp.update.middleware(DataBaseSession(session_pool=session_maker, read_router=read_router))
+# Профилирование обработчиков (/profile); inner middleware - знает имя обработчика
+dp.message.middleware(ProfilerMiddleware())
+dp.callback_query.middleware(ProfilerMiddleware())
 
 dp.include_router(user_private_router)
 dp.include_router(admin_router)
@@ -115,11 +133,29 @@ async def on_startup(bot):
         return
     
     logger.info("✅ Бот подключен к основной БД workly_app")
+    
+    if read_router:
+        # Отчеты читаются с реплики (если задан DATABASE_REPLICA_URL)
+        await read_router.start()
+    
+    if invalidation_bus:
+        await invalidation_bus.start()
+        logger.info("🔄 Шина сброса кэшей: %s", invalidation_bus.backend)
+    
+    if start_report_jobs:
+        await start_report_jobs(session_maker, read_session=read_router.session_for if read_router else None)
+        logger.info("📊 Очередь отчетов запущена")
     logger.info("📋 Логирование всех действий активировано")
     print("✅ Бот подключен к основной БД workly_app")
 
 async def on_shutdown(bot):
     logger.info("🛑 Бот останавливается...")
+    if stop_report_jobs:
+        await stop_report_jobs()
+    if read_router:
+        await read_router.stop()
+    if invalidation_bus:
+        await invalidation_bus.stop()
     print('бот лег')
 
 async def main():
@@ -6,10 +6,11 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import DATABASE_URL
-from app.models.employee import Employee, PositionEnum
+from app.models.employee import Employee
 from app.models.attendance import Attendance, CheckTypeEnum
 from app.utils.timezone import get_tashkent_time, TASHKENT_TZ, get_tashkent_time_naive
-from app.core.database import Base
+from app.migrations import migrate
+from app.services.attendance_bulk import bulk_insert_attendance
 
 # Async engine yaratish
 engine = create_async_engine(DATABASE_URL, echo=True)
@@ -19,61 +20,61 @@ AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_com
 SAMPLE_EMPLOYEES = [
     {
         "full_name": "Ahmedov Bobur Karimovich",
-        "position": PositionEnum.MANAGER,
+        "position": "Manager",
         "phone": "+998901234567",
         "base_salary": Decimal("8000000")
     },
     {
         "full_name": "Karimova Nilufar Rustamovna",
-        "position": PositionEnum.DEVELOPER,
+        "position": "Developer",
         "phone": "+998901234568",
         "base_salary": Decimal("6500000")
     },
     {
         "full_name": "Toshmatov Aziz Xurshidovich",
-        "position": PositionEnum.DEVELOPER,
+        "position": "Developer",
         "phone": "+998901234569",
         "base_salary": Decimal("7000000")
     },
     {
         "full_name": "Raxmonova Dilfuza Abrorovna",
-        "position": PositionEnum.DESIGNER,
+        "position": "Designer",
         "phone": "+998901234570",
         "base_salary": Decimal("5500000")
     },
     {
         "full_name": "Nazarov Sherzod Anvarovich",
-        "position": PositionEnum.HR,
+        "position": "HR",
         "phone": "+998901234571",
         "base_salary": Decimal("5000000")
     },
     {
         "full_name": "Yusupova Gulnoza Davronovna",
-        "position": PositionEnum.ACCOUNTANT,
+        "position": "Accountant",
         "phone": "+998901234572",
         "base_salary": Decimal("4500000")
     },
     {
         "full_name": "Mirzayev Jasur Toxirovich",
-        "position": PositionEnum.SALES,
+        "position": "Sales",
         "phone": "+998901234573",
         "base_salary": Decimal("4000000")
     },
     {
         "full_name": "Qodirova Shoira Botirovna",
-        "position": PositionEnum.MARKETING,
+        "position": "Marketing",
         "phone": "+998901234574",
         "base_salary": Decimal("4200000")
     },
     {
         "full_name": "Abdullayev Sardor Ilhomovich",
-        "position": PositionEnum.SUPPORT,
+        "position": "Support",
         "phone": "+998901234575",
         "base_salary": Decimal("3500000")
     },
     {
         "full_name": "Xolmatova Munisa Shavkatovna",
-        "position": PositionEnum.INTERN,
+        "position": "Intern",
         "phone": "+998901234576",
         "base_salary": Decimal("2000000")
     }
@@ -81,8 +82,7 @@ SAMPLE_EMPLOYEES = [
 
 async def create_tables():
     """Ma'lumotlar bazasi jadvallarini yaratish"""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await migrate(engine)
     print("✅ Jadvallar muvaffaqiyatli yaratildi!")
 
 async def create_sample_employees():
@@ -139,26 +139,22 @@ async def create_sample_attendance(employees):
                             )
                             
                             # Kelish
-                            attendance_in = Attendance(
-                                employee_id=employee.id,
-                                check_type=CheckTypeEnum.IN,
-                                check_time=check_in_time,
-                                is_late=is_late
-                            )
-                            attendance_records.append(attendance_in)
-                            session.add(attendance_in)
+                            attendance_records.append({
+                                "employee_id": employee.id,
+                                "check_type": CheckTypeEnum.IN,
+                                "check_time": check_in_time,
+                                "is_late": is_late
+                            })
                             
                             # Ketish vaqti (17:00-19:00 oralig'ida)
                             # Ba'zida erta ketishi mumkin (20% ehtimol)
                             if random.random() < 0.8:
                                 check_out_hour = random.randint(17, 18)
                                 check_out_minute = random.randint(0, 59)
-                                is_early = check_out_hour < 17 or (check_out_hour == 17 and check_out_minute < 30)
                             else:
                                 # Erta ketish
                                 check_out_hour = random.randint(15, 16)
                                 check_out_minute = random.randint(0, 59)
-                                is_early = True
                             
                             check_out_time = current_date.replace(
                                 hour=check_out_hour,
@@ -168,15 +164,15 @@ async def create_sample_attendance(employees):
                             )
                             
                             # Ketish
-                            attendance_out = Attendance(
-                                employee_id=employee.id,
-                                check_type=CheckTypeEnum.OUT,
-                                check_time=check_out_time,
-                                is_early_departure=is_early
-                            )
-                            attendance_records.append(attendance_out)
-                            session.add(attendance_out)
+                            attendance_records.append({
+                                "employee_id": employee.id,
+                                "check_type": CheckTypeEnum.OUT,
+                                "check_time": check_out_time,
+                                "is_late": False
+                            })
             
+            # Barcha yozuvlarni bitta executemany INSERT bilan qo'shish
+            await bulk_insert_attendance(session, attendance_records)
             await session.commit()
             print(f"✅ {len(attendance_records)} ta davomat yozuvi muvaffaqiyatli qo'shildi!")
             
@@ -0,0 +1,139 @@
+"""
+Workly boshqaruv buyruqlari
+
+Foydalanish:
+    python manage.py export-attendance davomat.csv --start 2024-01-01 --end 2024-12-31
+    python manage.py import-attendance davomat_2024.npz --chunk-size 10000
+    python manage.py rebuild-rollups --start 2024-01-01 --end 2024-12-31
+    python manage.py migrate
+    python manage.py migrate --status
+    python manage.py archive --keep-months 3
+"""
+import argparse
+import asyncio
+import sys
+from datetime import date
+
+from app.core.config import ATTENDANCE_ARCHIVE_KEEP_MONTHS
+from app.core.database import AsyncSessionLocal, engine
+from app.core.invalidation import invalidation_bus
+from app import migrations
+from app.services import attendance_bulk
+from app.services.attendance_archive import archive_closed_months, storage_status
+from app.services.rollups import rebuild_rollups
+
+
+def _print_stats(title: str, stats: dict):
+    print(f"✅ {title}")
+    for key, value in stats.items():
+        print(f"   {key}: {value}")
+
+
+async def export_attendance_command(args):
+    async with AsyncSessionLocal() as session:
+        stats = await attendance_bulk.export_attendance(
+            session, args.path, args.format,
+            start_date=args.start, end_date=args.end, chunk_size=args.chunk_size
+        )
+    _print_stats("Davomat eksport qilindi", stats)
+
+
+async def import_attendance_command(args):
+    async with AsyncSessionLocal() as session:
+        stats = await attendance_bulk.import_attendance(
+            session, args.path, args.format, chunk_size=args.chunk_size
+        )
+    _print_stats("Davomat import qilindi", stats)
+
+
+async def rebuild_rollups_command(args):
+    async with AsyncSessionLocal() as session:
+        stats = await rebuild_rollups(session, args.start, args.end)
+    _print_stats("Rollup'lar qayta hisoblandi", stats)
+
+
+async def migrate_command(args):
+    if args.status:
+        current = await migrations.get_schema_version(engine)
+        pending = await migrations.pending_migrations(engine)
+        print(f"📋 Sxema versiyasi: {current} (oxirgi: {migrations.latest_version()})")
+        for migration in pending:
+            print(f"   kutilmoqda: {migration.version:04d}_{migration.name} - {migration.description}")
+        return
+
+    applied = await migrations.migrate(engine, args.target)
+    if not applied:
+        print("✅ Sxema allaqachon so'nggi versiyada")
+    for migration in applied:
+        print(f"✅ {migration.version:04d}_{migration.name} - {migration.description}")
+
+
+async def archive_command(args):
+    async with AsyncSessionLocal() as session:
+        if args.status:
+            _print_stats("Davomat saqlash holati", await storage_status(session))
+            return
+        # Fon vazifasi arxivlayotgan bo'lsa - tugashini kutib, qolganini ko'chirish
+        stats = await archive_closed_months(session, args.keep_months, wait=True)
+    _print_stats("Yopilgan oylar arxivlandi", stats)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Workly boshqaruv buyruqlari")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export-attendance", help="Davomatni faylga eksport qilish")
+    export_parser.add_argument("path", help="Chiqish fayli (.csv yoki .npz)")
+    export_parser.add_argument("--format", choices=attendance_bulk.SUPPORTED_FORMATS)
+    export_parser.add_argument("--start", type=date.fromisoformat, help="Boshlanish sanasi (YYYY-MM-DD)")
+    export_parser.add_argument("--end", type=date.fromisoformat, help="Tugash sanasi (YYYY-MM-DD)")
+    export_parser.add_argument("--chunk-size", type=int, default=attendance_bulk.DEFAULT_CHUNK_SIZE)
+    export_parser.set_defaults(handler=export_attendance_command)
+
+    import_parser = subparsers.add_parser("import-attendance", help="Davomatni fayldan import qilish")
+    import_parser.add_argument("path", help="Kirish fayli (.csv yoki .npz)")
+    import_parser.add_argument("--format", choices=attendance_bulk.SUPPORTED_FORMATS)
+    import_parser.add_argument("--chunk-size", type=int, default=attendance_bulk.DEFAULT_CHUNK_SIZE)
+    import_parser.set_defaults(handler=import_attendance_command)
+
+    rollups_parser = subparsers.add_parser("rebuild-rollups", help="Davomat rollup'larini qayta hisoblash")
+    rollups_parser.add_argument("--start", type=date.fromisoformat, help="Boshlanish sanasi (YYYY-MM-DD)")
+    rollups_parser.add_argument("--end", type=date.fromisoformat, help="Tugash sanasi (YYYY-MM-DD)")
+    rollups_parser.set_defaults(handler=rebuild_rollups_command)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Sxema migratsiyalarini qo'llash")
+    migrate_parser.add_argument("--target", type=int, help="Shu versiyagacha qo'llash")
+    migrate_parser.add_argument("--status", action="store_true", help="Joriy versiya va kutilayotgan migratsiyalar")
+    migrate_parser.set_defaults(handler=migrate_command)
+
+    archive_parser = subparsers.add_parser("archive", help="Yopilgan oylarni attendance_archive ga ko'chirish")
+    archive_parser.add_argument("--keep-months", type=int, default=ATTENDANCE_ARCHIVE_KEEP_MONTHS,
+                                help="Joriy oydan tashqari asosiy jadvalda qoladigan oylar")
+    archive_parser.add_argument("--status", action="store_true", help="Asosiy jadval va arxivdagi yozuvlar soni")
+    archive_parser.set_defaults(handler=archive_command)
+
+    return parser
+
+
+async def run(args):
+    # Import kabi o'zgarishlar ishlayotgan API va bot keshlariga ham yetkaziladi
+    await invalidation_bus.start()
+    try:
+        await args.handler(args)
+    finally:
+        await invalidation_bus.stop()
+        await engine.dispose()
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        asyncio.run(run(args))
+    except (ValueError, FileNotFoundError) as e:
+        print(f"❌ Xatolik: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.models.attendance import Attendance, CheckTypeEnum, SourceEnum
+from app.models.attendance_archive import AttendanceArchive
+from app.models.employee import Employee
+
+# Bot modullari app/bot papkasidan `database.*` sifatida import qilinadi (bot.py dagi kabi)
+BOT_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "app", "bot")
+
+
+@pytest.fixture
+def orm_query(monkeypatch):
+    monkeypatch.syspath_prepend(BOT_ROOT)
+    from database import orm_query
+    orm_query.invalidate_daily_report()
+    yield orm_query
+    orm_query.invalidate_daily_report()
+
+
+def _strip(report: dict) -> dict:
+    """Hisobotni solishtirish uchun - xodim obyektlari o'rniga id lar"""
+    def ids(items):
+        return [item["employee"].id if isinstance(item, dict) else item.id for item in items]
+
+    def times(items):
+        return [(item["employee"].id, item["check_time"], item["source"]) for item in items]
+
+    return {
+        **{key: value for key, value in report.items() if key.endswith("_count") or key in ("date", "total_employees")},
+        "attended": times(report["attended_employees"]),
+        "absent": ids(report["absent_employees"]),
+        "late": ids(report["late_employees"]),
+        "on_time": ids(report["on_time_employees"]),
+    }
+
+
+def test_range_report_matches_single_day_reports(run_db, orm_query):
+    start, end = date(2025, 8, 29), date(2025, 9, 2)
+
+    async def scenario(session_factory):
+        async with session_factory() as db:
+            db.add_all([
+                Employee(id=1, full_name="Aziz", position="dev", uuid="a", created_at=datetime(2025, 1, 1)),
+                Employee(id=2, full_name="Bobur", position="qa", uuid="b", created_at=datetime(2025, 1, 1)),
+                Employee(id=3, full_name="Dilnoza", position="pm", uuid="c", created_at=datetime(2025, 1, 1)),
+                Employee(id=4, full_name="Nofaol", position="dev", uuid="d", created_at=datetime(2025, 1, 1),
+                         is_active=False),
+            ])
+            # Avgust arxivda, sentyabr asosiy jadvalda - oraliq ikkalasini qamraydi
+            db.add_all([
+                AttendanceArchive(id=1, employee_id=1, check_type=CheckTypeEnum.IN, source=SourceEnum.APP,
+                                  check_time=datetime(2025, 8, 29, 8, 50)),
+                AttendanceArchive(id=2, employee_id=2, check_type=CheckTypeEnum.IN, source=SourceEnum.TELEGRAM,
+                                  check_time=datetime(2025, 8, 29, 9, 20)),
+                AttendanceArchive(id=3, employee_id=2, check_type=CheckTypeEnum.OUT, source=SourceEnum.APP,
+                                  check_time=datetime(2025, 8, 29, 18, 0)),
+            ])
+            db.add_all([
+                Attendance(id=10, employee_id=1, check_type=CheckTypeEnum.IN, source=SourceEnum.APP,
+                           check_time=datetime(2025, 9, 1, 9, 5)),
+                Attendance(id=11, employee_id=3, check_type=CheckTypeEnum.IN, source=SourceEnum.TELEGRAM,
+                           check_time=datetime(2025, 9, 1, 8, 30)),
+                Attendance(id=12, employee_id=4, check_type=CheckTypeEnum.IN, source=SourceEnum.APP,
+                           check_time=datetime(2025, 9, 1, 8, 0)),
+                Attendance(id=13, employee_id=2, check_type=CheckTypeEnum.IN, source=SourceEnum.APP,
+                           check_time=datetime(2025, 9, 2, 23, 59)),
+            ])
+            await db.commit()
+
+        async with session_factory() as db:
+            ranged = await orm_query.orm_get_attendance_range_report(db, start, end)
+            singles = [
+                await orm_query.orm_get_daily_attendance_report(db, start + timedelta(days=offset))
+                for offset in range((end - start).days + 1)
+            ]
+            weekdays = await orm_query.orm_get_attendance_range_report(
+                db, start, end, report_dates=[date(2025, 9, 2), date(2025, 8, 29)]
+            )
+        return ranged, singles, weekdays
+
+    ranged, singles, weekdays = run_db(scenario)
+    assert [_strip(report) for report in ranged] == [_strip(report) for report in singles]
+    assert [report["date"] for report in weekdays] == [date(2025, 8, 29), date(2025, 9, 2)]
+    assert [_strip(report) for report in weekdays] == [_strip(singles[0]), _strip(singles[-1])]
+    # Arxivdagi kun va nofaol xodim tekshiruvi
+    assert _strip(ranged[0])["attended"] == [(1, datetime(2025, 8, 29, 8, 50), SourceEnum.APP),
+                                             (2, datetime(2025, 8, 29, 9, 20), SourceEnum.TELEGRAM)]
+    assert ranged[3]["total_employees"] == 3
+    assert _strip(ranged[3])["late"] == [1]
@@ -0,0 +1,32 @@
+import asyncio
+import os
+import sys
+
+# Ilova modullari import paytida engine yaratadi - test bazasi undan oldin beriladi
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.pop("REDIS_URL", None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models import attendance, attendance_archive, attendance_rollup, employee, report_job  # noqa: F401 (jadvallar)
+from app.services.attendance_storage import archive_boundary
+
+
+@pytest.fixture
+def run_db(tmp_path):
+    """Korutinani alohida SQLite bazasida bajarish: run_db(lambda session_factory: ...)"""
+    def run(test):
+        async def main():
+            db_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+            async with db_engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            archive_boundary.expire()
+            try:
+                return await test(async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False))
+            finally:
+                await db_engine.dispose()
+        return asyncio.run(main())
+    return run
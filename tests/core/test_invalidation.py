@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+
+from app.core import invalidation
+from app.core.invalidation import EMPLOYEE, InvalidationBus
+
+
+def test_start_fails_when_redis_url_set_without_package(monkeypatch):
+    monkeypatch.setattr(invalidation, "aioredis", None)
+    bus = InvalidationBus("redis://localhost:6379/0")
+    with pytest.raises(RuntimeError, match="redis"):
+        asyncio.run(bus.start())
+    assert not bus.is_running
+
+
+def test_local_bus_delivers_to_subscribers_without_redis():
+    bus = InvalidationBus(None)
+    seen = []
+    bus.subscribe(EMPLOYEE, lambda event: seen.append(event.ids))
+
+    async def main():
+        await bus.start()
+        bus.publish(EMPLOYEE, ids=[7])
+        await bus.stop()
+
+    asyncio.run(main())
+    assert bus.backend == "local"
+    assert seen == [(7,)]
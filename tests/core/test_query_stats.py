@@ -0,0 +1,30 @@
+from app.core.query_stats import normalize
+
+
+def test_literals_and_parameter_styles_share_one_fingerprint():
+    statements = [
+        "SELECT * FROM attendance WHERE employee_id = 5 AND source = 'it''s'",
+        "SELECT * FROM attendance WHERE employee_id = ? AND source = ?",
+        "SELECT * FROM attendance WHERE employee_id = %(employee_id_1)s AND source = %s",
+        "SELECT * FROM attendance WHERE employee_id = $1 AND source = :source",
+        "SELECT *\n  FROM attendance\n WHERE employee_id = -12 AND source = 'APP'",
+    ]
+    shapes = {normalize(statement) for statement in statements}
+    assert shapes == {(
+        "SELECT * FROM attendance WHERE employee_id = ? AND source = ?",
+        normalize(statements[1])[1],
+    )}
+
+
+def test_in_lists_and_multi_row_values_collapse():
+    assert normalize("SELECT * FROM a WHERE id IN (1, 2, 3)") == normalize("SELECT * FROM a WHERE id IN (?, ?)")
+    assert normalize("SELECT * FROM a WHERE id IN (1, 2, 3)")[0] == "SELECT * FROM a WHERE id IN (?, ...)"
+    three_rows = normalize("INSERT INTO a (x, y) VALUES (?, ?), (?, ?), (?, ?)")
+    assert three_rows == normalize("INSERT INTO a (x, y) VALUES (1, 'a'), (2, 'b')")
+    assert three_rows[0] == "INSERT INTO a (x, y) VALUES (?, ...), ..."
+
+
+def test_identifiers_and_casts_are_kept():
+    text, _ = normalize("SELECT t2.col1, max(t2.x::int) FROM t2 WHERE t2.col1 = 3")
+    assert text == "SELECT t2.col1, max(t2.x::int) FROM t2 WHERE t2.col1 = ?"
+    assert normalize("SELECT * FROM a")[1] != normalize("SELECT * FROM b")[1]
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+import pytest
+
+from app.crud.attendance import _store_attendance
+from app.models.attendance import CheckTypeEnum, SourceEnum
+from app.models.employee import Employee
+from app.services.attendance_queue import DuplicateAttendanceError
+
+
+def _row(check_time: datetime) -> dict:
+    return {
+        "employee_id": 1, "check_type": CheckTypeEnum.IN, "source": SourceEnum.TELEGRAM,
+        "check_time": check_time, "location_lat": None, "location_lon": None, "is_late": False,
+    }
+
+
+def test_direct_write_reports_duplicate_from_unique_index(run_db):
+    async def scenario(session_factory):
+        async with session_factory() as db:
+            employee = Employee(id=1, full_name="A", uuid="a", created_at=datetime(2025, 1, 1))
+            db.add(employee)
+            await db.commit()
+            first = await _store_attendance(db, _row(datetime(2025, 9, 1, 9, 0)))
+            with pytest.raises(DuplicateAttendanceError):
+                await _store_attendance(db, _row(datetime(2025, 9, 1, 9, 30)))
+            # So'rovda yuklangan xodim eskirmagan (javobda ismi ishlatiladi), sessiya ishlashda davom etadi
+            name = employee.full_name
+            second_day = await _store_attendance(db, _row(datetime(2025, 9, 2, 9, 0)))
+            return first.id, second_day.id, name
+
+    first_id, second_day_id, name = run_db(scenario)
+    assert first_id and second_day_id
+    assert name == "A"
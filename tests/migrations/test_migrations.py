@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, insert, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import migrations
+from app.migrations.versions.v0001_initial import attendance, employees
+
+
+def _run(tmp_path, scenario):
+    async def main():
+        db_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'migrate.db'}")
+        try:
+            return await scenario(db_engine)
+        finally:
+            await db_engine.dispose()
+    return asyncio.run(main())
+
+
+def test_unique_day_migration_moves_duplicates_aside(tmp_path):
+    async def scenario(db_engine):
+        await migrations.migrate(db_engine, target=2)
+        async with db_engine.begin() as conn:
+            await conn.execute(insert(employees), [{"id": 1, "uuid": "a", "full_name": "A", "created_at": datetime(2025, 1, 1)}])
+            await conn.execute(insert(attendance), [
+                {"id": 1, "employee_id": 1, "check_type": "IN", "source": "APP", "check_time": datetime(2025, 9, 1, 9, 5)},
+                {"id": 2, "employee_id": 1, "check_type": "IN", "source": "APP", "check_time": datetime(2025, 9, 1, 9, 0)},
+                {"id": 3, "employee_id": 1, "check_type": "IN", "source": "APP", "check_time": datetime(2025, 9, 1, 9, 0)},
+                {"id": 4, "employee_id": 1, "check_type": "OUT", "source": "APP", "check_time": datetime(2025, 9, 1, 18, 0)},
+                {"id": 5, "employee_id": 1, "check_type": "IN", "source": "APP", "check_time": datetime(2025, 9, 2, 9, 0)},
+            ])
+
+        applied = await migrations.migrate(db_engine, target=3)
+
+        async with db_engine.connect() as conn:
+            kept = (await conn.execute(select(attendance.c.id).order_by(attendance.c.id))).scalars().all()
+            moved = (await conn.execute(text("SELECT id FROM attendance_duplicates ORDER BY id"))).scalars().all()
+            version = (await conn.execute(select(func.max(migrations.schema_version_table.c.version)))).scalar()
+        try:
+            async with db_engine.begin() as conn:
+                await conn.execute(insert(attendance), [
+                    {"employee_id": 1, "check_type": "IN", "source": "APP", "check_time": datetime(2025, 9, 2, 11, 0)},
+                ])
+            duplicate_rejected = False
+        except IntegrityError:
+            duplicate_rejected = True
+        return [migration.version for migration in applied], kept, moved, duplicate_rejected, version
+
+    applied, kept, moved, duplicate_rejected, version = _run(tmp_path, scenario)
+    assert applied == [3]
+    # Kunning eng birinchi belgisi (vaqt, so'ng id bo'yicha) qoladi
+    assert kept == [2, 4, 5]
+    assert moved == [1, 3]
+    assert duplicate_rejected
+    assert version == 3
+
+
+def test_unique_day_migration_on_clean_database(tmp_path):
+    async def scenario(db_engine):
+        await migrations.migrate(db_engine)
+        async with db_engine.connect() as conn:
+            return await conn.run_sync(lambda sync_conn: set(inspect(sync_conn).get_table_names()))
+
+    tables = _run(tmp_path, scenario)
+    # Takrorlar bo'lmasa qo'shimcha jadval yaratilmaydi
+    assert "attendance_duplicates" not in tables
+    assert {"attendance", "attendance_archive", "report_jobs", "schema_version"} <= tables
+
+
+def _versions_package(tmp_path, monkeypatch, name, files):
+    package = tmp_path / name
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    for filename, source in files.items():
+        (package / filename).write_text(source)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(migrations, "VERSIONS_PACKAGE", name)
+
+
+def test_discover_orders_by_version_and_skips_helpers(tmp_path, monkeypatch):
+    _versions_package(tmp_path, monkeypatch, "ordered_versions", {
+        "v0010_later.py": '"""Keyingi"""\ndef upgrade(conn):\n    pass\n',
+        "v0002_earlier.py": '"""Oldingi\n\nBatafsil"""\ndef upgrade(conn):\n    pass\n',
+        "helpers.py": "",
+        "vnext_draft.py": "",
+    })
+
+    found = migrations.discover()
+    assert [(migration.version, migration.name) for migration in found] == [(2, "earlier"), (10, "later")]
+    assert found[0].description == "Oldingi"
+    assert migrations.latest_version() == 10
+
+
+def test_discover_rejects_duplicate_versions(tmp_path, monkeypatch):
+    _versions_package(tmp_path, monkeypatch, "duplicate_versions", {
+        "v0001_one.py": "def upgrade(conn):\n    pass\n",
+        "v001_other.py": "def upgrade(conn):\n    pass\n",
+    })
+
+    with pytest.raises(RuntimeError):
+        migrations.discover()
+
+
+def test_shipped_migrations_are_contiguous_and_applied_once(tmp_path):
+    versions = [migration.version for migration in migrations.discover()]
+    assert versions == list(range(1, len(versions) + 1))
+
+    async def scenario(db_engine):
+        first = await migrations.migrate(db_engine)
+        second = await migrations.migrate(db_engine)
+        return [migration.version for migration in first], second, await migrations.get_schema_version(db_engine)
+
+    first, second, version = _run(tmp_path, scenario)
+    assert first == versions
+    assert second == []
+    assert version == versions[-1]
@@ -0,0 +1,9 @@
+from app.main import app
+
+
+def test_detailed_report_json_and_excel_routes_are_distinct():
+    paths = app.openapi()["paths"]
+    excel = paths["/attendance/report/detailed/{year}/{month}"]["get"]["operationId"]
+    json_report = paths["/attendance/report/detailed/{year}/{month}/json"]["get"]["operationId"]
+    assert excel.startswith("download_detailed_monthly_report")
+    assert json_report.startswith("get_detailed_monthly_report")
@@ -0,0 +1,61 @@
+import asyncio
+from datetime import date, datetime
+
+from sqlalchemy import func, select
+
+from app.models.attendance import Attendance, CheckTypeEnum
+from app.models.attendance_archive import AttendanceArchive
+from app.models.employee import Employee
+from app.services.attendance_archive import archive_closed_months
+from app.utils.file_lock import file_lock
+
+TODAY = date(2025, 10, 15)
+
+
+async def _seed(session_factory):
+    async with session_factory() as db:
+        db.add(Employee(id=1, full_name="A", position="dev", uuid="a", created_at=datetime(2025, 1, 1)))
+        db.add_all([
+            Attendance(employee_id=1, check_type=CheckTypeEnum.IN, check_time=datetime(2025, 7, day, 9, 0), is_late=False)
+            for day in (1, 2, 3)
+        ])
+        await db.commit()
+
+
+async def _counts(db):
+    live = (await db.execute(select(func.count(Attendance.id)))).scalar()
+    archived = (await db.execute(select(func.count(AttendanceArchive.id)))).scalar()
+    return live, archived
+
+
+def test_archive_skips_while_another_process_holds_lock(run_db):
+    async def scenario(session_factory):
+        await _seed(session_factory)
+        async with session_factory() as db:
+            database = db.bind.url.database
+            async with file_lock(f"{database}.archive.lock"):
+                stats = await archive_closed_months(db, keep_months=1, today=TODAY)
+            return stats, await _counts(db)
+
+    stats, counts = run_db(scenario)
+    assert stats["skipped"] is True
+    assert stats["rows"] == 0
+    assert counts == (3, 0)
+
+
+def test_concurrent_archive_moves_rows_once(run_db):
+    async def scenario(session_factory):
+        await _seed(session_factory)
+
+        async def archive():
+            async with session_factory() as db:
+                return await archive_closed_months(db, keep_months=1, today=TODAY, wait=True)
+
+        results = await asyncio.gather(archive(), archive())
+        async with session_factory() as db:
+            return results, await _counts(db)
+
+    results, counts = run_db(scenario)
+    assert sorted(stats["rows"] for stats in results) == [0, 3]
+    assert not any(stats["skipped"] for stats in results)
+    assert counts == (0, 3)
@@ -0,0 +1,152 @@
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.invalidation import ATTENDANCE, InvalidationBus
+from app.models.attendance import Attendance, CheckTypeEnum, SourceEnum
+from app.models.attendance_rollup import AttendanceRollup
+from app.models.employee import Employee
+from app.services import attendance_queue as queue_module
+from app.services.attendance_queue import AttendanceIngestQueue, DuplicateAttendanceError
+
+
+def _row(employee_id: int, check_time: datetime, check_type=CheckTypeEnum.IN) -> dict:
+    return {
+        "employee_id": employee_id, "check_type": check_type, "source": SourceEnum.APP,
+        "check_time": check_time, "location_lat": None, "location_lon": None, "is_late": False,
+    }
+
+
+async def _add_employees(session_factory, *ids):
+    async with session_factory() as db:
+        db.add_all([
+            Employee(id=employee_id, full_name=f"E{employee_id}", uuid=f"u{employee_id}", created_at=datetime(2025, 1, 1))
+            for employee_id in ids
+        ])
+        await db.commit()
+
+
+async def _count(session_factory) -> int:
+    async with session_factory() as db:
+        return (await db.execute(select(func.count(Attendance.id)))).scalar()
+
+
+def test_invalidation_is_published_after_the_row_is_committed(run_db, monkeypatch):
+    bus = InvalidationBus(None)
+    monkeypatch.setattr(queue_module, "invalidation_bus", bus)
+    events = []
+
+    async def scenario(session_factory):
+        await _add_employees(session_factory, 1)
+        queue = AttendanceIngestQueue(session_factory, flush_interval_ms=10)
+        bus.subscribe(ATTENDANCE, lambda event: events.append((event, queue.stats["flushed"])))
+        await queue.start()
+        assert await queue.submit(_row(1, datetime(2025, 9, 1, 9, 0)), wait=False) is None
+        assert events == []  # Navbatga qo'yildi, lekin hali saqlanmagan
+        await queue.stop()
+        return await _count(session_factory)
+
+    assert run_db(scenario) == 1
+    (event, flushed), = events
+    assert flushed == 1
+    assert event.ids == (1,)
+    assert event.day == datetime(2025, 9, 1).date()
+
+
+def test_failed_rows_are_retried_and_unwaited_ones_dead_lettered(run_db, tmp_path):
+    dead_letter = tmp_path / "dead_letter" / "attendance.ndjson"
+
+    async def scenario(session_factory):
+        await _add_employees(session_factory, 1, 2, 3)
+        queue = AttendanceIngestQueue(session_factory, flush_interval_ms=10, retries=2, retry_delay=0,
+                                      dead_letter_path=str(dead_letter))
+        write = queue._write
+
+        async def flaky_write(rows):
+            # 2-xodim yozuvi doim xato beradi - qolganlari alohida saqlanishi kerak
+            if any(row["employee_id"] == 2 for row in rows):
+                raise RuntimeError("disk I/O error")
+            return await write(rows)
+
+        queue._write = flaky_write
+        await queue.start()
+        for employee_id in (1, 2, 3):
+            await queue.submit(_row(employee_id, datetime(2025, 9, 1, 9, employee_id)), wait=False)
+        await queue.stop()
+        return queue.stats, await _count(session_factory)
+
+    stats, saved = run_db(scenario)
+    assert saved == 2
+    assert stats["flushed"] == 2
+    assert stats["dead_lettered"] == 1
+    assert stats["retries"] >= 2
+    (line,) = dead_letter.read_text(encoding="utf-8").splitlines()
+    record = json.loads(line)
+    assert record["row"]["employee_id"] == 2
+    assert record["row"]["check_type"] == "IN"
+    assert record["row"]["check_time"] == "2025-09-01T09:02:00"
+    assert record["error"] == "disk I/O error"
+
+
+def test_waiting_caller_gets_the_error_and_can_retry(run_db):
+    async def scenario(session_factory):
+        queue = AttendanceIngestQueue(session_factory, flush_interval_ms=10, retries=1, retry_delay=0)
+
+        async def broken_write(rows):
+            raise RuntimeError("database is locked")
+
+        queue._write = broken_write
+        await queue.start()
+        day = datetime(2025, 9, 1).date()
+        async with session_factory() as db:
+            assert await queue.reserve(db, 1, "IN", day)
+            try:
+                await queue.submit(_row(1, datetime(2025, 9, 1, 9, 0)), wait=True)
+            except RuntimeError as e:
+                error = str(e)
+            # Belgi bo'shatilgan - xodim qayta skanerlashi mumkin
+            reserved_again = await queue.reserve(db, 1, "IN", day)
+        await queue.stop()
+        return error, reserved_again, queue.stats
+
+    error, reserved_again, stats = run_db(scenario)
+    assert error == "database is locked"
+    assert reserved_again
+    assert stats["failed"] == 1
+    assert stats["dead_lettered"] == 0
+
+
+def test_second_worker_gets_duplicate_error_from_the_unique_index(run_db):
+    async def scenario(session_factory):
+        await _add_employees(session_factory, 1)
+        # Ikki worker - har birining "bugun kim belgilagan" keshi alohida
+        first = AttendanceIngestQueue(session_factory, flush_interval_ms=10)
+        second = AttendanceIngestQueue(session_factory, flush_interval_ms=10)
+        await first.start()
+        await second.start()
+        day = datetime(2025, 9, 1).date()
+        async with session_factory() as db:
+            assert await first.reserve(db, 1, "IN", day)
+            assert await second.reserve(db, 1, "IN", day)
+        attendance_id = await first.submit(_row(1, datetime(2025, 9, 1, 9, 0)))
+        with pytest.raises(DuplicateAttendanceError):
+            await second.submit(_row(1, datetime(2025, 9, 1, 9, 1)))
+        # Javobi qaytgan (kutilmagan) takror - jimgina o'tkazib yuboriladi
+        await second.submit(_row(1, datetime(2025, 9, 1, 9, 2)), wait=False)
+        await first.stop()
+        await second.stop()
+        async with session_factory() as db:
+            check_ins = (await db.execute(
+                select(AttendanceRollup.check_ins).where(AttendanceRollup.granularity == "day")
+            )).scalar()
+        return attendance_id, second.stats, await _count(session_factory), check_ins
+
+    attendance_id, stats, saved, check_ins = run_db(scenario)
+    assert attendance_id is not None
+    assert saved == 1
+    assert check_ins == 1  # Rollup faqat yozilgan qator bo'yicha oshgan
+    assert stats["duplicates"] == 2
+    assert stats["flushed"] == 0
+    assert stats["failed"] == 0
@@ -0,0 +1,35 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+
+from app.services.payroll import WORKING_DAYS_PER_MONTH, _cents, compute_payroll, payroll_salary_info
+
+
+def _reference(value: float) -> int:
+    return int(Decimal(repr(float(value))).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP) * 100)
+
+
+def test_cents_rounds_half_up_like_decimal():
+    values = [1.005, 2.675, 0.125, 1234567.895, 0.0, 99.994999, 1e6 / 26]
+    assert _cents(np.array(values)).tolist() == [_reference(value) for value in values]
+
+
+def test_totals_equal_rounded_parts():
+    payroll = compute_payroll(
+        base_salary=[3_333_333.33, 0, 1_000_000],
+        absent_days=[3, 5, 0],
+        late_days=[7, 1, 0],
+        worked_hours=[100.123, 0, 170],
+        expected_hours=[170, 170, 170],
+    )
+    salaried, unsalaried, full = payroll_salary_info(payroll)
+
+    parts = sum(Decimal(str(item["amount"])) for item in salaried["deduction_breakdown"].values())
+    assert Decimal(str(salaried["total_deductions"])) == parts
+    assert Decimal(str(salaried["final_salary"])) == Decimal(str(salaried["base_salary"])) - parts
+    assert salaried["deduction_breakdown"]["absent_days"]["amount"] == round(3 * 3_333_333.33 / WORKING_DAYS_PER_MONTH, 2)
+    assert salaried["worked_hours"] == 100.12
+
+    assert unsalaried == {"base_salary": 0, "final_salary": 0, "total_deductions": 0, "deduction_breakdown": {}}
+    assert full["final_salary"] == 1_000_000
+    assert full["deduction_breakdown"] == {}
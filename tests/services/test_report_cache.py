@@ -0,0 +1,48 @@
+import asyncio
+from datetime import date, datetime
+
+from app.models.attendance import Attendance, CheckTypeEnum
+from app.models.employee import Employee
+from app.services.report_cache import CachedReport, ReportCache
+
+
+def test_lookup_is_stable_across_processes_and_follows_data(run_db, tmp_path):
+    async def scenario(session_factory):
+        async with session_factory() as db:
+            db.add(Employee(id=1, full_name="A", position="dev", uuid="a", created_at=datetime(2025, 1, 1)))
+            db.add(Attendance(employee_id=1, check_type=CheckTypeEnum.IN, check_time=datetime(2025, 9, 1, 9, 0)))
+            await db.commit()
+
+            # Ikki jarayon (masalan API ishchisi va bot) bir xil ma'lumot uchun bir xil kalit hisoblaydi
+            first = await ReportCache(str(tmp_path), 10**6).lookup(db, "monthly", date(2025, 9, 1), date(2025, 9, 30))
+            second = await ReportCache(str(tmp_path), 10**6).lookup(db, "monthly", date(2025, 9, 1), date(2025, 9, 30))
+
+            db.add(Attendance(employee_id=1, check_type=CheckTypeEnum.OUT, check_time=datetime(2025, 9, 1, 18, 0)))
+            await db.commit()
+            changed = await ReportCache(str(tmp_path), 10**6).lookup(db, "monthly", date(2025, 9, 1), date(2025, 9, 30))
+            return first, second, changed
+
+    first, second, changed = run_db(scenario)
+    assert (first.etag, first.path) == (second.etag, second.path)
+    assert changed.etag != first.etag
+
+
+def test_ensure_generates_once_for_concurrent_callers(tmp_path):
+    cache = ReportCache(str(tmp_path / "cache"), 10**6)
+    entry = CachedReport("monthly", "2025-09", "etag", str(tmp_path / "cache" / "monthly_2025-09_etag.xlsx"))
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        path = tmp_path / f"generated_{len(calls)}.xlsx"
+        path.write_bytes(b"xlsx")
+        return str(path)
+
+    async def main():
+        return await asyncio.gather(*[cache.ensure(entry, generate) for _ in range(5)])
+
+    assert set(asyncio.run(main())) == {entry.path}
+    assert len(calls) == 1
+    assert not cache._locks  # Kutuvchisi qolmagan lock'lar o'chadi
+
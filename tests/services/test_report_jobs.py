@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+from app.models.report_job import ReportJobRecord
+from app.services import report_jobs as jobs_module
+from app.services import reports
+from app.services.report_cache import ReportCache
+from app.services.report_jobs import JOB_DONE, JOB_FAILED, JOB_RUNNING, ReportJobManager
+
+
+def test_job_state_is_visible_from_another_worker(run_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs_module, "report_cache", ReportCache(str(tmp_path / "cache"), 10**6))
+    monkeypatch.setattr(jobs_module, "SAVE_INTERVAL", 0.01)
+    release = asyncio.Event()
+    seen = []
+
+    async def fake_generate(db, report_type, params, progress=None):
+        progress(40, "Qatorlar tayyorlanmoqda: 200/500")
+        await release.wait()
+        path = tmp_path / "report.xlsx"
+        path.write_bytes(b"xlsx")
+        return str(path)
+
+    monkeypatch.setattr(jobs_module, "generate_report", fake_generate)
+
+    async def scenario(session_factory):
+        # Ikki uvicorn worker - vazifa birinchisida, holat so'rovlari ikkinchisiga tushadi
+        owner = ReportJobManager(session_factory)
+        other = ReportJobManager(session_factory)
+        job = await owner.submit("monthly", {"year": 2025, "month": 9})
+        for _ in range(100):
+            polled = await other.get(job.id)
+            if polled.progress == 40:
+                break
+            await asyncio.sleep(0.01)
+        seen.append((polled.status, polled.progress, polled.stage))
+        release.set()
+        await owner.wait(job, timeout=5)
+        finished = await other.get(job.id)
+        missing = await other.get("0" * 32)
+        await owner.stop()
+        return finished, missing
+
+    finished, missing = run_db(scenario)
+    assert seen == [(JOB_RUNNING, 40, "Qatorlar tayyorlanmoqda: 200/500")]
+    assert finished.status == JOB_DONE
+    assert finished.progress == 100
+    assert finished.params == {"year": 2025, "month": 9}
+    assert finished.file_path.startswith(str(tmp_path / "cache"))
+    assert missing is None
+
+
+def test_job_of_a_dead_worker_is_reported_as_failed(run_db):
+    async def scenario(session_factory):
+        async with session_factory() as session:
+            session.add(ReportJobRecord(
+                id="a" * 32, report_type="daily", params='{"date": "2025-09-01"}', status=JOB_RUNNING,
+                progress=30, stage="Excel yozilmoqda", created_at=time.time() - 600,
+                updated_at=time.time() - jobs_module.STALE_AFTER - 1,
+            ))
+            await session.commit()
+        return await ReportJobManager(session_factory).get("a" * 32)
+
+    job = run_db(scenario)
+    assert job.status == JOB_FAILED
+    assert job.params["date"].isoformat() == "2025-09-01"
+    assert job.done.is_set()
+
+
+def test_excel_writer_reports_progress_per_row_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(reports, "PROGRESS_BATCH_ROWS", 2)
+    sheet = reports.ReportSheet("Test", ["A", "B"])
+    for index in range(5):
+        sheet.add_row([index, f"row {index}"])
+    calls = []
+
+    reports._write_report_sheet(sheet, str(tmp_path / "out.xlsx"), lambda percent, stage: calls.append((percent, stage)))
+
+    assert [stage for _, stage in calls] == [
+        "Excel yozilmoqda: 2/5", "Excel yozilmoqda: 4/5", "Excel yozilmoqda: 5/5", "Fayl saqlanmoqda",
+    ]
+    percents = [percent for percent, _ in calls]
+    assert percents == sorted(percents)
+    assert reports.PROGRESS_WRITE < percents[0] and percents[-1] == reports.PROGRESS_SAVED
+    assert (tmp_path / "out.xlsx").exists()
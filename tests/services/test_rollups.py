@@ -0,0 +1,56 @@
+from datetime import date, datetime
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.models.attendance import Attendance, CheckTypeEnum
+from app.models.employee import Employee
+from app.services.attendance_storage import attendance_entity
+from app.services.rollups import _daily_aggregates_statement, query_rollups, rebuild_rollups
+
+
+def _compiled(dialect, boundary=None) -> str:
+    start, end = date(2025, 9, 1), date(2025, 9, 30)
+    statement = _daily_aggregates_statement(
+        attendance_entity(boundary, start, end), attendance_entity(boundary, start, end, name="first_in"), start, end
+    )
+    return str(statement.compile(dialect=dialect))
+
+
+def test_daily_aggregates_sql_has_no_boolean_max():
+    # PostgreSQL'da max(boolean) yo'q - kechikish CASE orqali 0/1 ga aylantiriladi
+    for dialect in (postgresql.dialect(), sqlite.dialect()):
+        for boundary in (None, date(2025, 10, 1)):
+            sql = _compiled(dialect, boundary)
+            assert "max(CASE WHEN" in sql
+            assert "max(first_in.is_late)" not in sql
+
+
+def test_rebuild_rollups_counts_first_check_in_lateness(run_db):
+    async def scenario(session_factory):
+        async with session_factory() as db:
+            db.add_all([
+                Employee(id=1, full_name="A", position="dev", uuid="a", created_at=datetime(2025, 1, 1)),
+                Employee(id=2, full_name="B", position="dev", uuid="b", created_at=datetime(2025, 1, 1)),
+            ])
+            db.add_all([
+                # 1-xodim: birinchi kuni kech, ikkinchi kuni vaqtida
+                Attendance(employee_id=1, check_type=CheckTypeEnum.IN, check_time=datetime(2025, 9, 1, 9, 45), is_late=True),
+                Attendance(employee_id=1, check_type=CheckTypeEnum.OUT, check_time=datetime(2025, 9, 1, 18, 0), is_late=False),
+                Attendance(employee_id=1, check_type=CheckTypeEnum.IN, check_time=datetime(2025, 9, 2, 8, 55), is_late=False),
+                # 2-xodim: vaqtida
+                Attendance(employee_id=2, check_type=CheckTypeEnum.IN, check_time=datetime(2025, 9, 1, 9, 0), is_late=False),
+                Attendance(employee_id=2, check_type=CheckTypeEnum.IN, check_time=datetime(2025, 9, 2, 9, 50), is_late=True),
+            ])
+            await db.commit()
+
+            stats = await rebuild_rollups(db)
+            assert stats["rows"] > 0
+            return await query_rollups(db, date(2025, 9, 1), date(2025, 9, 30), group_by="employee")
+
+    summary = run_db(scenario)
+    rows = {row["employee"]: row for row in summary["rows"]}
+    assert rows[1]["present_days"] == 2
+    assert rows[1]["late_days"] == 1
+    assert rows[1]["check_ins"] == 2
+    assert rows[2]["present_days"] == 2
+    assert rows[2]["late_days"] == 1
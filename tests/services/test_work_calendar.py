@@ -0,0 +1,46 @@
+from datetime import date
+
+import pytest
+
+from app.services.work_calendar import WorkCalendar
+
+
+def _brute_force(calendar: WorkCalendar, start: date, end: date) -> int:
+    return sum(1 for day in range(start.toordinal(), end.toordinal() + 1)
+               if calendar.is_working_day(date.fromordinal(day)))
+
+
+def test_yearly_and_fixed_holidays_are_excluded():
+    calendar = WorkCalendar("1111100", ["01-01", "03-08", "2025-03-21"])
+    assert not calendar.is_working_day(date(2025, 1, 1))
+    assert not calendar.is_working_day(date(2026, 1, 1))  # har yili takrorlanadi
+    assert not calendar.is_working_day(date(2025, 3, 21))
+    assert calendar.is_working_day(date(2026, 3, 20))  # aniq sana faqat o'z yilida
+    assert not calendar.is_working_day(date(2025, 3, 22))  # shanba
+    # Mart 2025: 21 ish kuni (dushanba-juma), 8-mart shanba, 21-mart juma
+    assert calendar.month_working_days(2025, 3) == 20
+
+
+def test_leap_day_holiday_is_skipped_in_other_years():
+    calendar = WorkCalendar("1111111", ["02-29"])
+    assert calendar.month_working_days(2024, 2) == 28
+    assert calendar.month_working_days(2025, 2) == 28
+
+
+def test_count_working_days_matches_day_by_day_count():
+    calendar = WorkCalendar("1111110", ["01-01", "2025-12-31"])
+    ranges = [
+        (date(2025, 12, 29), date(2026, 1, 5)),  # yil chegarasi
+        (date(2025, 3, 3), date(2025, 3, 3)),  # bitta kun
+        (date(2025, 3, 9), date(2025, 3, 9)),  # bitta yakshanba
+        (date(2024, 1, 1), date(2025, 12, 31)),
+    ]
+    for start, end in ranges:
+        assert calendar.count_working_days(start, end) == _brute_force(calendar, start, end)
+        assert len(calendar.working_dates(start, end)) == calendar.count_working_days(start, end)
+    assert calendar.count_working_days(date(2025, 3, 10), date(2025, 3, 1)) == 0
+
+
+def test_invalid_holiday_is_rejected():
+    with pytest.raises(ValueError):
+        WorkCalendar("1111110", ["2025"])
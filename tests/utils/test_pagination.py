@@ -0,0 +1,21 @@
+from datetime import datetime
+
+import pytest
+
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    for check_time, row_id in [
+        (datetime(2025, 9, 1, 9, 0), 1),
+        (datetime(2025, 9, 1, 9, 0, 0, 123456), 987654321),
+    ]:
+        cursor = encode_cursor(check_time, row_id)
+        assert "=" not in cursor  # URL uchun to'ldirish belgilarisiz
+        assert decode_cursor(cursor) == (check_time, row_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "bm9waXBl", encode_cursor(datetime(2025, 9, 1), 1)[:-4]])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)